@@ -0,0 +1,215 @@
+"""
+Serializer fields backed by queryset annotations and prefetches
+
+A ``SerializerMethodField`` that counts, sums or lists a related set runs
+its own queries for every object of a list. These fields declare the work
+instead::
+
+    class StudentSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
+        enrollments_count = AnnotatedField(
+            'enrollments', Count('pk'), filter=Q(is_active=True), default=0)
+
+        class Meta:
+            model = Student
+            list_serializer_class = AnnotatedListSerializer
+
+Views that mix in ``AnnotatedQuerysetMixin`` add every ``AnnotatedField``
+to their queryset as a correlated subquery and every ``PrefetchedField`` as
+a ``Prefetch(to_attr=...)``, so a page costs the same number of queries
+whatever its size. Objects that were not loaded that way (a freshly saved
+row, a list handed to the serializer by a plain ``APIView``) are filled in
+on first use with one grouped query per field for the whole list.
+
+The values live on the instance as ``annotated_<field name>``.
+"""
+from django.db.models import OuterRef, Prefetch, Q, Subquery, prefetch_related_objects
+from django.db.models.manager import BaseManager
+from django.db.models.query import QuerySet
+from rest_framework import serializers
+
+
+def annotation_name(field_name):
+    """Instance attribute holding the precomputed value of ``field_name``"""
+    return f'annotated_{field_name}'
+
+
+def related_lookup(model, relation):
+    """``(related model, lookup from it back to model)`` for a reverse FK or a M2M"""
+    field = model._meta.get_field(relation)
+    if field.auto_created and not field.concrete:
+        return field.related_model, field.field.name
+    return field.related_model, field.related_query_name()
+
+
+# ==================== FIELDS ====================
+
+class AnnotatedField(serializers.ReadOnlyField):
+    """
+    Aggregate over a related set, e.g.
+    ``AnnotatedField('grades', Avg('score'), default=0, decimal_places=2)``.
+    ``filter`` is a ``Q`` on the related model; ``default`` replaces the
+    ``None`` of an empty set.
+    """
+
+    def __init__(self, relation, aggregate, filter=None, default=None,
+                 coerce=None, decimal_places=None, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+        self.relation = relation
+        self.aggregate = aggregate
+        self.condition = filter if filter is not None else Q()
+        self.empty_value = default
+        self.coerce = coerce
+        self.decimal_places = decimal_places
+
+    def related_rows(self, model):
+        related, lookup = related_lookup(model, self.relation)
+        return related._default_manager.filter(self.condition).order_by(), lookup
+
+    def subquery(self, model):
+        """Correlated subquery computing the aggregate for ``OuterRef('pk')``"""
+        rows, lookup = self.related_rows(model)
+        rows = rows.filter(**{lookup: OuterRef('pk')}).values(lookup)
+        return Subquery(rows.annotate(value=self.aggregate).values('value'))
+
+    def compute(self, model, pks):
+        """``{pk: value}`` for the objects with primary keys ``pks``"""
+        rows, lookup = self.related_rows(model)
+        rows = rows.filter(**{f'{lookup}__in': pks}).values(lookup).annotate(value=self.aggregate)
+        return {row[lookup]: row['value'] for row in rows}
+
+    def clean(self, value):
+        if value is None:
+            return self.empty_value
+        if self.coerce is not None:
+            value = self.coerce(value)
+        if self.decimal_places is not None:
+            value = round(value, self.decimal_places)
+        return value
+
+    def to_representation(self, instance):
+        return self.clean(getattr(instance, annotation_name(self.field_name)))
+
+
+class PrefetchedField(serializers.Field):
+    """
+    Related rows loaded with ``Prefetch(relation, queryset, to_attr=...)``
+    and rendered with the ``child`` serializer; ``first=True`` renders only
+    the first row, or ``None``.
+    """
+
+    def __init__(self, relation, child, queryset=None, first=False, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.relation = relation
+        self.child = child
+        self.queryset = queryset
+        self.first = first
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        self.child.bind(field_name='', parent=self)
+
+    def prefetch(self, field_name):
+        return Prefetch(self.relation, queryset=self.queryset, to_attr=annotation_name(field_name))
+
+    def to_representation(self, instance):
+        rows = getattr(instance, annotation_name(self.field_name))
+        if self.first:
+            return self.child.to_representation(rows[0]) if rows else None
+        return [self.child.to_representation(row) for row in rows]
+
+
+# ==================== SERIALIZERS ====================
+
+class AnnotatedSerializerMixin:
+    """Model serializer mixin for ``AnnotatedField`` and ``PrefetchedField``"""
+
+    @classmethod
+    def annotated_fields(cls):
+        return {
+            name: field for name, field in cls._declared_fields.items()
+            if isinstance(field, (AnnotatedField, PrefetchedField))
+        }
+
+    @classmethod
+    def annotate_queryset(cls, queryset):
+        """``queryset`` with every annotated field computed in the same query"""
+        prefetched = {
+            lookup.to_attr for lookup in queryset._prefetch_related_lookups
+            if isinstance(lookup, Prefetch)
+        }
+        for name, field in cls.annotated_fields().items():
+            attribute = annotation_name(name)
+            if isinstance(field, AnnotatedField):
+                if attribute not in queryset.query.annotations:
+                    queryset = queryset.annotate(**{attribute: field.subquery(queryset.model)})
+            elif attribute not in prefetched:
+                queryset = queryset.prefetch_related(field.prefetch(name))
+        return queryset
+
+    @classmethod
+    def fill_instances(cls, instances):
+        """
+        Compute the annotated fields ``instances`` were not loaded with,
+        including those of nested single-object serializers
+        """
+        instances = [instance for instance in instances if instance is not None]
+        for name, field in cls._declared_fields.items():
+            if isinstance(field, AnnotatedSerializerMixin) and field.source != '*':
+                related = instances
+                for attribute in (field.source or name).split('.'):
+                    related = [getattr(instance, attribute, None) for instance in related if instance is not None]
+                field.fill_instances(related)
+        for name, field in cls.annotated_fields().items():
+            attribute = annotation_name(name)
+            missing = [instance for instance in instances if not hasattr(instance, attribute)]
+            if not missing:
+                continue
+            if isinstance(field, PrefetchedField):
+                prefetch_related_objects(
+                    [instance for instance in missing if instance.pk is not None],
+                    field.prefetch(name))
+                for instance in missing:
+                    if instance.pk is None:
+                        setattr(instance, attribute, [])
+                continue
+            pks = [instance.pk for instance in missing if instance.pk is not None]
+            values = field.compute(type(missing[0]), pks) if pks else {}
+            for instance in missing:
+                setattr(instance, attribute, values.get(instance.pk))
+
+    def annotated(self, instance, field_name):
+        """Cleaned value of the ``AnnotatedField`` called ``field_name``"""
+        return self.fields[field_name].clean(getattr(instance, annotation_name(field_name)))
+
+    def to_representation(self, instance):
+        self.fill_instances([instance])
+        return super().to_representation(instance)
+
+
+class AnnotatedListSerializer(serializers.ListSerializer):
+    """``many=True`` counterpart filling a whole list in one query per field"""
+
+    def to_representation(self, data):
+        if isinstance(data, BaseManager):
+            data = data.all()
+        if isinstance(data, QuerySet) and data._result_cache is None:
+            data = self.child.annotate_queryset(data)
+        data = list(data)
+        self.child.fill_instances(data)
+        return super().to_representation(data)
+
+
+# ==================== VIEWS ====================
+
+class AnnotatedQuerysetMixin:
+    """Generic view mixin annotating the queryset for the view's serializer"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'annotate_queryset'):
+            queryset = serializer_class.annotate_queryset(queryset)
+        return queryset
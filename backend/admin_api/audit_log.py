@@ -0,0 +1,270 @@
+"""
+Buffered audit log writer
+
+``AuditLogMiddleware`` turns each audited API request into a plain dict and
+hands it to ``record``, which only appends it to an in-process buffer; the
+request never waits on the database. A daemon thread per worker process
+flushes the buffer with one ``bulk_create`` once it holds
+``AUDIT_LOG_BATCH_SIZE`` entries or ``AUDIT_LOG_FLUSH_SECONDS`` after the
+first one arrived, and once more when the process exits.
+
+With ``AUDIT_LOG_BACKEND = 'redis'`` the thread pushes each batch onto the
+``AUDIT_LOG_REDIS_KEY`` list instead, and ``manage.py flush_audit_log``
+(run as a worker) moves it into the table. That keeps the web workers off
+the audit table entirely and keeps entries a crashed worker had already
+handed over.
+
+Reads are the bulk of the traffic and the least interesting part of a
+trail: ``should_record`` logs a ``AUDIT_LOG_GET_SAMPLE_RATE`` fraction of
+GETs, except those whose path contains an ``AUDIT_LOG_GET_ALWAYS`` part
+(exports), which are always logged. Old rows are moved out with ``manage.py archive_audit_logs``.
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+ACTION_MAP = {
+    'POST': 'create',
+    'PUT': 'update',
+    'PATCH': 'update',
+    'DELETE': 'delete',
+    'GET': 'view',
+}
+AUDITED_STATUSES = (200, 201, 204)
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ==================== POLICY ====================
+
+def is_export(path):
+    return any(part in path for part in setting('AUDIT_LOG_GET_ALWAYS', ()))
+
+
+def should_record(request, response):
+    """Whether ``request`` belongs in the audit trail"""
+    if not request.path.startswith('/api/'):
+        return False
+    if any(request.path.startswith(path) for path in setting('AUDIT_LOG_SKIP_PATHS', ())):
+        return False
+    if response.status_code not in AUDITED_STATUSES:
+        return False
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return False
+    if request.method not in ACTION_MAP:
+        return False
+    if request.method == 'GET':
+        if is_export(request.path):
+            return True
+        rate = setting('AUDIT_LOG_GET_SAMPLE_RATE', 0.0)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+    return True
+
+
+def entry_for(request):
+    """The audit row of ``request`` as a plain dict, cheap to queue"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        ip_address = forwarded.split(',')[0].strip()
+    else:
+        ip_address = request.META.get('REMOTE_ADDR')
+
+    path_parts = request.path.strip('/').split('/')
+    action = ACTION_MAP.get(request.method, 'view')
+    if action == 'view' and is_export(request.path):
+        action = 'export'
+    return {
+        # The primary key only: request.user may be a cache-backed proxy
+        # whose row we do not want to load here
+        'user_id': request.user.pk,
+        'action': action,
+        'timestamp': timezone.now().isoformat(),
+        'ip_address': ip_address or None,
+        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+        'model_name': path_parts[2] if len(path_parts) > 2 else '',
+        'description': f"{request.method} {request.path}"[:1000],
+    }
+
+
+# ==================== WRITING ====================
+
+def write_entries(entries):
+    """``bulk_create`` the queued ``entries``; returns the number written"""
+    from .models_audit import AuditLog
+
+    rows = []
+    for entry in entries:
+        values = dict(entry)
+        if isinstance(values.get('timestamp'), str):
+            values['timestamp'] = parse_datetime(values['timestamp'])
+        rows.append(AuditLog(**values))
+    AuditLog.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def push_entries(entries):
+    """Append ``entries`` to the Redis list drained by ``flush_audit_log``"""
+    from django_redis import get_redis_connection
+
+    redis = get_redis_connection('default')
+    redis.rpush(setting('AUDIT_LOG_REDIS_KEY', 'audit_log:queue'),
+                *[json.dumps(entry) for entry in entries])
+    return len(entries)
+
+
+def drain_redis(batch_size=None):
+    """Move one batch from the Redis list into the table; returns its size"""
+    from django_redis import get_redis_connection
+
+    batch_size = batch_size or setting('AUDIT_LOG_BATCH_SIZE', 200)
+    key = setting('AUDIT_LOG_REDIS_KEY', 'audit_log:queue')
+    redis = get_redis_connection('default')
+    with redis.pipeline() as pipe:
+        pipe.lrange(key, 0, batch_size - 1)
+        pipe.ltrim(key, batch_size, -1)
+        raw, _ = pipe.execute()
+    if not raw:
+        return 0
+    entries = [json.loads(item) for item in raw]
+    try:
+        return write_entries(entries)
+    except Exception:
+        # Put the batch back in front for the next attempt
+        redis.lpush(key, *reversed(raw))
+        raise
+
+
+class AuditLogBuffer:
+    """Per-process queue of audit entries flushed by a daemon thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.entries = deque()
+        self.thread = None
+        self.pid = None
+        self.first_queued_at = None
+        self.dropped = 0
+
+    def add(self, entry):
+        self._ensure_thread()
+        with self.lock:
+            if len(self.entries) >= setting('AUDIT_LOG_MAX_BUFFER', 10000):
+                # The writer is failing or far behind; keep memory bounded
+                self.dropped += 1
+                return
+            if not self.entries:
+                self.first_queued_at = time.monotonic()
+            self.entries.append(entry)
+            full = len(self.entries) >= setting('AUDIT_LOG_BATCH_SIZE', 200)
+        if full:
+            self.wake.set()
+
+    def take(self):
+        with self.lock:
+            batch = list(self.entries)
+            self.entries.clear()
+            self.first_queued_at = None
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            logger.error('Audit log buffer full; dropped %s entries', dropped)
+        return batch
+
+    def flush(self):
+        """Write everything queued so far; returns the number written"""
+        batch = self.take()
+        if not batch:
+            return 0
+        try:
+            if setting('AUDIT_LOG_BACKEND', 'memory') == 'redis':
+                return push_entries(batch)
+            return write_entries(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} audit log entries: {e}")
+            with self.lock:
+                # Retry with the next flush unless that would overflow the buffer
+                room = setting('AUDIT_LOG_MAX_BUFFER', 10000) - len(self.entries)
+                self.entries.extendleft(reversed(batch[:max(room, 0)]))
+                if self.entries and self.first_queued_at is None:
+                    self.first_queued_at = time.monotonic()
+                self.dropped += max(len(batch) - max(room, 0), 0)
+            return 0
+
+    def _due(self):
+        with self.lock:
+            if not self.entries:
+                return False
+            waited = time.monotonic() - self.first_queued_at
+            return (len(self.entries) >= setting('AUDIT_LOG_BATCH_SIZE', 200)
+                    or waited >= setting('AUDIT_LOG_FLUSH_SECONDS', 2.0))
+
+    def _run(self):
+        # Poll a few times per interval so no entry waits much longer than it
+        poll = max(setting('AUDIT_LOG_FLUSH_SECONDS', 2.0) / 4, 0.05)
+        while True:
+            self.wake.wait(timeout=poll)
+            self.wake.clear()
+            if self._due():
+                try:
+                    self.flush()
+                finally:
+                    close_old_connections()
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self.pid == pid and self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid != pid:
+                # Forked from a process that had started buffering: the
+                # parent's thread and entries are not ours to flush
+                self.entries.clear()
+                self.first_queued_at = None
+                self.wake = threading.Event()
+                self.pid = pid
+                self.thread = None
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='audit-log-writer', daemon=True)
+                self.thread.start()
+
+
+buffer = AuditLogBuffer()
+
+
+def record(entry):
+    """Queue ``entry``, or write it at once when ``AUDIT_LOG_ASYNC`` is off"""
+    if setting('AUDIT_LOG_ASYNC', True):
+        buffer.add(entry)
+    else:
+        write_entries([entry])
+
+
+def flush():
+    """Write this process's queued entries now"""
+    return buffer.flush()
+
+
+@atexit.register
+def _flush_at_exit():
+    if buffer.pid == os.getpid() and buffer.entries:
+        try:
+            buffer.flush()
+        finally:
+            connection.close()
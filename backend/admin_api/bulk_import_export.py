@@ -1,7 +1,6 @@
 """
 Bulk Import/Export functionality for students, teachers, and other entities
 """
-import pandas as pd
 from io import BytesIO
 from django.http import HttpResponse
 from django.contrib.auth import get_user_model
@@ -12,6 +11,10 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from admin_api.models import Student, Teacher, Subject, Grade, ClassRoom
 from django.db import transaction
+from admin_api import jobs
+from admin_api.lazy_imports import lazy_module
+
+pd = lazy_module('pandas')
 
 User = get_user_model()
 
@@ -19,6 +22,7 @@ User = get_user_model()
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
+@jobs.allow_async
 def bulk_import_students(request):
     """
     Bulk import students from Excel or CSV file
@@ -160,6 +164,7 @@ def bulk_import_students(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
+@jobs.allow_async
 def bulk_import_teachers(request):
     """
     Bulk import teachers from Excel or CSV file
@@ -283,6 +288,7 @@ def bulk_import_teachers(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@jobs.allow_async
 def export_students(request):
     """
     Export all students to Excel file
@@ -295,21 +301,21 @@ def export_students(request):
 
     try:
         students = Student.objects.select_related(
-            'user', 'grade', 'section').all()
+            'user', 'school_class', 'parent_user').all()
 
         data = []
         for student in students:
             data.append({
-                'Student ID': student.student_id,
+                'Student ID': student.roll_no,
                 'First Name': student.user.first_name,
                 'Last Name': student.user.last_name,
                 'Email': student.user.email,
-                'Grade': student.grade.name if student.grade else '',
-                'Section': student.section.name if student.section else '',
+                'Grade': student.class_name,
+                'Section': student.school_class.section if student.school_class else '',
                 'Date of Birth': student.date_of_birth.strftime('%Y-%m-%d') if student.date_of_birth else '',
                 'Enrollment Date': student.enrollment_date.strftime('%Y-%m-%d') if student.enrollment_date else '',
-                'Guardian Name': student.guardian_name or '',
-                'Guardian Phone': student.guardian_phone or '',
+                'Guardian Name': student.parent_user.get_full_name() if student.parent_user else '',
+                'Guardian Phone': student.parent_contact or '',
                 'Status': 'Active' if student.user.is_active else 'Inactive',
             })
 
@@ -339,6 +345,7 @@ def export_students(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@jobs.allow_async
 def export_teachers(request):
     """
     Export all teachers to Excel file
@@ -103,6 +103,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'alert': event['alert']
         }))
 
+    async def job_progress(self, event):
+        """Progress and status changes of the user's background jobs"""
+        await self.send(text_data=json.dumps({
+            'type': 'job_progress',
+            'job': event['job']
+        }))
+
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
         """Mark notification as read"""
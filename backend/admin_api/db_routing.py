@@ -0,0 +1,201 @@
+"""
+Read-replica routing
+
+When ``DATABASES`` has a ``replica`` alias (see settings), read queries of
+report, analytics and export requests are sent to it and everything else
+stays on ``default``:
+
+- ``ReplicaRoutingMiddleware`` decides per request: a GET/HEAD whose view
+  lives in one of ``DATABASE_REPLICA_VIEW_MODULES`` or whose path contains
+  one of ``DATABASE_REPLICA_PATH_PARTS`` may read from the replica.
+- Read-your-writes: a successful write pins the client (its bearer token
+  or session cookie) to the primary for ``DATABASE_REPLICA_STICKY_SECONDS``
+  via the cache, so a report requested right after saving grades never
+  misses them because of replication lag. A write inside a replica-routed
+  request pins the rest of that request too.
+- ``ReplicaRouter`` falls back to the primary inside ``atomic()`` blocks and
+  while the replica fails its health check (unreachable, or lagging more
+  than ``DATABASE_REPLICA_MAX_LAG_SECONDS``), re-checked at most every
+  ``DATABASE_REPLICA_HEALTH_SECONDS`` per process.
+
+Without a replica alias the router and middleware do nothing. Code can opt
+a block in or out explicitly with ``with use_replica():`` / ``with use_primary():``.
+"""
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+PIN_KEY_PREFIX = 'db_pin:'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# True while the current request (or block) may read from the replica
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+# ==================== HEALTH ====================
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def replication_lag(alias=REPLICA_ALIAS):
+    """Seconds the replica is behind the primary; None where it can't be measured"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END")
+        lag = cursor.fetchone()[0]
+    return float(lag) if lag is not None else None
+
+
+def check_database(alias):
+    """``{'ok', 'latency_ms', 'lag_seconds', 'error'}`` for one connection"""
+    started = time.perf_counter()
+    try:
+        connection = connections[alias]
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        lag = replication_lag(alias) if alias == REPLICA_ALIAS else None
+    except Exception as exc:
+        # Drop the broken connection so the next check reconnects
+        connections[alias].close()
+        return {'ok': False, 'latency_ms': None, 'lag_seconds': None, 'error': str(exc)}
+    max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG_SECONDS', 30)
+    return {
+        'ok': lag is None or lag <= max_lag,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        'lag_seconds': lag,
+        'error': f'replication lag {lag:.1f}s' if lag is not None and lag > max_lag else None,
+    }
+
+
+def replica_healthy():
+    """Cached result of ``check_database('replica')``"""
+    interval = getattr(settings, 'DATABASE_REPLICA_HEALTH_SECONDS', 10)
+    now = time.monotonic()
+    state = _health.get(REPLICA_ALIAS)
+    if state and now - state[0] < interval:
+        return state[1]
+    with _health_lock:
+        state = _health.get(REPLICA_ALIAS)
+        if state and now - state[0] < interval:
+            return state[1]
+        result = check_database(REPLICA_ALIAS)
+        if not result['ok'] and (state is None or state[1]):
+            logger.warning('Read replica unavailable, reading from the primary: %s', result['error'])
+        _health[REPLICA_ALIAS] = (now, result['ok'])
+        return result['ok']
+
+
+# ==================== ROUTER ====================
+
+class ReplicaRouter:
+    """Send reads to the replica when the current request allows it"""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if not replica_healthy():
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if _replica_reads.get():
+            # Whatever this request reads next must see the write
+            _replica_reads.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != REPLICA_ALIAS
+
+
+@contextmanager
+def request_scope():
+    """Primary-only until ``allow_replica_reads()``; restored on exit"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def allow_replica_reads():
+    _replica_reads.set(True)
+
+
+@contextmanager
+def use_replica():
+    token = _replica_reads.set(replica_configured())
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def use_primary():
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+# ==================== STICKINESS ====================
+
+def client_key(request):
+    """Stable per-client key: the bearer token or session cookie, hashed"""
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return PIN_KEY_PREFIX + hashlib.sha256(credential.encode()).hexdigest()[:32]
+
+
+def is_pinned(request):
+    key = client_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def pin_to_primary(request):
+    key = client_key(request)
+    if key is not None:
+        cache.set(key, 1, getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5))
+
+
+def replica_eligible(request, view_func):
+    """Whether ``view_func`` serving ``request`` only reads report data"""
+    if request.method not in SAFE_METHODS:
+        return False
+    view = getattr(view_func, 'cls', view_func)
+    module = getattr(view, '__module__', '') or ''
+    if any(module == prefix or module.startswith(prefix + '.')
+           for prefix in getattr(settings, 'DATABASE_REPLICA_VIEW_MODULES', ())):
+        return True
+    return any(part in request.path for part in getattr(settings, 'DATABASE_REPLICA_PATH_PARTS', ()))
@@ -0,0 +1,184 @@
+"""
+Bulk MCQ grading engine for online exams
+
+The answer key is loaded once, answers are graded in primary-key chunks and
+written back with one set-based UPDATE per distinct outcome; per-session
+totals are accumulated in the same pass and persisted to ``ExamSession`` (and ``ExamResult`` when the
+session belongs to a scheduled ``Exam``).
+
+Question ``options`` follow the question bank import format, e.g.
+``{"A": "...", "B": "...", "correct": "A"}``. Multi-select questions list
+several keys (``"correct": "A,C"`` or ``["A", "C"]``) and require the exact
+set to be selected. A per-question ``"negative_marks"`` entry overrides the
+exam's ``negative_mark_ratio``.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from admin_api import grading_scale
+from admin_api.models import ExamResult, ExamSession, MeritList, QuestionAnswer
+
+
+DEFAULT_CHUNK_SIZE = 2000
+ZERO = Decimal('0.00')
+
+
+def letter_grade(percentage):
+    """Letter grade for a percentage score, on the school's grading scale"""
+    return grading_scale.letter(percentage)
+
+
+def parse_selection(value):
+    """Normalize an option selection ("a", "A,C", ["A", "C"]) to a frozenset"""
+    if value is None:
+        return frozenset()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        tokens = value
+    else:
+        tokens = str(value).replace('|', ',').split(',')
+    return frozenset(str(t).strip().upper() for t in tokens if str(t).strip())
+
+
+def load_answer_key(questions, negative_mark_ratio=ZERO):
+    """
+    Build ``{question_id: (correct_options, marks, penalty)}`` for the MCQ
+    questions in ``questions`` with a single query.
+    """
+    ratio = Decimal(negative_mark_ratio or 0)
+    key = {}
+    for question in questions.filter(question_type='mcq').values('id', 'options', 'marks'):
+        options = question['options'] or {}
+        correct = parse_selection(options.get('correct'))
+        if not correct:
+            continue
+        marks = Decimal(question['marks'])
+        if options.get('negative_marks') is not None:
+            penalty = Decimal(str(options['negative_marks']))
+        else:
+            penalty = marks * ratio
+        key[question['id']] = (correct, marks, penalty.quantize(ZERO))
+    return key
+
+
+def score_answer(key_entry, selected_option):
+    """Return ``(is_correct, marks_awarded)``; unanswered questions score zero"""
+    correct, marks, penalty = key_entry
+    selected = parse_selection(selected_option)
+    if not selected:
+        return False, ZERO
+    if selected == correct:
+        return True, marks
+    return False, -penalty
+
+
+def grade_answers(answers, answer_key, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Grade ``answers`` against ``answer_key`` chunk by chunk.
+
+    Returns ``(graded_count, totals)`` where ``totals`` maps session id to the
+    summed marks of its graded answers.
+    """
+    answers = answers.filter(question_id__in=list(answer_key)).order_by('id')
+
+    totals = {}
+    graded_count = 0
+    last_id = 0
+    while True:
+        chunk = list(answers.filter(id__gt=last_id).values_list(
+            'id', 'session_id', 'question_id', 'selected_option')[:chunk_size])
+        if not chunk:
+            break
+        outcomes = {}
+        for answer_id, session_id, question_id, selected_option in chunk:
+            outcome = score_answer(answer_key[question_id], selected_option)
+            outcomes.setdefault(outcome, []).append(answer_id)
+            totals[session_id] = totals.get(session_id, ZERO) + outcome[1]
+        # A question only has a handful of possible outcomes, so one UPDATE
+        # per distinct (is_correct, marks) pair replaces a per-row CASE
+        for (is_correct, marks_awarded), ids in outcomes.items():
+            QuestionAnswer.objects.filter(id__in=ids).update(
+                is_correct=is_correct, marks_awarded=marks_awarded)
+        graded_count += len(chunk)
+        last_id = chunk[-1][0]
+    return graded_count, totals
+
+
+def persist_totals(sessions, totals, max_marks, subject_id=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write session totals to ``ExamSession.auto_graded_marks`` and upsert an
+    ``ExamResult`` for sessions attached to a scheduled exam. Totals are
+    floored at zero so negative marking cannot produce a negative score.
+    """
+    sessions = list(sessions.only('id', 'exam_id', 'student_id'))
+    results = []
+    for session in sessions:
+        total = max(totals.get(session.id, ZERO), ZERO)
+        session.auto_graded_marks = total
+        if session.exam_id and subject_id:
+            percentage = (total / max_marks * 100) if max_marks else 0
+            results.append(ExamResult(
+                student_id=session.student_id,
+                exam_id=session.exam_id,
+                subject_id=subject_id,
+                marks_obtained=total,
+                max_marks=max_marks,
+                grade=letter_grade(percentage),
+            ))
+
+    ExamSession.objects.bulk_update(sessions, ['auto_graded_marks'], batch_size=chunk_size)
+    if results:
+        ExamResult.objects.bulk_create(
+            results,
+            batch_size=chunk_size,
+            update_conflicts=True,
+            unique_fields=['student', 'exam', 'subject'],
+            update_fields=['marks_obtained', 'max_marks', 'grade', 'updated_at'],
+        )
+    return len(sessions), len(results)
+
+
+def max_marks_for(online_exam):
+    """Maximum obtainable marks for an online exam (all question types)"""
+    return Decimal(online_exam.questions.aggregate(total=Sum('marks'))['total'] or 0)
+
+
+def key_max_marks(answer_key):
+    """Maximum marks the auto-grader can award for ``answer_key``"""
+    return sum((marks for _, marks, _ in answer_key.values()), ZERO)
+
+
+def grade_online_exam(online_exam, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Grade every submitted MCQ answer of an online exam and persist totals.
+
+    Sessions still in progress are left alone. Only MCQ questions can be
+    auto-graded, so results are out of the MCQ marks.
+    """
+    answer_key = load_answer_key(online_exam.questions.all(), online_exam.negative_mark_ratio)
+    max_marks = key_max_marks(answer_key)
+
+    with transaction.atomic():
+        graded_count, totals = grade_answers(
+            QuestionAnswer.objects.filter(
+                session__online_exam=online_exam, session__is_submitted=True),
+            answer_key,
+            chunk_size,
+        )
+        sessions_count, results_count = persist_totals(
+            ExamSession.objects.filter(online_exam=online_exam, is_submitted=True),
+            totals,
+            max_marks,
+            subject_id=online_exam.subject_id,
+            chunk_size=chunk_size,
+        )
+        # Stored rankings are stale once marks change
+        MeritList.objects.filter(online_exam=online_exam).delete()
+
+    return {
+        'graded_count': graded_count,
+        'students_graded': sessions_count,
+        'results_written': results_count,
+        'max_marks': float(max_marks),
+    }
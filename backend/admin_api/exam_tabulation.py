@@ -0,0 +1,170 @@
+"""
+Merit list and tabulation sheet generation for online exams
+
+Results are ranked with a single annotated query (session totals joined to
+student and user, ranked with a window function) and persisted as a
+``MeritList``/``MeritListEntry`` snapshot. Downloads read the snapshot; it is
+dropped whenever the exam is re-graded or a session is submitted, and rebuilt
+on request.
+"""
+import tempfile
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum, Value, Window
+from django.db.models.functions import Coalesce, Greatest, Rank
+
+from admin_api.exam_grading import letter_grade, max_marks_for
+from admin_api.models import ExamSession, MeritList, MeritListEntry, OnlineExam
+
+
+BATCH_SIZE = 2000
+ZERO = Decimal('0.00')
+
+ENTRY_FIELDS = ('rank', 'roll_no', 'student_name', 'total_marks', 'percentage', 'grade')
+
+HEADER_COLOR = 'CCCCCC'
+PASS_COLOR = '90EE90'
+FAIL_COLOR = 'FFB6C1'
+
+
+def ranked_results(online_exam):
+    """Per-student totals for an online exam, ranked in the database"""
+    total = Greatest(
+        Coalesce(
+            Sum('answers__marks_awarded'),
+            Value(ZERO),
+            output_field=DecimalField(max_digits=8, decimal_places=2),
+        ),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=8, decimal_places=2),
+    )
+    return (
+        ExamSession.objects.filter(online_exam=online_exam, is_submitted=True)
+        .values('student_id')
+        .annotate(
+            roll_no=F('student__roll_no'),
+            first_name=F('student__user__first_name'),
+            last_name=F('student__user__last_name'),
+            total=total,
+            rank=Window(expression=Rank(), order_by=total.desc()),
+        )
+        .order_by('rank', 'roll_no')
+    )
+
+
+def build_snapshot(online_exam, user=None, replace=True):
+    """
+    Compute the ranking and persist it as the exam's merit list snapshot.
+
+    The exam row is locked first so concurrent builds take turns; with
+    ``replace=False`` a snapshot built while waiting is returned as is.
+    """
+    max_marks = max_marks_for(online_exam)
+
+    with transaction.atomic():
+        OnlineExam.objects.select_for_update().only('id').get(pk=online_exam.pk)
+        existing = MeritList.objects.filter(online_exam=online_exam)
+        if not replace:
+            merit_list = existing.first()
+            if merit_list is not None:
+                return merit_list
+        existing.delete()
+        merit_list = MeritList.objects.create(
+            online_exam=online_exam,
+            class_name=online_exam.class_assigned.name,
+            max_marks=max_marks,
+            generated_by=user,
+        )
+
+        batch = []
+        for row in ranked_results(online_exam).iterator(chunk_size=BATCH_SIZE):
+            percentage = (row['total'] / max_marks * 100) if max_marks else ZERO
+            batch.append(MeritListEntry(
+                merit_list=merit_list,
+                rank=row['rank'],
+                student_id=row['student_id'],
+                student_name=f"{row['first_name']} {row['last_name']}".strip(),
+                roll_no=row['roll_no'],
+                total_marks=row['total'],
+                percentage=round(percentage, 2),
+                grade=letter_grade(percentage),
+            ))
+            if len(batch) >= BATCH_SIZE:
+                MeritListEntry.objects.bulk_create(batch)
+                batch = []
+        MeritListEntry.objects.bulk_create(batch)
+
+    return merit_list
+
+
+def get_snapshot(online_exam, user=None, refresh=False):
+    """Return the stored snapshot, building it on first use or when refreshed"""
+    if not refresh:
+        merit_list = MeritList.objects.filter(online_exam=online_exam).first()
+        if merit_list is not None:
+            return merit_list
+    return build_snapshot(online_exam, user, replace=refresh)
+
+
+def snapshot_rows(merit_list):
+    """Stream a snapshot's entries in rank order as plain dicts"""
+    return merit_list.entries.order_by('rank', 'roll_no').values(
+        *ENTRY_FIELDS).iterator(chunk_size=BATCH_SIZE)
+
+
+def write_tabulation_sheet(online_exam, merit_list):
+    """
+    Render the tabulation sheet with openpyxl's write-only mode into a
+    temporary file and return it positioned at the start. Memory use stays
+    flat regardless of cohort size.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    def solid(color):
+        return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+    header_fill, pass_fill, fail_fill = solid(HEADER_COLOR), solid(PASS_COLOR), solid(FAIL_COLOR)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Tabulation Sheet')
+    for letter, width in zip('ABCDEFGH', (8, 14, 32, 13, 12, 12, 8, 10)):
+        ws.column_dimensions[letter].width = width
+
+    def styled(value, font=None, fill=None, alignment=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+        return cell
+
+    ws.append([styled(f'{online_exam.title} - Tabulation Sheet', font=Font(bold=True, size=14))])
+    ws.append([])
+    headers = ['Rank', 'Roll No', 'Student Name', 'Total Marks', 'Max Marks', 'Percentage', 'Grade', 'Status']
+    ws.append([
+        styled(header, font=Font(bold=True), fill=header_fill, alignment=Alignment(horizontal='center'))
+        for header in headers
+    ])
+
+    max_marks = float(merit_list.max_marks or 0)
+    for row in snapshot_rows(merit_list):
+        passed = row['percentage'] >= online_exam.min_percent
+        ws.append([
+            row['rank'],
+            row['roll_no'],
+            row['student_name'],
+            float(row['total_marks']),
+            max_marks,
+            float(row['percentage']),
+            row['grade'],
+            styled('Pass' if passed else 'Fail', fill=pass_fill if passed else fail_fill),
+        ])
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,221 @@
+"""
+Fee collection aggregation
+
+``collection_buckets`` groups paid fees by day or month in a single query and
+``densify`` fills the gaps in Python, so a report over any range costs the
+same number of queries.
+
+``FeeCollectionDaily`` keeps the same figures precomputed per
+(date, class, payment method). ``FeePayment`` signal handlers apply the
+difference between a payment's old and new contribution on every save or
+delete; writes that bypass signals (``QuerySet.update``, ``bulk_create``)
+are repaired with ``manage.py rebuild_fee_collection_rollup``.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+
+from admin_api.models import FeeCollectionDaily, FeePayment, FeeStructure
+
+
+ZERO = Decimal('0.00')
+TRUNCATORS = {'day': TruncDay, 'month': TruncMonth}
+
+
+# ==================== BUCKETING ====================
+
+def _month_start(value):
+    return value.replace(day=1)
+
+
+def _next_month(value):
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def bucket_keys(start_date, end_date, granularity='day'):
+    """Every bucket start between the two dates, inclusive"""
+    if granularity == 'month':
+        current = _month_start(start_date)
+        while current <= end_date:
+            yield current
+            current = _next_month(current)
+        return
+    current = start_date
+    while current <= end_date:
+        yield current
+        current = date.fromordinal(current.toordinal() + 1)
+
+
+def densify(rows, start_date, end_date, granularity='day'):
+    """
+    Expand sparse ``{bucket: (transactions, amount)}`` rows into one entry per
+    bucket, with zeroes for buckets that had no payments
+    """
+    return [
+        {
+            'date': bucket,
+            'transactions': rows.get(bucket, (0, ZERO))[0],
+            'amount': float(rows.get(bucket, (0, ZERO))[1]),
+        }
+        for bucket in bucket_keys(start_date, end_date, granularity)
+    ]
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') else value
+
+
+def collection_buckets(payments, granularity='day'):
+    """One grouped aggregate: ``{bucket: (transactions, amount)}``"""
+    rows = (
+        payments.annotate(bucket=TRUNCATORS[granularity]('payment_date'))
+        .values('bucket')
+        .annotate(transactions=Count('id'), amount=Sum('amount_paid'))
+        .order_by()
+    )
+    return {
+        _as_date(row['bucket']): (row['transactions'], row['amount'] or ZERO)
+        for row in rows
+    }
+
+
+def rollup_buckets(start_date, end_date, granularity='day', class_ids=None):
+    """
+    Read precomputed buckets from ``FeeCollectionDaily``. Returns
+    ``{class_id: {bucket: (transactions, amount)}}``.
+    """
+    days = FeeCollectionDaily.objects.filter(date__gte=start_date, date__lte=end_date)
+    if class_ids:
+        days = days.filter(class_assigned_id__in=class_ids)
+    rows = (
+        days.annotate(bucket=TRUNCATORS[granularity]('date'))
+        .values('class_assigned_id', 'bucket')
+        .annotate(transactions=Sum('transactions'), amount=Sum('amount'))
+        .order_by()
+    )
+    series = {}
+    for row in rows:
+        series.setdefault(row['class_assigned_id'], {})[_as_date(row['bucket'])] = (
+            row['transactions'] or 0, row['amount'] or ZERO)
+    return series
+
+
+# ==================== ROLLUP MAINTENANCE ====================
+
+def contribution(status, payment_date, amount_paid, payment_method, class_id):
+    """
+    The ``(bucket, transactions, amount)`` a payment adds to the rollup, or
+    None when it does not count as collected
+    """
+    if status != 'paid' or not payment_date:
+        return None
+    bucket = (payment_date, class_id, payment_method or '')
+    return bucket, 1, Decimal(amount_paid or 0)
+
+
+def payment_contribution(payment):
+    """Contribution of an in-memory ``FeePayment`` (may cost one query for the class)"""
+    if 'fee_structure' in payment._state.fields_cache:
+        class_id = payment.fee_structure.class_assigned_id
+    else:
+        class_id = (
+            FeeStructure.objects.filter(pk=payment.fee_structure_id)
+            .values_list('class_assigned_id', flat=True)
+            .first()
+        )
+    return contribution(
+        payment.status, payment.payment_date, payment.amount_paid,
+        payment.payment_method, class_id)
+
+
+def stored_contribution(payment_id):
+    """Contribution of the row as currently stored in the database"""
+    row = (
+        FeePayment.objects.filter(pk=payment_id)
+        .values('status', 'payment_date', 'amount_paid', 'payment_method',
+                'fee_structure__class_assigned_id')
+        .first()
+    )
+    if row is None:
+        return None
+    return contribution(
+        row['status'], row['payment_date'], row['amount_paid'],
+        row['payment_method'], row['fee_structure__class_assigned_id'])
+
+
+def apply_delta(bucket, transactions, amount):
+    """Atomically add ``transactions``/``amount`` (possibly negative) to a bucket"""
+    day, class_id, method = bucket
+    lookup = {'date': day, 'class_assigned_id': class_id, 'payment_method': method}
+    with transaction.atomic():
+        row = (
+            FeeCollectionDaily.objects.select_for_update()
+            .filter(**lookup)
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if row is None:
+            if transactions < 0:
+                # Bucket already gone (cascade delete or out-of-band cleanup)
+                return
+            try:
+                with transaction.atomic():
+                    FeeCollectionDaily.objects.create(
+                        transactions=transactions, amount=amount, **lookup)
+                return
+            except IntegrityError:
+                # Another writer created the bucket meanwhile; add to theirs
+                pass
+        FeeCollectionDaily.objects.filter(**lookup).update(
+            transactions=F('transactions') + transactions,
+            amount=F('amount') + amount)
+
+
+def apply_change(old, new):
+    """Move a payment's contribution from ``old`` to ``new`` (either may be None)"""
+    if old == new:
+        return
+    if old is not None:
+        apply_delta(old[0], -old[1], -old[2])
+    if new is not None:
+        apply_delta(new[0], new[1], new[2])
+
+
+def rebuild(start_date=None, end_date=None):
+    """
+    Recompute the rollup from ``FeePayment`` with one grouped query and
+    replace the stored rows for the range. Returns the number of buckets.
+    """
+    payments = FeePayment.objects.filter(status='paid', payment_date__isnull=False)
+    days = FeeCollectionDaily.objects.all()
+    if start_date:
+        payments = payments.filter(payment_date__gte=start_date)
+        days = days.filter(date__gte=start_date)
+    if end_date:
+        payments = payments.filter(payment_date__lte=end_date)
+        days = days.filter(date__lte=end_date)
+
+    rows = (
+        payments.values('payment_date', 'fee_structure__class_assigned_id', 'payment_method')
+        .annotate(transactions=Count('id'), amount=Sum('amount_paid'))
+        .order_by()
+    )
+    buckets = [
+        FeeCollectionDaily(
+            date=row['payment_date'],
+            class_assigned_id=row['fee_structure__class_assigned_id'],
+            payment_method=row['payment_method'] or '',
+            transactions=row['transactions'],
+            amount=row['amount'] or ZERO,
+        )
+        for row in rows.iterator(chunk_size=2000)
+    ]
+    with transaction.atomic():
+        days.delete()
+        FeeCollectionDaily.objects.bulk_create(buckets, batch_size=2000)
+    return len(buckets)
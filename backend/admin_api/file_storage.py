@@ -0,0 +1,392 @@
+"""
+Content-addressed file storage
+
+Uploaded bytes are hashed with SHA-256 while they stream through and stored
+once per digest under ``ab/cd/<digest>`` in the ``blobs`` storage backend
+(``settings.STORAGES['blobs']``, local filesystem by default, any Django
+storage works). ``StoredFile`` rows give each upload its own name and owner
+while identical content shares a ``StoredBlob``.
+
+Large files can be sent in pieces through an ``UploadSession``: chunks are
+appended to a temporary file and the client can resume from
+``received_bytes`` after a dropped connection. Downloads honour single
+``Range`` requests and can be handed to the web server with X-Sendfile or
+X-Accel-Redirect.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from admin_api.models import StoredBlob, StoredFile, UploadSession
+
+
+BLOB_STORAGE_ALIAS = 'blobs'
+READ_CHUNK_SIZE = 64 * 1024
+ALLOWED_EXTENSIONS = ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'txt', 'jpg', 'jpeg', 'png']
+CHUNKED_UPLOAD_DIR = getattr(
+    settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.MEDIA_ROOT, 'partial_uploads'))
+CHUNKED_UPLOAD_MAX_SIZE = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class UploadError(Exception):
+    """Rejected upload; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def get_blob_storage():
+    return storages[BLOB_STORAGE_ALIAS]
+
+
+def blob_key(digest):
+    return f'{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+def validate_filename(name, allowed_extensions=ALLOWED_EXTENSIONS):
+    extension = os.path.splitext(name or '')[1].lstrip('.').lower()
+    if extension not in allowed_extensions:
+        raise UploadError(f'File type not allowed. Allowed types: {", ".join(allowed_extensions)}')
+
+
+def guess_content_type(name, declared=''):
+    if declared and declared != 'application/octet-stream':
+        return declared
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def hash_chunks(chunks):
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _read_chunks(handle, chunk_size=READ_CHUNK_SIZE):
+    while True:
+        data = handle.read(chunk_size)
+        if not data:
+            break
+        yield data
+
+
+# ==================== STORING ====================
+
+def _store_blob(digest, size, content):
+    """
+    Return the blob for ``digest``, writing ``content`` only if no blob with
+    that digest exists yet. Concurrent writers of the same content race on
+    the unique digest; the loser discards its copy.
+    """
+    blob = StoredBlob.objects.filter(sha256=digest).first()
+    if blob is not None:
+        return blob
+
+    storage = get_blob_storage()
+    key = blob_key(digest)
+    saved_key = key if storage.exists(key) else storage.save(key, content)
+    try:
+        with transaction.atomic():
+            return StoredBlob.objects.create(sha256=digest, size=size, storage_key=saved_key)
+    except IntegrityError:
+        blob = StoredBlob.objects.get(sha256=digest)
+        if saved_key != blob.storage_key:
+            storage.delete(saved_key)
+        return blob
+
+
+def store_upload(uploaded_file, user=None):
+    """Persist a Django ``UploadedFile`` and return its ``StoredFile``"""
+    digest, size = hash_chunks(uploaded_file.chunks())
+    uploaded_file.seek(0)
+    blob = _store_blob(digest, size, uploaded_file)
+    return StoredFile.objects.create(
+        blob=blob,
+        original_name=os.path.basename(uploaded_file.name),
+        content_type=guess_content_type(uploaded_file.name, uploaded_file.content_type),
+        uploaded_by=user,
+    )
+
+
+def store_path(path, original_name, content_type='', user=None):
+    """Persist a file already on local disk and return its ``StoredFile``"""
+    with open(path, 'rb') as handle:
+        digest, size = hash_chunks(_read_chunks(handle))
+        handle.seek(0)
+        blob = _store_blob(digest, size, File(handle, name=original_name))
+    return StoredFile.objects.create(
+        blob=blob,
+        original_name=os.path.basename(original_name),
+        content_type=guess_content_type(original_name, content_type),
+        uploaded_by=user,
+    )
+
+
+def resolve_upload(request, allowed_extensions=ALLOWED_EXTENSIONS, max_size=None):
+    """
+    Return the ``StoredFile`` for a request carrying either a multipart
+    ``file`` or the ``file_id`` of a completed chunked upload, or None when
+    neither was sent.
+    """
+    uploaded = request.FILES.get('file')
+    if uploaded is not None:
+        validate_filename(uploaded.name, allowed_extensions)
+        if max_size and uploaded.size > max_size:
+            raise UploadError(f'File size exceeds {max_size // (1024 * 1024)}MB limit')
+        return store_upload(uploaded, request.user)
+
+    file_id = request.data.get('file_id')
+    if not file_id:
+        return None
+    stored = StoredFile.objects.select_related('blob').filter(
+        id=file_id, uploaded_by=request.user).first()
+    if stored is None:
+        raise UploadError('File not found', status=404)
+    validate_filename(stored.original_name, allowed_extensions)
+    return stored
+
+
+def shared_file_id(token):
+    """The file id a ``StoredFile.shared_download_url`` token grants, or None"""
+    try:
+        return signing.loads(token, salt=StoredFile.SHARE_SALT)
+    except signing.BadSignature:
+        return None
+
+
+# ==================== CHUNKED UPLOADS ====================
+
+def start_upload(user, filename, total_size, content_type=''):
+    validate_filename(filename)
+    if total_size <= 0:
+        raise UploadError('total_size must be positive')
+    if total_size > CHUNKED_UPLOAD_MAX_SIZE:
+        raise UploadError(
+            f'File size exceeds {CHUNKED_UPLOAD_MAX_SIZE // (1024 * 1024)}MB limit')
+
+    os.makedirs(CHUNKED_UPLOAD_DIR, exist_ok=True)
+    upload_id = uuid.uuid4()
+    temp_path = os.path.join(CHUNKED_UPLOAD_DIR, f'{upload_id.hex}.part')
+    open(temp_path, 'wb').close()
+    return UploadSession.objects.create(
+        upload_id=upload_id,
+        filename=os.path.basename(filename),
+        content_type=guess_content_type(filename, content_type),
+        total_size=total_size,
+        temp_path=temp_path,
+        created_by=user,
+    )
+
+
+def parse_content_range(header, total_size):
+    """Parse ``bytes start-end/total``; returns ``(start, length)``"""
+    match = _CONTENT_RANGE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range header is required (bytes start-end/total)')
+    start, end, total = match.groups()
+    start, end = int(start), int(end)
+    if end < start or end >= total_size or (total != '*' and int(total) != total_size):
+        raise UploadError('Content-Range does not match the upload', status=416)
+    return start, end - start + 1
+
+
+def _check_accepting(upload, offset):
+    if upload.status != 'uploading':
+        raise UploadError('Upload is no longer accepting chunks', status=409)
+    if offset != upload.received_bytes:
+        raise UploadError(
+            'Chunk offset does not match received bytes', status=409,
+            received_bytes=upload.received_bytes)
+
+
+def append_chunk(upload, stream, offset, length):
+    """
+    Append ``length`` bytes from ``stream`` at ``offset``. The offset must
+    equal the bytes already received so a retried or out-of-order chunk is
+    rejected with 409 and the client resumes from ``received_bytes``.
+
+    The body is staged next to the partial file first; the session row is
+    only locked to re-check the offset, copy the staged bytes in and
+    advance ``received_bytes``, never while the client is still sending.
+    """
+    _check_accepting(upload, offset)
+    staged_path = f'{upload.temp_path}.{uuid.uuid4().hex}'
+    try:
+        written = 0
+        with open(staged_path, 'wb') as handle:
+            while written < length:
+                data = stream.read(min(READ_CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                handle.write(data)
+                written += len(data)
+        if written != length:
+            raise UploadError(
+                'Chunk body shorter than Content-Range', status=400,
+                received_bytes=upload.received_bytes)
+
+        with transaction.atomic():
+            upload = UploadSession.objects.select_for_update().get(pk=upload.pk)
+            _check_accepting(upload, offset)
+            with open(staged_path, 'rb') as source, open(upload.temp_path, 'r+b') as target:
+                target.seek(offset)
+                shutil.copyfileobj(source, target, READ_CHUNK_SIZE)
+                target.truncate()
+            upload.received_bytes = offset + written
+            upload.save(update_fields=['received_bytes', 'updated_at'])
+    finally:
+        _remove(staged_path)
+    return upload
+
+
+def complete_upload(upload):
+    """
+    Hash the assembled file into blob storage and close the session. The
+    session row stays locked throughout so concurrent completes store the
+    file once; the others get the stored file back.
+    """
+    with transaction.atomic():
+        upload = UploadSession.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == 'completed':
+            return upload.stored_file
+        if upload.status != 'uploading':
+            raise UploadError('Upload was aborted', status=409)
+        if upload.received_bytes != upload.total_size:
+            raise UploadError(
+                'Upload is incomplete', status=409, received_bytes=upload.received_bytes)
+
+        stored = store_path(upload.temp_path, upload.filename, upload.content_type, upload.created_by)
+        upload.status = 'completed'
+        upload.stored_file = stored
+        upload.save(update_fields=['status', 'stored_file', 'updated_at'])
+    _remove(upload.temp_path)
+    return stored
+
+
+def abort_upload(upload):
+    upload.status = 'aborted'
+    upload.save(update_fields=['status', 'updated_at'])
+    _remove(upload.temp_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ==================== DOWNLOADS ====================
+
+def parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header. Returns ``(start, end)``
+    inclusive, None to serve the whole file, or raises ``UploadError`` (416)
+    for an unsatisfiable range.
+    """
+    match = _RANGE.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise UploadError('Range not satisfiable', status=416)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise UploadError('Range not satisfiable', status=416)
+    return start, end
+
+
+def _ranged_reader(handle, start, length):
+    try:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = handle.read(min(READ_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        handle.close()
+
+
+def _sendfile_response(stored, storage):
+    header = getattr(settings, 'FILE_SENDFILE_HEADER', '')
+    if not header:
+        return None
+    key = stored.blob.storage_key
+    if header.lower() == 'x-accel-redirect':
+        target = getattr(settings, 'FILE_SENDFILE_PREFIX', '/protected/blobs/') + key
+    else:
+        try:
+            target = storage.path(key)
+        except NotImplementedError:
+            return None
+    response = HttpResponse(content_type=stored.content_type or 'application/octet-stream')
+    response[header] = target
+    return response
+
+
+def download_response(request, stored, as_attachment=True):
+    """Serve a ``StoredFile`` with ETag, Range and optional sendfile offload"""
+    blob = stored.blob
+    etag = f'"{blob.sha256}"'
+    disposition = content_disposition_header(as_attachment, stored.original_name)
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    storage = get_blob_storage()
+    response = _sendfile_response(stored, storage)
+    if response is None:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), blob.size)
+        except UploadError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{blob.size}'
+            return response
+        if request.headers.get('If-Range') not in (None, etag):
+            byte_range = None
+
+        handle = storage.open(blob.storage_key, 'rb')
+        if byte_range is None:
+            response = FileResponse(handle, content_type=stored.content_type)
+            response['Content-Length'] = blob.size
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _ranged_reader(handle, start, end - start + 1),
+                status=206,
+                content_type=stored.content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{blob.size}'
+            response['Content-Length'] = end - start + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = disposition
+    return response
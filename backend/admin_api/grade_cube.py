@@ -0,0 +1,236 @@
+"""
+Grade analytics cube
+
+``GradeCubeCell`` keeps grade counts and score sums per (class, subject,
+term, grade type, month, band), where the band is the grade's letter on the
+school's grading scale (``admin_api.grading_scale``). Averages by class,
+subject or month, the band distribution and totals are grouped sums over the
+cells, so the analytics report costs the same few queries however many
+grades exist.
+
+A grade belongs to its student's current ``school_class``. ``Grade`` signal
+handlers move a grade's contribution between cells on every save or
+delete, a student changing class rebuilds the cells of both classes and a
+change to the grading scale rebuilds the whole cube.
+Writes that bypass signals (``bulk_create``, ``QuerySet.update``, raw
+deletes, the promotion engine's bulk class moves) call ``rebuild`` for the
+classes they touched, and ``manage.py rebuild_grade_cube`` repairs anything
+else.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from admin_api import grading_scale
+from admin_api.models import Grade, GradeCubeCell, Student
+
+
+ZERO = Decimal('0.00')
+
+KEY_FIELDS = ('class_assigned_id', 'subject_id', 'term', 'grade_type', 'month', 'band')
+
+
+# ==================== BANDS ====================
+
+def band_expression():
+    """The grading scale's letter of each grade, as a SQL CASE"""
+    return grading_scale.get_scale().case(grading_scale.percentage_expression())
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') else value
+
+
+# ==================== SLICING ====================
+
+def cells(class_names=None, subject_titles=None, terms=None, grade_types=None,
+          start_month=None, end_month=None):
+    """Cells matching the filters; every argument is optional"""
+    queryset = GradeCubeCell.objects.all()
+    if class_names:
+        queryset = queryset.filter(class_assigned__name__in=class_names)
+    if subject_titles:
+        queryset = queryset.filter(subject__title__in=subject_titles)
+    if terms:
+        queryset = queryset.filter(term__in=terms)
+    if grade_types:
+        queryset = queryset.filter(grade_type__in=grade_types)
+    if start_month:
+        queryset = queryset.filter(month__gte=start_month.replace(day=1))
+    if end_month:
+        queryset = queryset.filter(month__lte=end_month)
+    return queryset
+
+
+def summarize(queryset, *dimensions):
+    """
+    Roll ``queryset`` up to ``dimensions`` (cell fields or lookups such as
+    ``'class_assigned__name'``). Returns one dict per group with
+    ``grade_count``, ``score_sum``, ``max_score_sum`` and ``average``.
+    """
+    rows = (
+        queryset.values(*dimensions)
+        .annotate(grade_count=Sum('grade_count'), score_sum=Sum('score_sum'),
+                  max_score_sum=Sum('max_score_sum'))
+        .order_by(*dimensions)
+    )
+    summary = []
+    for row in rows:
+        count = row['grade_count'] or 0
+        row['score_sum'] = row['score_sum'] or ZERO
+        row['max_score_sum'] = row['max_score_sum'] or ZERO
+        row['average'] = float(row['score_sum']) / count if count else 0.0
+        summary.append(row)
+    return summary
+
+
+def totals(queryset):
+    """``summarize`` over the whole of ``queryset``, as one dict"""
+    row = queryset.aggregate(grade_count=Sum('grade_count'), score_sum=Sum('score_sum'),
+                             max_score_sum=Sum('max_score_sum'))
+    count = row['grade_count'] = row['grade_count'] or 0
+    row['score_sum'] = row['score_sum'] or ZERO
+    row['max_score_sum'] = row['max_score_sum'] or ZERO
+    row['average'] = float(row['score_sum']) / count if count else 0.0
+    return row
+
+
+def distribution(queryset):
+    """``[{'grade': label, 'count': n}]`` for every band of the grading scale"""
+    scale = grading_scale.get_scale()
+    counts = {row['band']: row['grade_count'] for row in summarize(queryset, 'band')}
+    bands = scale.grades + ([grading_scale.UNGRADED] if counts.get(grading_scale.UNGRADED) else [])
+    return [{'grade': scale.label(band), 'count': counts.get(band, 0)} for band in bands]
+
+
+# ==================== CUBE MAINTENANCE ====================
+
+def contribution(class_id, subject_id, term, grade_type, date_recorded, score, max_score):
+    """The ``(cell key, count, score, max_score)`` a grade adds to the cube"""
+    if date_recorded is None or score is None:
+        return None
+    score, max_score = Decimal(str(score)), Decimal(str(max_score or 0))
+    band = grading_scale.letter(grading_scale.percentage(score, max_score))
+    key = (class_id, subject_id, term, grade_type, date_recorded.replace(day=1), band)
+    return key, 1, score, max_score
+
+
+def grade_contribution(grade):
+    """Contribution of an in-memory ``Grade`` (may cost one query for the class)"""
+    if 'student' in grade._state.fields_cache:
+        class_id = grade.student.school_class_id
+    else:
+        class_id = (
+            Student.objects.filter(pk=grade.student_id)
+            .values_list('school_class_id', flat=True)
+            .first()
+        )
+    return contribution(
+        class_id, grade.subject_id, grade.term, grade.grade_type,
+        grade.date_recorded, grade.score, grade.max_score)
+
+
+def stored_contribution(grade_id):
+    """Contribution of the row as currently stored in the database"""
+    row = (
+        Grade.objects.filter(pk=grade_id)
+        .values('student__school_class_id', 'subject_id', 'term', 'grade_type',
+                'date_recorded', 'score', 'max_score')
+        .first()
+    )
+    if row is None:
+        return None
+    return contribution(
+        row['student__school_class_id'], row['subject_id'], row['term'], row['grade_type'],
+        row['date_recorded'], row['score'], row['max_score'])
+
+
+def apply_delta(key, count, score, max_score):
+    """Atomically add ``count``/``score``/``max_score`` (possibly negative) to a cell"""
+    lookup = dict(zip(KEY_FIELDS, key))
+    with transaction.atomic():
+        row = (
+            GradeCubeCell.objects.select_for_update()
+            .filter(**lookup)
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if row is None:
+            if count < 0:
+                # Cell already gone (cascade delete or a rebuild in between)
+                return
+            try:
+                with transaction.atomic():
+                    GradeCubeCell.objects.create(
+                        grade_count=count, score_sum=score, max_score_sum=max_score, **lookup)
+                return
+            except IntegrityError:
+                # Another writer created the cell meanwhile; add to theirs
+                pass
+        GradeCubeCell.objects.filter(**lookup).update(
+            grade_count=F('grade_count') + count,
+            score_sum=F('score_sum') + score,
+            max_score_sum=F('max_score_sum') + max_score)
+
+
+def apply_change(old, new):
+    """Move a grade's contribution from ``old`` to ``new`` (either may be None)"""
+    if old == new:
+        return
+    if old is not None:
+        apply_delta(old[0], -old[1], -old[2], -old[3])
+    if new is not None:
+        apply_delta(new[0], new[1], new[2], new[3])
+
+
+def _class_filter(field, class_ids):
+    ids = [class_id for class_id in class_ids if class_id is not None]
+    condition = Q(**{f'{field}__in': ids})
+    if None in class_ids:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def rebuild(class_ids=None):
+    """
+    Recompute the cube from ``Grade`` with one grouped query and replace the
+    stored cells, for every class or only ``class_ids`` (``None`` in the
+    list stands for students without a class). Returns the number of cells.
+    """
+    grades = Grade.objects.all()
+    stored = GradeCubeCell.objects.all()
+    if class_ids is not None:
+        class_ids = set(class_ids)
+        grades = grades.filter(_class_filter('student__school_class_id', class_ids))
+        stored = stored.filter(_class_filter('class_assigned_id', class_ids))
+
+    rows = (
+        grades.annotate(
+            cell_class=F('student__school_class_id'),
+            cell_month=TruncMonth('date_recorded'),
+            cell_band=band_expression(),
+        )
+        .values('cell_class', 'subject_id', 'term', 'grade_type', 'cell_month', 'cell_band')
+        .annotate(grade_count=Count('id'), score_sum=Sum('score'), max_score_sum=Sum('max_score'))
+        .order_by()
+    )
+    cube = [
+        GradeCubeCell(
+            class_assigned_id=row['cell_class'],
+            subject_id=row['subject_id'],
+            term=row['term'],
+            grade_type=row['grade_type'],
+            month=_as_date(row['cell_month']),
+            band=row['cell_band'],
+            grade_count=row['grade_count'],
+            score_sum=row['score_sum'] or ZERO,
+            max_score_sum=row['max_score_sum'] or ZERO,
+        )
+        for row in rows.iterator(chunk_size=2000)
+    ]
+    with transaction.atomic():
+        stored.delete()
+        GradeCubeCell.objects.bulk_create(cube, batch_size=2000)
+    return len(cube)
@@ -0,0 +1,228 @@
+"""
+Grading scale
+
+One scale turns percentages into letter grades everywhere: ``Grade.letter_grade``,
+report cards, analytics distributions, exam results and merit lists. It is
+made of the active ``GradeScale`` rows of one scale name:
+``settings.GRADING_SCALE_NAME``, or when that is empty the name of the
+first scale configured. With no active rows it falls back to
+``settings.GRADING_SCALE`` (``(grade, min_percentage, grade_point)``
+tuples) or ``DEFAULT_SCALE``.
+
+A percentage gets the grade of the highest band whose ``min_percentage``
+it reaches; below the lowest band, or NaN, it gets ``UNGRADED``. The same
+floors drive three paths:
+
+- ``scale.letter(p)``: bisect, for a single value
+- ``scale.letters(values)``: a whole batch; NumPy arrays are bucketed with
+  ``searchsorted`` in one vectorised call
+- ``scale.case(expression)``: a SQL ``CASE WHEN`` over any percentage
+  expression, so a distribution is a single ``GROUP BY``
+  (``distribution(queryset)``)
+
+The scale is loaded once per process and reloaded when a ``GradeScale``
+row changes; the change bumps a version token in the cache so the other
+processes notice within ``GRADING_SCALE_CHECK_SECONDS``.
+"""
+import logging
+import math
+import time
+import uuid
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Min, Value, When
+from django.db.models.functions import NullIf
+from django.db.models.lookups import GreaterThanOrEqual
+
+logger = logging.getLogger(__name__)
+
+UNGRADED = 'N/A'
+VERSION_KEY = 'grading_scale:version'
+
+# The ladder Grade.letter_grade has always used
+DEFAULT_SCALE = (
+    ('A+', 90, 4.0),
+    ('A', 85, 3.7),
+    ('B+', 80, 3.3),
+    ('B', 75, 3.0),
+    ('C+', 70, 2.7),
+    ('C', 65, 2.3),
+    ('D', 60, 2.0),
+    ('F', 0, 0.0),
+)
+
+
+class GradingScale:
+    """Bands ordered from the highest floor down"""
+
+    def __init__(self, bands):
+        # (grade, min_percentage, max_percentage, grade_point), highest first
+        self.bands = sorted(bands, key=lambda band: band[1], reverse=True)
+        self.grades = [band[0] for band in self.bands]
+        self._floors = [float(band[1]) for band in reversed(self.bands)]
+        self._ascending = list(reversed(self.grades))
+
+    @classmethod
+    def from_tuples(cls, scale):
+        """Bands from ``(grade, min_percentage, grade_point)``; each ends below the next floor"""
+        ordered = sorted(scale, key=lambda band: band[1], reverse=True)
+        bands = []
+        ceiling = 100
+        for grade, floor, point in ordered:
+            bands.append((grade, floor, ceiling, point))
+            ceiling = floor
+        return cls(bands)
+
+    def letter(self, percentage):
+        if percentage is None:
+            return UNGRADED
+        percentage = float(percentage)
+        if math.isnan(percentage):
+            return UNGRADED
+        index = bisect_right(self._floors, percentage) - 1
+        return self._ascending[index] if index >= 0 else UNGRADED
+
+    def letters(self, percentages):
+        """Grades for a batch; a NumPy array in gives a NumPy array out"""
+        if type(percentages).__module__ == 'numpy':
+            import numpy
+
+            values = numpy.asarray(percentages, dtype=float)
+            indexes = numpy.searchsorted(self._floors, values, side='right') - 1
+            # searchsorted puts NaN past the top floor
+            indexes[numpy.isnan(values)] = -1
+            grades = numpy.array([UNGRADED, *self._ascending], dtype=object)
+            return grades[indexes + 1]
+        return [self.letter(percentage) for percentage in percentages]
+
+    def grade_point(self, grade):
+        for band in self.bands:
+            if band[0] == grade:
+                return band[3]
+        return None
+
+    def label(self, grade):
+        """``'A+ (90-100)'`` style label used by the distribution reports"""
+        for name, floor, ceiling, _ in self.bands:
+            if name == grade:
+                return f'{name} ({_number(floor)}-{_number(ceiling)})'
+        return grade
+
+    def case(self, expression):
+        """The scale as a SQL CASE over a percentage expression"""
+        return Case(
+            *[When(GreaterThanOrEqual(expression, Value(float(floor))), then=Value(grade))
+              for grade, floor, _, _ in self.bands],
+            default=Value(UNGRADED),
+        )
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+# ==================== LOADING ====================
+
+_loaded = {'scale': None, 'version': None, 'checked_at': 0.0}
+
+
+def load():
+    """Build the scale from one scale's active ``GradeScale`` rows, or the configured default"""
+    from admin_api.models import GradeScale
+
+    active = GradeScale.objects.filter(is_active=True)
+    name = getattr(settings, 'GRADING_SCALE_NAME', '')
+    if not name:
+        names = list(
+            active.values('name').annotate(first_id=Min('id'))
+            .order_by('first_id').values_list('name', flat=True)[:2]
+        )
+        name = names[0] if names else ''
+        if len(names) > 1:
+            logger.warning('Several grading scales are active; using %r (set GRADING_SCALE_NAME)', name)
+    rows = list(
+        active.filter(name=name)
+        .order_by('-min_percentage')
+        .values_list('grade', 'min_percentage', 'max_percentage', 'grade_point')
+    )
+    if rows:
+        return GradingScale([
+            (grade, float(floor), float(ceiling), float(point))
+            for grade, floor, ceiling, point in rows
+        ])
+    return GradingScale.from_tuples(getattr(settings, 'GRADING_SCALE', DEFAULT_SCALE))
+
+
+def get_scale():
+    """The current scale, reloaded when another process bumped the version"""
+    now = time.monotonic()
+    if (_loaded['scale'] is not None
+            and now - _loaded['checked_at'] < getattr(settings, 'GRADING_SCALE_CHECK_SECONDS', 5)):
+        return _loaded['scale']
+    version = cache.get(VERSION_KEY)
+    if _loaded['scale'] is None or version != _loaded['version']:
+        _loaded['scale'] = load()
+        _loaded['version'] = version
+    _loaded['checked_at'] = now
+    return _loaded['scale']
+
+
+def scale_changed():
+    """Called when ``GradeScale`` rows change"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _loaded['scale'] = None
+
+
+def letter(percentage):
+    return get_scale().letter(percentage)
+
+
+def percentage(score, max_score):
+    """``score / max_score * 100`` unrounded, matching ``percentage_expression``"""
+    if score is None or not max_score:
+        return None
+    return Decimal(str(score)) * 100 / Decimal(str(max_score))
+
+
+# ==================== SQL ====================
+
+def percentage_expression(score='score', max_score='max_score'):
+    """``score / max_score * 100`` as a float SQL expression; NULL when ``max_score`` is 0"""
+    return ExpressionWrapper(
+        F(score) * Value(100.0) / NullIf(F(max_score), Value(0)), output_field=FloatField())
+
+
+def annotate_letters(queryset, expression=None, name='letter'):
+    """Annotate each row's letter grade (``Grade`` rows by default)"""
+    expression = expression if expression is not None else percentage_expression()
+    return queryset.annotate(**{name: get_scale().case(expression)})
+
+
+def distribution(queryset, expression=None):
+    """
+    Grade counts in one ``GROUP BY``: ``[{'grade', 'label', 'count',
+    'percentage'}]`` for every band of the scale, highest first
+    """
+    scale = get_scale()
+    rows = (
+        annotate_letters(queryset.order_by(), expression)
+        .values('letter')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    counts = {row['letter']: row['count'] for row in rows}
+    total = sum(counts.values())
+    grades = scale.grades + ([UNGRADED] if counts.get(UNGRADED) else [])
+    return [
+        {
+            'grade': grade,
+            'label': scale.label(grade),
+            'count': counts.get(grade, 0),
+            'percentage': round(counts.get(grade, 0) / total * 100, 2) if total else 0,
+        }
+        for grade in grades
+    ]
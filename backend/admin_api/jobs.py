@@ -0,0 +1,543 @@
+"""
+Background jobs
+
+Payroll runs, result calculation, merit lists, promotions, bulk imports and
+exports and email blasts can take longer than the proxy waits for a
+response. Views that do such work are decorated with ``allow_async``:
+
+    @action(detail=False, methods=['post'])
+    @jobs.allow_async
+    def generate_payroll(self, request):
+
+and called with ``?async=1`` they answer ``202 {"job_id": ...}`` at once.
+The request (method, path, query, body, uploaded files spooled to
+``JOBS_SPOOL_DIR``) is stored on a ``Job`` and replayed later as the same
+user by a worker, which keeps the JSON response as ``job.result`` or, for a
+file download, a ``StoredFile`` served from ``/api/admin/jobs/<id>/download/``.
+Other code can queue a registered task directly with ``enqueue(kind, payload)``.
+
+The ``Job`` table is the queue: a job is claimed by flipping its
+status from pending to running in a single UPDATE, so any number of
+workers on any database can share it. Who runs jobs is ``JOBS_RUNNER``:
+
+- ``'thread'`` (default): a daemon thread in the web process, started when
+  the enqueuing transaction commits. Needs nothing else running. A job
+  whose web process stopped under it is requeued (or failed, after
+  ``JOBS_MAX_ATTEMPTS``) by the first request a web process on the same
+  host serves, see ``recover_thread_jobs``. Jobs left by a host that
+  never comes back need ``run_workers`` and its stale-heartbeat check.
+- ``'workers'``: ``manage.py run_workers`` processes. With
+  ``JOBS_QUEUE_BACKEND = 'redis'`` new job ids are also pushed to a Redis
+  list so idle workers wake at once instead of on their next poll.
+
+A job reports progress with ``progress(current, total, message)``, a no-op
+outside jobs; updates are written at most every ``JOBS_PROGRESS_SECONDS``
+and pushed to the owner's ``notifications_<user id>`` Channels group as
+``{"type": "job_progress", "job": {...}}``, together with every status
+change. ``progress`` raises ``JobCancelled`` once a cancel was requested.
+A retried request with the same ``Idempotency-Key`` header gets the
+existing job back.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# Task name -> callable taking the Job; its return value becomes job.result
+TASKS = {
+    'request': 'admin_api.jobs.replay_request',
+    'questions.import': 'admin_api.question_import.run_import_task',
+    'stripe.events': 'admin_api.stripe_inbox.run_inbox_task',
+}
+FINISHED = ('completed', 'failed', 'cancelled')
+ASYNC_PARAM = 'async'
+
+_current_job = contextvars.ContextVar('current_job', default=None)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    """Task failure that still carries a result (e.g. a 400 response body)"""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def current_job():
+    return _current_job.get()
+
+
+# ==================== QUEUE ====================
+
+def enqueue(kind, payload=None, user=None, name='', idempotency_key=None):
+    """Queue a ``kind`` task; returns ``(job, created)``"""
+    from admin_api.models import Job
+
+    if kind not in TASKS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    if idempotency_key:
+        existing = Job.objects.filter(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing, False
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                kind=kind, name=name[:255], payload=payload or {},
+                created_by=user, idempotency_key=idempotency_key or None)
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        # The same key won a race with us
+        return Job.objects.get(idempotency_key=idempotency_key), False
+    transaction.on_commit(lambda: dispatch(job.id))
+    return job, True
+
+
+def dispatch(job_id):
+    """Hand a committed job to whatever runs jobs"""
+    if setting('JOBS_RUNNER', 'thread') == 'thread':
+        threading.Thread(target=run_in_thread, args=(job_id,), daemon=True).start()
+    elif setting('JOBS_QUEUE_BACKEND', 'db') == 'redis':
+        from django_redis import get_redis_connection
+
+        try:
+            get_redis_connection('default').lpush(setting('JOBS_REDIS_KEY', 'jobs:queue'), job_id)
+        except Exception as e:
+            # Workers still find it on their next poll of the table
+            logger.warning('Could not signal job %s through Redis: %s', job_id, e)
+
+
+def visible_to(user):
+    """The jobs ``user`` may see: their own, or everyone's for admins"""
+    from admin_api.models import Job
+
+    queryset = Job.objects.select_related('created_by')
+    if not (user.is_staff or getattr(user, 'role', None) == 'admin'):
+        queryset = queryset.filter(created_by=user)
+    return queryset
+
+
+def wait_for_work(timeout):
+    """Block until a job may be waiting (Redis signal) or ``timeout`` passes"""
+    if setting('JOBS_QUEUE_BACKEND', 'db') == 'redis':
+        from django_redis import get_redis_connection
+
+        try:
+            get_redis_connection('default').brpop(
+                setting('JOBS_REDIS_KEY', 'jobs:queue'), timeout=max(int(timeout), 1))
+            return
+        except Exception as e:
+            logger.warning('Redis wait failed, polling instead: %s', e)
+    time.sleep(timeout)
+
+
+def claim(job_id, worker):
+    """Atomically move a pending job to running; False if someone else got it"""
+    from django.db.models import F
+    from admin_api.models import Job
+
+    now = timezone.now()
+    return Job.objects.filter(pk=job_id, status='pending').update(
+        status='running', worker=worker[:100], started_at=now, heartbeat_at=now,
+        attempts=F('attempts') + 1) == 1
+
+
+def claim_next(limit, worker):
+    """Claim up to ``limit`` of the oldest pending jobs; returns their ids"""
+    from admin_api.models import Job
+
+    claimed = []
+    if limit <= 0:
+        return claimed
+    candidates = Job.objects.filter(status='pending').order_by('id').values_list('id', flat=True)
+    for job_id in candidates[:limit * 4]:
+        if claim(job_id, worker):
+            claimed.append(job_id)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def heartbeat(job_ids):
+    from admin_api.models import Job
+
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids, status='running').update(heartbeat_at=timezone.now())
+
+
+def requeue_stale():
+    """Jobs whose worker stopped reporting go back to pending, or fail after JOBS_MAX_ATTEMPTS"""
+    from admin_api.models import Job
+
+    cutoff = timezone.now() - timedelta(seconds=setting('JOBS_STALE_SECONDS', 300))
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=cutoff)
+    retried = stale.filter(attempts__lt=setting('JOBS_MAX_ATTEMPTS', 1), cancel_requested=False).update(
+        status='pending', worker='')
+    failed = stale.update(
+        status='failed', finished_at=timezone.now(), error='Worker stopped responding')
+    if retried or failed:
+        logger.warning('Stale jobs: %s requeued, %s failed', retried, failed)
+    return retried, failed
+
+
+def _thread_runner_gone(worker):
+    """Whether the web process named in a thread runner's ``worker`` has exited"""
+    host, pid = worker.split(':')[:2]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    pid = int(pid)
+    if pid == os.getpid():
+        # Only called before this process has run anything; a restarted
+        # container reuses its pids
+        return True
+    if os.name == 'nt':
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def recover_thread_jobs():
+    """
+    ``JOBS_RUNNER = 'thread'``: requeue the running jobs whose web process on
+    this host has exited, or fail them after JOBS_MAX_ATTEMPTS, then
+    dispatch every pending job again. Run once per web process.
+    """
+    from admin_api.models import Job
+
+    running = Job.objects.filter(status='running', worker__endswith=':thread')
+    orphaned = [job_id for job_id, worker in running.values_list('id', 'worker')
+                if _thread_runner_gone(worker)]
+    if orphaned:
+        orphans = Job.objects.filter(pk__in=orphaned, status='running')
+        retried = orphans.filter(attempts__lt=setting('JOBS_MAX_ATTEMPTS', 1), cancel_requested=False).update(
+            status='pending', worker='')
+        failed = orphans.update(
+            status='failed', finished_at=timezone.now(), error='Web process stopped while running the job')
+        logger.warning('Orphaned thread jobs: %s requeued, %s failed', retried, failed)
+    for job_id in Job.objects.filter(status='pending').order_by('id').values_list('id', flat=True):
+        dispatch(job_id)
+
+
+def recover_in_thread():
+    try:
+        recover_thread_jobs()
+    except Exception:
+        logger.exception('Could not recover background jobs')
+    finally:
+        connections.close_all()
+
+
+def prune(days=None):
+    """Delete finished jobs (and their output files) older than ``days``"""
+    from admin_api.models import Job, StoredFile
+
+    days = days if days is not None else setting('JOBS_RETENTION_DAYS', 30)
+    old = Job.objects.filter(status__in=FINISHED, finished_at__lt=timezone.now() - timedelta(days=days))
+    file_ids = list(old.exclude(result_file=None).values_list('result_file_id', flat=True))
+    deleted, _ = old.delete()
+    StoredFile.objects.filter(pk__in=file_ids).delete()
+    return deleted
+
+
+# ==================== RUNNING ====================
+
+def run_job(job_id):
+    """Run a claimed job to completion and record the outcome"""
+    from admin_api.models import Job
+
+    job = Job.objects.select_related('created_by').get(pk=job_id)
+    job._last_progress = 0
+    notify(job)
+    token = _current_job.set(job)
+    try:
+        if job.cancel_requested:
+            raise JobCancelled()
+        result = import_string(TASKS[job.kind])(job)
+        finish(job, 'completed', result=result)
+    except JobCancelled:
+        finish(job, 'cancelled', error='Cancelled')
+    except JobFailed as e:
+        finish(job, 'failed', result=e.result, error=str(e))
+    except Exception as e:
+        logger.exception('Job %s (%s) failed', job_id, job.kind)
+        finish(job, 'failed', error=str(e) or e.__class__.__name__)
+    finally:
+        _current_job.reset(token)
+    return job.status
+
+
+def run_in_thread(job_id):
+    """``JOBS_RUNNER = 'thread'``: claim and run one job, then drop this thread's connections"""
+    try:
+        if claim(job_id, f'{socket.gethostname()}:{os.getpid()}:thread'):
+            run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_claimed_job(job_id):
+    """Entry point in ``run_workers`` pool processes"""
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def init_worker_process():
+    """``ProcessPoolExecutor`` initializer: spawned workers start without Django"""
+    import django
+
+    django.setup()
+
+
+def finish(job, status, result=None, error=''):
+    from admin_api.models import Job
+
+    now = timezone.now()
+    job.status, job.result, job.error, job.finished_at = status, result, error, now
+    if status == 'completed' and job.progress_total:
+        job.progress_current = job.progress_total
+    Job.objects.filter(pk=job.pk).update(
+        status=status, result=result, error=error, finished_at=now, heartbeat_at=now,
+        progress_current=job.progress_current, progress_total=job.progress_total,
+        progress_message=job.progress_message)
+    notify(job)
+
+
+def fail(job_id, error):
+    """Record a job whose worker process died under it"""
+    from admin_api.models import Job
+
+    Job.objects.filter(pk=job_id, status='running').update(
+        status='failed', error=error, finished_at=timezone.now())
+
+
+def progress(current, total=None, message=''):
+    """Report progress of the running job (no-op outside one)"""
+    from admin_api.models import Job
+
+    job = _current_job.get()
+    if job is None:
+        return
+    job.progress_current = current
+    if total is not None:
+        job.progress_total = total
+    if message:
+        job.progress_message = message[:255]
+    now = time.monotonic()
+    done = job.progress_total is not None and current >= job.progress_total
+    if not done and now - job._last_progress < setting('JOBS_PROGRESS_SECONDS', 1):
+        return
+    job._last_progress = now
+    Job.objects.filter(pk=job.pk).update(
+        progress_current=job.progress_current, progress_total=job.progress_total,
+        progress_message=job.progress_message, heartbeat_at=timezone.now())
+    notify(job)
+    if Job.objects.filter(pk=job.pk, cancel_requested=True).exists():
+        raise JobCancelled()
+
+
+def job_message(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'name': job.name,
+        'status': job.status,
+        'progress_current': job.progress_current,
+        'progress_total': job.progress_total,
+        'progress_percent': job.progress_percent,
+        'progress_message': job.progress_message,
+        'error': job.error,
+        'result_file': job.result_file_id,
+    }
+
+
+def notify(job):
+    """Push the job's state to its owner's NotificationConsumer group"""
+    if job.created_by_id is None:
+        return
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(
+            f'notifications_{job.created_by_id}',
+            {'type': 'job_progress', 'job': job_message(job)})
+    except Exception as e:
+        # A missing channel layer must not fail the job
+        logger.debug('Job %s progress not pushed: %s', job.id, e)
+
+
+# ==================== ASYNC API REQUESTS ====================
+
+def async_requested(request):
+    return (request.query_params.get(ASYNC_PARAM) in ('1', 'true')
+            and _current_job.get() is None)
+
+
+def allow_async(view):
+    """Let a DRF view or viewset action run as a job when called with ``?async=1``"""
+    from rest_framework.request import Request
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next((arg for arg in args if isinstance(arg, Request)), None)
+        if request is None or not async_requested(request):
+            return view(*args, **kwargs)
+        job, _ = enqueue_request(request)
+        return accepted_response(job)
+
+    return wrapper
+
+
+def accepted_response(job):
+    from rest_framework import status
+    from rest_framework.response import Response
+
+    return Response({
+        'message': 'Queued' if job.status == 'pending' else f'Job already {job.status}',
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/admin/jobs/{job.id}/',
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def spool_files(request):
+    """Copy the request's uploads to a job directory; returns their descriptions"""
+    if not request.FILES:
+        return []
+    directory = os.path.join(setting('JOBS_SPOOL_DIR', os.path.join(settings.MEDIA_ROOT, 'jobs')),
+                             uuid.uuid4().hex)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for field in request.FILES:
+        for index, uploaded in enumerate(request.FILES.getlist(field)):
+            path = os.path.join(directory, f'{index}_{os.path.basename(uploaded.name)}')
+            with open(path, 'wb') as destination:
+                for chunk in uploaded.chunks():
+                    destination.write(chunk)
+            files.append({'field': field, 'path': path, 'name': uploaded.name,
+                          'content_type': uploaded.content_type or ''})
+    return files
+
+
+def enqueue_request(request):
+    """Store ``request`` as a 'request' job replayed by ``replay_request``"""
+    files = spool_files(request)
+    # Form posts keep every value of a field and are replayed as multipart
+    form = bool(files) or hasattr(request.data, 'getlist')
+    if form:
+        data = {key: request.data.getlist(key) for key in request.data if key not in request.FILES}
+    else:
+        data = request.data
+    query = [(key, value) for key, values in request.query_params.lists()
+             if key != ASYNC_PARAM for value in values]
+    key = request.headers.get('Idempotency-Key')
+    return enqueue(
+        'request',
+        {'method': request.method, 'path': request.path, 'query': query,
+         'format': 'multipart' if form else 'json', 'data': data, 'files': files},
+        user=request.user,
+        name=f'{request.method} {request.path}',
+        idempotency_key=f'{request.user.pk}:{key}' if key else None,
+    )
+
+
+_FILENAME = re.compile(r'filename="?([^";]+)"?')
+
+
+def replay_request(job):
+    """Task for 'request' jobs: call the view again, as the job's owner"""
+    from django.urls import resolve
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from admin_api import file_storage
+
+    payload = job.payload
+    url = payload['path'] + ('?' + urlencode(payload['query']) if payload['query'] else '')
+    method = payload['method'].lower()
+    handles = []
+    try:
+        if method in ('get', 'head'):
+            request = getattr(APIRequestFactory(), method)(url)
+        elif payload['format'] == 'multipart':
+            data = dict(payload['data'])
+            for spooled in payload['files']:
+                handle = open(spooled['path'], 'rb')
+                handles.append(handle)
+                data.setdefault(spooled['field'], []).append(handle)
+            request = getattr(APIRequestFactory(), method)(url, data, format='multipart')
+        else:
+            request = getattr(APIRequestFactory(), method)(url, payload['data'], format='json')
+        force_authenticate(request, user=job.created_by)
+        match = resolve(payload['path'])
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    finally:
+        for handle in handles:
+            handle.close()
+        if payload['files']:
+            shutil.rmtree(os.path.dirname(payload['files'][0]['path']), ignore_errors=True)
+
+    result = {'status_code': response.status_code}
+    content_type = response.get('Content-Type', '')
+    if isinstance(response, Response) or content_type.startswith('application/json'):
+        result['data'] = json.loads(response.content or b'null')
+    else:
+        match = _FILENAME.search(response.get('Content-Disposition', ''))
+        filename = match.group(1) if match else f'job_{job.id}'
+        with tempfile.NamedTemporaryFile(delete=False) as output:
+            chunks = response.streaming_content if response.streaming else [response.content]
+            for chunk in chunks:
+                output.write(chunk)
+        try:
+            stored = file_storage.store_path(output.name, filename, content_type, job.created_by)
+        finally:
+            os.remove(output.name)
+            response.close()
+        job.result_file = stored
+        type(job).objects.filter(pk=job.pk).update(result_file=stored)
+        result['file'] = {'id': stored.id, 'name': stored.original_name, 'size': stored.size}
+
+    if response.status_code >= 400:
+        data = result.get('data')
+        message = data.get('error') or data.get('detail') if isinstance(data, dict) else None
+        raise JobFailed(message or f'HTTP {response.status_code}', result)
+    return result
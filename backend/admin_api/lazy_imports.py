@@ -0,0 +1,87 @@
+"""
+Deferred imports of heavy optional libraries
+
+pandas, openpyxl and stripe together add about half a second to every
+process that imports the URL conf (each web worker, every management
+command), although only a handful of import/export and payment endpoints
+use them. Modules bind them with::
+
+    openpyxl = lazy_module('openpyxl')
+
+and the real import happens on first attribute access (``openpyxl.Workbook``).
+Names imported from inside such packages (``from openpyxl.styles import
+Font``) are imported in the functions that use them instead, and URL
+patterns for whole view modules that are rarely hit can point at
+``lazy_view('admin_api.payment_views.stripe_webhook')``.
+
+``manage.py check_import_time`` reports what importing the URL conf costs
+and fails when it goes over budget or pulls in one of ``HEAVY_MODULES``.
+"""
+import importlib
+import types
+
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'reportlab', 'stripe')
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name, on_load=None):
+        super().__init__(name)
+        self.__dict__['_on_load'] = on_load
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            if self._on_load is not None:
+                self._on_load(module)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name, on_load=None):
+    """
+    ``name`` as a module imported on first use; ``on_load(module)`` runs
+    once after the import (e.g. to configure an API key)
+    """
+    return LazyModule(name, on_load)
+
+
+def lazy_view(dotted_path):
+    """
+    URL pattern callback that imports the view at ``dotted_path`` on the
+    first request it serves, so the view's module (and whatever it imports)
+    stays out of worker startup. Meant for DRF function views, which do
+    their own CSRF handling: the wrapper is marked ``csrf_exempt`` because
+    the middleware inspects it before the real view is known.
+    """
+    module_path, name = dotted_path.rsplit('.', 1)
+    resolved = []
+
+    def view(request, *args, **kwargs):
+        if not resolved:
+            resolved.append(getattr(importlib.import_module(module_path), name))
+        return resolved[0](request, *args, **kwargs)
+
+    view.__name__ = name
+    view.__qualname__ = name
+    view.__module__ = module_path
+    view.lazy_view_path = dotted_path
+    view.csrf_exempt = True
+    return view
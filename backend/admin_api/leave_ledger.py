@@ -0,0 +1,323 @@
+"""
+Leave balance ledger
+
+Every change to an employee's leave balance is recorded as a signed
+``LeaveLedgerEntry`` and applied to ``EmployeeLeaveBalance`` in the same
+transaction, so balances are read with a single query instead of being
+recomputed from applications.
+
+- Opening allocations come from ``LeaveDefine`` (a definition whose role
+  matches the employee's designation wins over the blank "all roles" one).
+- Approving an application posts ``usage`` entries, one per calendar year
+  the leave touches; rejecting or cancelling an approved application posts
+  the matching ``reversal``.
+- ``reconcile`` recomputes usage from approved applications and reports
+  (or fixes) balances that drifted, e.g. after status edits made outside
+  these transitions.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from admin_api.models import (
+    Employee, EmployeeLeaveBalance, LeaveApplication, LeaveDefine,
+    LeaveLedgerEntry, LeaveType
+)
+
+
+ZERO = Decimal('0.0')
+
+
+class LeaveTransitionError(Exception):
+    """The application is not in a state that allows the transition"""
+
+
+# ==================== DAYS & ALLOCATIONS ====================
+
+def leave_days_by_year(from_date, to_date):
+    """Calendar days of a leave (end date inclusive) split by year"""
+    days = {}
+    for year in range(from_date.year, to_date.year + 1):
+        start = max(from_date, date(year, 1, 1))
+        end = min(to_date, date(year, 12, 31))
+        if end >= start:
+            days[year] = Decimal((end - start).days + 1)
+    return days
+
+
+def allocation_map():
+    """``{(role, leave_type_id): days_allowed}`` from ``LeaveDefine`` in one query"""
+    allocations = {}
+    for role, leave_type_id, days in LeaveDefine.objects.order_by('created_at').values_list(
+            'role', 'leave_type_id', 'days_allowed'):
+        allocations[((role or '').strip().lower(), leave_type_id)] = Decimal(days or 0)
+    return allocations
+
+
+def allocation_for(allocations, role, leave_type_id):
+    role = (role or '').strip().lower()
+    if role and (role, leave_type_id) in allocations:
+        return allocations[(role, leave_type_id)]
+    return allocations.get(('', leave_type_id), ZERO)
+
+
+def ensure_balances(year, employee_ids=None, user=None):
+    """
+    Create missing ``EmployeeLeaveBalance`` rows for ``year`` (all active
+    employees, or ``employee_ids``) with their opening allocation, posting
+    an ``allocation`` entry for each. Returns the number of rows created.
+    """
+    employees = Employee.objects.all()
+    if employee_ids is None:
+        employees = employees.filter(is_active=True)
+    else:
+        employees = employees.filter(id__in=employee_ids)
+    employees = list(employees.values_list('id', 'designation__title'))
+    leave_type_ids = list(LeaveType.objects.values_list('id', flat=True))
+
+    existing = set(
+        EmployeeLeaveBalance.objects.filter(
+            year=year, employee_id__in=[employee_id for employee_id, _ in employees])
+        .values_list('employee_id', 'leave_type_id')
+    )
+    allocations = allocation_map()
+
+    balances = []
+    entries = []
+    for employee_id, role in employees:
+        for leave_type_id in leave_type_ids:
+            if (employee_id, leave_type_id) in existing:
+                continue
+            allocated = allocation_for(allocations, role, leave_type_id)
+            balances.append(EmployeeLeaveBalance(
+                employee_id=employee_id, leave_type_id=leave_type_id,
+                year=year, total_allocated=allocated))
+            if allocated:
+                entries.append(LeaveLedgerEntry(
+                    employee_id=employee_id, leave_type_id=leave_type_id, year=year,
+                    entry_type='allocation', days=allocated,
+                    note='Opening allocation', created_by=user))
+
+    with transaction.atomic():
+        EmployeeLeaveBalance.objects.bulk_create(balances, batch_size=1000, ignore_conflicts=True)
+        LeaveLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(balances)
+
+
+# ==================== POSTING ====================
+
+def _post(entries, user=None):
+    """
+    Persist usage/reversal/adjustment ``entries`` and add their days to
+    ``EmployeeLeaveBalance.used``. Must run inside a transaction.
+    """
+    deltas = {}
+    for entry in entries:
+        key = (entry.employee_id, entry.leave_type_id, entry.year)
+        deltas[key] = deltas.get(key, ZERO) + entry.days
+    if not deltas:
+        return
+
+    by_year = {}
+    for employee_id, _, year in deltas:
+        by_year.setdefault(year, set()).add(employee_id)
+    for year, employee_ids in by_year.items():
+        ensure_balances(year, employee_ids, user)
+
+    for (employee_id, leave_type_id, year), days in deltas.items():
+        EmployeeLeaveBalance.objects.filter(
+            employee_id=employee_id, leave_type_id=leave_type_id, year=year
+        ).update(used=F('used') + days)
+    LeaveLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def _transition(application_ids, to_status, allowed_from, user=None, **changes):
+    """
+    Move applications in ``allowed_from`` to ``to_status`` and post the
+    balance entries the change implies, atomically. Applications in any
+    other state are skipped. Returns the ids that changed.
+    """
+    with transaction.atomic():
+        applications = list(
+            LeaveApplication.objects.select_for_update()
+            .filter(id__in=application_ids, status__in=allowed_from)
+            .values('id', 'applicant_id', 'leave_type_id', 'from_date', 'to_date', 'status')
+        )
+        entries = []
+        for application in applications:
+            if to_status == 'approved':
+                entry_type, sign = 'usage', 1
+            elif application['status'] == 'approved':
+                entry_type, sign = 'reversal', -1
+            else:
+                continue
+            for year, days in leave_days_by_year(
+                    application['from_date'], application['to_date']).items():
+                entries.append(LeaveLedgerEntry(
+                    employee_id=application['applicant_id'],
+                    leave_type_id=application['leave_type_id'],
+                    year=year,
+                    entry_type=entry_type,
+                    days=sign * days,
+                    application_id=application['id'],
+                    note=f'Leave {to_status}',
+                    created_by=user,
+                ))
+
+        changed = [application['id'] for application in applications]
+        LeaveApplication.objects.filter(id__in=changed).update(status=to_status, **changes)
+        _post(entries, user)
+    return changed
+
+
+def approve(application_ids, user):
+    return _transition(
+        application_ids, 'approved', ('pending',), user,
+        approved_by=user, approved_at=timezone.now())
+
+
+def reject(application_ids, user):
+    return _transition(
+        application_ids, 'rejected', ('pending', 'approved'), user,
+        approved_by=user, approved_at=timezone.now())
+
+
+def cancel(application_ids, user=None):
+    return _transition(application_ids, 'cancelled', ('pending', 'approved'), user)
+
+
+def transition_one(application, action, user):
+    """Run ``approve``/``reject``/``cancel`` for one application and refresh it"""
+    handlers = {'approve': approve, 'reject': reject, 'cancel': cancel}
+    if not handlers[action]([application.id], user):
+        raise LeaveTransitionError(
+            f'Cannot {action} a leave application that is {application.status}')
+    application.refresh_from_db()
+    return application
+
+
+# ==================== READING ====================
+
+BALANCE_FIELDS = ('leave_type_id', 'leave_type__name', 'total_allocated', 'carried_forward', 'used')
+
+
+def _balance_row(row):
+    allocated = row['total_allocated'] + row['carried_forward']
+    return {
+        'leave_type_id': row['leave_type_id'],
+        'leave_type': row['leave_type__name'],
+        'annual_allocation': float(row['total_allocated']),
+        'carried_forward': float(row['carried_forward']),
+        'used': float(row['used']),
+        'balance': float(allocated - row['used']),
+    }
+
+
+def employee_balances(employee_id, year):
+    """Balances for one employee and year, seeded on first access"""
+    rows = list(
+        EmployeeLeaveBalance.objects.filter(employee_id=employee_id, year=year)
+        .values(*BALANCE_FIELDS).order_by('leave_type__name')
+    )
+    if not rows and ensure_balances(year, [employee_id]):
+        return employee_balances(employee_id, year)
+    return [_balance_row(row) for row in rows]
+
+
+def organisation_report(year, department_id=None):
+    """Balances of every active employee for ``year`` from a single query"""
+    balances = EmployeeLeaveBalance.objects.filter(year=year, employee__is_active=True)
+    if department_id:
+        balances = balances.filter(employee__department_id=department_id)
+    rows = balances.values(
+        'employee_id', 'employee__employee_id', 'employee__name',
+        'employee__department__name', 'employee__designation__title', *BALANCE_FIELDS
+    ).order_by('employee__name', 'employee_id', 'leave_type__name')
+
+    report = []
+    current = None
+    for row in rows.iterator(chunk_size=2000):
+        if current is None or current['staff_id'] != row['employee_id']:
+            current = {
+                'staff_id': row['employee_id'],
+                'employee_id': row['employee__employee_id'] or '',
+                'name': row['employee__name'],
+                'department': row['employee__department__name'] or '',
+                'designation': row['employee__designation__title'] or '',
+                'balances': [],
+            }
+            report.append(current)
+        current['balances'].append(_balance_row(row))
+    return report
+
+
+# ==================== RECONCILIATION ====================
+
+def history_usage(year):
+    """``{(employee_id, leave_type_id): days}`` recomputed from approved applications"""
+    usage = {}
+    approved = LeaveApplication.objects.filter(
+        status='approved', from_date__lte=date(year, 12, 31), to_date__gte=date(year, 1, 1)
+    ).values_list('applicant_id', 'leave_type_id', 'from_date', 'to_date')
+    for employee_id, leave_type_id, from_date, to_date in approved.iterator(chunk_size=2000):
+        days = leave_days_by_year(from_date, to_date).get(year, ZERO)
+        key = (employee_id, leave_type_id)
+        usage[key] = usage.get(key, ZERO) + days
+    return usage
+
+
+def reconcile(year, fix=False, user=None):
+    """
+    Compare each balance's ``used`` with the ledger and with approved
+    application history for ``year``. Returns the drifted rows; with
+    ``fix`` an ``adjustment`` entry brings the ledger back to history and
+    the balance is set to match.
+    """
+    history = history_usage(year)
+    ledger = {
+        (row['employee_id'], row['leave_type_id']): row['total']
+        for row in LeaveLedgerEntry.objects.filter(year=year).exclude(entry_type='allocation')
+        .values('employee_id', 'leave_type_id').annotate(total=Sum('days')).order_by()
+    }
+    balances = {
+        (row['employee_id'], row['leave_type_id']): row['used']
+        for row in EmployeeLeaveBalance.objects.filter(year=year)
+        .values('employee_id', 'leave_type_id', 'used')
+    }
+
+    drift = []
+    for key in sorted(set(history) | set(ledger) | set(balances)):
+        expected = history.get(key, ZERO)
+        recorded = balances.get(key)
+        posted = ledger.get(key, ZERO)
+        if recorded == expected and posted == expected:
+            continue
+        drift.append({
+            'employee_id': key[0],
+            'leave_type_id': key[1],
+            'year': year,
+            'balance_used': float(recorded) if recorded is not None else None,
+            'ledger_used': float(posted),
+            'history_used': float(expected),
+        })
+
+    if fix and drift:
+        with transaction.atomic():
+            ensure_balances(year, {row['employee_id'] for row in drift}, user)
+            entries = []
+            for row in drift:
+                expected = Decimal(str(row['history_used']))
+                difference = expected - Decimal(str(row['ledger_used']))
+                if difference:
+                    entries.append(LeaveLedgerEntry(
+                        employee_id=row['employee_id'], leave_type_id=row['leave_type_id'],
+                        year=year, entry_type='adjustment', days=difference,
+                        note='Reconciled with approved applications', created_by=user))
+                EmployeeLeaveBalance.objects.filter(
+                    employee_id=row['employee_id'], leave_type_id=row['leave_type_id'], year=year
+                ).update(used=expected)
+            LeaveLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+    return drift
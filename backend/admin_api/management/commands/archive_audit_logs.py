@@ -0,0 +1,76 @@
+"""
+Move old AuditLog rows to monthly archive files.
+
+Usage:
+    python manage.py archive_audit_logs                 # older than AUDIT_LOG_RETENTION_DAYS
+    python manage.py archive_audit_logs --days 90 --dry-run
+
+Rows older than the cutoff are appended, one JSON object per line, to
+``<AUDIT_LOG_ARCHIVE_DIR>/audit_log_<YYYY>_<MM>.jsonl.gz`` for the month of
+their timestamp and then deleted, a batch at a time, so the table stays at
+roughly the retention window whatever the traffic. A batch is deleted only
+after it has been written and flushed to its archive file.
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from admin_api.models_audit import AuditLog
+
+
+class Command(BaseCommand):
+    help = 'Archive audit log rows older than the retention window to gzipped JSONL files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', 180),
+                            help='Keep this many days of audit log in the table')
+        parser.add_argument('--output-dir',
+                            default=getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', 'audit_archive'))
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many rows would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = AuditLog.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} audit log rows older than {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        fields = [field.attname for field in AuditLog._meta.concrete_fields]
+        archived = 0
+        files = set()
+        while True:
+            rows = list(expired.order_by('id').values(*fields)[:options['batch_size']])
+            if not rows:
+                break
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row['timestamp'].strftime('%Y_%m'), []).append(row)
+            for month, month_rows in by_month.items():
+                path = os.path.join(options['output_dir'], f'audit_log_{month}.jsonl.gz')
+                # Appending adds a gzip member; readers see one stream
+                with gzip.open(path, 'at', encoding='utf-8') as handle:
+                    for row in month_rows:
+                        handle.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                files.add(path)
+            with transaction.atomic():
+                AuditLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            archived += len(rows)
+            self.stdout.write(f'  archived {archived} rows')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} audit log rows older than {cutoff:%Y-%m-%d} to {len(files)} file(s) '
+            f"in {options['output_dir']}"))
@@ -0,0 +1,122 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from admin_api.exam_grading import grade_online_exam
+from admin_api.models import (
+    Class, ExamSession, OnlineExam, Question, QuestionAnswer, Student,
+    Subject, User
+)
+from decimal import Decimal
+import random
+import time
+
+
+class _Rollback(Exception):
+    """Raised to discard the synthetic data once the benchmark has run"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the online exam auto-grading engine on synthetic answer sheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--questions', type=int, default=50)
+        parser.add_argument('--multi-select', type=float, default=0.2,
+                            help='Fraction of questions with several correct options')
+        parser.add_argument('--negative-ratio', type=Decimal, default=Decimal('0.25'))
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the synthetic data instead of rolling it back')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+
+        try:
+            with transaction.atomic():
+                exam = self._build_exam(options)
+                sheets = options['students'] * options['questions']
+                self.stdout.write(
+                    f"Grading {options['students']} students x "
+                    f"{options['questions']} questions ({sheets} answers)...")
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    summary = grade_online_exam(exam, chunk_size=options['chunk_size'])
+                    elapsed = time.perf_counter() - started
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"Graded {summary['graded_count']} answers for "
+                    f"{summary['students_graded']} students in {elapsed:.3f}s "
+                    f"using {len(queries)} queries "
+                    f"({summary['graded_count'] / elapsed if elapsed else 0:.0f} answers/s)"))
+
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            self.stdout.write('Synthetic data rolled back')
+
+    def _build_exam(self, options):
+        tag = f"bench{int(time.time())}"
+        letters = ['A', 'B', 'C', 'D']
+
+        subject = Subject.objects.create(code=f'{tag}-SUB', title='Benchmark Subject')
+        class_obj = Class.objects.create(name=f'{tag} Class', room='-')
+        exam = OnlineExam.objects.create(
+            title=f'{tag} Exam',
+            class_assigned=class_obj,
+            subject=subject,
+            start_datetime=timezone.now(),
+            end_datetime=timezone.now(),
+            auto_mark=True,
+            negative_mark_ratio=options['negative_ratio'],
+        )
+
+        questions = []
+        for i in range(options['questions']):
+            if random.random() < options['multi_select']:
+                correct = ','.join(sorted(random.sample(letters, 2)))
+            else:
+                correct = random.choice(letters)
+            opts = {letter: f'Option {letter}' for letter in letters}
+            opts['correct'] = correct
+            questions.append(Question(
+                question_text=f'{tag} question {i}',
+                question_type='mcq',
+                options=opts,
+                marks=random.choice([1, 2, 4]),
+                subject=subject,
+                class_assigned=class_obj,
+            ))
+        questions = Question.objects.bulk_create(questions)
+        exam.questions.add(*questions)
+
+        users = User.objects.bulk_create([
+            User(username=f'{tag}_{i}', email=f'{tag}_{i}@bench.local', role='student')
+            for i in range(options['students'])
+        ])
+        students = Student.objects.bulk_create([
+            Student(user=user, roll_no=f'{tag}-{i}', class_name=class_obj.name,
+                    school_class=class_obj)
+            for i, user in enumerate(users)
+        ])
+        sessions = ExamSession.objects.bulk_create([
+            ExamSession(online_exam=exam, student=student, is_submitted=True, is_active=False)
+            for student in students
+        ])
+
+        answers = []
+        for session in sessions:
+            for question in questions:
+                roll = random.random()
+                if roll < 0.6:
+                    selected = question.options['correct']
+                elif roll < 0.9:
+                    selected = random.choice(letters)
+                else:
+                    selected = ''
+                answers.append(QuestionAnswer(
+                    session=session, question=question, selected_option=selected))
+        QuestionAnswer.objects.bulk_create(answers, batch_size=5000)
+        return exam
@@ -0,0 +1,132 @@
+"""
+Measure what importing the URL conf costs a fresh worker and fail when it
+goes over the startup budget.
+
+Usage:
+    python manage.py check_import_time                  # budget from IMPORT_TIME_BUDGET_MS
+    python manage.py check_import_time --top 40 --repeat 5
+    python manage.py check_import_time --include-setup  # also list django.setup() imports
+
+Each measurement runs in a new interpreter: ``django.setup()`` and then the
+URL conf with every ``include()``, which is what a gunicorn/daphne worker
+does before serving its first request. The budget is checked against the
+fastest of ``--repeat`` plain runs; one more run under ``python -X importtime``
+gives the per-module breakdown (self and cumulative microseconds, as
+reported by CPython). The check also fails when the URL conf pulls in one
+of ``admin_api.lazy_imports.HEAVY_MODULES``.
+"""
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_api.lazy_imports import HEAVY_MODULES
+
+
+MARKER = '-- check_import_time: urlconf --'
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+loaded = set(sys.modules)
+sys.stderr.write({MARKER!r} + '\\n')
+sys.stderr.flush()
+from django.urls import get_resolver
+get_resolver().url_patterns
+done = time.perf_counter()
+print(json.dumps({{
+    'setup_ms': (setup_done - start) * 1000,
+    'urlconf_ms': (done - setup_done) * 1000,
+    'new_modules': sorted(set(sys.modules) - loaded),
+}}))
+"""
+
+
+def run_probe(importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    result = subprocess.run(command + ['-c', PROBE], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise CommandError(f'Import probe failed:\n{result.stderr[-4000:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr, include_setup=False):
+    """``[(name, self_us, cumulative_us, depth)]`` from ``-X importtime`` output"""
+    modules = []
+    in_urlconf = include_setup
+    for line in stderr.splitlines():
+        if line == MARKER:
+            in_urlconf = True
+            continue
+        if not in_urlconf or not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative), depth))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Report per-module import cost of the URL conf and fail over the startup budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float,
+                            default=getattr(settings, 'IMPORT_TIME_BUDGET_MS', 800),
+                            help='Maximum milliseconds to import the URL conf')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Timed runs; the fastest is compared with the budget')
+        parser.add_argument('--top', type=int, default=25,
+                            help='Modules to list, by cumulative import time')
+        parser.add_argument('--include-setup', action='store_true',
+                            help='Also list modules imported by django.setup()')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the measurements as JSON')
+
+    def handle(self, *args, **options):
+        runs = [run_probe()[0] for _ in range(max(options['repeat'], 1))]
+        best = min(runs, key=lambda run: run['urlconf_ms'])
+        _, stderr = run_probe(importtime=True)
+        modules = parse_importtime(stderr, options['include_setup'])
+        heavy = sorted({
+            name.split('.')[0] for name in best['new_modules']} & set(HEAVY_MODULES))
+
+        ranked = sorted(modules, key=lambda module: module[2], reverse=True)[:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'setup_ms': round(best['setup_ms'], 1),
+                'urlconf_ms': round(best['urlconf_ms'], 1),
+                'budget_ms': options['budget_ms'],
+                'heavy_modules': heavy,
+                'modules': [
+                    {'name': name, 'self_us': self_us, 'cumulative_us': cumulative}
+                    for name, self_us, cumulative, _ in ranked
+                ],
+            }, indent=2))
+        else:
+            self.stdout.write(f"{'module':60} {'self ms':>9} {'cumul. ms':>10}")
+            for name, self_us, cumulative, depth in ranked:
+                self.stdout.write(f"{'  ' * min(depth, 6) + name:60} {self_us / 1000:9.1f} {cumulative / 1000:10.1f}")
+            self.stdout.write('')
+            self.stdout.write(
+                f"django.setup(): {best['setup_ms']:.0f} ms   URL conf: {best['urlconf_ms']:.0f} ms "
+                f"(budget {options['budget_ms']:.0f} ms, fastest of {len(runs)})")
+
+        problems = []
+        if best['urlconf_ms'] > options['budget_ms']:
+            problems.append(
+                f"URL conf import took {best['urlconf_ms']:.0f} ms, budget is {options['budget_ms']:.0f} ms")
+        if heavy:
+            problems.append(
+                'URL conf imports heavy modules (bind them with lazy_module or import '
+                'them in the function that uses them): ' + ', '.join(heavy))
+        if problems:
+            raise CommandError('; '.join(problems))
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Startup import budget OK'))
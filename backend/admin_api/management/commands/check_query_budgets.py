@@ -0,0 +1,81 @@
+"""
+Replay the endpoints in ``admin_api/query_budgets.json`` against a small
+fixed dataset and fail when one runs more SQL queries than its budget.
+
+Usage: python manage.py check_query_budgets [--endpoint NAME] [--verbose]
+
+The dataset (``admin_api.query_budgets``) is created inside a transaction
+that is rolled back, so the command can run against any database. The same
+check runs under pytest in ``admin_api/tests/test_query_budgets.py``.
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from admin_api.query_budgets import build_fixture, measure
+from admin_api.query_metrics import BUDGETS_FILE, load_budgets
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Fail when an API endpoint runs more SQL queries than its budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budgets', default=BUDGETS_FILE,
+                            help='Budget file (default: admin_api/query_budgets.json)')
+        parser.add_argument('--endpoint', action='append', default=[],
+                            help='Only check endpoints whose name contains this text')
+        parser.add_argument('--verbose', action='store_true',
+                            help='Show the most repeated statements of each endpoint')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the measurements as JSON')
+
+    def handle(self, *args, **options):
+        budgets = load_budgets(options['budgets'])
+        if options['endpoint']:
+            budgets = [
+                budget for budget in budgets
+                if any(text in budget['name'] for text in options['endpoint'])
+            ]
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        results = []
+        try:
+            with transaction.atomic():
+                placeholders, users = build_fixture()
+                for budget in budgets:
+                    results.append(measure(budget, placeholders, users))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self._report(results, options['verbose'])
+
+        failures = [result for result in results if result['outcome'] != 'ok']
+        if failures:
+            raise CommandError(
+                f"{len(failures)} endpoint(s) over budget or failing: "
+                + ', '.join(result['name'] for result in failures))
+
+    def _report(self, results, verbose):
+        for result in results:
+            line = (f"{result['queries']:>4}/{result['max_queries']:<4} "
+                    f"{result['db_time_ms']:>8.2f}ms  {result['name']}")
+            if result['outcome'] == 'ok':
+                self.stdout.write(f'ok    {line}')
+            else:
+                self.stdout.write(self.style.ERROR(f"FAIL  {line}  ({result['outcome']})"))
+            if verbose or result['outcome'] != 'ok':
+                for duplicate in result['duplicates'][:3]:
+                    self.stdout.write(f"        {duplicate['count']}x {duplicate['sql'][:160]}")
+        if results and all(result['outcome'] == 'ok' for result in results):
+            self.stdout.write(self.style.SUCCESS(f'{len(results)} endpoints within their query budgets'))
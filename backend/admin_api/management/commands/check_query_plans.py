@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from admin_api.query_plans import check_plan, hot_queries
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot student/class filters and fail if any plan scans the table'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Plan assertions are written for SQLite EXPLAIN QUERY PLAN output')
+
+        failures = []
+        for label, queryset, fragment in hot_queries():
+            ok, plan = check_plan(queryset, fragment)
+            self.stdout.write(f"{'ok  ' if ok else 'FAIL'} {label}")
+            for line in plan.splitlines():
+                self.stdout.write(f'       {line}')
+            if not ok:
+                failures.append(label)
+
+        if failures:
+            raise CommandError(f"Queries without a usable index: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
@@ -0,0 +1,48 @@
+"""
+Move audit log entries queued in Redis into the AuditLog table.
+
+Only needed with ``AUDIT_LOG_BACKEND = 'redis'``; run it as a long-lived
+worker, or with ``--once`` from cron.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from admin_api import audit_log
+
+
+class Command(BaseCommand):
+    help = 'Write audit log entries queued in Redis to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling')
+        parser.add_argument('--batch-size', type=int,
+                            default=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200))
+        parser.add_argument('--interval', type=float,
+                            default=getattr(settings, 'AUDIT_LOG_FLUSH_SECONDS', 2),
+                            help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            try:
+                written = audit_log.drain_redis(options['batch_size'])
+            except Exception as e:
+                self.stderr.write(f'Failed to write audit log batch: {e}')
+                written = 0
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            finally:
+                close_old_connections()
+            total += written
+            if written:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {total} audit log entries'))
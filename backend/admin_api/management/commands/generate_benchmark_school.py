@@ -0,0 +1,457 @@
+"""
+Generate a production-sized synthetic school for load benchmarks.
+
+Usage: python manage.py generate_benchmark_school --students 50000 --years 1
+
+The same arguments (including ``--seed`` and ``--end-date``) always produce
+the same school. The large tables (attendance, grades, fees, notifications)
+are streamed in batches by ``RowWriter``: ``COPY`` on PostgreSQL, one
+``executemany`` INSERT per batch elsewhere. The smaller tables (users,
+students, classes, teachers) use ``bulk_create``. Every generated
+row carries the ``--tag`` prefix (usernames, roll numbers, class and subject
+codes), so ``--clear`` removes exactly the benchmark data and
+``run_benchmarks --tag`` can find its users again.
+
+Defaults per student and year are 100 attendance days and 40 grades, i.e.
+50k students x 1 year is 5M attendance rows and 2M grades.
+"""
+import csv
+import io
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import AutoField
+
+from admin_api import fee_rollup, grade_cube
+from admin_api.models import (
+    AcademicYear, Attendance, Class, ClassRoom, Enrollment, FeePayment,
+    FeeStructure, Grade, Notification, Student, Subject, Teacher,
+    TeacherAssignment
+)
+from users.models import User
+
+
+SUBJECTS = (
+    ('MAT', 'Mathematics'), ('ENG', 'English'), ('SCI', 'Science'), ('SOC', 'Social Studies'),
+    ('CSC', 'Computer Science'), ('ART', 'Art'), ('PHE', 'Physical Education'), ('LAN', 'Second Language'),
+)
+GRADE_TYPES = ('assignment', 'quiz', 'test', 'homework', 'project', 'midterm', 'participation', 'final')
+TERMS = ('first', 'second', 'third')
+SECTION_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+STUDENTS_PER_TEACHER = 25
+FEES_PER_YEAR = 4
+PAYMENT_METHODS = ('cash', 'online', 'bank_transfer', 'upi')
+
+
+def school_days(start, end, count):
+    """``count`` weekdays spread evenly over ``start``..``end`` (inclusive)"""
+    weekdays = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            weekdays.append(day)
+        day += timedelta(days=1)
+    if count >= len(weekdays):
+        return weekdays
+    if count <= 1:
+        return weekdays[-count:] if count else []
+    return [weekdays[round(i * (len(weekdays) - 1) / (count - 1))] for i in range(count)]
+
+
+class RowWriter:
+    """
+    Buffer model instances and write them in batches without going through
+    ``bulk_create``: ``COPY ... FROM STDIN`` on PostgreSQL, one prepared
+    ``executemany`` INSERT elsewhere. Values are prepared by the model
+    fields, so ``auto_now_add`` and defaults behave as in ``save()``. Only
+    for models whose columns are plain scalars (no JSON or array fields).
+    """
+
+    def __init__(self, model, batch_size):
+        self.model = model
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+        # The wrapper itself, not the thread-local ``connection`` proxy that
+        # would be resolved again for every value
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.fields = [
+            field for field in model._meta.local_concrete_fields
+            if not isinstance(field, AutoField)
+        ]
+        quote = self.connection.ops.quote_name
+        self.table = quote(model._meta.db_table)
+        self.columns = ', '.join(quote(field.column) for field in self.fields)
+
+    def add(self, instance):
+        self.rows.append([
+            field.get_db_prep_save(field.pre_save(instance, True), self.connection)
+            for field in self.fields
+        ])
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                self._copy(cursor)
+            else:
+                placeholders = ', '.join(['%s'] * len(self.fields))
+                cursor.executemany(
+                    f'INSERT INTO {self.table} ({self.columns}) VALUES ({placeholders})', self.rows)
+        self.written += len(self.rows)
+        self.rows = []
+
+    def _copy(self, cursor):
+        stream = io.StringIO()
+        writer = csv.writer(stream)
+        for row in self.rows:
+            writer.writerow([r'\N' if value is None else value for value in row])
+        stream.seek(0)
+        cursor.copy_expert(
+            f"COPY {self.table} ({self.columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", stream)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic synthetic school for load benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--years', type=int, default=1,
+                            help='Academic years of attendance, grades and fees')
+        parser.add_argument('--levels', type=int, default=12, help='Grade levels')
+        parser.add_argument('--section-size', type=int, default=40)
+        parser.add_argument('--attendance-days', type=int, default=100,
+                            help='Attendance days per student and year')
+        parser.add_argument('--grades-per-year', type=int, default=40,
+                            help='Grades per student and year')
+        parser.add_argument('--end-date', help='Last school day, YYYY-MM-DD (default: today)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--tag', default='bench',
+                            help='Prefix identifying the generated rows')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated data with this tag first')
+        parser.add_argument('--delete', action='store_true',
+                            help='Only delete previously generated data with this tag')
+
+    def handle(self, *args, **options):
+        self.tag = options['tag'].strip().lower()
+        if not self.tag.isalnum() or len(self.tag) > 8:
+            raise CommandError('--tag must be alphanumeric and at most 8 characters')
+        self.code = self.tag.upper()
+        self.batch_size = max(options['batch_size'], 1)
+
+        if options['delete'] or options['clear']:
+            self._delete()
+            if options['delete']:
+                return
+        if User.objects.filter(username=f'{self.tag}_admin').exists():
+            raise CommandError(
+                f"Benchmark data tagged '{self.tag}' already exists; pass --clear to replace it")
+        if options['students'] < 1 or options['years'] < 1:
+            raise CommandError('--students and --years must be positive')
+
+        try:
+            end_date = (datetime.strptime(options['end_date'], '%Y-%m-%d').date()
+                        if options['end_date'] else date.today())
+        except ValueError:
+            raise CommandError('--end-date must be in YYYY-MM-DD format')
+
+        self.rng = random.Random(options['seed'])
+        self.password = make_password('benchmark')
+        started = time.perf_counter()
+
+        years = self._academic_years(options['years'], end_date)
+        structure = self._structure(options)
+        people = self._people(options['students'], structure)
+        for index, year in enumerate(years):
+            days = school_days(year.start_date, year.end_date, options['attendance_days'])
+            self._attendance(people, structure, days)
+            self._grades(people, structure, year, options['grades_per_year'])
+            self._fees(people, structure, year, index, end_date)
+        self._notifications(people)
+
+        self._step('Fee collection rollup', lambda: fee_rollup.rebuild())
+        self._step('Grade analytics cube', lambda: grade_cube.rebuild())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated school '{self.tag}' with {options['students']} students over "
+            f"{options['years']} year(s) in {time.perf_counter() - started:.1f}s. "
+            f"Log in as {self.tag}_admin@bench.local / benchmark"))
+
+    # ==================== HELPERS ====================
+
+    def _step(self, label, build):
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = build()
+        elapsed = time.perf_counter() - started
+        if isinstance(count, int):
+            rate = f' ({count / elapsed:,.0f} rows/s)' if elapsed else ''
+            self.stdout.write(f'  {label}: {count:,} rows in {elapsed:.1f}s{rate}')
+        else:
+            self.stdout.write(f'  {label}: done in {elapsed:.1f}s')
+        return count
+
+    def _users(self, names, role, **extra):
+        """Users for ``names`` (username suffixes) in batches; returns them in order"""
+        users = [
+            User(username=f'{self.tag}_{name}', email=f'{self.tag}_{name}@bench.local',
+                 password=self.password, role=role,
+                 first_name=name.split('_')[0].title(), last_name=name.split('_')[-1],
+                 **extra)
+            for name in names
+        ]
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def _delete(self):
+        """
+        Remove the tagged rows table by table, children first. Raw deletes
+        skip the cascade collector, which would otherwise load every row and
+        touch each related table.
+        """
+        users = User.objects.filter(username__startswith=f'{self.tag}_')
+        students = Student.objects.filter(roll_no__startswith=f'{self.code}-')
+        teachers = Teacher.objects.filter(employee_id__startswith=f'{self.code}-')
+        classes = Class.objects.filter(name__startswith=f'{self.code} ')
+        with transaction.atomic():
+            deleted = 0
+            for queryset in (
+                Attendance.objects.filter(student__in=students),
+                Grade.objects.filter(student__in=students),
+                FeePayment.objects.filter(student__in=students),
+                Enrollment.objects.filter(student__in=students),
+                Notification.objects.filter(user__in=users),
+                TeacherAssignment.objects.filter(class_assigned__in=classes),
+                students,
+                ClassRoom.objects.filter(room_code__startswith=f'{self.code}-'),
+                classes,
+                teachers,
+                Subject.objects.filter(code__startswith=f'{self.code}-'),
+                FeeStructure.objects.filter(name__startswith=f'{self.code} '),
+                AcademicYear.objects.filter(name__startswith=f'{self.code} '),
+                users,
+            ):
+                deleted += queryset._raw_delete(queryset.db)
+        if deleted:
+            fee_rollup.rebuild()
+            grade_cube.rebuild()
+        self.stdout.write(f"Deleted {deleted:,} rows tagged '{self.tag}'")
+
+    # ==================== STRUCTURE ====================
+
+    def _academic_years(self, count, end_date):
+        years = []
+        for index in range(count):
+            year_end = end_date - timedelta(days=365 * (count - 1 - index))
+            year_start = year_end - timedelta(days=364)
+            years.append(AcademicYear(
+                name=f'{self.code} {year_start.year}-{year_end.year} #{index + 1}',
+                start_date=year_start, end_date=year_end, is_active=index == count - 1))
+        self._step('Academic years', lambda: len(AcademicYear.objects.bulk_create(years)))
+        return years
+
+    def _structure(self, options):
+        levels = max(options['levels'], 1)
+        per_level = -(-options['students'] // (levels * max(options['section_size'], 1)))
+        sections = [
+            (level, SECTION_LETTERS[index % 26] * (index // 26 + 1))
+            for level in range(1, levels + 1) for index in range(per_level)
+        ]
+        structure = {}
+
+        def build():
+            subjects = Subject.objects.bulk_create([
+                Subject(code=f'{self.code}-{code}', title=title) for code, title in SUBJECTS
+            ])
+            teacher_count = max(len(SUBJECTS), options['students'] // STUDENTS_PER_TEACHER)
+            teacher_users = self._users([f'teacher_{n}' for n in range(teacher_count)], 'teacher')
+            teachers = Teacher.objects.bulk_create([
+                Teacher(user=user, subject=SUBJECTS[n % len(SUBJECTS)][1],
+                        employee_id=f'{self.code}-T{n}', experience_years=n % 20)
+                for n, user in enumerate(teacher_users)
+            ], batch_size=self.batch_size)
+
+            classes = Class.objects.bulk_create([
+                Class(name=f'{self.code} Grade {level}-{section}', section=section,
+                      room=f'{level}{section}', teacher=teachers[n % len(teachers)])
+                for n, (level, section) in enumerate(sections)
+            ], batch_size=self.batch_size)
+            classrooms = ClassRoom.objects.bulk_create([
+                ClassRoom(name=cls.name, grade_level=f'{self.code}-{level}', section=section,
+                          room_code=f'{self.code}-{level}{section}',
+                          assigned_teacher=cls.teacher)
+                for cls, (level, section) in zip(classes, sections)
+            ], batch_size=self.batch_size)
+
+            # One teacher per class and subject, rotating through the staff
+            assignments = {}
+            for n, cls in enumerate(classes):
+                for s, subject in enumerate(subjects):
+                    assignments[(cls.id, subject.id)] = teachers[(n * len(subjects) + s) % len(teachers)]
+            TeacherAssignment.objects.bulk_create([
+                TeacherAssignment(teacher=teacher, class_assigned_id=class_id, subject_id=subject_id)
+                for (class_id, subject_id), teacher in assignments.items()
+            ], batch_size=self.batch_size)
+
+            fee_structures = FeeStructure.objects.bulk_create([
+                FeeStructure(name=f'{self.code} Tuition Grade {level}', fee_type='tuition',
+                             frequency='quarterly', grade_level=f'{self.code}-{level}',
+                             amount=Decimal(400 + 50 * level))
+                for level in range(1, levels + 1)
+            ])
+            structure.update(
+                subjects=subjects, teachers=teachers, classes=classes, classrooms=classrooms,
+                levels=[level for level, _ in sections], assignments=assignments,
+                fee_structures={level: fee for level, fee in zip(range(1, levels + 1), fee_structures)},
+            )
+            return (len(subjects) + len(teachers) * 2 + len(classes) * 2
+                    + len(assignments) + len(fee_structures))
+
+        self._step(f'Classes, subjects and teachers ({len(sections)} sections)', build)
+        return structure
+
+    def _people(self, count, structure):
+        classes = structure['classes']
+        people = {}
+
+        def build():
+            admin = User.objects.create(
+                username=f'{self.tag}_admin', email=f'{self.tag}_admin@bench.local',
+                password=self.password, role='admin', first_name='Benchmark',
+                last_name='Admin', is_staff=True, is_superuser=True)
+            parents = self._users([f'parent_{n}' for n in range((count + 1) // 2)], 'parent')
+            student_users = self._users([f'student_{n}' for n in range(count)], 'student')
+
+            students = []
+            placement = []
+            for n, user in enumerate(student_users):
+                index = n * len(classes) // count
+                cls = classes[index]
+                placement.append(index)
+                students.append(Student(
+                    user=user, parent_user=parents[n // 2], roll_no=f'{self.code}-{n}',
+                    class_name=cls.name, school_class=cls, phone=f'555{n:07d}',
+                    date_of_birth=date(2020 - structure['levels'][index], 1 + n % 12, 1 + n % 28),
+                ))
+            students = Student.objects.bulk_create(students, batch_size=self.batch_size)
+            Enrollment.objects.bulk_create([
+                Enrollment(student=student, classroom=structure['classrooms'][index])
+                for student, index in zip(students, placement)
+            ], batch_size=self.batch_size)
+
+            # Per-student traits keep each student's marks and attendance consistent
+            people.update(
+                admin=admin, parents=parents, students=students, placement=placement,
+                ability=[self.rng.uniform(45, 95) for _ in students],
+                absence=[self.rng.uniform(0.02, 0.15) for _ in students],
+            )
+            return 1 + len(parents) + len(students) * 3
+
+        self._step('Users, students and enrollments', build)
+        return people
+
+    # ==================== ACTIVITY ====================
+
+    def _attendance(self, people, structure, days):
+        classrooms = structure['classrooms']
+        classes = structure['classes']
+        rng = self.rng
+
+        def build():
+            writer = RowWriter(Attendance, self.batch_size)
+            for day in days:
+                for student, index, absence in zip(
+                        people['students'], people['placement'], people['absence']):
+                    roll = rng.random()
+                    writer.add(Attendance(
+                        student_id=student.id, class_section_id=classrooms[index].id, date=day,
+                        status='absent' if roll < absence else 'late' if roll < absence + 0.03 else 'present',
+                        recorded_by_id=classes[index].teacher_id))
+            writer.flush()
+            return writer.written
+
+        self._step(f'Attendance ({len(days)} days from {days[0] if days else "-"})', build)
+
+    def _grades(self, people, structure, year, per_year):
+        subjects = structure['subjects']
+        classes = structure['classes']
+        assignments = structure['assignments']
+        span = (year.end_date - year.start_date).days
+        rng = self.rng
+
+        def build():
+            writer = RowWriter(Grade, self.batch_size)
+            for n in range(per_year):
+                recorded = year.start_date + timedelta(days=span * (n + 1) // (per_year + 1))
+                subject = subjects[n % len(subjects)]
+                grade_type = GRADE_TYPES[(n // len(subjects)) % len(GRADE_TYPES)]
+                term = TERMS[min(n * len(TERMS) // per_year, len(TERMS) - 1)]
+                for student, index, ability in zip(
+                        people['students'], people['placement'], people['ability']):
+                    score = min(max(rng.gauss(ability, 10), 0), 100)
+                    writer.add(Grade(
+                        student_id=student.id, subject_id=subject.id, grade_type=grade_type,
+                        score=Decimal(f'{score:.2f}'), max_score=Decimal('100'), term=term,
+                        date_recorded=recorded,
+                        recorded_by_id=assignments[(classes[index].id, subject.id)].id))
+            writer.flush()
+            return writer.written
+
+        self._step(f'Grades ({year.name})', build)
+
+    def _fees(self, people, structure, year, year_index, end_date):
+        span = (year.end_date - year.start_date).days
+        fee_structures = structure['fee_structures']
+        levels = structure['levels']
+        rng = self.rng
+
+        def build():
+            writer = RowWriter(FeePayment, self.batch_size)
+            for quarter in range(FEES_PER_YEAR):
+                due = year.start_date + timedelta(days=span * quarter // FEES_PER_YEAR + 14)
+                for student, index in zip(people['students'], people['placement']):
+                    fee = fee_structures[levels[index]]
+                    invoice = f'{self.code}-{student.id}-{year_index}-{quarter}'
+                    payment = FeePayment(
+                        student_id=student.id, fee_structure_id=fee.id, invoice_number=invoice,
+                        amount_due=fee.amount, due_date=due)
+                    if due <= end_date:
+                        roll = rng.random()
+                        paid_on = min(due + timedelta(days=rng.randint(-10, 20)), end_date)
+                        if roll < 0.85:
+                            payment.status, payment.amount_paid = 'paid', fee.amount
+                        elif roll < 0.9:
+                            payment.status, payment.amount_paid = 'partial', fee.amount / 2
+                        else:
+                            payment.status, paid_on = 'overdue', None
+                        if paid_on:
+                            payment.payment_date = paid_on
+                            payment.payment_method = rng.choice(PAYMENT_METHODS)
+                            payment.transaction_id = invoice
+                    writer.add(payment)
+            writer.flush()
+            return writer.written
+
+        self._step(f'Fee payments ({year.name})', build)
+
+    def _notifications(self, people):
+        def build():
+            writer = RowWriter(Notification, self.batch_size)
+            recipients = [people['admin']] + people['parents'] + [s.user for s in people['students']]
+            for n, user in enumerate(recipients):
+                for k in range(3 if user.role == 'admin' else 2):
+                    writer.add(Notification(
+                        user_id=user.id, title=f'Notice {k + 1}', message='Benchmark notice',
+                        notification_type='info', is_read=(n + k) % 3 == 0))
+            writer.flush()
+            return writer.written
+
+        self._step('Notifications', build)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from admin_api import stripe_inbox
+
+
+class Command(BaseCommand):
+    help = 'Apply pending Stripe webhook events from the inbox to transactions and fees'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='Events per batch (default: STRIPE_WEBHOOK_BATCH_SIZE)')
+        parser.add_argument('--limit', type=int, help='Stop after this many events')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Put failed events back in the inbox first')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f'Requeued {stripe_inbox.requeue_failed()} failed events')
+
+        totals = stripe_inbox.process_pending(options['batch_size'], options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {totals['processed']}, ignored {totals['ignored']}, "
+            f"failed {totals['failed']} Stripe events"))
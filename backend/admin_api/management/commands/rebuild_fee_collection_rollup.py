@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from admin_api import fee_rollup
+from datetime import datetime
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily fee collection rollup from fee payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='YYYY-MM-DD (default: earliest payment)')
+        parser.add_argument('--end-date', help='YYYY-MM-DD (default: latest payment)')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = self._parse(options['start_date'])
+            end_date = self._parse(options['end_date'])
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+
+        buckets = fee_rollup.rebuild(start_date, end_date)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} daily collection buckets'))
+
+    def _parse(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from admin_api import grade_cube
+
+
+class Command(BaseCommand):
+    help = 'Recompute the grade analytics cube from grades'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-id', type=int, action='append', dest='class_ids',
+                            help='Only rebuild this class (repeatable; default: every class)')
+
+    def handle(self, *args, **options):
+        cells = grade_cube.rebuild(options['class_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {cells} grade analytics cells'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from admin_api import leave_ledger
+
+
+class Command(BaseCommand):
+    help = 'Recompute leave usage from approved applications and report balance drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None,
+                            help='Leave year to reconcile (default: current year)')
+        parser.add_argument('--seed', action='store_true',
+                            help='Create missing balances for active staff with their opening allocation')
+        parser.add_argument('--fix', action='store_true',
+                            help='Post adjustment entries so balances match application history')
+
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.now().year
+
+        if options['seed']:
+            created = leave_ledger.ensure_balances(year)
+            self.stdout.write(f'Created {created} leave balances for {year}')
+
+        drift = leave_ledger.reconcile(year, fix=options['fix'])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f'Leave balances for {year} match application history'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'{len(drift)} leave balances drifted in {year}:'))
+        for row in drift:
+            self.stdout.write(
+                f"  employee {row['employee_id']} / leave type {row['leave_type_id']}: "
+                f"balance={row['balance_used']} ledger={row['ledger_used']} "
+                f"history={row['history_used']}")
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS('Adjustment entries posted'))
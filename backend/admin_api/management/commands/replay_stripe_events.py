@@ -0,0 +1,197 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from admin_api import stripe_inbox
+from admin_api.models import FeePayment, PaymentTransaction, Student, StripeWebhookEvent
+from decimal import Decimal
+from hashlib import sha256
+import hmac
+import json
+import random
+import time
+
+
+class _Rollback(Exception):
+    """Raised to discard the replayed events and their effects"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a captured Stripe event stream against the webhook, signed with a '
+        'test secret, then apply it from the inbox and report ack latency and outcomes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', nargs='?',
+                            help='Events as a JSON array, JSON lines or a Stripe list object')
+        parser.add_argument('--synthetic', type=int, metavar='N',
+                            help='Instead of a file, generate N payment intents for pending fees')
+        parser.add_argument('--export', metavar='PATH',
+                            help='Write the events stored in the inbox to PATH (JSON lines) and exit')
+        parser.add_argument('--secret', default='whsec_replay_test',
+                            help='Webhook signing secret used for the replay')
+        parser.add_argument('--duplicates', type=float, default=0.2,
+                            help='Fraction of events delivered a second time, as Stripe retries do')
+        parser.add_argument('--shuffle', action='store_true',
+                            help='Deliver events out of order')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the inbox rows and payment updates instead of rolling back')
+
+    def handle(self, *args, **options):
+        if options['export']:
+            return self._export(options['export'])
+        if not options['source'] and not options['synthetic']:
+            raise CommandError('Give an event file or --synthetic N')
+        random.seed(options['seed'])
+
+        try:
+            # Inside the transaction no processing job is dispatched (they
+            # start on commit); the inbox is drained inline below instead
+            with transaction.atomic():
+                events = (self._synthetic(options['synthetic']) if options['synthetic']
+                          else self._load(options['source']))
+                self._replay(events, options)
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            self.stdout.write('Replayed events rolled back')
+
+    def _replay(self, events, options):
+        deliveries = list(events)
+        deliveries += random.sample(events, int(len(events) * options['duplicates']))
+        if options['shuffle']:
+            random.shuffle(deliveries)
+
+        client = Client(HTTP_HOST=self._host())
+        path = reverse('stripe-webhook')
+        latencies, rejected = [], 0
+        queries = []
+        with override_settings(STRIPE_WEBHOOK_SECRET=options['secret']):
+            # Counted by a wrapper: each request resets connection.queries
+            with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                for event in deliveries:
+                    body = json.dumps(event)
+                    started = time.perf_counter()
+                    response = client.post(path, body, content_type='application/json',
+                                           HTTP_STRIPE_SIGNATURE=self._sign(body, options['secret']))
+                    latencies.append(time.perf_counter() - started)
+                    rejected += response.status_code != 200
+            forged = client.post(path, json.dumps(events[0]), content_type='application/json',
+                                 HTTP_STRIPE_SIGNATURE=self._sign(json.dumps(events[0]), 'whsec_wrong'))
+
+        latencies.sort()
+        stored = StripeWebhookEvent.objects.filter(
+            event_id__in=[event['id'] for event in events]).count()
+        self.stdout.write(
+            f'Delivered {len(deliveries)} ({len(deliveries) - len(events)} retries), '
+            f'rejected {rejected}, stored {stored} of {len(events)} distinct events; '
+            f'forged signature answered {forged.status_code}')
+        self.stdout.write(
+            f'Ack latency p50 {self._ms(latencies, 0.5)} ms, p95 {self._ms(latencies, 0.95)} ms, '
+            f'max {latencies[-1] * 1000:.1f} ms, {len(queries) / len(deliveries):.1f} queries per ack')
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            totals = stripe_inbox.process_pending(options['batch_size'])
+            elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {totals['processed']}, ignored {totals['ignored']}, failed "
+            f"{totals['failed']} events in {elapsed:.3f}s using {len(queries)} queries"))
+
+        intent_ids = {event['data']['object'].get('id') for event in events}
+        statuses = {}
+        for value in PaymentTransaction.objects.filter(
+                payment_intent_id__in=intent_ids).values_list('status', flat=True):
+            statuses[value] = statuses.get(value, 0) + 1
+        self.stdout.write(f'Transactions by status: {statuses}')
+
+    def _sign(self, body, secret):
+        """A ``Stripe-Signature`` header as Stripe computes it"""
+        timestamp = int(time.time())
+        signature = hmac.new(secret.encode(), f'{timestamp}.{body}'.encode(), sha256).hexdigest()
+        return f't={timestamp},v1={signature}'
+
+    def _host(self):
+        hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '')]
+        return hosts[0].lstrip('.') if hosts else 'localhost'
+
+    def _ms(self, latencies, quantile):
+        return f'{latencies[min(len(latencies) - 1, int(len(latencies) * quantile))] * 1000:.1f}'
+
+    def _load(self, source):
+        with open(source) as handle:
+            text = handle.read()
+        try:
+            events = json.loads(text)
+        except ValueError:
+            events = [json.loads(line) for line in text.splitlines() if line.strip()]
+        if isinstance(events, dict):
+            events = events['data'] if events.get('object') == 'list' else [events]
+        if not events:
+            raise CommandError(f'No events in {source}')
+        return events
+
+    def _export(self, path):
+        count = 0
+        with open(path, 'w') as handle:
+            for payload in StripeWebhookEvent.objects.order_by(
+                    'stripe_created', 'id').values_list('payload', flat=True).iterator():
+                handle.write(json.dumps(payload) + '\n')
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} events to {path}'))
+
+    def _synthetic(self, count):
+        """
+        Payment intents for outstanding fees: most succeed, some fail and
+        then succeed on a second attempt, some fail for good
+        """
+        tag = f'replay{int(time.time())}'
+        fees = list(
+            FeePayment.objects.filter(status__in=['pending', 'partial'])
+            .select_related('student')[:count])
+        students = list(Student.objects.all()[:count]) if len(fees) < count else []
+        if not fees and not students:
+            raise CommandError('No students to replay payments for')
+
+        events, created = [], int(time.time()) - 3600
+        for index in range(count):
+            fee = fees[index] if index < len(fees) else None
+            student = fee.student if fee else students[index % len(students)]
+            amount = (fee.amount_due - fee.amount_paid) if fee else Decimal('100.00')
+            intent_id = f'pi_{tag}_{index}'
+            PaymentTransaction.objects.create(
+                student=student, amount=amount, fee_type='tuition',
+                payment_intent_id=intent_id, status='pending', description='Replay')
+            metadata = {'student_id': str(student.pk), 'fee_type': 'tuition'}
+            if fee:
+                metadata['fee_payment_id'] = str(fee.pk)
+            intent = {
+                'id': intent_id, 'object': 'payment_intent',
+                'amount': int(amount * 100), 'amount_received': 0, 'metadata': metadata,
+            }
+
+            outcome = random.random()
+            if outcome < 0.25:
+                created += 1
+                events.append(self._event(tag, len(events), 'payment_intent.payment_failed', created, {
+                    **intent, 'last_payment_error': {'message': 'Your card was declined.'}}))
+            if outcome < 0.2 or outcome >= 0.25:
+                created += 1
+                events.append(self._event(tag, len(events), 'payment_intent.succeeded', created, {
+                    **intent, 'amount_received': intent['amount'], 'latest_charge': f'ch_{tag}_{index}'}))
+            if outcome > 0.95:
+                created += 1
+                events.append(self._event(tag, len(events), 'charge.refund.updated', created,
+                                          {'id': f're_{tag}_{index}', 'object': 'refund'}))
+        return events
+
+    def _event(self, tag, index, event_type, created, data_object):
+        return {
+            'id': f'evt_{tag}_{index}', 'object': 'event', 'type': event_type,
+            'created': created, 'livemode': False, 'data': {'object': data_object},
+        }
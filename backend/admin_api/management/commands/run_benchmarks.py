@@ -0,0 +1,267 @@
+"""
+Load benchmark for the dashboards, reports, attendance marking and exports
+listed in ``admin_api/benchmark_scenarios.json``.
+
+Usage:
+    python manage.py generate_benchmark_school --students 50000
+    python manage.py run_benchmarks --output baseline.json
+    python manage.py run_benchmarks --compare baseline.json
+
+Each scenario is replayed through the DRF test client as the generated
+school's admin, teacher, student or parent (found by ``--tag``). Every
+request runs in a transaction that is rolled back, so write scenarios such
+as attendance marking measure the same work on each iteration. The result
+records p50/p95/max latency and the query count per scenario; ``--compare``
+fails when a scenario got slower than the baseline beyond the tolerance or
+runs more queries.
+"""
+import json
+import os
+import platform
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_api.models import (
+    AcademicYear, Attendance, ClassRoom, Grade, Student, Teacher, TeacherAssignment
+)
+from admin_api.query_metrics import record_queries
+from users.models import User
+
+
+SCENARIOS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'benchmark_scenarios.json')
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of ``samples``"""
+    ordered = sorted(samples)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def substitute(value, placeholders):
+    """Fill ``{name}`` placeholders in a scenario path or payload"""
+    if isinstance(value, dict):
+        return {key: substitute(item, placeholders) for key, item in value.items()}
+    if isinstance(value, list):
+        return [substitute(item, placeholders) for item in value]
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and value[1:-1] in placeholders:
+            return placeholders[value[1:-1]]
+        return value.format(**placeholders)
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Measure latency and query counts of key endpoints on a generated benchmark school'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tag', default='bench',
+                            help='Tag passed to generate_benchmark_school')
+        parser.add_argument('--scenarios', default=SCENARIOS_FILE)
+        parser.add_argument('--only', action='append', default=[],
+                            help='Only run scenarios whose name or group contains this text')
+        parser.add_argument('--iterations', type=int, default=10,
+                            help='Measured requests per scenario (a scenario may ask for fewer)')
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--output', help='Write the results to this JSON baseline file')
+        parser.add_argument('--compare', help='Baseline JSON to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p95 slowdown against the baseline (0.25 = 25%%)')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help='Ignore p95 slowdowns smaller than this, as noise')
+
+    def handle(self, *args, **options):
+        with open(options['scenarios']) as handle:
+            scenarios = json.load(handle)['scenarios']
+        if options['only']:
+            scenarios = [
+                scenario for scenario in scenarios
+                if any(text in scenario['name'] or text in scenario.get('group', '')
+                       for text in options['only'])
+            ]
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        tag = options['tag'].strip().lower()
+        placeholders, users = self._school(tag)
+        dataset = self._dataset(tag)
+        self.stdout.write(
+            f"School '{tag}': {dataset['students']:,} students, {dataset['attendance']:,} "
+            f"attendance rows, {dataset['grades']:,} grades ({connection.vendor})")
+
+        self.stdout.write(f"{'':6}{'p50 ms':>9} {'p95 ms':>9} {'queries':>7}")
+        results = []
+        for scenario in scenarios:
+            result = self._measure(scenario, placeholders, users, options)
+            results.append(result)
+            self._print(result)
+
+        report = {
+            'recorded_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'dataset': dataset,
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+                handle.write('\n')
+            self.stdout.write(f"Baseline written to {options['output']}")
+
+        failures = [result['name'] for result in results if result['outcome'] != 'ok']
+        if options['compare']:
+            failures += self._compare(report, options)
+        if failures:
+            raise CommandError(f'{len(failures)} benchmark failure(s): ' + ', '.join(failures))
+
+    # ==================== SETUP ====================
+
+    def _school(self, tag):
+        """Placeholder values and the users each scenario runs as"""
+        code = tag.upper()
+        try:
+            admin = User.objects.get(username=f'{tag}_admin')
+            teacher = Teacher.objects.select_related('user').get(employee_id=f'{code}-T0')
+        except (User.DoesNotExist, Teacher.DoesNotExist):
+            raise CommandError(
+                f"No benchmark school tagged '{tag}'; run generate_benchmark_school first")
+
+        school_class = TeacherAssignment.objects.filter(teacher=teacher).order_by(
+            'class_assigned_id').select_related('class_assigned').first().class_assigned
+        classroom = ClassRoom.objects.get(name=school_class.name)
+        students = list(
+            Student.objects.filter(school_class=school_class).select_related('user', 'parent_user')
+            .order_by('id'))
+        if not students:
+            raise CommandError(f'Benchmark class {school_class.name} has no students')
+        last_day = (Attendance.objects.filter(class_section=classroom)
+                    .aggregate(last=Max('date'))['last'] or timezone.now().date())
+        year = AcademicYear.objects.filter(
+            name__startswith=f'{code} ', start_date__lte=last_day).order_by('-start_date').first()
+
+        placeholders = {
+            'class': school_class.id,
+            'classroom': classroom.id,
+            'teacher': teacher.id,
+            'student': students[0].id,
+            'child': students[0].id,
+            'date': last_day.isoformat(),
+            'year_start': (year.start_date if year else last_day).isoformat(),
+            'today': timezone.now().date().isoformat(),
+            'class_attendance': [
+                {'student_id': student.id, 'status': 'absent' if n % 10 == 0 else 'present'}
+                for n, student in enumerate(students)
+            ],
+        }
+        users = {
+            'admin': admin,
+            'teacher': teacher.user,
+            'student': students[0].user,
+            'parent': students[0].parent_user or admin,
+        }
+        return placeholders, users
+
+    def _dataset(self, tag):
+        students = Student.objects.filter(roll_no__startswith=f'{tag.upper()}-')
+        return {
+            'tag': tag,
+            'students': students.count(),
+            'attendance': Attendance.objects.filter(student__in=students).count(),
+            'grades': Grade.objects.filter(student__in=students).count(),
+        }
+
+    # ==================== MEASUREMENT ====================
+
+    def _request(self, client, scenario, path, data):
+        with transaction.atomic():
+            with record_queries() as recorder:
+                started = time.perf_counter()
+                response = client.generic(
+                    scenario.get('method', 'GET'), path,
+                    data=json.dumps(data) if data is not None else '',
+                    content_type='application/json')
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        return response, elapsed, recorder
+
+    def _measure(self, scenario, placeholders, users, options):
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(users[scenario.get('as', 'admin')])
+        path = substitute(scenario['path'], placeholders)
+        data = substitute(scenario['data'], placeholders) if 'data' in scenario else None
+        iterations = max(min(options['iterations'], scenario.get('iterations', options['iterations'])), 1)
+
+        for _ in range(options['warmup']):
+            self._request(client, scenario, path, data)
+        timings = []
+        queries = []
+        statuses = set()
+        for _ in range(iterations):
+            response, elapsed, recorder = self._request(client, scenario, path, data)
+            timings.append(elapsed)
+            queries.append(recorder.count)
+            statuses.add(response.status_code)
+
+        expected = scenario.get('status', [200])
+        unexpected = sorted(statuses - set(expected))
+        return {
+            'name': scenario['name'],
+            'group': scenario.get('group', ''),
+            'path': path,
+            'iterations': iterations,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+            'status': sorted(statuses),
+            'outcome': f'status {unexpected[0]}' if unexpected else 'ok',
+        }
+
+    def _print(self, result):
+        line = (f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['queries']:>7}  "
+                f"{result['name']}")
+        if result['outcome'] == 'ok':
+            self.stdout.write(f'ok    {line}')
+        else:
+            self.stdout.write(self.style.ERROR(f"FAIL  {line}  ({result['outcome']})"))
+
+    # ==================== BASELINE ====================
+
+    def _compare(self, report, options):
+        """Names of scenarios that regressed against the baseline"""
+        with open(options['compare']) as handle:
+            baseline = json.load(handle)
+        if baseline.get('dataset', {}).get('students') != report['dataset']['students']:
+            self.stdout.write(self.style.WARNING(
+                'Baseline was recorded on a school of a different size; '
+                'latency comparisons are only indicative'))
+
+        previous = {scenario['name']: scenario for scenario in baseline['scenarios']}
+        regressions = []
+        for result in report['scenarios']:
+            before = previous.get(result['name'])
+            if before is None:
+                continue
+            problems = []
+            allowed = before['p95_ms'] * (1 + options['tolerance'])
+            if result['p95_ms'] > allowed and result['p95_ms'] - before['p95_ms'] > options['min_delta_ms']:
+                problems.append(f"p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f}ms")
+            if result['queries'] > before['queries']:
+                problems.append(f"queries {before['queries']} -> {result['queries']}")
+            if problems:
+                regressions.append(result['name'])
+                self.stdout.write(self.style.ERROR(
+                    f"REGRESSION  {result['name']}: {', '.join(problems)}"))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+        return regressions
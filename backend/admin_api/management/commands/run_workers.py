@@ -0,0 +1,118 @@
+"""
+Run queued background jobs in a pool of worker processes.
+
+Usage:
+    python manage.py run_workers                   # JOBS_WORKER_PROCESSES processes, until stopped
+    python manage.py run_workers --processes 4
+    python manage.py run_workers --once            # run what is queued, then exit
+
+Used with ``JOBS_RUNNER = 'workers'`` (see ``admin_api.jobs``). This process
+claims pending jobs as pool slots free up and hands their ids to spawned
+worker processes, so a slow payroll run never blocks the web workers and
+a crashing job only takes its pool process with it. It also keeps the
+heartbeat of running jobs fresh, requeues or fails jobs whose worker
+disappeared, and prunes finished jobs older than ``JOBS_RETENTION_DAYS``.
+SIGTERM/SIGINT stop claiming and let running jobs finish.
+"""
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_api import jobs
+
+
+MAINTENANCE_SECONDS = 30
+PRUNE_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs with a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=getattr(settings, 'JOBS_WORKER_PROCESSES', 2))
+        parser.add_argument('--poll', type=float,
+                            default=getattr(settings, 'JOBS_POLL_SECONDS', 2),
+                            help='Seconds between looks at the queue when idle')
+        parser.add_argument('--max-tasks-per-child', type=int, default=100,
+                            help='Replace a pool process after this many jobs')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+        self.stopping = False
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._stop)
+
+        processes = options['processes']
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        pool = self._pool(processes, options['max_tasks_per_child'])
+        inflight = {}
+        last_maintenance = last_prune = 0
+        self.stdout.write(f'Job worker {worker} running with {processes} process(es)')
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now - last_maintenance >= MAINTENANCE_SECONDS:
+                    jobs.heartbeat(list(inflight.values()))
+                    jobs.requeue_stale()
+                    last_maintenance = now
+                if now - last_prune >= PRUNE_SECONDS:
+                    jobs.prune()
+                    last_prune = now
+
+                claimed = []
+                if not self.stopping:
+                    claimed = jobs.claim_next(processes - len(inflight), worker)
+                    for job_id in claimed:
+                        inflight[pool.submit(jobs.run_claimed_job, job_id)] = job_id
+                        self.stdout.write(f'  job {job_id} started')
+
+                if not inflight:
+                    if self.stopping or (options['once'] and not claimed):
+                        break
+                    jobs.wait_for_work(options['poll'])
+                    continue
+
+                done, _ = wait(inflight, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job_id = inflight.pop(future)
+                    try:
+                        self.stdout.write(f'  job {job_id} {future.result()}')
+                    except BrokenProcessPool as e:
+                        broken = True
+                        jobs.fail(job_id, f'Worker process died: {e}')
+                        self.stderr.write(f'  job {job_id} lost its worker process')
+                    except Exception as e:
+                        jobs.fail(job_id, str(e))
+                        self.stderr.write(f'  job {job_id} failed: {e}')
+                if broken:
+                    # Every job of a broken pool is lost; start a fresh one
+                    for job_id in inflight.values():
+                        jobs.fail(job_id, 'Worker process died')
+                    inflight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._pool(processes, options['max_tasks_per_child'])
+        finally:
+            pool.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS('Job worker stopped'))
+
+    def _pool(self, processes, max_tasks_per_child):
+        return ProcessPoolExecutor(
+            max_workers=processes, mp_context=get_context('spawn'),
+            initializer=jobs.init_worker_process, max_tasks_per_child=max_tasks_per_child)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        self.stdout.write('Stopping: no new jobs will be claimed')
@@ -0,0 +1,55 @@
+"""
+Copy the SQLite primary into the SQLite file standing in for the read replica.
+
+Usage:
+    SQLITE_REPLICA_PATH=replica.sqlite3 python manage.py sync_sqlite_replica
+    SQLITE_REPLICA_PATH=replica.sqlite3 python manage.py sync_sqlite_replica --interval 5
+
+Development only: with two SQLite files the replica is refreshed by
+copying, using SQLite's online backup API so the primary stays writable.
+Between copies the replica lags like a real one, which is what the
+read-your-writes pinning in ``admin_api.db_routing`` is there to hide.
+With ``--interval`` the copy repeats until interrupted.
+"""
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from admin_api.db_routing import REPLICA_ALIAS, replica_configured
+
+
+class Command(BaseCommand):
+    help = 'Refresh the SQLite read replica from the primary (development)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Repeat every this many seconds')
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica database configured (set SQLITE_REPLICA_PATH)')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[REPLICA_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Only SQLite primaries and replicas can be synced this way')
+        if primary.settings_dict['NAME'] == replica.settings_dict['NAME']:
+            raise CommandError('The replica must be a different file from the primary')
+        # Readers of the replica must not hold it open mid-copy
+        replica.close()
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(primary.settings_dict['NAME'])
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(
+                f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']} "
+                f'in {time.perf_counter() - started:.2f}s')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
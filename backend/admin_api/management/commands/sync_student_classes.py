@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from admin_api import student_classes
+
+
+class Command(BaseCommand):
+    help = 'Point Student.school_class at the Class matching each student\'s class_name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report students whose class link is stale')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = student_classes.stale_students().count()
+            if stale:
+                self.stdout.write(self.style.WARNING(f'{stale} students have a stale class link'))
+            else:
+                self.stdout.write(self.style.SUCCESS('All student class links match class_name'))
+            return
+
+        changed = student_classes.sync()
+        self.stdout.write(self.style.SUCCESS(f'Updated the class link of {changed} students'))
@@ -1,8 +1,9 @@
 import logging
 import json
+import time
+from django.conf import settings
 from django.http import JsonResponse
 from django.contrib.contenttypes.models import ContentType
-from django.utils.deprecation import MiddlewareMixin
 
 logger = logging.getLogger(__name__)
 
@@ -47,63 +48,116 @@ class ExceptionToJSONMiddleware:
             raise
 
 
-class AuditLogMiddleware(MiddlewareMixin):
-    """Middleware to automatically create audit logs for API operations"""
-    
-    def process_response(self, request, response):
-        # Only log API requests
-        if not request.path.startswith('/api/'):
-            return response
-        
-        # Skip certain paths
-        skip_paths = ['/api/auth/token/', '/api/health/', '/api/admin/notifications/']
-        if any(request.path.startswith(path) for path in skip_paths):
-            return response
-        
-        # Only log authenticated requests
-        if not request.user or not request.user.is_authenticated:
-            return response
-        
-        # Only log successful operations
-        if response.status_code not in [200, 201, 204]:
+class QueryMetricsMiddleware:
+    """Record SQL query count, repeated queries and DB time for each API request.
+
+    - With DEBUG the figures are returned in a ``Server-Timing`` header (shown
+      in the browser's network panel) and an ``X-Query-Count`` header.
+    - Otherwise one JSON log line per request is written to the
+      ``admin_api.query_metrics`` logger when it ran at least
+      ``QUERY_METRICS_LOG_MIN_QUERIES`` queries (default 0: every request).
+
+    See ``admin_api.query_metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_METRICS_ENABLED', True)
+        self.log_min_queries = getattr(settings, 'QUERY_METRICS_LOG_MIN_QUERIES', 0)
+        self.metrics_logger = logging.getLogger('admin_api.query_metrics')
+
+    def __call__(self, request):
+        if not self.enabled or not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        from .query_metrics import record_queries, server_timing
+
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        if settings.DEBUG:
+            timing = f'{server_timing(recorder)}, total;dur={elapsed_ms}'
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+            response['X-Query-Count'] = str(recorder.count)
+        elif recorder.count >= self.log_min_queries:
+            match = getattr(request, 'resolver_match', None)
+            self.metrics_logger.info(json.dumps({
+                'event': 'request_queries',
+                'method': request.method,
+                'path': request.path,
+                'route': match.route if match else None,
+                'status': response.status_code,
+                'duration_ms': elapsed_ms,
+                **recorder.summary(limit=3),
+            }))
+        return response
+
+
+class AuditLogMiddleware:
+    """Record authenticated API operations in the audit log.
+
+    - Writes, and the GETs chosen by ``AUDIT_LOG_GET_SAMPLE_RATE`` and
+      ``AUDIT_LOG_GET_ALWAYS``, that succeeded are queued as plain dicts.
+    - The queue is written in batches off the request thread; see
+      ``admin_api.audit_log``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'AUDIT_LOG_ENABLED', True)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.enabled:
             return response
-        
-        # Determine action based on HTTP method
-        action_map = {
-            'POST': 'create',
-            'PUT': 'update',
-            'PATCH': 'update',
-            'DELETE': 'delete',
-            'GET': 'view',
-        }
-        
-        action = action_map.get(request.method, 'view')
-        
-        # Create audit log asynchronously to avoid performance impact
+
+        from . import audit_log
+
         try:
-            from .models_audit import AuditLog
-            
-            # Extract IP address
-            x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-            if x_forwarded_for:
-                ip_address = x_forwarded_for.split(',')[0]
-            else:
-                ip_address = request.META.get('REMOTE_ADDR')
-            
-            # Extract model name from path
-            path_parts = request.path.strip('/').split('/')
-            model_name = path_parts[2] if len(path_parts) > 2 else ''
-            
-            AuditLog.objects.create(
-                user=request.user,
-                action=action,
-                ip_address=ip_address,
-                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-                model_name=model_name,
-                description=f"{request.method} {request.path}"
-            )
+            if audit_log.should_record(request, response):
+                audit_log.record(audit_log.entry_for(request))
         except Exception as e:
             # Don't let audit logging break the request
-            logger.error(f"Failed to create audit log: {e}")
-        
+            logger.error(f"Failed to queue audit log entry: {e}")
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Let report, analytics and export reads use the read replica.
+
+    - Marks eligible GET/HEAD requests so ``ReplicaRouter`` sends their
+      reads to the ``replica`` alias, unless the client wrote recently.
+    - Pins the client to the primary after a successful write.
+    - Does nothing when no replica is configured; see ``admin_api.db_routing``.
+    """
+
+    def __init__(self, get_response):
+        from . import db_routing
+
+        self.get_response = get_response
+        self.enabled = db_routing.replica_configured()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        from . import db_routing
+
+        with db_routing.request_scope():
+            response = self.get_response(request)
+        if request.method not in db_routing.SAFE_METHODS and response.status_code < 400:
+            db_routing.pin_to_primary(request)
         return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled:
+            return None
+
+        from . import db_routing
+
+        if db_routing.replica_eligible(request, view_func) and not db_routing.is_pinned(request):
+            db_routing.allow_replica_reads()
+        return None
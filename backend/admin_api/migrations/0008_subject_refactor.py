@@ -3,6 +3,7 @@ from django.db import migrations, models
 
 def backfill_subject_codes(apps, schema_editor):
     Subject = apps.get_model('admin_api', 'Subject')
+    db = schema_editor.connection.alias
 
     def make_code(title: str):
         base = ''.join(ch for ch in (title or 'SUBJECT').upper() if ch.isalnum())
@@ -14,10 +15,10 @@ def backfill_subject_codes(apps, schema_editor):
         return base
 
     existing_codes = set(
-        Subject.objects.exclude(code__isnull=True).values_list('code', flat=True)
+        Subject.objects.using(db).exclude(code__isnull=True).values_list('code', flat=True)
     )
 
-    for s in Subject.objects.all():
+    for s in Subject.objects.using(db):
         if getattr(s, 'code', None):
             continue
         base = make_code(getattr(s, 'title', '') or getattr(s, 'name', '') or '')
@@ -28,7 +29,7 @@ def backfill_subject_codes(apps, schema_editor):
             code = (base[: max(0, 8 - len(suffix))] + suffix)[:8]
             i += 1
         s.code = code
-        s.save(update_fields=['code'])
+        s.save(using=db, update_fields=['code'])
         existing_codes.add(code)
 
 
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:33
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0031_allowancetype_asset_assetcategory_deductiontype_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsession',
+            name='online_exam',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='admin_api.onlineexam'),
+        ),
+        migrations.AddField(
+            model_name='onlineexam',
+            name='negative_mark_ratio',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Fraction of question marks deducted for a wrong MCQ answer', max_digits=4),
+        ),
+        migrations.AddField(
+            model_name='onlineexam',
+            name='questions',
+            field=models.ManyToManyField(blank=True, related_name='online_exams', to='admin_api.question'),
+        ),
+        migrations.AlterField(
+            model_name='examsession',
+            name='exam',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='admin_api.exam'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='examsession',
+            unique_together={('exam', 'student'), ('online_exam', 'student')},
+        ),
+    ]
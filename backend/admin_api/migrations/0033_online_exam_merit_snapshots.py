@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0032_online_exam_grading'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='meritlistentry',
+            options={'ordering': ['rank', 'roll_no']},
+        ),
+        migrations.AlterUniqueTogether(
+            name='meritlistentry',
+            unique_together={('merit_list', 'student')},
+        ),
+        migrations.AddField(
+            model_name='meritlist',
+            name='max_marks',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='meritlist',
+            name='online_exam',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='merit_list', to='admin_api.onlineexam'),
+        ),
+        migrations.AddField(
+            model_name='meritlistentry',
+            name='grade',
+            field=models.CharField(blank=True, max_length=5),
+        ),
+        migrations.AddField(
+            model_name='meritlistentry',
+            name='roll_no',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='meritlistentry',
+            name='student_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='meritlist',
+            name='academic_year',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='merit_lists', to='admin_api.academicyear'),
+        ),
+        migrations.AlterField(
+            model_name='meritlist',
+            name='term',
+            field=models.CharField(blank=True, choices=[('1', 'Term 1'), ('2', 'Term 2'), ('3', 'Term 3'), ('annual', 'Annual')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='meritlistentry',
+            name='progress_card',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='merit_entries', to='admin_api.progresscard'),
+        ),
+    ]
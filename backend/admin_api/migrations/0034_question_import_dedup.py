@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:37
+
+import hashlib
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_text_hash(apps, schema_editor):
+    """Hash existing questions with the same normalization as the importer"""
+    Question = apps.get_model('admin_api', 'Question')
+    db = schema_editor.connection.alias
+    whitespace = re.compile(r'\s+')
+    batch = []
+    for question in Question.objects.using(db).only('id', 'question_text').iterator(chunk_size=2000):
+        text = unicodedata.normalize('NFKC', question.question_text or '')
+        text = whitespace.sub(' ', text).strip().casefold()
+        question.text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        batch.append(question)
+        if len(batch) >= 2000:
+            Question.objects.using(db).bulk_update(batch, ['text_hash'])
+            batch = []
+    Question.objects.using(db).bulk_update(batch, ['text_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0033_online_exam_merit_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='text_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='QuestionImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500)),
+                ('original_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_rows', models.IntegerField(blank=True, null=True)),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('created_count', models.IntegerField(default=0)),
+                ('duplicate_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_import_jobs', to='admin_api.class')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='question_import_jobs', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_import_jobs', to='admin_api.subject')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(backfill_text_hash, migrations.RunPython.noop),
+    ]
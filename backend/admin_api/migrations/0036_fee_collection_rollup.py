@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollup(apps, schema_editor):
+    FeePayment = apps.get_model('admin_api', 'FeePayment')
+    FeeCollectionDaily = apps.get_model('admin_api', 'FeeCollectionDaily')
+    db = schema_editor.connection.alias
+
+    rows = (
+        FeePayment.objects.using(db).filter(status='paid', payment_date__isnull=False)
+        .values('payment_date', 'fee_structure__class_assigned_id', 'payment_method')
+        .annotate(transactions=Count('id'), amount=Sum('amount_paid'))
+        .order_by()
+    )
+    FeeCollectionDaily.objects.using(db).bulk_create([
+        FeeCollectionDaily(
+            date=row['payment_date'],
+            class_assigned_id=row['fee_structure__class_assigned_id'],
+            payment_method=row['payment_method'] or '',
+            transactions=row['transactions'],
+            amount=row['amount'] or Decimal('0.00'),
+        )
+        for row in rows
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0035_file_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeCollectionDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(blank=True, max_length=20)),
+                ('transactions', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_assigned', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fee_collection_days', to='admin_api.class')),
+            ],
+            options={
+                'verbose_name_plural': 'Fee Collection Daily',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date', 'class_assigned', 'payment_method'], name='admin_api_f_date_da6189_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:50
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0038_number_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('class_mapping', models.JSONField(default=dict)),
+                ('promoted_count', models.IntegerField(default=0)),
+                ('reversed_count', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('completed', 'Completed'), ('reversed', 'Reversed')], default='completed', max_length=20)),
+                ('remarks', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reversed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='promotion_batches', to=settings.AUTH_USER_MODEL)),
+                ('from_academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promotion_batches_from', to='admin_api.academicyear')),
+                ('to_academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promotion_batches_to', to='admin_api.academicyear')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='studentpromotion',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='promotions', to='admin_api.promotionbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='studentpromotion',
+            index=models.Index(fields=['batch', 'from_class'], name='admin_api_s_batch_i_f13cde_idx'),
+        ),
+    ]
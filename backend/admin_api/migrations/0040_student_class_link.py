@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def link_student_classes(apps, schema_editor):
+    """Point each student at the lowest-id Class carrying its class_name"""
+    Class = apps.get_model('admin_api', 'Class')
+    Student = apps.get_model('admin_api', 'Student')
+    db = schema_editor.connection.alias
+    rows = Class.objects.using(db).values('name').annotate(class_id=Min('id')).order_by()
+    for row in rows:
+        Student.objects.using(db).filter(class_name=row['name']).update(school_class_id=row['class_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0039_promotion_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='school_class',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='enrolled_students', to='admin_api.class'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='class_name',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.RunPython(link_student_classes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_section', 'date'], name='admin_api_a_class_s_b10ecb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['student', 'status'], name='admin_api_f_student_8c2b10_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'created_at'], name='admin_api_g_student_81f3af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', '-created_at'], name='notification_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0040_student_class_link'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'id'], name='admin_api_a_date_e8e3f6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailsmslog',
+            index=models.Index(fields=['created_at', 'id'], name='admin_api_e_created_58c99a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['created_at', 'id'], name='admin_api_g_created_8d7a37_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['created_at', 'id'], name='admin_api_m_created_61d704_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='admin_api_n_user_id_c538ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['created_at', 'id'], name='admin_api_w_created_7bd309_idx'),
+        ),
+    ]
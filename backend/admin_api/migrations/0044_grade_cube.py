@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+
+def backfill_cube(apps, schema_editor):
+    Grade = apps.get_model('admin_api', 'Grade')
+    GradeCubeCell = apps.get_model('admin_api', 'GradeCubeCell')
+    db = schema_editor.connection.alias
+
+    band = Case(
+        When(score__gte=90, then=Value('A')),
+        When(score__gte=80, then=Value('B')),
+        When(score__gte=70, then=Value('C')),
+        When(score__gte=60, then=Value('D')),
+        default=Value('F'),
+    )
+    rows = (
+        Grade.objects.using(db)
+        .annotate(cell_class=F('student__school_class_id'),
+                  cell_month=TruncMonth('date_recorded'), cell_band=band)
+        .values('cell_class', 'subject_id', 'term', 'grade_type', 'cell_month', 'cell_band')
+        .annotate(grade_count=Count('id'), score_sum=Sum('score'), max_score_sum=Sum('max_score'))
+        .order_by()
+    )
+    GradeCubeCell.objects.using(db).bulk_create([
+        GradeCubeCell(
+            class_assigned_id=row['cell_class'],
+            subject_id=row['subject_id'],
+            term=row['term'],
+            grade_type=row['grade_type'],
+            month=row['cell_month'],
+            band=row['cell_band'],
+            grade_count=row['grade_count'],
+            score_sum=row['score_sum'] or Decimal('0.00'),
+            max_score_sum=row['max_score_sum'] or Decimal('0.00'),
+        )
+        for row in rows
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0043_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeCubeCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=20)),
+                ('grade_type', models.CharField(max_length=20)),
+                ('month', models.DateField()),
+                ('band', models.CharField(max_length=2)),
+                ('grade_count', models.IntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('max_score_sum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_assigned', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grade_cube_cells', to='admin_api.class')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_cube_cells', to='admin_api.subject')),
+            ],
+            options={
+                'ordering': ['month'],
+                'indexes': [models.Index(fields=['class_assigned', 'subject', 'term', 'grade_type', 'month', 'band'], name='admin_api_g_class_a_a0675d_idx'), models.Index(fields=['month'], name='admin_api_g_month_057ada_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_cube, migrations.RunPython.noop),
+    ]
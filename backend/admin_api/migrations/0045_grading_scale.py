@@ -0,0 +1,84 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:13
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+from django.db.models.functions import NullIf, TruncMonth
+
+# The default grading scale as it stood when this migration was written.
+# Frozen here so re-running the migration never depends on live settings.
+SCALE = (
+    ('A+', 90), ('A', 85), ('B+', 80), ('B', 75), ('C+', 70), ('C', 65), ('D', 60), ('F', 0),
+)
+
+
+def reband_cube(apps, schema_editor):
+    """Cells were banded on the raw score; re-band them on the grading scale's letters"""
+    Grade = apps.get_model('admin_api', 'Grade')
+    GradeCubeCell = apps.get_model('admin_api', 'GradeCubeCell')
+    db = schema_editor.connection.alias
+
+    percentage = ExpressionWrapper(
+        F('score') * Value(100.0) / NullIf(F('max_score'), Value(0)), output_field=FloatField())
+    band = Case(
+        *[When(**{'cell_percentage__gte': float(band[1])}, then=Value(band[0]))
+          for band in SCALE],
+        default=Value('N/A'),
+    )
+    rows = (
+        Grade.objects.using(db)
+        .annotate(cell_class=F('student__school_class_id'),
+                  cell_month=TruncMonth('date_recorded'), cell_percentage=percentage)
+        .annotate(cell_band=band)
+        .values('cell_class', 'subject_id', 'term', 'grade_type', 'cell_month', 'cell_band')
+        .annotate(grade_count=Count('id'), score_sum=Sum('score'), max_score_sum=Sum('max_score'))
+        .order_by()
+    )
+    cells = [
+        GradeCubeCell(
+            class_assigned_id=row['cell_class'],
+            subject_id=row['subject_id'],
+            term=row['term'],
+            grade_type=row['grade_type'],
+            month=row['cell_month'],
+            band=row['cell_band'],
+            grade_count=row['grade_count'],
+            score_sum=row['score_sum'] or Decimal('0.00'),
+            max_score_sum=row['max_score_sum'] or Decimal('0.00'),
+        )
+        for row in rows
+    ]
+    GradeCubeCell.objects.using(db).all().delete()
+    GradeCubeCell.objects.using(db).bulk_create(cells, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0044_grade_cube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeScale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('min_percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('max_percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('grade', models.CharField(help_text='A+, A, B+, etc.', max_length=5)),
+                ('grade_point', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('description', models.CharField(blank=True, max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['-min_percentage'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='gradecubecell',
+            name='band',
+            field=models.CharField(max_length=5),
+        ),
+        migrations.RunPython(reband_cube, migrations.RunPython.noop),
+    ]
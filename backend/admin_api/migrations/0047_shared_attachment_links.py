@@ -0,0 +1,27 @@
+from django.core import signing
+from django.db import migrations
+
+SHARE_SALT = 'admin_api.storedfile.share'
+
+
+def sign_attachment_links(apps, schema_editor):
+    """Attachments are downloaded by other users, so they need shared links"""
+    db = schema_editor.connection.alias
+    for model_name in ('Assignment', 'AssignmentSubmission'):
+        model = apps.get_model('admin_api', model_name)
+        rows = list(model.objects.using(db).filter(attachment_file__isnull=False))
+        for row in rows:
+            token = signing.dumps(row.attachment_file_id, salt=SHARE_SALT)
+            row.attachment_url = f"/api/admin/files/{row.attachment_file_id}/download/?share={token}"
+        model.objects.using(db).bulk_update(rows, ['attachment_url'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0046_stripe_webhook_inbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(sign_attachment_links, migrations.RunPython.noop),
+    ]
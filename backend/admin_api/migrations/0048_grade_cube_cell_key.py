@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:51
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+KEY_FIELDS = ('class_assigned_id', 'subject_id', 'term', 'grade_type', 'month', 'band')
+
+
+def merge_duplicate_cells(apps, schema_editor):
+    """Fold cells sharing a key (left by concurrent writers) into one"""
+    GradeCubeCell = apps.get_model('admin_api', 'GradeCubeCell')
+    cells = GradeCubeCell.objects.using(schema_editor.connection.alias)
+    duplicates = (
+        cells.values(*KEY_FIELDS)
+        .annotate(cells=Count('id'), keep=Min('id'), grade_count=Sum('grade_count'),
+                  score_sum=Sum('score_sum'), max_score_sum=Sum('max_score_sum'))
+        .filter(cells__gt=1)
+        .order_by()
+    )
+    for row in list(duplicates):
+        key = {field: row[field] for field in KEY_FIELDS}
+        if key['class_assigned_id'] is None:
+            key = {'class_assigned__isnull': True, **{f: row[f] for f in KEY_FIELDS[1:]}}
+        cells.filter(**key).exclude(pk=row['keep']).delete()
+        cells.filter(pk=row['keep']).update(
+            grade_count=row['grade_count'], score_sum=row['score_sum'],
+            max_score_sum=row['max_score_sum'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0047_shared_attachment_links'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cells, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='gradecubecell',
+            name='admin_api_g_class_a_a0675d_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='gradecubecell',
+            constraint=models.UniqueConstraint(condition=models.Q(('class_assigned__isnull', False)), fields=('class_assigned', 'subject', 'term', 'grade_type', 'month', 'band'), name='grade_cube_cell_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradecubecell',
+            constraint=models.UniqueConstraint(condition=models.Q(('class_assigned__isnull', True)), fields=('subject', 'term', 'grade_type', 'month', 'band'), name='grade_cube_cell_key_no_class'),
+        ),
+    ]
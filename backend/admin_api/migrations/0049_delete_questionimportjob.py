@@ -0,0 +1,16 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0048_grade_cube_cell_key'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='QuestionImportJob',
+        ),
+    ]
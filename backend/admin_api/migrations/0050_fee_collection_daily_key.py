@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:19
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+KEY_FIELDS = ('date', 'class_assigned_id', 'payment_method')
+
+
+def merge_duplicate_days(apps, schema_editor):
+    """Fold rows sharing a bucket (left by concurrent writers) into one"""
+    FeeCollectionDaily = apps.get_model('admin_api', 'FeeCollectionDaily')
+    days = FeeCollectionDaily.objects.using(schema_editor.connection.alias)
+    duplicates = (
+        days.values(*KEY_FIELDS)
+        .annotate(rows=Count('id'), keep=Min('id'), transactions=Sum('transactions'),
+                  amount=Sum('amount'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in list(duplicates):
+        key = {field: row[field] for field in KEY_FIELDS}
+        if key['class_assigned_id'] is None:
+            key = {'class_assigned__isnull': True, 'date': row['date'],
+                   'payment_method': row['payment_method']}
+        days.filter(**key).exclude(pk=row['keep']).delete()
+        days.filter(pk=row['keep']).update(
+            transactions=row['transactions'], amount=row['amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_api', '0049_delete_questionimportjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_days, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='feecollectiondaily',
+            name='admin_api_f_date_da6189_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='feecollectiondaily',
+            constraint=models.UniqueConstraint(condition=models.Q(('class_assigned__isnull', False)), fields=('date', 'class_assigned', 'payment_method'), name='fee_collection_daily_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='feecollectiondaily',
+            constraint=models.UniqueConstraint(condition=models.Q(('class_assigned__isnull', True)), fields=('date', 'payment_method'), name='fee_collection_daily_key_no_class'),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
+from django.core import signing
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 from users.models import User
+import uuid
 
 
 class Student(models.Model):
@@ -17,7 +19,15 @@ class Student(models.Model):
         blank=True,
         related_name='children')
     roll_no = models.CharField(max_length=20, unique=True)
-    class_name = models.CharField(max_length=50)
+    class_name = models.CharField(max_length=50, db_index=True)
+    # Normalised link to ``Class``; kept in step with ``class_name`` by
+    # ``save()`` and ``admin_api.student_classes`` during the dual-write period
+    school_class = models.ForeignKey(
+        'Class',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='enrolled_students')
     phone = models.CharField(max_length=20, blank=True)
     attendance_percentage = models.DecimalField(
         max_digits=5, decimal_places=2, default=Decimal('0.00'))
@@ -30,6 +40,17 @@ class Student(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.roll_no}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'class_name' in update_fields:
+            self.school_class_id = (
+                Class.objects.filter(name=self.class_name)
+                .order_by('id').values_list('id', flat=True).first()
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'school_class'}
+        super().save(*args, **kwargs)
+
     def get_full_name(self):
         return self.user.get_full_name()
 
@@ -391,6 +412,11 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ('student', 'date', 'class_section')
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['class_section', 'date']),
+            # Keyset pagination (admin_api.pagination.DateKeysetPagination)
+            models.Index(fields=['date', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.date} - {self.status}"
@@ -456,29 +482,89 @@ class Grade(models.Model):
 
     @property
     def letter_grade(self):
-        percentage = self.percentage
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 85:
-            return 'A'
-        elif percentage >= 80:
-            return 'B+'
-        elif percentage >= 75:
-            return 'B'
-        elif percentage >= 70:
-            return 'C+'
-        elif percentage >= 65:
-            return 'C'
-        elif percentage >= 60:
-            return 'D'
-        else:
-            return 'F'
+        from admin_api import grading_scale
+
+        return grading_scale.letter(grading_scale.percentage(self.score, self.max_score))
 
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.subject.title} - {self.grade_type}"
 
     class Meta:
         ordering = ['-date_recorded', '-created_at']
+        indexes = [
+            models.Index(fields=['student', 'created_at']),
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+
+class GradeCubeCell(models.Model):
+    """
+    Grade counts and sums per (class, subject, term, grade type, month, score
+    band), maintained by the ``Grade`` signal handlers (see
+    ``admin_api.grade_cube``)
+    """
+    class_assigned = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='grade_cube_cells')
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='grade_cube_cells')
+    term = models.CharField(max_length=20)
+    grade_type = models.CharField(max_length=20)
+    month = models.DateField()
+    band = models.CharField(max_length=5)
+    grade_count = models.IntegerField(default=0)
+    score_sum = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'))
+    max_score_sum = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month']
+        # One cell per key. NULLs never collide in a unique index, so the
+        # cells of students without a class get a constraint of their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=['class_assigned', 'subject', 'term', 'grade_type', 'month', 'band'],
+                condition=models.Q(class_assigned__isnull=False),
+                name='grade_cube_cell_key'),
+            models.UniqueConstraint(
+                fields=['subject', 'term', 'grade_type', 'month', 'band'],
+                condition=models.Q(class_assigned__isnull=True),
+                name='grade_cube_cell_key_no_class'),
+        ]
+        indexes = [
+            models.Index(fields=['month']),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.term} {self.grade_type} {self.band}: {self.grade_count}"
+
+
+class GradeScale(models.Model):
+    """Grading scale configuration"""
+    name = models.CharField(max_length=100)
+    min_percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    max_percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    grade = models.CharField(max_length=5, help_text="A+, A, B+, etc.")
+    grade_point = models.DecimalField(max_digits=3, decimal_places=2)
+    description = models.CharField(max_length=100, blank=True)
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        ordering = ['-min_percentage']
+    
+    def __str__(self):
+        return f"{self.grade} ({self.min_percentage}% - {self.max_percentage}%)"
 
 
 class Report(models.Model):
@@ -580,6 +666,16 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread inbox, newest first; a partial index because the ORM
+            # renders ``is_read=False`` as ``NOT is_read``
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx'),
+            # Keyset pagination of a user's notifications
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -722,11 +818,54 @@ class FeePayment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['student', 'status']),
+        ]
 
     def __str__(self):
         return f"{self.invoice_number} - {self.student.get_full_name()} - {self.status}"
 
 
+class FeeCollectionDaily(models.Model):
+    """
+    Daily rollup of paid fees per class and payment method, maintained by the
+    ``FeePayment`` signal handlers (see ``admin_api.fee_rollup``)
+    """
+    date = models.DateField()
+    class_assigned = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='fee_collection_days')
+    payment_method = models.CharField(max_length=20, blank=True)
+    transactions = models.IntegerField(default=0)
+    amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        # One row per bucket; class_assigned is nullable, so rows without a
+        # class need their own constraint
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'class_assigned', 'payment_method'],
+                condition=models.Q(class_assigned__isnull=False),
+                name='fee_collection_daily_key'),
+            models.UniqueConstraint(
+                fields=['date', 'payment_method'],
+                condition=models.Q(class_assigned__isnull=True),
+                name='fee_collection_daily_key_no_class'),
+        ]
+        verbose_name_plural = "Fee Collection Daily"
+
+    def __str__(self):
+        return f"{self.date} - {self.payment_method or 'unspecified'} - {self.amount}"
+
+
 # ==================== WALLET / ACCOUNTS / INVENTORY ====================
 
 
@@ -773,6 +912,9 @@ class WalletTransaction(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.wallet.name} - {self.transaction_type} - {self.amount}"
@@ -1079,6 +1221,15 @@ class OnlineExam(models.Model):
     end_datetime = models.DateTimeField()
     min_percent = models.IntegerField(default=Decimal('0.00'))
     auto_mark = models.BooleanField(default=False)
+    negative_mark_ratio = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Fraction of question marks deducted for a wrong MCQ answer')
+    questions = models.ManyToManyField(
+        'Question',
+        blank=True,
+        related_name='online_exams')
     instructions = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(
@@ -1118,6 +1269,8 @@ class Question(models.Model):
         blank=True,
         related_name='questions')
     question_text = models.TextField()
+    # SHA-256 of the normalized question text, used to skip duplicates on import
+    text_hash = models.CharField(max_length=64, blank=True, db_index=True)
     question_type = models.CharField(
         max_length=20, choices=Q_TYPES, default='mcq')
     options = models.JSONField(
@@ -1147,6 +1300,11 @@ class Question(models.Model):
     def __str__(self):
         return f"Q: {self.question_text[:60]}"
 
+    def save(self, *args, **kwargs):
+        from admin_api.question_import import question_text_hash
+        self.text_hash = question_text_hash(self.question_text)
+        super().save(*args, **kwargs)
+
 
 class ClassTest(models.Model):
     title = models.CharField(max_length=255)
@@ -1339,6 +1497,12 @@ class Assignment(models.Model):
         choices=STATUS_CHOICES,
         default='published')
     attachment_url = models.CharField(max_length=500, blank=True)
+    attachment_file = models.ForeignKey(
+        'StoredFile',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='assignments')
     instructions = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1370,6 +1534,12 @@ class AssignmentSubmission(models.Model):
     submission_date = models.DateTimeField(auto_now_add=True)
     submission_text = models.TextField(blank=True)
     attachment_url = models.CharField(max_length=500, blank=True)
+    attachment_file = models.ForeignKey(
+        'StoredFile',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='assignment_submissions')
     status = models.CharField(
         max_length=20,
         choices=SUBMISSION_STATUS,
@@ -1397,6 +1567,96 @@ class AssignmentSubmission(models.Model):
         return f"{self.assignment.title} - {self.student.get_full_name()}"
 
 
+# ==================== FILE STORAGE MODELS ====================
+
+class StoredBlob(models.Model):
+    """Content-addressed file body; identical uploads share one blob"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    storage_key = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+class StoredFile(models.Model):
+    """A user-visible upload pointing at a shared blob"""
+    # Signs the ids in shared download links (see shared_download_url)
+    SHARE_SALT = 'admin_api.storedfile.share'
+
+    blob = models.ForeignKey(
+        StoredBlob,
+        on_delete=models.PROTECT,
+        related_name='files')
+    original_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='stored_files')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.original_name
+
+    @property
+    def size(self):
+        return self.blob.size
+
+    @property
+    def download_url(self):
+        return f"/api/admin/files/{self.id}/download/"
+
+    @property
+    def shared_download_url(self):
+        """Download link any signed-in user holding it may use, e.g. for attachments"""
+        token = signing.dumps(self.id, salt=self.SHARE_SALT)
+        return f"{self.download_url}?share={token}"
+
+
+class UploadSession(models.Model):
+    """Resumable chunked upload in progress"""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+
+    upload_id = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    temp_path = models.CharField(max_length=500)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='uploading')
+    stored_file = models.ForeignKey(
+        StoredFile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
+
+
 # ==================== LIBRARY MODELS ====================
 
 
@@ -1593,6 +1853,9 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.sender.username} to {self.receiver.username} - {self.subject}"
@@ -2113,6 +2376,7 @@ class LeaveApplication(models.Model):
         ('pending', 'Pending'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
+        ('cancelled', 'Cancelled'),
     ]
 
     applicant = models.ForeignKey(
@@ -2224,6 +2488,9 @@ class EmailSmsLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.channel} -> {self.to} ({self.status})"
@@ -2345,6 +2612,44 @@ class PaymentTransaction(models.Model):
         return f"{self.student.user.get_full_name()} - {self.amount} - {self.status}"
 
 
+class StripeWebhookEvent(models.Model):
+    """
+    Inbox of verified Stripe webhook deliveries, one row per event id so
+    retried deliveries are stored once; processed in batches by
+    admin_api.stripe_inbox
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    # The event's data.object id, e.g. the payment intent
+    object_id = models.CharField(max_length=255, blank=True, db_index=True)
+    stripe_created = models.BigIntegerField(default=0)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'stripe_created']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} - {self.event_type} - {self.status}"
+
+
 class HomeworkSubmission(models.Model):
     STATUS_CHOICES = [
         ('submitted', 'Submitted'),
@@ -2525,6 +2830,56 @@ class AdmissionApplication(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+class NumberSequence(models.Model):
+    """Named counter for gap-tolerant document numbers (see ``admin_api.sequences``)"""
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
+class PromotionBatch(models.Model):
+    """One run of the bulk promotion engine (see ``admin_api.promotion_engine``)"""
+    STATUS_CHOICES = [
+        ('completed', 'Completed'),
+        ('reversed', 'Reversed'),
+    ]
+
+    batch_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    class_mapping = models.JSONField(default=dict)
+    from_academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        related_name='promotion_batches_from'
+    )
+    to_academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        related_name='promotion_batches_to'
+    )
+    promoted_count = models.IntegerField(default=0)
+    reversed_count = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='completed')
+    remarks = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='promotion_batches'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    reversed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Promotion batch {self.batch_id} ({self.promoted_count} students)"
+
+
 class StudentPromotion(models.Model):
     """Track student promotions between classes"""
     student = models.ForeignKey(
@@ -2552,10 +2907,20 @@ class StudentPromotion(models.Model):
         null=True,
         blank=True
     )
+    batch = models.ForeignKey(
+        PromotionBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='promotions'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-promotion_date']
+        indexes = [
+            models.Index(fields=['batch', 'from_class']),
+        ]
 
     def __str__(self):
         return f"{self.student.get_full_name()}: {self.from_class} → {self.to_class}"
@@ -2568,6 +2933,15 @@ class ExamSession(models.Model):
     exam = models.ForeignKey(
         'Exam',
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sessions'
+    )
+    online_exam = models.ForeignKey(
+        OnlineExam,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='sessions'
     )
     student = models.ForeignKey(
@@ -2593,11 +2967,12 @@ class ExamSession(models.Model):
     tab_switches = models.IntegerField(default=0)
     
     class Meta:
-        unique_together = ['exam', 'student']
+        unique_together = [['exam', 'student'], ['online_exam', 'student']]
         ordering = ['-started_at']
 
     def __str__(self):
-        return f"{self.student.get_full_name()} - {self.exam.name}"
+        exam_name = self.exam.name if self.exam else self.online_exam.title
+        return f"{self.student.get_full_name()} - {exam_name}"
 
 
 class QuestionAnswer(models.Model):
@@ -2731,16 +3106,32 @@ class ProgressCardSubject(models.Model):
 
 
 class MeritList(models.Model):
-    """Merit list for classes"""
+    """Merit list for classes, or a ranked snapshot of an online exam"""
     academic_year = models.ForeignKey(
         AcademicYear,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='merit_lists'
     )
+    online_exam = models.OneToOneField(
+        OnlineExam,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='merit_list'
+    )
     class_name = models.CharField(max_length=50)
     term = models.CharField(
         max_length=10,
-        choices=ProgressCard.TERM_CHOICES
+        choices=ProgressCard.TERM_CHOICES,
+        blank=True
+    )
+    max_marks = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        null=True,
+        blank=True
     )
     generated_date = models.DateField(auto_now_add=True)
     generated_by = models.ForeignKey(
@@ -2756,6 +3147,8 @@ class MeritList(models.Model):
         ordering = ['-generated_date']
 
     def __str__(self):
+        if self.online_exam_id:
+            return f"Merit List - {self.online_exam.title}"
         return f"Merit List - {self.class_name} - {self.term} - {self.academic_year.name}"
 
 
@@ -2775,15 +3168,22 @@ class MeritListEntry(models.Model):
     progress_card = models.ForeignKey(
         ProgressCard,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='merit_entries'
     )
+    # Denormalized at generation time so snapshots render without joins
+    student_name = models.CharField(max_length=255, blank=True)
+    roll_no = models.CharField(max_length=20, blank=True)
     total_marks = models.DecimalField(max_digits=6, decimal_places=2)
     percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    grade = models.CharField(max_length=5, blank=True)
     gpa = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
 
     class Meta:
-        unique_together = ['merit_list', 'rank']
-        ordering = ['rank']
+        # Tied students share a rank, so uniqueness is per student
+        unique_together = ['merit_list', 'student']
+        ordering = ['rank', 'roll_no']
 
     def __str__(self):
         return f"Rank {self.rank} - {self.student.get_full_name()}"
@@ -3018,6 +3418,45 @@ class EmployeeLeaveBalance(models.Model):
         return float(self.total_allocated) + float(self.carried_forward) - float(self.used)
 
 
+class LeaveLedgerEntry(models.Model):
+    """
+    Signed movement on an employee's leave balance; ``EmployeeLeaveBalance``
+    is the running total of these entries (see ``admin_api.leave_ledger``)
+    """
+    ENTRY_TYPES = [
+        ('allocation', 'Allocation'),
+        ('usage', 'Usage'),
+        ('reversal', 'Reversal'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_ledger')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, related_name='ledger_entries')
+    year = models.IntegerField()
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES)
+    days = models.DecimalField(max_digits=5, decimal_places=1,
+                               help_text="Allocations add to total_allocated; usage, reversal and adjustment add to used")
+    application = models.ForeignKey(
+        LeaveApplication,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries')
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['employee', 'leave_type', 'year']),
+        ]
+        verbose_name_plural = 'Leave Ledger Entries'
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.leave_type.name} ({self.year}): {self.entry_type} {self.days}"
+
+
 # ==================== EXPENSE MANAGEMENT ====================
 
 class ExpenseCategory(models.Model):
@@ -3343,3 +3782,9 @@ class BudgetAllocation(models.Model):
 # Academic: 9 models
 # NOTE: Accounting models already exist in this file
 # ============================================
+
+# Audit trail written by AuditLogMiddleware, see admin_api.audit_log
+from .models_audit import AuditLog  # noqa: E402,F401
+
+# Background jobs run by admin_api.jobs
+from .models_jobs import Job  # noqa: E402,F401
@@ -7,7 +7,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
 from users.models import User
-from .models import Student, Teacher, Subject, ClassRoom, AcademicYear, Exam
+from .models import Student, Teacher, Subject, ClassRoom, AcademicYear, Exam, GradeScale
 
 
 # AcademicYear already exists in models.py
@@ -119,23 +119,6 @@ class ExamMark(models.Model):
         return self.marks_obtained >= self.exam.passing_marks and not self.is_absent
 
 
-class GradeScale(models.Model):
-    """Grading scale configuration"""
-    name = models.CharField(max_length=100)
-    min_percentage = models.DecimalField(max_digits=5, decimal_places=2)
-    max_percentage = models.DecimalField(max_digits=5, decimal_places=2)
-    grade = models.CharField(max_length=5, help_text="A+, A, B+, etc.")
-    grade_point = models.DecimalField(max_digits=3, decimal_places=2)
-    description = models.CharField(max_length=100, blank=True)
-    is_active = models.BooleanField(default=True)
-    
-    class Meta:
-        ordering = ['-min_percentage']
-    
-    def __str__(self):
-        return f"{self.grade} ({self.min_percentage}% - {self.max_percentage}%)"
-
-
 # ExamResult already exists in models.py - DO NOT DUPLICATE
 # class ExamResult(models.Model):
 #     """Consolidated exam results for students"""
@@ -0,0 +1,73 @@
+from django.db import models
+from users.models import User
+
+
+class Job(models.Model):
+    """A long-running operation run off the request; see admin_api.jobs"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    )
+
+    # Task name from admin_api.jobs.TASKS, e.g. 'request' for a replayed API call
+    kind = models.CharField(max_length=100)
+    name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    payload = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    result_file = models.ForeignKey(
+        'admin_api.StoredFile',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    progress_current = models.IntegerField(default=0)
+    progress_total = models.IntegerField(null=True, blank=True)
+    progress_message = models.CharField(max_length=255, blank=True)
+
+    # Per-user key from the Idempotency-Key header: a retried request gets
+    # the existing job instead of starting the operation twice
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    cancel_requested = models.BooleanField(default=False)
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers claim the oldest pending job
+            models.Index(fields=['status', 'id'], name='job_status_id_idx'),
+            models.Index(fields=['created_by', '-created_at'], name='job_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.name or self.kind} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    @property
+    def progress_percent(self):
+        if self.status == 'completed':
+            return 100
+        if not self.progress_total:
+            return None
+        return min(round(self.progress_current / self.progress_total * 100, 1), 100)
@@ -0,0 +1,239 @@
+"""
+Pagination for list endpoints
+
+``BoundedPageNumberPagination`` is the project default: page-number pages
+of 20 that a client can grow with ``?page_size=`` up to ``MAX_PAGE_SIZE``.
+
+Append-heavy tables (attendance, grades, notifications, messages, wallet
+transactions, e-mail/SMS logs) use keyset pagination instead. A page is
+the rows after the last ``(created_at, id)`` (or ``(date, id)``) pair of
+the previous page, so every page costs one index range scan however deep
+the client goes, and rows inserted meanwhile never shift the pages. The
+response carries opaque ``next``/``previous`` cursors and no total; a
+client that needs one asks for ``?count=estimate`` (the planner's row
+estimate on PostgreSQL, a briefly cached ``COUNT(*)`` elsewhere) or
+``?count=exact``. Pages are newest first; ``?direction=asc`` reverses them.
+The key is the only order keyset pages can follow, so ``?ordering=`` is
+rejected with a 400 rather than silently ignored.
+"""
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+COUNT_CACHE_SECONDS = 60
+
+
+class BoundedPageNumberPagination(PageNumberPagination):
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+# ==================== COUNT ESTIMATES ====================
+
+def estimate_count(queryset):
+    """
+    Approximate ``queryset.count()``: ``pg_class.reltuples`` for a whole
+    table and the planner's row estimate for a filtered queryset on
+    PostgreSQL; elsewhere an exact count cached for ``COUNT_CACHE_SECONDS``
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        estimate = _planner_estimate(queryset, connection)
+        if estimate is not None:
+            return estimate
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    key = 'count_estimate:' + hashlib.sha1(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_SECONDS)
+    return count
+
+
+def _planner_estimate(queryset, connection):
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # reltuples is -1 until the table is first analysed
+            if row and row[0] >= 0:
+                return row[0]
+            return None
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+# ==================== KEYSET PAGINATION ====================
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``keyset`` (a timestamp or date column, then the
+    primary key), newest first. ``?direction=asc`` flips it to oldest first.
+    Needs an index on ``keyset`` to be cheap.
+    """
+    keyset = ('created_at', 'id')
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    direction_query_param = 'direction'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.descending = self.get_descending(request)
+        position, backwards = self.decode_cursor(queryset.model, request)
+
+        # A backwards page is read in the opposite order and flipped back
+        reverse = self.descending != backwards
+        ordering = [f'-{field}' if reverse else field for field in self.keyset]
+        page = queryset.order_by(*ordering)
+        if position is not None:
+            page = page.filter(self.after(position, reverse))
+        rows = list(page[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        self.first = self.position(rows[0]) if rows else None
+        self.last = self.position(rows[-1]) if rows else None
+        self.has_next = more if not backwards else position is not None
+        self.has_previous = more if backwards else position is not None
+
+        self.count = None
+        count = request.query_params.get(self.count_query_param)
+        if count == 'estimate':
+            self.count = estimate_count(queryset)
+        elif count == 'exact':
+            self.count = queryset.count()
+        self.count_mode = count
+        return rows
+
+    def get_descending(self, request):
+        if 'ordering' in request.query_params:
+            raise ValidationError({
+                'ordering': f"Pages follow {', '.join(self.keyset)}; use "
+                            f"?{self.direction_query_param}=asc or desc instead"
+            })
+        direction = request.query_params.get(self.direction_query_param, 'desc')
+        if direction not in ('asc', 'desc'):
+            raise ValidationError({self.direction_query_param: 'Must be asc or desc'})
+        return direction == 'desc'
+
+    def after(self, position, reverse):
+        """Rows strictly past ``position`` in the current direction"""
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.keyset, position):
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        # The redundant bound on the leading column lets the planner start
+        # an index range scan there instead of evaluating the OR per row
+        return Q(**{f'{self.keyset[0]}__{lookup}e': position[0]}) & condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_estimate'] = self.count_mode == 'estimate'
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Only with ?count=estimate or ?count=exact'},
+                'count_is_estimate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ==================== CURSORS ====================
+
+    def position(self, row):
+        if isinstance(row, dict):
+            return tuple(row[field] for field in self.keyset)
+        return tuple(getattr(row, field) for field in self.keyset)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, backwards=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first, backwards=True)
+
+    def encode_cursor(self, position, backwards):
+        token = {'p': [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]}
+        if backwards:
+            token['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(token, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, model, request):
+        """``(position, backwards)`` from the request's cursor; ``(None, False)`` without one"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            token = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = token['p']
+            if len(values) != len(self.keyset):
+                raise ValueError(encoded)
+            position = tuple(
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.keyset, values)
+            )
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(token.get('r'))
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    keyset = ('created_at', 'id')
+
+
+class DateKeysetPagination(KeysetPagination):
+    keyset = ('date', 'id')
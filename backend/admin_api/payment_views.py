@@ -1,18 +1,26 @@
 """
 Stripe payment integration service
 """
-import stripe
+import json
+
 from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from admin_api.models import Student, PaymentTransaction
+from admin_api import stripe_inbox
+from admin_api.models import FeePayment, Student, PaymentTransaction
 from decimal import Decimal
 from django.db import transaction
+from admin_api.lazy_imports import lazy_module
+
+
+def configure_stripe(module):
+    module.api_key = settings.STRIPE_SECRET_KEY
 
-# Configure Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+# Imported and configured on first use
+stripe = lazy_module('stripe', on_load=configure_stripe)
 
 
 @api_view(['POST'])
@@ -26,6 +34,7 @@ def create_payment_intent(request):
         amount = request.data.get('amount')
         fee_type = request.data.get('fee_type')
         description = request.data.get('description', 'School Fee Payment')
+        fee_payment_id = request.data.get('fee_payment_id')  # Optional, credited on success
 
         if not all([student_id, amount, fee_type]):
             return Response(
@@ -42,16 +51,27 @@ def create_payment_intent(request):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        if fee_payment_id and not FeePayment.objects.filter(
+                id=fee_payment_id, student=student).exists():
+            return Response(
+                {'error': 'Fee payment not found for this student'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        metadata = {
+            'student_id': student_id,
+            'student_name': f"{student.user.first_name} {student.user.last_name}",
+            'fee_type': fee_type,
+            'user_id': request.user.id,
+        }
+        if fee_payment_id:
+            metadata['fee_payment_id'] = fee_payment_id
+
         # Create Payment Intent
         intent = stripe.PaymentIntent.create(
             amount=int(Decimal(amount) * 100),  # Convert to cents
             currency='usd',
-            metadata={
-                'student_id': student_id,
-                'student_name': f"{student.user.first_name} {student.user.last_name}",
-                'fee_type': fee_type,
-                'user_id': request.user.id,
-            },
+            metadata=metadata,
             description=description,
         )
 
@@ -143,15 +163,20 @@ def confirm_payment(request):
 def stripe_webhook(request):
     """
     Handle Stripe webhook events
+
+    Only verifies the signature and stores the event in the webhook inbox;
+    transactions and fees are updated in batches by admin_api.stripe_inbox.
+    A retried delivery of a stored event is acknowledged without effect.
     """
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
     webhook_secret = settings.STRIPE_WEBHOOK_SECRET
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, webhook_secret
+        stripe.WebhookSignature.verify_header(
+            payload, sig_header, webhook_secret, stripe.Webhook.DEFAULT_TOLERANCE
         )
+        stripe_inbox.receive(json.loads(payload))
     except ValueError:
         return Response({'error': 'Invalid payload'},
                         status=status.HTTP_400_BAD_REQUEST)
@@ -159,51 +184,7 @@ def stripe_webhook(request):
         return Response({'error': 'Invalid signature'},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    # Handle the event
-    if event.type == 'payment_intent.succeeded':
-        payment_intent = event.data.object
-        handle_payment_success(payment_intent)
-
-    elif event.type == 'payment_intent.payment_failed':
-        payment_intent = event.data.object
-        handle_payment_failure(payment_intent)
-
-    return Response({'status': 'success'}, status=status.HTTP_200_OK)
-
-
-def handle_payment_success(payment_intent):
-    """Handle successful payment"""
-    try:
-        with transaction.atomic():
-            payment_transaction = PaymentTransaction.objects.get(
-                payment_intent_id=payment_intent.id
-            )
-            payment_transaction.status = 'completed'
-            payment_transaction.stripe_charge_id = payment_intent.charges.data[
-                0].id if payment_intent.charges.data else None
-            payment_transaction.save()
-
-            # Additional logic: Update student balance, send notification, etc.
-
-    except PaymentTransaction.DoesNotExist:
-        print(f"Transaction not found for payment_intent: {payment_intent.id}")
-
-
-def handle_payment_failure(payment_intent):
-    """Handle failed payment"""
-    try:
-        with transaction.atomic():
-            payment_transaction = PaymentTransaction.objects.get(
-                payment_intent_id=payment_intent.id
-            )
-            payment_transaction.status = 'failed'
-            payment_transaction.failure_reason = payment_intent.last_payment_error.message if payment_intent.last_payment_error else 'Unknown error'
-            payment_transaction.save()
-
-            # Additional logic: Send notification to user
-
-    except PaymentTransaction.DoesNotExist:
-        print(f"Transaction not found for payment_intent: {payment_intent.id}")
+    return Response({'status': 'received'}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -0,0 +1,204 @@
+"""
+Bulk student promotion
+
+A promotion run takes a ``{from_class: to_class}`` mapping for the whole
+school (or a subset of students) and is recorded as a ``PromotionBatch``:
+
+- ``preview`` counts the students each source class would move, plus the
+  active classes the mapping leaves out, in one grouped query.
+- ``promote`` writes the ``StudentPromotion`` rows with ``bulk_create`` and
+  then issues one ``UPDATE ... SET class_name`` per source class. The update
+  selects students through the batch's own promotion rows, so chained
+  mappings (``Grade 1 -> Grade 2``, ``Grade 2 -> Grade 3``) and swaps move
+  each student exactly once.
+- ``reverse`` undoes a batch with one ``UPDATE`` per class pair. Students
+  whose class changed again after the batch are left alone and reported.
+"""
+from django.db import transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from admin_api import grade_cube
+from admin_api.models import AcademicYear, PromotionBatch, Student, StudentPromotion
+from admin_api.student_classes import class_ids_by_name
+
+
+PROMOTION_CHUNK_SIZE = 2000
+CLASS_NAME_MAX_LENGTH = 50
+
+
+class PromotionError(Exception):
+    """Invalid mapping or batch state"""
+
+
+def normalize_mapping(mapping):
+    """Validate a ``{from_class: to_class}`` mapping and strip the names"""
+    if not isinstance(mapping, dict) or not mapping:
+        raise PromotionError('mapping must be a non-empty object of {from_class: to_class}')
+    normalized = {}
+    for from_class, to_class in mapping.items():
+        if not isinstance(to_class, str):
+            raise PromotionError(f'Target class for {from_class!r} must be a string')
+        from_class, to_class = str(from_class).strip(), to_class.strip()
+        if not from_class or not to_class:
+            raise PromotionError('Class names cannot be blank')
+        if from_class == to_class:
+            raise PromotionError(f'{from_class!r} is mapped to itself')
+        if len(to_class) > CLASS_NAME_MAX_LENGTH:
+            raise PromotionError(f'Class name {to_class!r} is too long')
+        normalized[from_class] = to_class
+    return normalized
+
+
+def academic_years(to_year_id, from_year_id=None):
+    """
+    Resolve ``(from_year, to_year)``; the source year defaults to the current
+    academic year, or the target year when none is marked current
+    """
+    years = AcademicYear.objects.in_bulk([pk for pk in (to_year_id, from_year_id) if pk])
+    try:
+        to_year = years[int(to_year_id)]
+        from_year = years[int(from_year_id)] if from_year_id else None
+    except (KeyError, TypeError, ValueError):
+        raise PromotionError('Academic year not found')
+    if from_year is None:
+        from_year = AcademicYear.objects.filter(is_current=True).first() or to_year
+    return from_year, to_year
+
+
+def _students(student_ids=None):
+    students = Student.objects.filter(is_active=True)
+    if student_ids:
+        students = students.filter(id__in=student_ids)
+    return students
+
+
+# ==================== PREVIEW ====================
+
+def preview(mapping, student_ids=None):
+    """Students per source class and the classes the mapping does not cover"""
+    mapping = normalize_mapping(mapping)
+    counts = {
+        row['class_name']: row['students']
+        for row in _students(student_ids).values('class_name')
+        .annotate(students=Count('id')).order_by()
+    }
+    classes = [
+        {'from_class': from_class, 'to_class': to_class, 'students': counts.get(from_class, 0)}
+        for from_class, to_class in mapping.items()
+    ]
+    return {
+        'classes': classes,
+        'total_students': sum(row['students'] for row in classes),
+        'unmapped_classes': [
+            {'class_name': class_name, 'students': students}
+            for class_name, students in sorted(counts.items())
+            if class_name not in mapping
+        ],
+    }
+
+
+# ==================== EXECUTION ====================
+
+def promote(mapping, from_academic_year, to_academic_year, user=None, student_ids=None, remarks=''):
+    """
+    Promote every active student in a mapped class (optionally limited to
+    ``student_ids``) and return the ``PromotionBatch``
+    """
+    mapping = normalize_mapping(mapping)
+    with transaction.atomic():
+        batch = PromotionBatch.objects.create(
+            class_mapping=mapping,
+            from_academic_year=from_academic_year,
+            to_academic_year=to_academic_year,
+            remarks=remarks,
+            created_by=user,
+        )
+        students = (
+            _students(student_ids).select_for_update()
+            .filter(class_name__in=list(mapping))
+            .values_list('id', 'class_name')
+            .order_by('id')
+        )
+
+        promoted = 0
+        chunk = []
+        for student_id, class_name in students.iterator(chunk_size=PROMOTION_CHUNK_SIZE):
+            chunk.append(StudentPromotion(
+                student_id=student_id,
+                from_class=class_name,
+                to_class=mapping[class_name],
+                from_academic_year=from_academic_year,
+                to_academic_year=to_academic_year,
+                remarks=remarks,
+                promoted_by=user,
+                batch=batch,
+            ))
+            if len(chunk) >= PROMOTION_CHUNK_SIZE:
+                StudentPromotion.objects.bulk_create(chunk)
+                promoted += len(chunk)
+                chunk = []
+        if chunk:
+            StudentPromotion.objects.bulk_create(chunk)
+            promoted += len(chunk)
+
+        names = [*mapping, *mapping.values()]
+        class_ids = class_ids_by_name(names)
+        for from_class, to_class in mapping.items():
+            Student.objects.filter(
+                id__in=batch.promotions.filter(from_class=from_class).values('student_id')
+            ).update(class_name=to_class, school_class_id=class_ids.get(to_class))
+        # The bulk move skips Student signals; the moved grades change class
+        grade_cube.rebuild(class_ids={class_ids.get(name) for name in names})
+
+        batch.promoted_count = promoted
+        batch.save(update_fields=['promoted_count'])
+    return batch
+
+
+def reverse(batch):
+    """
+    Move the batch's students back to their previous class. Returns
+    ``(restored, skipped)``; skipped students are no longer in the class
+    the batch moved them to.
+    """
+    with transaction.atomic():
+        batch = PromotionBatch.objects.select_for_update().get(pk=batch.pk)
+        if batch.status == 'reversed':
+            raise PromotionError('Promotion batch has already been reversed')
+
+        pairs = list(batch.promotions.values_list('from_class', 'to_class').distinct().order_by())
+        names = [name for pair in pairs for name in pair]
+        class_ids = class_ids_by_name(names)
+        restored = 0
+        for from_class, to_class in pairs:
+            restored += Student.objects.filter(
+                id__in=batch.promotions.filter(
+                    from_class=from_class, to_class=to_class).values('student_id'),
+                class_name=to_class,
+            ).update(class_name=from_class, school_class_id=class_ids.get(from_class))
+        grade_cube.rebuild(class_ids={class_ids.get(name) for name in names})
+
+        note = f'\n[REVERSED on {timezone.now().date()}]'
+        batch.promotions.update(remarks=Concat('remarks', Value(note)))
+
+        batch.status = 'reversed'
+        batch.reversed_count = restored
+        batch.reversed_at = timezone.now()
+        batch.save(update_fields=['status', 'reversed_count', 'reversed_at'])
+    return restored, batch.promoted_count - restored
+
+
+def batch_summary(batch):
+    return {
+        'batch_id': str(batch.batch_id),
+        'status': batch.status,
+        'class_mapping': batch.class_mapping,
+        'from_academic_year': batch.from_academic_year_id,
+        'to_academic_year': batch.to_academic_year_id,
+        'promoted_count': batch.promoted_count,
+        'reversed_count': batch.reversed_count,
+        'created_at': batch.created_at,
+        'reversed_at': batch.reversed_at,
+    }
@@ -0,0 +1,200 @@
+"""
+Query budget checks
+
+``build_fixture()`` creates the small fixed dataset the budgets in
+``query_budgets.json`` were measured against, and ``measure()`` replays one
+endpoint on it and compares its queries with the budget. They back both
+``manage.py check_query_budgets`` and ``admin_api/tests/test_query_budgets.py``.
+Counts depend on the dataset, which is why it is fixed here rather than read
+from whatever the database holds.
+"""
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from admin_api import grade_cube
+from admin_api.models import (
+    AccountGroup, AllowanceType, Announcement, Asset, AssetAssignment, AssetCategory,
+    Assignment, AssignmentSubmission, Attendance, Class, ClassRoom, ClassSubject,
+    DeductionType, Employee, EmployeeAllowance, EmployeeDeduction,
+    EmployeeSalaryStructure, Enrollment, FeePayment, FeeStructure, Grade, Message,
+    Notification, Student, Subject, Teacher, TeacherAssignment
+)
+from admin_api.query_metrics import record_queries
+from users.models import User
+
+
+CLASSES = 3
+STUDENTS_PER_CLASS = 5
+GRADES_PER_STUDENT = 4
+ATTENDANCE_DAYS = 5
+
+
+def build_fixture():
+    """Create the budget dataset; returns placeholder values and users by role"""
+    tag = 'qb'
+    today = date.today()
+
+    def user(name, role, **extra):
+        return User.objects.create_user(
+            username=f'{tag}_{name}', email=f'{tag}_{name}@budget.local',
+            password='budget', role=role, first_name=name.title(), **extra)
+
+    admin = user('admin', 'admin', is_staff=True, is_superuser=True)
+    teacher = Teacher.objects.create(
+        user=user('teacher', 'teacher'), subject='Mathematics', employee_id=f'{tag.upper()}-T1')
+    parent = user('parent', 'parent')
+
+    subjects = [
+        Subject.objects.create(code=f'{tag.upper()}-{code}', title=title)
+        for code, title in (('MAT', 'Mathematics'), ('SCI', 'Science'))
+    ]
+    fee_structure = FeeStructure.objects.create(
+        name='Budget tuition', fee_type='tuition', amount=Decimal('500.00'))
+
+    classes = []
+    classrooms = []
+    students = []
+    for index in range(CLASSES):
+        school_class = Class.objects.create(
+            name=f'Budget Grade {index + 1}', room=f'R{index + 1}', teacher=teacher)
+        classroom = ClassRoom.objects.create(
+            name=f'Budget Grade {index + 1}', grade_level=str(index + 1),
+            section='A', room_code=f'{tag.upper()}{index + 1}')
+        classes.append(school_class)
+        classrooms.append(classroom)
+        for subject in subjects:
+            ClassSubject.objects.create(class_assigned=school_class, subject=subject)
+            TeacherAssignment.objects.create(
+                teacher=teacher, class_assigned=school_class, subject=subject)
+
+        for number in range(STUDENTS_PER_CLASS):
+            student = Student.objects.create(
+                user=user(f's{index}_{number}', 'student'),
+                parent_user=parent if number < 2 and index == 0 else None,
+                roll_no=f'{tag.upper()}-{index}-{number}',
+                class_name=school_class.name,
+            )
+            students.append(student)
+            Enrollment.objects.create(student=student, classroom=classroom)
+            Grade.objects.bulk_create([
+                Grade(student=student, subject=subjects[g % len(subjects)],
+                      grade_type='test', score=Decimal(60 + g * 5),
+                      date_recorded=today - timedelta(days=g), recorded_by=teacher)
+                for g in range(GRADES_PER_STUDENT)
+            ])
+            Attendance.objects.bulk_create([
+                Attendance(student=student, class_section=classroom,
+                           date=today - timedelta(days=d),
+                           status='present' if d % 4 else 'absent', recorded_by=teacher)
+                for d in range(ATTENDANCE_DAYS)
+            ])
+            for month in range(2):
+                FeePayment.objects.create(
+                    student=student, fee_structure=fee_structure,
+                    invoice_number=f'{tag.upper()}-{student.id}-{month}',
+                    amount_due=Decimal('500.00'),
+                    amount_paid=Decimal('500.00') if month == 0 else Decimal('0.00'),
+                    status='paid' if month == 0 else 'pending',
+                    payment_method='cash' if month == 0 else None,
+                    payment_date=today if month == 0 else None,
+                    due_date=today + timedelta(days=30 * month),
+                )
+
+    for recipient in (admin, teacher.user, parent, students[0].user):
+        Notification.objects.bulk_create([
+            Notification(user=recipient, title=f'Notice {n}', message='Budget notice',
+                         is_read=n % 2 == 0)
+            for n in range(4)
+        ])
+    Message.objects.create(
+        sender=parent, receiver=teacher.user, subject='Homework', body='Question')
+    Message.objects.create(
+        sender=teacher.user, receiver=parent, subject='Re: Homework', body='Answer')
+    Announcement.objects.create(title='Budget announcement', content='Welcome back')
+
+    for school_class in classes:
+        assignment = Assignment.objects.create(
+            title='Budget homework', description='Exercises', subject=subjects[0],
+            class_assigned=school_class, teacher=teacher, due_date=today + timedelta(days=7))
+        AssignmentSubmission.objects.bulk_create([
+            AssignmentSubmission(assignment=assignment, student=student,
+                                 status='pending' if n % 2 else 'graded')
+            for n, student in enumerate(students[:STUDENTS_PER_CLASS])
+        ])
+
+    allowance = AllowanceType.objects.create(name='Budget housing', code=f'{tag.upper()}-HRA')
+    deduction = DeductionType.objects.create(name='Budget provident fund', code=f'{tag.upper()}-PF')
+    category = AssetCategory.objects.create(name='Budget equipment', code=f'{tag.upper()}-EQ')
+    root = AccountGroup.objects.create(name='Budget assets', code=f'{tag.upper()}-1')
+    for number in range(3):
+        employee = Employee.objects.create(name=f'Budget employee {number}')
+        structure = EmployeeSalaryStructure.objects.create(
+            employee=employee, basic_salary=Decimal('1000.00'), effective_date=today)
+        EmployeeAllowance.objects.create(
+            salary_structure=structure, allowance_type=allowance, amount=Decimal('150.00'))
+        EmployeeDeduction.objects.create(
+            salary_structure=structure, deduction_type=deduction, amount=Decimal('80.00'))
+        asset = Asset.objects.create(
+            asset_code=f'{tag.upper()}-A{number}', name=f'Budget laptop {number}',
+            category=category, purchase_date=today, purchase_price=Decimal('900.00'),
+            current_value=Decimal('900.00'), status='assigned')
+        AssetAssignment.objects.create(
+            asset=asset, employee=employee, assigned_date=today, condition_at_assignment='good')
+        AccountGroup.objects.create(
+            name=f'Budget assets {number}', code=f'{tag.upper()}-1{number}', parent=root)
+
+    # Grades were bulk-created past the cube's signal handlers
+    grade_cube.rebuild()
+
+    placeholders = {
+        'class': classes[0].id,
+        'classroom': classrooms[0].id,
+        'student': students[0].id,
+        'child': students[0].id,
+        'teacher': teacher.id,
+        'today': today.isoformat(),
+    }
+    users = {
+        'admin': admin,
+        'teacher': teacher.user,
+        'student': students[0].user,
+        'parent': parent,
+    }
+    return placeholders, users
+
+
+def measure(budget, placeholders, users):
+    """Run one budget entry; returns its query summary and ``outcome`` ('ok' or the failure)"""
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(users[budget.get('as', 'admin')])
+    path = budget['path'].format(**placeholders)
+    with transaction.atomic():
+        with record_queries() as recorder:
+            response = client.generic(
+                budget.get('method', 'GET'), path,
+                data=json.dumps(budget['data']) if 'data' in budget else '',
+                content_type='application/json')
+        transaction.set_rollback(True)
+
+    summary = recorder.summary()
+    expected = budget.get('status', [200])
+    if response.status_code not in expected:
+        outcome = f'status {response.status_code}'
+    elif recorder.count > budget['max_queries']:
+        outcome = 'over budget'
+    elif summary['duplicate_queries'] > budget.get('max_duplicates', summary['duplicate_queries']):
+        outcome = 'too many repeated queries'
+    else:
+        outcome = 'ok'
+    return {
+        'name': budget['name'],
+        'path': path,
+        'status': response.status_code,
+        'max_queries': budget['max_queries'],
+        'outcome': outcome,
+        **summary,
+    }
@@ -0,0 +1,132 @@
+"""
+SQL query instrumentation
+
+``record_queries()`` installs an execute wrapper on every database
+connection and counts the statements run inside the block, their total
+time and repeated statement shapes (the N+1 signature: the same SQL with
+different literals). ``QueryMetricsMiddleware`` wraps each request in it.
+
+``query_budget(n)`` turns the recorder into an assertion, and
+``manage.py check_query_budgets`` replays the endpoints listed in
+``query_budgets.json`` and fails when one runs more queries than its
+budget allows.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), 'query_budgets.json')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s|\?')
+_SPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More queries ran than the budget allows"""
+
+
+def normalize_sql(sql):
+    """SQL with literals and ``IN`` lists collapsed, so N+1 repeats compare equal"""
+    sql = _STRING.sub('%s', sql)
+    sql = _NUMBER.sub('%s', sql)
+    sql = _PLACEHOLDER.sub('%s', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """Execute wrapper collecting count, time and fingerprints of every statement"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            self.samples.setdefault(key, sql)
+
+    @property
+    def db_time_ms(self):
+        return round(self.duration * 1000, 2)
+
+    def duplicates(self, minimum=2):
+        """``[(fingerprint, count, sample_sql)]`` for shapes run ``minimum`` times or more"""
+        return [
+            (key, count, self.samples[key])
+            for key, count in self.fingerprints.most_common()
+            if count >= minimum
+        ]
+
+    def summary(self, limit=5):
+        return {
+            'queries': self.count,
+            'db_time_ms': self.db_time_ms,
+            'duplicate_queries': sum(count - 1 for _, count, _ in self.duplicates()),
+            'duplicates': [
+                {'fingerprint': key, 'count': count, 'sql': normalize_sql(sql)[:300]}
+                for key, count, sql in self.duplicates()[:limit]
+            ],
+        }
+
+
+@contextmanager
+def record_queries():
+    """Record the queries run on any connection inside the block"""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def query_budget(max_queries, max_duplicates=None):
+    """Fail with ``QueryBudgetExceeded`` when the block exceeds its budget"""
+    with record_queries() as recorder:
+        yield recorder
+    problems = []
+    if recorder.count > max_queries:
+        problems.append(f'{recorder.count} queries (budget {max_queries})')
+    duplicates = recorder.summary()['duplicate_queries']
+    if max_duplicates is not None and duplicates > max_duplicates:
+        problems.append(f'{duplicates} repeated queries (budget {max_duplicates})')
+    if problems:
+        worst = recorder.duplicates()[:3]
+        detail = ''.join(f'\n  {count}x {normalize_sql(sql)[:200]}' for _, count, sql in worst)
+        raise QueryBudgetExceeded('; '.join(problems) + detail)
+
+
+def server_timing(recorder):
+    """``Server-Timing`` header value for a request's recorder"""
+    return (
+        f'db;dur={recorder.db_time_ms};desc="{recorder.count} queries", '
+        f'dup;desc="{recorder.summary()["duplicate_queries"]} repeated"'
+    )
+
+
+def load_budgets(path=BUDGETS_FILE):
+    with open(path) as handle:
+        return json.load(handle)['endpoints']
@@ -0,0 +1,44 @@
+"""
+EXPLAIN checks for the hot student/class filters
+
+``hot_queries()`` lists the filters the dashboards and reports run most and
+the index each is expected to use; ``check_plan()`` reads SQLite's
+``EXPLAIN QUERY PLAN`` output for one of them. They back
+``admin_api/tests/test_query_plans.py`` and ``manage.py check_query_plans``.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from admin_api.models import Attendance, FeePayment, Grade, Notification, Student
+
+
+def hot_queries():
+    """``(label, queryset, index name expected in the plan)`` for the hot filters"""
+    return [
+        ('Student by class_name',
+         Student.objects.filter(class_name='Grade 1'),
+         'class_name'),
+        ('Student by school_class',
+         Student.objects.filter(school_class_id=1),
+         'school_class_id'),
+        ('Attendance by class and date',
+         Attendance.objects.filter(class_section_id=1, date='2025-01-01'),
+         'admin_api_a_class_s'),
+        ('Grade history of a student',
+         Grade.objects.filter(student_id=1, created_at__gte=datetime(2025, 1, 1, tzinfo=dt_timezone.utc)),
+         'admin_api_g_student'),
+        ('Unread notifications of a user',
+         Notification.objects.filter(user_id=1, is_read=False).order_by('-created_at'),
+         'notification_unread_idx'),
+        ('Fee payments of a student by status',
+         FeePayment.objects.filter(student_id=1, status='pending'),
+         'admin_api_f_student'),
+    ]
+
+
+def check_plan(queryset, fragment):
+    """``(ok, plan)``: ok when the plan uses an index named like ``fragment`` and no full scan"""
+    plan = queryset.explain()
+    table = queryset.model._meta.db_table
+    uses_index = 'USING INDEX' in plan or 'USING COVERING INDEX' in plan
+    full_scan = f'SCAN {table}' in plan and not uses_index
+    return uses_index and not full_scan and fragment in plan, plan
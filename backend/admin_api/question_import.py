@@ -0,0 +1,211 @@
+"""
+Streaming question bank import
+
+Rows are streamed from the uploaded sheet (openpyxl read-only mode, or CSV),
+question text is normalized and hashed, rows whose hash is already in the
+bank for the same subject and class (or earlier in the file) are skipped,
+and new questions are written with chunked ``bulk_create``.
+
+Small files are imported inside the request; large ones are spooled to
+private storage and run as a 'questions.import' background job
+(``admin_api.jobs``) whose progress and counters are polled on the ``Job``.
+
+Expected columns: question_text, question_type, options, marks. MCQ options
+use the format ``A:Option1|B:Option2|C:Option3|correct:A``.
+"""
+import csv
+import hashlib
+import os
+import re
+import unicodedata
+import uuid
+
+from django.conf import settings
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
+
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 200
+SYNC_MAX_BYTES = getattr(settings, 'QUESTION_IMPORT_SYNC_MAX_BYTES', 512 * 1024)
+IMPORT_DIR = os.path.join(settings.PRIVATE_STORAGE_ROOT, 'imports', 'questions')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_question_text(text):
+    """Canonical form used for duplicate detection"""
+    text = unicodedata.normalize('NFKC', str(text or ''))
+    return _WHITESPACE.sub(' ', text).strip().casefold()
+
+
+def question_text_hash(text):
+    return hashlib.sha256(normalize_question_text(text).encode('utf-8')).hexdigest()
+
+
+def parse_options(options_str):
+    options = {}
+    for opt in str(options_str).split('|'):
+        if not opt.strip():
+            continue
+        key, value = opt.split(':', 1)
+        options[key.strip()] = value.strip()
+    return options
+
+
+def iter_rows(path):
+    """Yield ``(row_number, values)`` from an xlsx or csv file without loading it whole"""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            reader = csv.reader(handle)
+            next(reader, None)  # header
+            for row_num, row in enumerate(reader, start=2):
+                yield row_num, row
+        return
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row_num, row in enumerate(wb.active.iter_rows(min_row=2, values_only=True), start=2):
+            yield row_num, row
+    finally:
+        wb.close()
+
+
+def count_rows(path):
+    """Best-effort row count for progress reporting (may be None)"""
+    if path.lower().endswith('.csv'):
+        return None
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        max_row = wb.active.max_row
+        return max_row - 1 if max_row else None
+    finally:
+        wb.close()
+
+
+def import_questions(path, subject, class_obj, user=None, on_progress=None):
+    """
+    Import questions from ``path``. Returns a dict of counters and errors.
+
+    ``on_progress`` is called after every flushed chunk with the running
+    counters so callers can persist progress.
+    """
+    from admin_api.models import Question
+
+    question_types = {value for value, _ in Question.Q_TYPES}
+    seen = set(
+        Question.objects.filter(subject=subject, class_assigned=class_obj)
+        .exclude(text_hash='')
+        .values_list('text_hash', flat=True)
+    )
+    counters = {'processed_rows': 0, 'created_count': 0, 'duplicate_count': 0}
+    errors = []
+    batch = []
+
+    def flush():
+        if batch:
+            Question.objects.bulk_create(batch, batch_size=CHUNK_SIZE)
+            counters['created_count'] += len(batch)
+            batch.clear()
+        if on_progress:
+            on_progress(counters, errors)
+
+    for row_num, row in iter_rows(path):
+        counters['processed_rows'] += 1
+        if not row or not any(row):
+            continue
+        try:
+            question_text, q_type, options_str, marks = list(row[:4]) + [None] * (4 - len(row[:4]))
+            if not question_text:
+                raise ValueError('question_text is required')
+            q_type = str(q_type or 'mcq').strip().lower()
+            if q_type not in question_types:
+                raise ValueError(f'unknown question_type {q_type!r}')
+
+            text_hash = question_text_hash(question_text)
+            if text_hash in seen:
+                counters['duplicate_count'] += 1
+                continue
+            seen.add(text_hash)
+
+            batch.append(Question(
+                question_text=str(question_text).strip(),
+                text_hash=text_hash,
+                question_type=q_type,
+                options=parse_options(options_str) if q_type == 'mcq' and options_str else {},
+                marks=int(float(marks or 1)),
+                subject=subject,
+                class_assigned=class_obj,
+                created_by=user,
+            ))
+        except Exception as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f'Row {row_num}: {str(e)}')
+
+        if len(batch) >= CHUNK_SIZE:
+            flush()
+
+    flush()
+    return {**counters, 'errors': errors}
+
+
+# ==================== BACKGROUND JOBS ====================
+
+def spool_upload(uploaded_file):
+    """Copy an upload to the import directory chunk by chunk and return its path"""
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    extension = os.path.splitext(uploaded_file.name)[1].lower() or '.xlsx'
+    path = os.path.join(IMPORT_DIR, f'{uuid.uuid4().hex}{extension}')
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return path
+
+
+def run_import_task(job):
+    """'questions.import' task for ``admin_api.jobs``: import a spooled upload"""
+    from admin_api import jobs
+    from admin_api.models import Class, Subject
+
+    payload = job.payload
+    try:
+        subject = Subject.objects.get(pk=payload['subject_id'])
+        class_obj = Class.objects.get(pk=payload['class_id'])
+        total_rows = count_rows(payload['file_path'])
+
+        def record_progress(counters, errors):
+            jobs.progress(counters['processed_rows'], total_rows, 'Importing questions')
+
+        return import_questions(
+            payload['file_path'], subject, class_obj, job.created_by, record_progress)
+    finally:
+        try:
+            os.remove(payload['file_path'])
+        except OSError:
+            pass
+
+
+def start_import_job(uploaded_file, subject, class_obj, user):
+    """Spool the upload and queue it as a background job; returns the ``Job``"""
+    from admin_api import jobs
+
+    job, _ = jobs.enqueue(
+        'questions.import',
+        {'file_path': spool_upload(uploaded_file), 'original_name': uploaded_file.name,
+         'subject_id': subject.id, 'class_id': class_obj.id},
+        user=user,
+        name=f'Import questions from {uploaded_file.name}')
+    return job
+
+
+def import_uploaded_file(uploaded_file, subject, class_obj, user):
+    """Synchronous import for small uploads"""
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return import_questions(uploaded_file.temporary_file_path(), subject, class_obj, user)
+
+    path = spool_upload(uploaded_file)
+    try:
+        return import_questions(path, subject, class_obj, user)
+    finally:
+        os.remove(path)
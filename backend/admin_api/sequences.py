@@ -0,0 +1,75 @@
+"""
+Collision-free document numbers
+
+Each ``NumberSequence`` row is a named counter. ``reserve`` advances it by
+``count`` with a single row-locking ``UPDATE`` and reads the new value back,
+so bulk imports take a whole block of numbers at once and concurrent
+callers can never receive the same value. Numbers reserved by a
+transaction that later fails are skipped, leaving gaps.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from admin_api.models import AdmissionApplication, NumberSequence
+
+
+def reserve(name, count=1, initial=None):
+    """
+    Reserve ``count`` consecutive values of sequence ``name`` and return
+    them as a ``range``. ``initial`` is called to seed a sequence that does
+    not exist yet (e.g. from numbers issued before it existed).
+    """
+    if count < 1:
+        return range(0)
+
+    with transaction.atomic():
+        updated = NumberSequence.objects.filter(name=name).update(
+            last_value=F('last_value') + count)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    NumberSequence.objects.create(
+                        name=name, last_value=(initial() if initial else 0) + count)
+            except IntegrityError:
+                # Created concurrently; the row exists now
+                NumberSequence.objects.filter(name=name).update(
+                    last_value=F('last_value') + count)
+        # The UPDATE holds the row lock until commit, so this read sees our
+        # increment and no one else's
+        last_value = NumberSequence.objects.values_list(
+            'last_value', flat=True).get(name=name)
+    return range(last_value - count + 1, last_value + 1)
+
+
+# ==================== ADMISSIONS ====================
+
+def _admission_prefix(year):
+    return f'ADM{year}'
+
+
+def _last_admission_number(prefix):
+    """Highest numeric suffix already issued under ``prefix`` (seeding only)"""
+    latest = (
+        AdmissionApplication.objects.filter(application_number__startswith=prefix)
+        .order_by(Length('application_number').desc(), '-application_number')
+        .values_list('application_number', flat=True)
+        .first()
+    )
+    suffix = latest[len(prefix):] if latest else ''
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def admission_application_numbers(count=1, year=None):
+    """Reserve ``count`` admission application numbers (``ADM<year><00001>``)"""
+    year = year or timezone.now().year
+    prefix = _admission_prefix(year)
+    values = reserve(
+        f'admission_application:{year}', count,
+        initial=lambda: _last_admission_number(prefix))
+    return [f'{prefix}{value:05d}' for value in values]
+
+
+def next_admission_application_number(year=None):
+    return admission_application_numbers(1, year)[0]
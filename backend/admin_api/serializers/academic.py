@@ -1,5 +1,8 @@
+from django.db.models import Count
 from rest_framework import serializers
-from django.utils import timezone
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
+)
 from admin_api.models import (
     AcademicYear, AdmissionApplication, StudentPromotion,
     ExamSession, QuestionAnswer, ProgressCard, ProgressCardSubject,
@@ -35,11 +38,8 @@ class AdmissionApplicationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         # Auto-generate application number
-        import random
-        import string
-        year = timezone.now().year
-        random_part = ''.join(random.choices(string.digits, k=6))
-        validated_data['application_number'] = f"APP{year}{random_part}"
+        from admin_api.sequences import next_admission_application_number
+        validated_data['application_number'] = next_admission_application_number()
         return super().create(validated_data)
 
 
@@ -173,7 +173,7 @@ class MeritListEntrySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class MeritListSerializer(serializers.ModelSerializer):
+class MeritListSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     entries = MeritListEntrySerializer(many=True, read_only=True)
     academic_year_name = serializers.CharField(source='academic_year.name', read_only=True)
     term_display = serializers.CharField(source='get_term_display', read_only=True)
@@ -181,15 +181,13 @@ class MeritListSerializer(serializers.ModelSerializer):
         source='generated_by.get_full_name',
         read_only=True
     )
-    entries_count = serializers.SerializerMethodField()
+    entries_count = AnnotatedField('entries', Count('pk'), default=0)
     
     class Meta:
         model = MeritList
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
         read_only_fields = ['generated_date', 'generated_by']
-    
-    def get_entries_count(self, obj):
-        return obj.entries.count()
 
 
 class MeritListGenerateSerializer(serializers.Serializer):
@@ -1,8 +1,12 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
+)
 from admin_api.models import Assignment, AssignmentSubmission
 
 
-class AssignmentSerializer(serializers.ModelSerializer):
+class AssignmentSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     subject_name = serializers.CharField(
         source='subject.title', read_only=True)
     class_name = serializers.CharField(
@@ -13,19 +17,15 @@ class AssignmentSerializer(serializers.ModelSerializer):
         source='get_assignment_type_display', read_only=True)
     status_display = serializers.CharField(
         source='get_status_display', read_only=True)
-    total_submissions = serializers.SerializerMethodField()
-    pending_submissions = serializers.SerializerMethodField()
+    total_submissions = AnnotatedField('submissions', Count('pk'), default=0)
+    pending_submissions = AnnotatedField(
+        'submissions', Count('pk'), filter=Q(status='pending'), default=0)
 
     class Meta:
         model = Assignment
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
 
-    def get_total_submissions(self, obj):
-        return obj.submissions.count()
-
-    def get_pending_submissions(self, obj):
-        return obj.submissions.filter(status='pending').count()
-
 
 class AssignmentSubmissionSerializer(serializers.ModelSerializer):
     assignment_title = serializers.CharField(
@@ -1,15 +1,24 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
-from ..models import ClassRoom
+from ..annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin, PrefetchedField
+)
+from ..models import ClassRoom, Enrollment
+from .enrollment import EnrollmentListSerializer
 
 
-class ClassRoomSerializer(serializers.ModelSerializer):
+class ClassRoomSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     assigned_teacher_name = serializers.CharField(
         source='assigned_teacher.get_full_name', read_only=True)
-    enrolled_students_count = serializers.SerializerMethodField()
-    active_enrollments = serializers.SerializerMethodField()
+    enrolled_students_count = AnnotatedField(
+        'enrollments', Count('pk'), filter=Q(is_active=True), default=0)
+    active_enrollments = PrefetchedField(
+        'enrollments', EnrollmentListSerializer(),
+        queryset=Enrollment.objects.filter(is_active=True).select_related('student__user'))
 
     class Meta:
         model = ClassRoom
+        list_serializer_class = AnnotatedListSerializer
         fields = [
             'id', 'name', 'grade_level', 'section', 'room_code',
             'assigned_teacher', 'assigned_teacher_name', 'students_count',
@@ -18,17 +27,6 @@ class ClassRoomSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'students_count', 'subjects_count']
 
-    def get_enrolled_students_count(self, obj):
-        """Get count of actively enrolled students"""
-        return obj.enrollments.filter(is_active=True).count()
-
-    def get_active_enrollments(self, obj):
-        """Get list of active enrollments with student details"""
-        from .enrollment import EnrollmentListSerializer
-        enrollments = obj.enrollments.filter(
-            is_active=True).select_related('student__user')
-        return EnrollmentListSerializer(enrollments, many=True).data
-
     def validate_room_code(self, value):
         """Ensure room code is unique"""
         if ClassRoom.objects.filter(room_code=value).exclude(
@@ -56,22 +54,21 @@ class ClassRoomSerializer(serializers.ModelSerializer):
         return data
 
 
-class ClassRoomListSerializer(serializers.ModelSerializer):
+class ClassRoomListSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing classrooms"""
     assigned_teacher_name = serializers.CharField(
         source='assigned_teacher.get_full_name', read_only=True)
-    enrolled_students_count = serializers.SerializerMethodField()
+    enrolled_students_count = AnnotatedField(
+        'enrollments', Count('pk'), filter=Q(is_active=True), default=0)
 
     class Meta:
         model = ClassRoom
+        list_serializer_class = AnnotatedListSerializer
         fields = [
             'id', 'name', 'grade_level', 'section', 'room_code',
             'assigned_teacher_name', 'enrolled_students_count', 'is_active'
         ]
 
-    def get_enrolled_students_count(self, obj):
-        return obj.enrollments.filter(is_active=True).count()
-
 
 class ClassRoomCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new classrooms"""
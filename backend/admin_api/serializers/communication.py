@@ -1,4 +1,8 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
+)
 from admin_api.models import Announcement, Message, Notification
 
 
@@ -19,20 +23,20 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     sender_name = serializers.CharField(
         source='sender.get_full_name', read_only=True)
     receiver_name = serializers.CharField(
         source='receiver.get_full_name', read_only=True)
-    reply_count = serializers.SerializerMethodField()
+    # Replies are counted on thread starters only; a reply reports 0
+    reply_count = AnnotatedField(
+        'replies', Count('pk'), filter=Q(parent_message__parent_message__isnull=True), default=0)
 
     class Meta:
         model = Message
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
 
-    def get_reply_count(self, obj):
-        return obj.replies.count() if not obj.parent_message else 0
-
 
 class NotificationSerializer(serializers.ModelSerializer):
     notification_type_display = serializers.CharField(
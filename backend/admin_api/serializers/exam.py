@@ -1,8 +1,12 @@
+from django.db.models import Count
 from rest_framework import serializers
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
+)
 from admin_api.models import Exam, ExamSchedule, ExamResult
 
 
-class ExamSerializer(serializers.ModelSerializer):
+class ExamSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     class_name = serializers.CharField(
         source='class_assigned.name', read_only=True)
     exam_type_display = serializers.CharField(
@@ -11,15 +15,13 @@ class ExamSerializer(serializers.ModelSerializer):
         source='created_by.get_full_name',
         read_only=True,
         allow_null=True)
-    total_schedules = serializers.SerializerMethodField()
+    total_schedules = AnnotatedField('schedules', Count('pk'), default=0)
 
     class Meta:
         model = Exam
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
 
-    def get_total_schedules(self, obj):
-        return obj.schedules.count()
-
 
 class ExamScheduleSerializer(serializers.ModelSerializer):
     exam_name = serializers.CharField(source='exam.name', read_only=True)
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from admin_api.models import StoredFile, UploadSession
+
+
+class StoredFileSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(source='blob.size', read_only=True)
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True)
+    download_url = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = StoredFile
+        fields = ['id', 'original_name', 'content_type', 'size', 'sha256',
+                  'download_url', 'uploaded_by', 'created_at']
+        read_only_fields = fields
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    stored_file = StoredFileSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['upload_id', 'filename', 'content_type', 'total_size',
+                  'received_bytes', 'status', 'stored_file', 'created_at', 'updated_at']
+        read_only_fields = fields
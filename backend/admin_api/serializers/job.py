@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from ..models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress_percent = serializers.ReadOnlyField()
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True, default=None)
+
+    class Meta:
+        model = Job
+        exclude = ['payload', 'idempotency_key', 'worker']
@@ -4,7 +4,11 @@ Phase 3 Serializers - Enhanced HR, Payroll, Leave, Expense, Asset, and Accountin
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin, PrefetchedField
+)
 from admin_api.models import (
     # Payroll
     SalaryGrade, AllowanceType, DeductionType, EmployeeSalaryStructure,
@@ -62,7 +66,7 @@ class EmployeeDeductionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class EmployeeSalaryStructureSerializer(serializers.ModelSerializer):
+class EmployeeSalaryStructureSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.name', read_only=True)
     employee_id_number = serializers.CharField(source='employee.employee_id', read_only=True)
     designation = serializers.CharField(source='employee.designation.name', read_only=True)
@@ -70,26 +74,23 @@ class EmployeeSalaryStructureSerializer(serializers.ModelSerializer):
     salary_grade_details = SalaryGradeSerializer(source='salary_grade', read_only=True)
     allowances = EmployeeAllowanceSerializer(many=True, read_only=True)
     deductions = EmployeeDeductionSerializer(many=True, read_only=True)
-    total_allowances = serializers.SerializerMethodField()
-    total_deductions = serializers.SerializerMethodField()
+    total_allowances = AnnotatedField(
+        'allowances', Sum('amount'), filter=Q(is_active=True), default=0, coerce=float)
+    total_deductions = AnnotatedField(
+        'deductions', Sum('amount'), filter=Q(is_active=True), default=0, coerce=float)
     gross_salary = serializers.SerializerMethodField()
     net_salary = serializers.SerializerMethodField()
     
     class Meta:
         model = EmployeeSalaryStructure
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
     
-    def get_total_allowances(self, obj):
-        return sum(float(a.amount) for a in obj.allowances.filter(is_active=True))
-    
-    def get_total_deductions(self, obj):
-        return sum(float(d.amount) for d in obj.deductions.filter(is_active=True))
-    
     def get_gross_salary(self, obj):
-        return float(obj.basic_salary) + self.get_total_allowances(obj)
+        return float(obj.basic_salary) + self.annotated(obj, 'total_allowances')
     
     def get_net_salary(self, obj):
-        return self.get_gross_salary(obj) - self.get_total_deductions(obj)
+        return self.get_gross_salary(obj) - self.annotated(obj, 'total_deductions')
 
 
 class PayslipAllowanceSerializer(serializers.ModelSerializer):
@@ -152,18 +153,16 @@ class LeavePolicyRuleSerializer(serializers.ModelSerializer):
         }
 
 
-class LeavePolicySerializer(serializers.ModelSerializer):
+class LeavePolicySerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     designation_name = serializers.CharField(source='designation.name', read_only=True)
     department_name = serializers.CharField(source='department.name', read_only=True)
     rules = LeavePolicyRuleSerializer(many=True, read_only=True)
-    total_annual_leaves = serializers.SerializerMethodField()
+    total_annual_leaves = AnnotatedField('rules', Sum('annual_quota'), default=0)
     
     class Meta:
         model = LeavePolicy
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
-    
-    def get_total_annual_leaves(self, obj):
-        return sum(rule.annual_quota for rule in obj.rules.all())
 
 
 class EmployeeLeaveBalanceSerializer(serializers.ModelSerializer):
@@ -247,44 +246,43 @@ class ExpenseApprovalSerializer(serializers.Serializer):
 
 # ==================== ASSET MANAGEMENT SERIALIZERS ====================
 
-class AssetCategorySerializer(serializers.ModelSerializer):
-    asset_count = serializers.SerializerMethodField()
-    total_value = serializers.SerializerMethodField()
+IN_SERVICE = Q(status__in=['available', 'assigned', 'maintenance'])
+
+
+class AssetCategorySerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
+    asset_count = AnnotatedField('assets', Count('pk'), filter=IN_SERVICE, default=0)
+    total_value = AnnotatedField(
+        'assets', Sum('current_value'), filter=IN_SERVICE, default=0, coerce=float)
     
     class Meta:
         model = AssetCategory
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
+
+
+class CurrentAssetAssignmentSerializer(serializers.ModelSerializer):
+    employee_id = serializers.IntegerField(source='employee.id')
+    employee_name = serializers.CharField(source='employee.name')
     
-    def get_asset_count(self, obj):
-        return obj.assets.filter(status__in=['available', 'assigned', 'maintenance']).count()
-    
-    def get_total_value(self, obj):
-        assets = obj.assets.filter(status__in=['available', 'assigned', 'maintenance'])
-        return sum(float(a.current_value) for a in assets)
+    class Meta:
+        model = AssetAssignment
+        fields = ['employee_id', 'employee_name', 'assigned_date', 'expected_return_date']
 
 
-class AssetSerializer(serializers.ModelSerializer):
+class AssetSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_details = AssetCategorySerializer(source='category', read_only=True)
-    current_assignment = serializers.SerializerMethodField()
+    current_assignment = PrefetchedField(
+        'assignments', CurrentAssetAssignmentSerializer(), first=True,
+        queryset=AssetAssignment.objects.filter(is_active=True).select_related('employee'))
     depreciation_amount = serializers.SerializerMethodField()
     age_years = serializers.SerializerMethodField()
     
     class Meta:
         model = Asset
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
     
-    def get_current_assignment(self, obj):
-        assignment = obj.assignments.filter(is_active=True).first()
-        if assignment:
-            return {
-                'employee_id': assignment.employee.id,
-                'employee_name': assignment.employee.name,
-                'assigned_date': assignment.assigned_date,
-                'expected_return_date': assignment.expected_return_date
-            }
-        return None
-    
     def get_depreciation_amount(self, obj):
         return float(obj.purchase_price) - float(obj.current_value)
     
@@ -348,16 +346,14 @@ class AssetMaintenanceSerializer(serializers.ModelSerializer):
 
 # ==================== ACCOUNTING SERIALIZERS ====================
 
-class AccountGroupSerializer(serializers.ModelSerializer):
+class AccountGroupSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     parent_name = serializers.CharField(source='parent.name', read_only=True)
-    children_count = serializers.SerializerMethodField()
+    children_count = AnnotatedField('children', Count('pk'), default=0)
     
     class Meta:
         model = AccountGroup
+        list_serializer_class = AnnotatedListSerializer
         fields = '__all__'
-    
-    def get_children_count(self, obj):
-        return obj.children.count()
 
 
 class JournalEntryLineSerializer(serializers.ModelSerializer):
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.db.models import Avg
 from ..models import Report, Student, ClassRoom, Grade, Attendance
+from .. import grading_scale
 
 
 class ReportSerializer(serializers.ModelSerializer):
@@ -167,22 +168,7 @@ class StudentReportSerializer(serializers.Serializer):
 
     def _get_letter_grade(self, percentage):
         """Convert percentage to letter grade"""
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 85:
-            return 'A'
-        elif percentage >= 80:
-            return 'B+'
-        elif percentage >= 75:
-            return 'B'
-        elif percentage >= 70:
-            return 'C+'
-        elif percentage >= 65:
-            return 'C'
-        elif percentage >= 60:
-            return 'D'
-        else:
-            return 'F'
+        return grading_scale.letter(percentage)
 
 
 class ClassReportSerializer(serializers.Serializer):
@@ -1,9 +1,13 @@
+from django.db.models import Avg, Count, Q
 from rest_framework import serializers
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
+)
 from admin_api.models import Student
 from users.models import User
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     first_name = serializers.CharField(source='user.first_name')
     last_name = serializers.CharField(source='user.last_name')
     email = serializers.EmailField(source='user.email')
@@ -26,8 +30,10 @@ class StudentSerializer(serializers.ModelSerializer):
     address = serializers.CharField(required=False, allow_blank=True)
 
     # Related data
-    enrollments_count = serializers.SerializerMethodField()
-    current_grades_average = serializers.SerializerMethodField()
+    enrollments_count = AnnotatedField(
+        'enrollments', Count('pk'), filter=Q(is_active=True), default=0)
+    current_grades_average = AnnotatedField(
+        'grades', Avg('score'), default=0, decimal_places=2)
 
     # Spec-friendly aliases
     roll_number = serializers.CharField(source='roll_no', required=False)
@@ -35,6 +41,7 @@ class StudentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Student
+        list_serializer_class = AnnotatedListSerializer
         fields = [
             'id',
             'roll_no',
@@ -72,19 +79,6 @@ class StudentSerializer(serializers.ModelSerializer):
     def get_status(self, obj):
         return "Active" if obj.is_active else "Inactive"
 
-    def get_enrollments_count(self, obj):
-        """Get count of active enrollments"""
-        return obj.enrollments.filter(is_active=True).count()
-
-    def get_current_grades_average(self, obj):
-        """Get current average grade"""
-        from django.db.models import Avg
-        grades = obj.grades.all()
-        if grades:
-            avg = grades.aggregate(avg=Avg('score'))['avg']
-            return round(avg, 2) if avg else 0
-        return 0
-
     def get_status(self, obj):
         return "Active" if obj.is_active else "Inactive"
 
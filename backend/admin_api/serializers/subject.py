@@ -1,14 +1,19 @@
+from django.db.models import Avg, Count
 from rest_framework import serializers
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
+)
 from admin_api.models import Subject
 
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     """Enhanced subject serializer with new fields"""
-    grades_count = serializers.SerializerMethodField()
-    average_grade = serializers.SerializerMethodField()
+    grades_count = AnnotatedField('grades', Count('pk'), default=0)
+    average_grade = AnnotatedField('grades', Avg('score'), default=0, decimal_places=2)
 
     class Meta:
         model = Subject
+        list_serializer_class = AnnotatedListSerializer
         fields = [
             'id',
             'code',
@@ -29,16 +34,6 @@ class SubjectSerializer(serializers.ModelSerializer):
             'teachers_count',
             'students_count']
 
-    def get_grades_count(self, obj):
-        """Get total number of grades recorded for this subject"""
-        return obj.grades.count()
-
-    def get_average_grade(self, obj):
-        """Get average grade for this subject"""
-        from django.db.models import Avg
-        avg = obj.grades.aggregate(avg=Avg('score'))['avg']
-        return round(avg, 2) if avg else 0
-
     def validate_code(self, value):
         """Ensure subject code is unique"""
         if Subject.objects.filter(code=value).exclude(
@@ -62,24 +57,22 @@ class SubjectSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class SubjectListSerializer(serializers.ModelSerializer):
+class SubjectListSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing subjects"""
-    grades_count = serializers.SerializerMethodField()
+    grades_count = AnnotatedField('grades', Count('pk'), default=0)
 
     class Meta:
         model = Subject
-    fields = [
-        'id',
-        'code',
-        'title',
-        'credit_hours',
-        'is_active',
-        'grades_count',
-        'is_practical',
-        'subject_type']
-
-    def get_grades_count(self, obj):
-        return obj.grades.count()
+        list_serializer_class = AnnotatedListSerializer
+        fields = [
+            'id',
+            'code',
+            'title',
+            'credit_hours',
+            'is_active',
+            'grades_count',
+            'is_practical',
+            'subject_type']
 
 
 class SubjectCreateSerializer(serializers.ModelSerializer):
@@ -1,9 +1,19 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
-from admin_api.models import Teacher
+from admin_api.annotated_fields import (
+    AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin, PrefetchedField
+)
+from admin_api.models import ClassRoom, Teacher
 from users.models import User
 
 
-class TeacherSerializer(serializers.ModelSerializer):
+class AssignedClassroomSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ClassRoom
+        fields = ['id', 'name', 'grade_level', 'section']
+
+
+class TeacherSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     first_name = serializers.CharField(source='user.first_name')
     last_name = serializers.CharField(source='user.last_name')
     email = serializers.EmailField(source='user.email')
@@ -20,8 +30,11 @@ class TeacherSerializer(serializers.ModelSerializer):
     experience_years = serializers.IntegerField(required=False, default=0)
 
     # Related data
-    assigned_classrooms_count = serializers.SerializerMethodField()
-    assigned_classrooms = serializers.SerializerMethodField()
+    assigned_classrooms_count = AnnotatedField(
+        'assigned_classrooms', Count('pk'), filter=Q(is_active=True), default=0)
+    assigned_classrooms = PrefetchedField(
+        'assigned_classrooms', AssignedClassroomSerializer(),
+        queryset=ClassRoom.objects.filter(is_active=True))
 
     # Spec-friendly alias
     subject_specialization = serializers.CharField(
@@ -29,6 +42,7 @@ class TeacherSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Teacher
+        list_serializer_class = AnnotatedListSerializer
         fields = [
             'id',
             'subject',
@@ -59,23 +73,6 @@ class TeacherSerializer(serializers.ModelSerializer):
     def get_status(self, obj):
         return "Active" if obj.is_active else "Inactive"
 
-    def get_assigned_classrooms_count(self, obj):
-        """Get count of assigned classrooms"""
-        return obj.assigned_classrooms.filter(is_active=True).count()
-
-    def get_assigned_classrooms(self, obj):
-        """Get list of assigned classrooms"""
-        classrooms = obj.assigned_classrooms.filter(is_active=True)
-        return [
-            {
-                'id': classroom.id,
-                'name': classroom.name,
-                'grade_level': classroom.grade_level,
-                'section': classroom.section
-            }
-            for classroom in classrooms
-        ]
-
     def validate_employee_id(self, value):
         """Ensure employee ID is unique if provided"""
         if value and Teacher.objects.filter(employee_id=value).exclude(
@@ -1,29 +1,27 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
+from .annotated_fields import AnnotatedField, AnnotatedListSerializer, AnnotatedSerializerMixin
 from .models_library import Book, BookCategory, BookIssue
 
-class BookCategorySerializer(serializers.ModelSerializer):
-    books_count = serializers.SerializerMethodField()
+class BookCategorySerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
+    books_count = AnnotatedField('books', Count('pk'), default=0)
     
     class Meta:
         model = BookCategory
+        list_serializer_class = AnnotatedListSerializer
         fields = ['id', 'name', 'description', 'books_count', 'created_at']
-    
-    def get_books_count(self, obj):
-        return obj.books.count()
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(AnnotatedSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
-    issued_count = serializers.SerializerMethodField()
+    issued_count = AnnotatedField('issues', Count('pk'), filter=Q(status='issued'), default=0)
     
     class Meta:
         model = Book
+        list_serializer_class = AnnotatedListSerializer
         fields = ['id', 'title', 'author', 'isbn', 'category', 'category_name',
                   'publisher', 'publication_year', 'edition', 'pages', 'price',
                   'quantity', 'available_quantity', 'rack_number', 'status',
                   'description', 'cover_image', 'added_date', 'issued_count']
-    
-    def get_issued_count(self, obj):
-        return obj.issues.filter(status='issued').count()
 
 class BookIssueSerializer(serializers.ModelSerializer):
     book_title = serializers.CharField(source='book.title', read_only=True)
@@ -0,0 +1,184 @@
+"""
+Model signal handlers for cache invalidation and derived data
+"""
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from admin_api.models import (
+    Class, FeePayment, Grade, Room, Student, Subject, Teacher, TimeSlot, Timetable,
+)
+from users.models import User
+
+
+# ==================== TIMETABLE EXPORT CACHE ====================
+
+@receiver(pre_save, sender=Timetable)
+def remember_timetable_class(sender, instance, **kwargs):
+    """Keep the previous class so moving an entry invalidates both classes"""
+    instance._previous_class_id = None
+    if instance.pk:
+        instance._previous_class_id = (
+            Timetable.objects.filter(pk=instance.pk)
+            .values_list('class_assigned_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Timetable)
+@receiver(post_delete, sender=Timetable)
+def invalidate_timetable_exports(sender, instance, **kwargs):
+    from admin_api.timetable_export import bump_version
+
+    bump_version(instance.class_assigned_id)
+    previous = getattr(instance, '_previous_class_id', None)
+    if previous and previous != instance.class_assigned_id:
+        bump_version(previous)
+
+
+@receiver(post_save, sender=Class)
+def invalidate_class_timetable_exports(sender, instance, **kwargs):
+    """The class name and section are in the exported title"""
+    from admin_api.timetable_export import bump_version
+
+    bump_version(instance.pk)
+
+
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_shared_timetable_exports(sender, **kwargs):
+    """Slots, subjects, teachers and rooms can appear in any class's timetable"""
+    from admin_api.timetable_export import bump_version
+
+    bump_version()
+
+
+@receiver(post_save, sender=User)
+def invalidate_teacher_name_exports(sender, instance, update_fields=None, **kwargs):
+    """Teacher names come from their user; logins only touch last_login"""
+    from admin_api.timetable_export import bump_version
+
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    if Teacher.objects.filter(user=instance).exists():
+        bump_version()
+
+
+# ==================== FEE COLLECTION ROLLUP ====================
+
+@receiver(pre_save, sender=FeePayment)
+def remember_fee_contribution(sender, instance, raw=False, **kwargs):
+    from admin_api.fee_rollup import stored_contribution
+
+    instance._previous_contribution = None
+    if instance.pk and not raw:
+        instance._previous_contribution = stored_contribution(instance.pk)
+
+
+@receiver(post_save, sender=FeePayment)
+def update_fee_rollup(sender, instance, raw=False, **kwargs):
+    from admin_api.fee_rollup import apply_change, payment_contribution
+
+    if raw:
+        return
+    apply_change(getattr(instance, '_previous_contribution', None), payment_contribution(instance))
+
+
+@receiver(post_delete, sender=FeePayment)
+def remove_fee_from_rollup(sender, instance, **kwargs):
+    from admin_api.fee_rollup import apply_change, payment_contribution
+
+    apply_change(payment_contribution(instance), None)
+
+
+# ==================== GRADE ANALYTICS CUBE ====================
+
+@receiver(pre_save, sender=Grade)
+def remember_grade_contribution(sender, instance, raw=False, **kwargs):
+    from admin_api.grade_cube import stored_contribution
+
+    instance._previous_contribution = None
+    if instance.pk and not raw:
+        instance._previous_contribution = stored_contribution(instance.pk)
+
+
+@receiver(post_save, sender=Grade)
+def update_grade_cube(sender, instance, raw=False, **kwargs):
+    from admin_api.grade_cube import apply_change, grade_contribution
+
+    if raw:
+        return
+    apply_change(getattr(instance, '_previous_contribution', None), grade_contribution(instance))
+
+
+@receiver(post_delete, sender=Grade)
+def remove_grade_from_cube(sender, instance, **kwargs):
+    from admin_api.grade_cube import apply_change, grade_contribution
+
+    apply_change(grade_contribution(instance), None)
+
+
+@receiver(pre_save, sender=Student)
+def remember_student_class(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_class_id = instance.school_class_id
+    if instance.pk and not raw and (update_fields is None or 'school_class' in update_fields):
+        instance._previous_class_id = (
+            Student.objects.filter(pk=instance.pk)
+            .values_list('school_class_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Student)
+def move_student_grades(sender, instance, created=False, raw=False, **kwargs):
+    """A student's grades follow them to their new class"""
+    from admin_api.grade_cube import rebuild
+
+    previous = getattr(instance, '_previous_class_id', instance.school_class_id)
+    if created or raw or previous == instance.school_class_id:
+        return
+    rebuild(class_ids=[previous, instance.school_class_id])
+
+
+@receiver(post_save, sender='admin_api.GradeScale')
+@receiver(post_delete, sender='admin_api.GradeScale')
+def reload_grading_scale(sender, raw=False, **kwargs):
+    """Once committed, every process picks up the new scale and the cube is re-banded"""
+    if raw:
+        return
+    # Editing a scale touches several rows; re-band once per transaction.
+    # A rolled back transaction drops its queued callbacks, so look in the
+    # queue rather than keeping a separate flag.
+    queued = transaction.get_connection().run_on_commit
+    if not any(func is apply_new_grading_scale for _, func, _ in queued):
+        transaction.on_commit(apply_new_grading_scale)
+
+
+def apply_new_grading_scale():
+    from admin_api import grading_scale
+    from admin_api.grade_cube import rebuild
+
+    grading_scale.scale_changed()
+    rebuild()
+
+
+# ==================== BACKGROUND JOBS ====================
+
+@receiver(request_started, dispatch_uid='admin_api.recover_thread_jobs')
+def recover_thread_jobs(sender, **kwargs):
+    """The first request a web process serves picks up jobs a previous process left behind"""
+    import threading
+
+    from admin_api import jobs
+
+    request_started.disconnect(dispatch_uid='admin_api.recover_thread_jobs')
+    if jobs.setting('JOBS_RUNNER', 'thread') == 'thread':
+        # Off the request, which should not wait on (or be billed for) it
+        threading.Thread(target=jobs.recover_in_thread, daemon=True).start()
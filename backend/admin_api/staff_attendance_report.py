@@ -0,0 +1,179 @@
+"""
+Monthly staff attendance reporting
+
+Per-employee status counts come from one conditional-aggregation query
+(``Count(filter=Q(...))`` over active employees) and the day-by-day matrix
+from one ``FilteredRelation`` join, so staff without records still appear.
+Both feed the JSON responses and the write-only XLSX renderers.
+"""
+import calendar
+import tempfile
+from datetime import date
+
+from django.db.models import Count, FilteredRelation, Q
+
+from admin_api.models import Employee
+
+
+STATUSES = ('present', 'absent', 'late', 'on_leave')
+STATUS_CODES = {'present': 'P', 'absent': 'A', 'late': 'L', 'on_leave': 'OL'}
+
+# Cell colours; the openpyxl fills are built when a sheet is written
+HEADER_COLOR = '366092'
+STATUS_COLORS = {
+    'present': 'C6EFCE',
+    'absent': 'FFC7CE',
+    'late': 'FFEB9C',
+    'on_leave': 'DDEBF7',
+}
+
+
+def month_bounds(year, month):
+    """First and last day of a month; raises ValueError for invalid input"""
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, last_day)
+
+
+def monthly_summary(year, month):
+    """One row per active employee with status counts for the month"""
+    first, last = month_bounds(year, month)
+    in_month = Q(attendances__date__gte=first, attendances__date__lte=last)
+    counts = {
+        status: Count('attendances', filter=in_month & Q(attendances__status=status))
+        for status in STATUSES
+    }
+    rows = (
+        Employee.objects.filter(is_active=True)
+        .annotate(total_marked=Count('attendances', filter=in_month), **counts)
+        .values('id', 'employee_id', 'name', 'total_marked', *STATUSES)
+        .order_by('name', 'id')
+    )
+
+    summary = []
+    for row in rows:
+        total = row['total_marked']
+        summary.append({
+            'staff_id': row['id'],
+            'employee_id': row['employee_id'] or '',
+            'name': row['name'],
+            'present': row['present'],
+            'absent': row['absent'],
+            'late': row['late'],
+            'on_leave': row['on_leave'],
+            'total_marked': total,
+            'attendance_percentage': round(row['present'] / total * 100, 2) if total else 0,
+        })
+    return summary
+
+
+def attendance_matrix(year, month):
+    """
+    Staff x day matrix for the month: ``(days, rows)`` where each row holds
+    the employee and a list of statuses (None when not marked), one per day
+    """
+    first, last = month_bounds(year, month)
+    days = [date(year, month, day) for day in range(1, last.day + 1)]
+    entries = (
+        Employee.objects.filter(is_active=True)
+        .annotate(month_attendance=FilteredRelation(
+            'attendances',
+            condition=Q(attendances__date__gte=first, attendances__date__lte=last),
+        ))
+        .values('id', 'employee_id', 'name',
+                'month_attendance__date', 'month_attendance__status')
+        .order_by('name', 'id')
+    )
+
+    rows = []
+    current = None
+    for entry in entries.iterator(chunk_size=2000):
+        if current is None or current['staff_id'] != entry['id']:
+            current = {
+                'staff_id': entry['id'],
+                'employee_id': entry['employee_id'] or '',
+                'name': entry['name'],
+                'days': [None] * len(days),
+            }
+            rows.append(current)
+        marked = entry['month_attendance__date']
+        if marked is not None:
+            current['days'][marked.day - 1] = entry['month_attendance__status']
+    return days, rows
+
+
+# ==================== XLSX ====================
+
+def _workbook(title, widths):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for column, width in widths:
+        ws.column_dimensions[column].width = width
+    return wb, ws
+
+
+def _fill(color):
+    from openpyxl.styles import PatternFill
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+def _header(ws, values):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+    font = Font(bold=True, color='FFFFFF')
+    fill = _fill(HEADER_COLOR)
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        cell.fill = fill
+        cell.alignment = Alignment(horizontal='center')
+        row.append(cell)
+    ws.append(row)
+
+
+def _save(wb):
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def write_summary_xlsx(summary, year, month):
+    """Monthly summary sheet written in openpyxl write-only mode"""
+    wb, ws = _workbook(
+        f'Attendance {month}-{year}',
+        [('A', 14), ('B', 30), ('C', 10), ('D', 10), ('E', 10), ('F', 10), ('G', 13), ('H', 13)])
+    _header(ws, ['Employee ID', 'Name', 'Present', 'Absent', 'Late',
+                 'On Leave', 'Total Marked', 'Attendance %'])
+    for row in summary:
+        ws.append([
+            row['employee_id'], row['name'], row['present'], row['absent'],
+            row['late'], row['on_leave'], row['total_marked'], row['attendance_percentage'],
+        ])
+    return _save(wb)
+
+
+def write_matrix_xlsx(days, rows, year, month):
+    """Staff x day matrix with colour-coded status cells, write-only"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    widths = [('A', 14), ('B', 30)] + [
+        (get_column_letter(col), 5) for col in range(3, len(days) + 3)]
+    wb, ws = _workbook(f'Matrix {month}-{year}', widths)
+    _header(ws, ['Employee ID', 'Name'] + [day.day for day in days])
+    fills = {status: _fill(color) for status, color in STATUS_COLORS.items()}
+
+    for row in rows:
+        cells = [row['employee_id'], row['name']]
+        for status in row['days']:
+            cell = WriteOnlyCell(ws, value=STATUS_CODES.get(status, status or ''))
+            if status in fills:
+                cell.fill = fills[status]
+            cells.append(cell)
+        ws.append(cells)
+
+    ws.append([])
+    ws.append(['Legend'] + [f'{code} = {status.replace("_", " ").title()}'
+                            for status, code in STATUS_CODES.items()])
+    return _save(wb)
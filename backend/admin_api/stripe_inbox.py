@@ -0,0 +1,269 @@
+"""
+Stripe webhook inbox
+
+The webhook only verifies the signature and stores the event in
+``StripeWebhookEvent`` (``receive``). The table's unique event id makes
+delivery idempotent: Stripe's retries insert nothing, so a retried event is
+never processed twice. Everything else happens off the request in a
+``stripe.events`` background job (``admin_api.jobs``):
+
+- pending events are taken in batches of ``STRIPE_WEBHOOK_BATCH_SIZE``,
+  oldest Stripe timestamp first
+- the batch's ``PaymentTransaction`` and ``FeePayment`` rows are read with
+  one query each, the events applied in memory and the rows written back
+  with a few grouped UPDATEs
+- the fee collection rollup is rebuilt for the payment dates touched, as
+  these bulk writes bypass its signal handlers
+
+At most one job waits in the queue at a time; the running one keeps taking
+batches until the inbox is empty. If a batch fails its events are retried
+one by one, so a single bad event is marked failed without holding back
+the rest. ``manage.py process_stripe_events`` drains the inbox by hand and
+requeues failed events; ``manage.py replay_stripe_events`` replays a
+captured event stream against the webhook.
+
+``payment_intent.succeeded`` completes the transaction and, when the
+intent's metadata names a ``fee_payment_id``, credits the amount received to
+that fee. The fee records the intent id as its ``transaction_id``, which
+keeps a fee from being credited twice for the same intent.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from admin_api import fee_rollup, jobs
+from admin_api.models import FeePayment, Job, PaymentTransaction, StripeWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+TASK = 'stripe.events'
+HANDLED = ('payment_intent.succeeded', 'payment_intent.payment_failed')
+# Rows per UPDATE; a CASE over many rows gets slow to evaluate
+UPDATE_BATCH_SIZE = 100
+
+
+# ==================== ACKNOWLEDGE ====================
+
+def receive(event):
+    """Store a verified event (a parsed dict); a delivery seen before is a no-op"""
+    if not isinstance(event, dict) or not event.get('id') or not event.get('type'):
+        raise ValueError('Not a Stripe event')
+    data_object = (event.get('data') or {}).get('object') or {}
+    StripeWebhookEvent.objects.bulk_create([
+        StripeWebhookEvent(
+            event_id=event['id'],
+            event_type=event['type'],
+            object_id=data_object.get('id') or '',
+            stripe_created=event.get('created') or 0,
+            payload=event,
+        )
+    ], ignore_conflicts=True)
+    schedule()
+
+
+def schedule():
+    """Queue a processing job unless one is already waiting"""
+    if not Job.objects.filter(kind=TASK, status='pending').exists():
+        jobs.enqueue(TASK, name='Stripe webhook events')
+
+
+# ==================== PROCESSING ====================
+
+def run_inbox_task(job):
+    """``stripe.events`` job: process batches until the inbox is empty"""
+    return process_pending()
+
+
+def process_pending(batch_size=None, limit=None):
+    """Process pending events in batches; returns the counts per outcome"""
+    batch_size = batch_size or getattr(settings, 'STRIPE_WEBHOOK_BATCH_SIZE', 200)
+    totals = {'processed': 0, 'ignored': 0, 'failed': 0}
+    while limit is None or sum(totals.values()) < limit:
+        size = batch_size if limit is None else min(batch_size, limit - sum(totals.values()))
+        outcome = process_batch(size)
+        if outcome is None:
+            break
+        for key, count in outcome.items():
+            totals[key] += count
+        jobs.progress(sum(totals.values()), None, f"{totals['processed']} Stripe events processed")
+    return totals
+
+
+def process_batch(size):
+    """Claim and process up to ``size`` pending events; None when there were none"""
+    try:
+        with transaction.atomic():
+            events = _claim(size)
+            if not events:
+                return None
+            return apply_events(events)
+    except Exception as e:
+        logger.warning('Stripe event batch failed, retrying one by one: %s', e)
+
+    outcome = {'processed': 0, 'ignored': 0, 'failed': 0}
+    with transaction.atomic():
+        event_ids = [event.pk for event in _claim(size)]
+    for event_id in event_ids:
+        try:
+            with transaction.atomic():
+                event = (
+                    StripeWebhookEvent.objects.select_for_update()
+                    .filter(pk=event_id, status='pending')
+                    .first()
+                )
+                if event is None:
+                    continue
+                for key, count in apply_events([event]).items():
+                    outcome[key] += count
+        except Exception as e:
+            StripeWebhookEvent.objects.filter(pk=event_id).update(
+                status='failed', error=str(e), processed_at=timezone.now(),
+                attempts=F('attempts') + 1)
+            outcome['failed'] += 1
+    return outcome
+
+
+def _claim(size):
+    """Lock the oldest pending events (other workers skip locked rows)"""
+    return list(
+        StripeWebhookEvent.objects.select_for_update(skip_locked=True)
+        .filter(status='pending')
+        .order_by('stripe_created', 'id')[:size]
+    )
+
+
+def apply_events(events):
+    """
+    Apply ``events`` (in Stripe order) to their transactions and fees with
+    one read and a few grouped writes per table; must run inside a transaction
+    """
+    now = timezone.now()
+    intent_ids = {event.object_id for event in events if event.event_type in HANDLED}
+    transactions = {
+        payment.payment_intent_id: payment
+        for payment in PaymentTransaction.objects.filter(payment_intent_id__in=intent_ids)
+    }
+    fee_ids = {
+        _fee_id(event.payload['data']['object'])
+        for event in events if event.event_type == 'payment_intent.succeeded'
+    } - {None}
+    fees = FeePayment.objects.in_bulk(fee_ids) if fee_ids else {}
+
+    changed_transactions, changed_fees, rollup_dates = {}, {}, set()
+    outcome = {'processed': 0, 'ignored': 0, 'failed': 0}
+    for event in events:
+        payment = transactions.get(event.object_id)
+        if event.event_type not in HANDLED:
+            event.status, event.error = 'ignored', 'Unhandled event type'
+        elif payment is None:
+            event.status, event.error = 'ignored', 'Transaction not found'
+        else:
+            intent = event.payload['data']['object']
+            if event.event_type == 'payment_intent.succeeded':
+                _apply_success(payment, intent)
+                fee = fees.get(_fee_id(intent))
+                if fee is not None and _credit_fee(fee, payment, intent, event, rollup_dates):
+                    changed_fees[fee.pk] = fee
+            else:
+                _apply_failure(payment, intent)
+            changed_transactions[payment.pk] = payment
+            event.status, event.error = 'processed', ''
+        outcome[event.status] += 1
+
+    _bulk_write(PaymentTransaction, changed_transactions.values(), now,
+                shared=('status', 'failure_reason'), varying=('stripe_charge_id',))
+    _bulk_write(FeePayment, changed_fees.values(), now,
+                shared=('status', 'payment_date', 'payment_method'),
+                varying=('amount_paid', 'transaction_id'))
+    if rollup_dates:
+        fee_rollup.rebuild(min(rollup_dates), max(rollup_dates))
+    # Events share a handful of outcomes: one UPDATE per outcome
+    by_outcome = {}
+    for event in events:
+        by_outcome.setdefault((event.status, event.error), []).append(event.pk)
+    for (event_status, error), event_ids in by_outcome.items():
+        StripeWebhookEvent.objects.filter(pk__in=event_ids).update(
+            status=event_status, error=error, processed_at=now, attempts=F('attempts') + 1)
+    return outcome
+
+
+def _bulk_write(model, rows, now, shared, varying):
+    """
+    ``bulk_update`` for rows that mostly agree: rows sharing the ``shared``
+    values are written by one UPDATE per chunk with a CASE only for the
+    ``varying`` columns (``bulk_update`` would build a CASE for every column)
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(getattr(row, name) for name in shared), []).append(row)
+    for values, group in groups.items():
+        for start in range(0, len(group), UPDATE_BATCH_SIZE):
+            chunk = group[start:start + UPDATE_BATCH_SIZE]
+            cases = {}
+            for name in varying:
+                field = model._meta.get_field(name)
+                cases[name] = Case(
+                    *[When(pk=row.pk, then=Value(getattr(row, name), output_field=field))
+                      for row in chunk],
+                    output_field=field)
+            model.objects.filter(pk__in=[row.pk for row in chunk]).update(
+                updated_at=now, **dict(zip(shared, values)), **cases)
+
+
+def _fee_id(intent):
+    fee_id = str((intent.get('metadata') or {}).get('fee_payment_id') or '')
+    return int(fee_id) if fee_id.isdigit() else None
+
+
+def _apply_success(payment, intent):
+    if payment.status == 'refunded':
+        return
+    payment.status = 'completed'
+    charges = (intent.get('charges') or {}).get('data') or []
+    payment.stripe_charge_id = intent.get('latest_charge') or (charges[0]['id'] if charges else '') or ''
+
+
+def _apply_failure(payment, intent):
+    # A failure reported after the payment went through is stale
+    if payment.status not in ('pending', 'failed'):
+        return
+    payment.status = 'failed'
+    error = intent.get('last_payment_error') or {}
+    payment.failure_reason = error.get('message') or 'Unknown error'
+
+
+def _credit_fee(fee, payment, intent, event, rollup_dates):
+    """Credit the amount received to ``fee`` once per intent"""
+    if fee.transaction_id == payment.payment_intent_id or fee.student_id != payment.student_id:
+        return False
+    if fee.status == 'paid' and fee.payment_date:
+        rollup_dates.add(fee.payment_date)
+    received = intent.get('amount_received')
+    amount = Decimal(received) / 100 if received is not None else payment.amount
+    paid_on = timezone.localdate()
+    if event.stripe_created:
+        paid_on = timezone.localdate(datetime.fromtimestamp(event.stripe_created, tz=dt_timezone.utc))
+
+    fee.amount_paid += amount
+    if fee.amount_paid >= fee.amount_due:
+        fee.status = 'paid'
+        fee.payment_date = paid_on
+        rollup_dates.add(paid_on)
+    elif fee.amount_paid > 0:
+        fee.status = 'partial'
+    fee.payment_method = 'online'
+    fee.transaction_id = payment.payment_intent_id
+    return True
+
+
+def requeue_failed():
+    """Put failed events back in the inbox; returns how many"""
+    count = StripeWebhookEvent.objects.filter(status='failed').update(status='pending', error='')
+    if count:
+        transaction.on_commit(schedule)
+    return count
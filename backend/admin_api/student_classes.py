@@ -0,0 +1,91 @@
+"""
+Student -> Class link
+
+``Student.class_name`` is the historical string join against ``Class.name``;
+``Student.school_class`` is its normalised replacement. While both exist
+every write keeps them in step: ``Student.save()`` resolves the foreign key
+from the name, and bulk writers (``QuerySet.update``/``bulk_create``) use
+``class_ids_by_name`` or call ``sync`` afterwards. ``manage.py
+sync_student_classes`` repairs rows written by anything else. ``sync``
+moves students with UPDATEs that bypass the ``Student`` signal, so it
+rebuilds the grade cube cells of the classes it moved them between.
+
+``Class.name`` is not unique (sections share a name), so a name resolves to
+the lowest ``Class`` id carrying it, the same row the ``.first()`` lookups
+in the views return.
+"""
+from django.db.models import Count, Min, Q
+
+from admin_api import grade_cube
+from admin_api.models import Class, Grade, Student
+
+
+def class_ids_by_name(names=None):
+    """``{name: class_id}`` in one grouped query"""
+    classes = Class.objects.all()
+    if names is not None:
+        classes = classes.filter(name__in=list(names))
+    return {
+        row['name']: row['class_id']
+        for row in classes.values('name').annotate(class_id=Min('id')).order_by()
+    }
+
+
+def stale_students(class_ids=None):
+    """Students whose ``school_class`` disagrees with their ``class_name``"""
+    if class_ids is None:
+        class_ids = class_ids_by_name()
+    linked = Q()
+    for name, class_id in class_ids.items():
+        linked |= Q(class_name=name, school_class_id=class_id)
+    unlinked = Q(school_class__isnull=True) & ~Q(class_name__in=list(class_ids))
+    return Student.objects.exclude(linked | unlinked)
+
+
+def sync(names=None):
+    """
+    Point ``school_class`` at the class matching ``class_name`` for every
+    student (or only those in ``names``); one UPDATE per class name plus
+    one for names without a class, then a grade cube rebuild of the old and
+    new classes. Returns the number of rows changed.
+    """
+    class_ids = class_ids_by_name(names)
+    students = Student.objects.all()
+    if names is not None:
+        students = students.filter(class_name__in=list(names))
+
+    moves = set(
+        stale_students(class_ids).filter(pk__in=students.values('pk'))
+        .values_list('class_name', 'school_class_id').distinct()
+    )
+    touched = {old for _, old in moves} | {class_ids.get(name) for name, _ in moves}
+
+    changed = 0
+    for name, class_id in class_ids.items():
+        changed += students.filter(class_name=name).exclude(
+            school_class_id=class_id).update(school_class_id=class_id)
+    changed += students.exclude(class_name__in=list(class_ids)).filter(
+        school_class__isnull=False).update(school_class=None)
+    if changed:
+        grade_cube.rebuild(class_ids=touched)
+    return changed
+
+
+# ==================== COUNTS ====================
+
+def student_counts(names):
+    """``{class_name: students}`` for the given names in one grouped query"""
+    return {
+        row['class_name']: row['students']
+        for row in Student.objects.filter(class_name__in=list(names))
+        .values('class_name').annotate(students=Count('id')).order_by()
+    }
+
+
+def grade_counts(names):
+    """``{class_name: grades}`` recorded for students of the given classes"""
+    return {
+        row['student__class_name']: row['grades']
+        for row in Grade.objects.filter(student__class_name__in=list(names))
+        .values('student__class_name').annotate(grades=Count('id')).order_by()
+    }
@@ -0,0 +1,135 @@
+"""
+List endpoints whose serializers count related rows run the same number of
+queries however many rows the page holds (``admin_api.annotated_fields``)
+"""
+from datetime import date
+
+import pytest
+from rest_framework.test import APIClient
+
+from admin_api.models import (
+    AcademicYear, Class, Exam, ExamSchedule, LeavePolicy, LeavePolicyRule, LeaveType,
+    MeritList, MeritListEntry, Message, Student, Subject
+)
+from users.models import User
+
+
+@pytest.fixture
+def admin(db):
+    return User.objects.create_user(
+        username='annotated_admin', email='annotated_admin@test.local', password='annotated', role='admin',
+        is_staff=True, is_superuser=True)
+
+
+@pytest.fixture
+def client(admin):
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+def get_results(client, path):
+    response = client.get(path)
+    assert response.status_code == 200, response.content
+    data = response.json()
+    return data['results'] if isinstance(data, dict) else data
+
+
+def user(name):
+    return User.objects.create_user(
+        username=name, email=f'{name}@test.local', password=name, first_name=name.title())
+
+
+def add_messages(admin, count):
+    for number in range(count):
+        other = user(f'correspondent{Message.objects.count()}_{number}')
+        thread = Message.objects.create(sender=other, receiver=admin, subject='Question', body='?')
+        for _ in range(2):
+            Message.objects.create(
+                sender=admin, receiver=other, subject='Re: Question', body='!', parent_message=thread)
+
+
+def add_exams(count):
+    subjects = [
+        Subject.objects.get_or_create(code=f'ANN-{code}', defaults={'title': code})[0]
+        for code in ('MAT', 'SCI', 'ENG')
+    ]
+    for number in range(count):
+        school_class = Class.objects.create(name=f'Annotated {Exam.objects.count()}', room='R1')
+        exam = Exam.objects.create(
+            name=f'Exam {number}', exam_type='monthly', academic_year='2025',
+            start_date=date(2025, 3, 1), end_date=date(2025, 3, 5),
+            class_assigned=school_class, created_by=user(f'examiner{Exam.objects.count()}'))
+        for day, subject in enumerate(subjects):
+            ExamSchedule.objects.create(
+                exam=exam, subject=subject, date=date(2025, 3, 1 + day),
+                start_time='09:00', end_time='11:00', duration_minutes=120)
+
+
+def add_merit_lists(count):
+    year = AcademicYear.objects.get_or_create(
+        name='2025-26', defaults={'start_date': date(2025, 4, 1), 'end_date': date(2026, 3, 31)})[0]
+    for number in range(count):
+        merit_list = MeritList.objects.create(
+            academic_year=year, class_name=f'Grade {MeritList.objects.count()}', term='first')
+        for rank in range(1, 4):
+            student = Student.objects.create(
+                user=user(f'ranked{merit_list.id}_{rank}'), roll_no=f'ANN-{merit_list.id}-{rank}')
+            MeritListEntry.objects.create(
+                merit_list=merit_list, rank=rank, student=student,
+                total_marks=300 - rank, percentage=100 - rank)
+
+
+def add_leave_policies(count):
+    for number in range(count):
+        policy = LeavePolicy.objects.create(name=f'Policy {LeavePolicy.objects.count()}')
+        for quota in (12, 8):
+            LeavePolicyRule.objects.create(
+                policy=policy, annual_quota=quota,
+                leave_type=LeaveType.objects.create(name=f'Leave {policy.id}-{quota}'))
+
+
+def test_message_reply_count(client, admin, django_assert_max_num_queries):
+    add_messages(admin, 2)
+    with django_assert_max_num_queries(2):
+        small = get_results(client, '/api/admin/messages/?box=inbox')
+    add_messages(admin, 6)
+    with django_assert_max_num_queries(2):
+        large = get_results(client, '/api/admin/messages/?box=inbox')
+    assert len(small) == 2 and len(large) == 8
+    assert {message['reply_count'] for message in large} == {2}
+    replies = get_results(client, '/api/admin/messages/?box=sent')
+    assert {message['reply_count'] for message in replies} == {0}
+
+
+def test_exam_total_schedules(client, django_assert_max_num_queries):
+    add_exams(2)
+    with django_assert_max_num_queries(2):
+        get_results(client, '/api/admin/exams/')
+    add_exams(6)
+    with django_assert_max_num_queries(2):
+        exams = get_results(client, '/api/admin/exams/')
+    assert len(exams) == 8
+    assert {exam['total_schedules'] for exam in exams} == {3}
+
+
+def test_merit_list_entries_count(client, django_assert_max_num_queries):
+    add_merit_lists(2)
+    with django_assert_max_num_queries(3):
+        get_results(client, '/api/admin/merit-lists/')
+    add_merit_lists(6)
+    with django_assert_max_num_queries(3):
+        merit_lists = get_results(client, '/api/admin/merit-lists/')
+    assert len(merit_lists) == 8
+    assert {merit_list['entries_count'] for merit_list in merit_lists} == {3}
+
+
+def test_leave_policy_total_annual_leaves(client, django_assert_max_num_queries):
+    add_leave_policies(2)
+    with django_assert_max_num_queries(3):
+        get_results(client, '/api/admin/leave-policies/')
+    add_leave_policies(6)
+    with django_assert_max_num_queries(3):
+        policies = get_results(client, '/api/admin/leave-policies/')
+    assert len(policies) == 8
+    assert {policy['total_annual_leaves'] for policy in policies} == {20}
@@ -0,0 +1,77 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_api import exam_tabulation
+from admin_api.exam_grading import grade_online_exam
+from admin_api.models import (
+    Class, Exam, ExamResult, ExamSession, MeritList, OnlineExam, Question,
+    QuestionAnswer, Student, Subject,
+)
+from users.models import User
+
+
+@pytest.fixture
+def online_exam(db):
+    subject = Subject.objects.create(code='GRADE-SCI', title='Science')
+    class_obj = Class.objects.create(name='Grading', room='-')
+    exam = OnlineExam.objects.create(
+        title='Grading', class_assigned=class_obj, subject=subject,
+        start_datetime=timezone.now(), end_datetime=timezone.now(), auto_mark=True)
+    exam.questions.add(
+        Question.objects.create(
+            question_text='Pick A', question_type='mcq', marks=2, subject=subject,
+            class_assigned=class_obj, options={'A': 'a', 'B': 'b', 'correct': 'A'}),
+        Question.objects.create(
+            question_text='Explain', question_type='long', marks=8, subject=subject,
+            class_assigned=class_obj),
+    )
+    return exam
+
+
+def sit(online_exam, name, submitted):
+    scheduled = Exam.objects.get_or_create(
+        name='Term', exam_type='unit_test', academic_year='2025-26',
+        start_date=date(2025, 5, 1), end_date=date(2025, 5, 2),
+        class_assigned=online_exam.class_assigned)[0]
+    student = Student.objects.create(
+        user=User.objects.create_user(username=name, email=f'{name}@test.local', password=name),
+        roll_no=name, class_name='Grading')
+    session = ExamSession.objects.create(
+        online_exam=online_exam, exam=scheduled, student=student,
+        is_submitted=submitted, is_active=not submitted)
+    for question in online_exam.questions.all():
+        QuestionAnswer.objects.create(session=session, question=question, selected_option='A')
+    return session
+
+
+def test_only_submitted_sessions_are_graded(online_exam):
+    done = sit(online_exam, 'done', submitted=True)
+    sitting = sit(online_exam, 'sitting', submitted=False)
+
+    summary = grade_online_exam(online_exam)
+
+    assert summary['students_graded'] == 1
+    assert not QuestionAnswer.objects.filter(session=sitting, is_correct__isnull=False).exists()
+    result = ExamResult.objects.get()
+    assert result.student_id == done.student_id
+    # Only the MCQ can be auto-graded, so the result is out of its marks
+    assert (result.marks_obtained, result.max_marks) == (Decimal('2.00'), Decimal('2.00'))
+    assert result.grade == 'A+'
+
+
+def test_submitting_drops_the_merit_list(online_exam, settings):
+    settings.AUDIT_LOG_ASYNC = False
+    sit(online_exam, 'done', submitted=True)
+    sitting = sit(online_exam, 'sitting', submitted=False)
+    grade_online_exam(online_exam)
+    assert exam_tabulation.get_snapshot(online_exam).entries.count() == 1
+
+    client = APIClient()
+    client.force_authenticate(sitting.student.user)
+    assert client.post(f'/api/admin/exam-sessions/{sitting.pk}/submit/').status_code == 200
+    assert not MeritList.objects.filter(online_exam=online_exam).exists()
+    assert exam_tabulation.get_snapshot(online_exam).entries.count() == 2
@@ -0,0 +1,35 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import IntegrityError, transaction
+from rest_framework.test import APIClient
+
+from admin_api import fee_rollup
+from admin_api.models import Class, FeeCollectionDaily
+from users.models import User
+
+
+@pytest.mark.parametrize('class_id', [None, 'class'])
+def test_deltas_share_one_bucket(db, class_id):
+    if class_id:
+        class_id = Class.objects.create(name='Rollup', room='-').id
+    bucket = (date(2025, 5, 1), class_id, 'cash')
+    fee_rollup.apply_delta(bucket, 1, Decimal('100.00'))
+    fee_rollup.apply_delta(bucket, 2, Decimal('50.00'))
+
+    row = FeeCollectionDaily.objects.get()
+    assert (row.transactions, row.amount) == (3, Decimal('150.00'))
+    with pytest.raises(IntegrityError), transaction.atomic():
+        FeeCollectionDaily.objects.create(
+            date=bucket[0], class_assigned_id=class_id, payment_method='cash')
+
+
+def test_trend_rejects_non_integer_class_ids(db, settings):
+    settings.AUDIT_LOG_ASYNC = False
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(
+        username='trend', email='trend@test.local', password='trend'))
+    url = '/api/admin/advanced-reports/fee_collection_trend/'
+    assert client.get(url, {'class_ids': '1,x'}).status_code == 400
+    assert client.get(url, {'class_ids': '1,2'}).status_code == 200
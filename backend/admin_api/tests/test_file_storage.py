@@ -0,0 +1,47 @@
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from admin_api import file_storage
+from admin_api.file_storage import UploadError
+from admin_api.models import UploadSession
+from users.models import User
+
+
+@pytest.fixture
+def upload(db, tmp_path, monkeypatch, settings):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'blobs': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': str(tmp_path / 'blobs')},
+        },
+    }
+    monkeypatch.setattr(file_storage, 'CHUNKED_UPLOAD_DIR', str(tmp_path / 'partial'))
+    user = User.objects.create_user(username='uploader', email='uploader@test.local', password='up')
+    return file_storage.start_upload(user, 'notes.txt', 10)
+
+
+def test_stale_offsets_are_rejected(upload, tmp_path):
+    upload = file_storage.append_chunk(upload, BytesIO(b'hello'), 0, 5)
+    with pytest.raises(UploadError) as error:
+        file_storage.append_chunk(UploadSession.objects.get(pk=upload.pk), BytesIO(b'HELLO'), 0, 5)
+    assert error.value.status == 409
+    with pytest.raises(UploadError):
+        file_storage.append_chunk(upload, BytesIO(b'wor'), 5, 5)
+
+    upload = file_storage.append_chunk(upload, BytesIO(b'world'), 5, 5)
+    assert upload.received_bytes == 10
+    assert Path(upload.temp_path).read_bytes() == b'helloworld'
+    assert sorted(path.name for path in (tmp_path / 'partial').iterdir()) == [
+        f'{upload.upload_id.hex}.part']
+
+
+def test_completing_twice_stores_once(upload):
+    upload = file_storage.append_chunk(upload, BytesIO(b'helloworld'), 0, 10)
+    stale = UploadSession.objects.get(pk=upload.pk)
+
+    stored = file_storage.complete_upload(upload)
+    assert file_storage.complete_upload(stale) == stored
+    assert stored.blob.files.count() == 1
@@ -0,0 +1,53 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import IntegrityError, transaction
+
+from admin_api import grade_cube, student_classes
+from admin_api.models import Class, Grade, GradeCubeCell, Student, Subject
+from users.models import User
+
+
+def cube():
+    return sorted(GradeCubeCell.objects.values_list(
+        'class_assigned_id', 'subject_id', 'term', 'grade_type', 'month', 'band', 'grade_count'))
+
+
+@pytest.fixture
+def student(db):
+    Class.objects.create(name='Cube 1', room='C1')
+    Class.objects.create(name='Cube 2', room='C2')
+    student = Student.objects.create(
+        user=User.objects.create_user(username='cube', email='cube@test.local', password='cube'),
+        roll_no='CUBE-1', class_name='Cube 1')
+    subject = Subject.objects.create(code='CUBE-MAT', title='Mathematics')
+    for score in (95, 72, 40):
+        Grade.objects.create(
+            student=student, subject=subject, grade_type='test', score=Decimal(score),
+            date_recorded=date(2025, 5, 1))
+    return student
+
+
+def test_sync_moves_grades_between_cube_classes(student):
+    old_class = student.school_class_id
+    Student.objects.filter(pk=student.pk).update(class_name='Cube 2')
+
+    assert student_classes.sync() == 1
+    new_class = Student.objects.get(pk=student.pk).school_class_id
+    assert {cell[0] for cell in cube()} == {new_class} != {old_class}
+    synced = cube()
+    grade_cube.rebuild()
+    assert cube() == synced
+
+
+def test_cube_cells_are_unique_per_key(student):
+    cell = GradeCubeCell.objects.first()
+    key = dict(class_assigned_id=cell.class_assigned_id, subject_id=cell.subject_id, term=cell.term,
+               grade_type=cell.grade_type, month=cell.month, band=cell.band)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        GradeCubeCell.objects.create(**key)
+    GradeCubeCell.objects.filter(pk=cell.pk).update(class_assigned=None)
+    key['class_assigned_id'] = None
+    with pytest.raises(IntegrityError), transaction.atomic():
+        GradeCubeCell.objects.create(**key)
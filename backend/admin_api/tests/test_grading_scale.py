@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from admin_api import grading_scale
+from admin_api.models import Grade, GradeScale, Student, Subject
+from users.models import User
+
+
+@pytest.fixture
+def scale(db):
+    grading_scale.scale_changed()
+    yield grading_scale.get_scale()
+    grading_scale.scale_changed()
+
+
+def edge_scores(scale, max_score):
+    """Scores on, just under and just over every floor of ``scale``, out of ``max_score``"""
+    percentages = {0, 100}
+    for _, floor, _, _ in scale.bands:
+        percentages.update({floor, floor - 0.5, floor + 0.5})
+    return sorted(
+        Decimal(str(p)) * max_score / 100 for p in percentages if 0 <= p <= 100)
+
+
+def test_letter_paths_agree_on_band_edges(scale):
+    numpy = pytest.importorskip('numpy')
+    student = Student.objects.create(
+        user=User.objects.create_user(username='scale', email='scale@test.local', password='scale'),
+        roll_no='SCALE-1', class_name='Scale')
+    subject = Subject.objects.create(code='SCALE-MAT', title='Mathematics')
+    scores = [(score, max_score) for max_score in (Decimal(100), Decimal(40))
+              for score in edge_scores(scale, max_score)]
+    Grade.objects.bulk_create([
+        Grade(student=student, subject=subject, grade_type='test', score=score,
+              max_score=max_score, date_recorded=date(2025, 5, 1))
+        for score, max_score in scores
+    ])
+
+    bisected = [scale.letter(grading_scale.percentage(score, max_score)) for score, max_score in scores]
+    vectorised = scale.letters(numpy.array(
+        [float(grading_scale.percentage(score, max_score)) for score, max_score in scores]))
+    assert list(vectorised) == bisected
+
+    sql = {row['grade']: row['count'] for row in grading_scale.distribution(Grade.objects.filter(student=student))}
+    assert sql == {grade: bisected.count(grade) for grade in sql}
+    assert sum(sql.values()) == len(scores)
+
+
+def test_nan_is_ungraded(scale):
+    assert scale.letter(float('nan')) == grading_scale.UNGRADED
+    assert scale.letter(Decimal('NaN')) == grading_scale.UNGRADED
+    assert scale.letters([float('nan'), 95]) == [grading_scale.UNGRADED, 'A+']
+    numpy = pytest.importorskip('numpy')
+    assert list(scale.letters(numpy.array([numpy.nan, 95.0, -1.0]))) == [
+        grading_scale.UNGRADED, 'A+', grading_scale.UNGRADED]
+
+
+def test_load_uses_a_single_scale(scale, settings):
+    for name, bands in (('Standard', (('A', 50), ('F', 0))), ('Strict', (('A', 90), ('F', 0)))):
+        GradeScale.objects.bulk_create([
+            GradeScale(name=name, grade=grade, min_percentage=floor, max_percentage=100,
+                       grade_point=Decimal('1.00'))
+            for grade, floor in bands
+        ])
+
+    settings.GRADING_SCALE_NAME = ''
+    assert grading_scale.load().letter(60) == 'A'
+    settings.GRADING_SCALE_NAME = 'Strict'
+    assert grading_scale.load().letter(60) == 'F'
+
+
+def test_scale_edits_rebuild_once_per_transaction(scale, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks:
+        for grade, floor in (('A', 50), ('F', 0)):
+            GradeScale.objects.create(name='Standard', grade=grade, min_percentage=floor,
+                                      max_percentage=100, grade_point=Decimal('1.00'))
+        GradeScale.objects.filter(grade='F').get().delete()
+    assert len(callbacks) == 1
@@ -0,0 +1,30 @@
+import os
+import socket
+
+from admin_api import jobs
+from admin_api.models import Job
+
+
+def test_thread_jobs_left_by_an_exited_process_are_rerun(db, monkeypatch):
+    dispatched = []
+    monkeypatch.setattr(jobs, 'dispatch', dispatched.append)
+    host = socket.gethostname()
+
+    def running(worker, attempts=1):
+        return Job.objects.create(kind='request', status='running', worker=worker, attempts=attempts)
+
+    # This process is only starting, so a job recorded under its pid was
+    # left by an earlier process; the parent is still alive and keeps its job
+    orphan = running(f'{host}:{os.getpid()}:thread', attempts=0)
+    exhausted = running(f'{host}:{os.getpid()}:thread')
+    alive = running(f'{host}:{os.getppid()}:thread', attempts=0)
+    elsewhere = running(f'{host}-other:{os.getpid()}:thread', attempts=0)
+    queued = Job.objects.create(kind='request')
+
+    jobs.recover_thread_jobs()
+
+    statuses = dict(Job.objects.values_list('id', 'status'))
+    assert statuses[orphan.id] == 'pending'
+    assert statuses[exhausted.id] == 'failed'
+    assert statuses[alive.id] == statuses[elsewhere.id] == 'running'
+    assert dispatched == [orphan.id, queued.id]
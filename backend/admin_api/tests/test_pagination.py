@@ -0,0 +1,33 @@
+import pytest
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from admin_api.models import Notification
+from admin_api.pagination import CreatedAtKeysetPagination
+from users.models import User
+
+
+def paginate(query):
+    request = Request(APIRequestFactory().get('/notifications/', query))
+    paginator = CreatedAtKeysetPagination()
+    return [row.title for row in paginator.paginate_queryset(
+        Notification.objects.filter(user__username='keyset'), request)]
+
+
+@pytest.fixture
+def notifications(db):
+    user = User.objects.create_user(username='keyset', password='keyset', role='admin')
+    for number in range(3):
+        Notification.objects.create(user=user, title=f'n{number}', message='Keyset')
+
+
+def test_newest_first_unless_direction_asc(notifications):
+    assert paginate({'page_size': 2}) == ['n2', 'n1']
+    assert paginate({'page_size': 2, 'direction': 'asc'}) == ['n0', 'n1']
+
+
+@pytest.mark.parametrize('query', [{'ordering': 'priority'}, {'ordering': 'created_at'}, {'direction': 'up'}])
+def test_rejects_orderings_other_than_the_key(notifications, query):
+    with pytest.raises(ValidationError):
+        paginate(query)
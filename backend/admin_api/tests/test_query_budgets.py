@@ -0,0 +1,21 @@
+"""
+Every endpoint in ``admin_api/query_budgets.json`` stays within its query
+budget on the fixed budget dataset (``manage.py check_query_budgets`` runs
+the same check against a live database)
+"""
+import pytest
+
+from admin_api.query_budgets import measure
+from admin_api.query_metrics import load_budgets
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('budget', load_budgets(), ids=lambda budget: budget['name'])
+def test_endpoint_within_query_budget(budget, query_budget_data):
+    placeholders, users = query_budget_data
+    result = measure(budget, placeholders, users)
+    repeated = ''.join(
+        f"\n  {duplicate['count']}x {duplicate['sql'][:200]}" for duplicate in result['duplicates'][:3])
+    assert result['outcome'] == 'ok', (
+        f"{result['name']}: {result['outcome']}, {result['queries']} queries "
+        f"(budget {result['max_queries']}), status {result['status']}{repeated}")
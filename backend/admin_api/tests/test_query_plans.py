@@ -0,0 +1,17 @@
+"""
+The hot student/class filters keep using their indexes (SQLite EXPLAIN
+QUERY PLAN; ``manage.py check_query_plans`` prints the same plans)
+"""
+import pytest
+from django.db import connection
+
+from admin_api.query_plans import check_plan, hot_queries
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('label, queryset, fragment', hot_queries(), ids=[query[0] for query in hot_queries()])
+def test_hot_query_uses_index(label, queryset, fragment):
+    if connection.vendor != 'sqlite':
+        pytest.skip('Plan assertions are written for SQLite EXPLAIN QUERY PLAN output')
+    ok, plan = check_plan(queryset, fragment)
+    assert ok, f'{label} does not use {fragment}:\n{plan}'
@@ -0,0 +1,50 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from admin_api import jobs, question_import
+from admin_api.models import Class, Job, Question, Subject
+from users.models import User
+
+
+CSV = (
+    'question_text,question_type,options,marks\n'
+    'Pick A,MCQ,A:one|B:two|correct:A,2\n'
+    'Explain,essay,,5\n'
+    'Pick A,mcq,A:one|B:two|correct:A,2\n'
+)
+
+
+@pytest.fixture
+def import_job(db, tmp_path, monkeypatch, settings):
+    settings.AUDIT_LOG_ASYNC = False
+    monkeypatch.setattr(question_import, 'IMPORT_DIR', str(tmp_path))
+    owner = User.objects.create_user(username='owner', email='owner@test.local', password='owner')
+    return question_import.start_import_job(
+        SimpleUploadedFile('questions.csv', CSV.encode()),
+        Subject.objects.create(code='IMPORT-SCI', title='Science'),
+        Class.objects.create(name='Import', room='-'),
+        owner,
+    )
+
+
+def test_import_runs_as_a_job(import_job, tmp_path):
+    assert jobs.claim(import_job.id, 'test')
+    assert jobs.run_job(import_job.id) == 'completed'
+
+    result = Job.objects.get(pk=import_job.pk).result
+    assert (result['created_count'], result['duplicate_count']) == (1, 1)
+    assert result['errors'] == ["Row 3: unknown question_type 'essay'"]
+    assert list(Question.objects.values_list('question_type', flat=True)) == ['mcq']
+    assert not list(tmp_path.iterdir())
+
+
+def test_status_is_visible_to_the_owner_only(import_job):
+    url = f'/api/admin/question-bank/import_jobs/{import_job.id}/'
+    client = APIClient()
+    client.force_authenticate(import_job.created_by)
+    assert client.get(url).data['kind'] == 'questions.import'
+
+    client.force_authenticate(User.objects.create_user(
+        username='other', email='other@test.local', password='other'))
+    assert client.get(url).status_code == 404
@@ -0,0 +1,69 @@
+from datetime import date, time
+
+import pytest
+
+from admin_api import timetable_export
+from admin_api.models import AcademicYear, Class, Subject, Teacher, TimeSlot, Timetable
+from users.models import User
+
+
+@pytest.fixture
+def timetable(db, settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    class_obj = Class.objects.create(name='Export', room='-')
+    teacher = Teacher.objects.create(
+        user=User.objects.create_user(username='export', email='export@test.local', password='export',
+                                      first_name='Ada', last_name='Lovelace'),
+        subject='Mathematics')
+    for year in ('2024-25', '2025-26'):
+        Timetable.objects.create(
+            class_assigned=class_obj, teacher=teacher, academic_year=year,
+            effective_from=date(2025, 5, 1),
+            subject=Subject.objects.create(code=f'EXP-{year}', title=f'Subject {year}'),
+            time_slot=TimeSlot.objects.create(
+                name='Period 1', day_of_week='monday', start_time=time(9), end_time=time(10)))
+    return class_obj
+
+
+def export_key(class_obj):
+    return timetable_export._artefact_key(class_obj.id, '2025-26', 'csv')
+
+
+@pytest.mark.parametrize('change', ['subject', 'time_slot', 'teacher', 'teacher_name', 'class'])
+def test_edits_shown_in_a_timetable_invalidate_its_exports(timetable, change):
+    entry = Timetable.objects.select_related('subject', 'time_slot', 'teacher__user').get(
+        academic_year='2025-26')
+    before = export_key(timetable)
+    {
+        'subject': entry.subject,
+        'time_slot': entry.time_slot,
+        'teacher': entry.teacher,
+        'teacher_name': entry.teacher.user,
+        'class': timetable,
+    }[change].save()
+    assert export_key(timetable) != before
+
+
+def test_logins_keep_exports_cached(timetable):
+    user = Teacher.objects.get(user__username='export').user
+    before = export_key(timetable)
+    user.save(update_fields=['last_login'])
+    assert export_key(timetable) == before
+
+
+def test_renamed_subject_is_exported(timetable):
+    assert 'Subject 2025-26' in timetable_export.render_class(timetable, '2025-26', 'csv').decode()
+    subject = Subject.objects.get(code='EXP-2025-26')
+    subject.title = 'Physics'
+    subject.save()
+    assert 'Physics' in timetable_export.render_class(timetable, '2025-26', 'csv').decode()
+
+
+def test_academic_year_defaults_to_the_current_year(timetable):
+    assert timetable_export.academic_year_param(None) is None
+    AcademicYear.objects.create(name='2025-26', start_date=date(2025, 4, 1),
+                                end_date=date(2026, 3, 31), is_current=True)
+    assert timetable_export.academic_year_param(None) == '2025-26'
+    assert timetable_export.academic_year_param('') == '2025-26'
+    assert timetable_export.academic_year_param('2024-25') == '2024-25'
+    assert timetable_export.academic_year_param('all') is None
@@ -0,0 +1,345 @@
+"""
+Timetable rendering pipeline
+
+Entries are pivoted once into a day x period grid (``TimetableGrid``) which is
+then rendered to XLSX, CSV or PDF. Rendered files are cached per
+(class, academic_year, timetable version). The signal handlers in
+``admin_api.signals`` rotate a class's version token on every write to its
+``Timetable`` entries or the class itself, and a shared token on writes to
+the time slots, subjects, teachers and rooms any timetable may show.
+"""
+import csv
+import uuid
+import zipfile
+from io import BytesIO, StringIO
+
+from django.core.cache import cache
+
+from admin_api.models import AcademicYear, Timetable, TimeSlot
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
+
+
+DAY_ORDER = [day for day, _ in TimeSlot.DAYS_OF_WEEK]
+DAY_LABELS = dict(TimeSlot.DAYS_OF_WEEK)
+
+FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'pdf': 'application/pdf',
+}
+
+CACHE_TIMEOUT = 86400  # 24 hours; versioned keys make expiry a GC concern only
+VERSION_KEY = 'timetable_version:{class_id}'
+SHARED = 'shared'
+ARTEFACT_KEY = 'timetable_export:{class_id}:{academic_year}:{version}:{file_format}'
+
+ENTRY_FIELDS = (
+    'class_assigned_id',
+    'class_assigned__name',
+    'class_assigned__section',
+    'time_slot__day_of_week',
+    'time_slot__start_time',
+    'time_slot__end_time',
+    'time_slot__name',
+    'time_slot__is_break',
+    'subject__title',
+    'teacher__user__first_name',
+    'teacher__user__last_name',
+    'room__room_number',
+)
+
+
+class TimetableGrid:
+    """Intermediate day x period model shared by all renderers"""
+
+    def __init__(self, class_id, class_name, academic_year, entries):
+        self.class_id = class_id
+        self.class_name = class_name
+        self.academic_year = academic_year
+
+        cells = {}
+        periods = {}
+        days = set()
+        for entry in entries:
+            day = entry['time_slot__day_of_week']
+            period = (entry['time_slot__start_time'], entry['time_slot__end_time'])
+            periods.setdefault(period, entry['time_slot__name'])
+            days.add(day)
+
+            teacher = ' '.join(filter(None, [
+                entry['teacher__user__first_name'],
+                entry['teacher__user__last_name'],
+            ]))
+            cells[(period, day)] = {
+                'subject': entry['subject__title'],
+                'teacher': teacher or 'TBA',
+                'room': entry['room__room_number'] or '',
+                'is_break': entry['time_slot__is_break'],
+            }
+
+        # Always show the working week; weekend columns only when used
+        self.days = [
+            day for day in DAY_ORDER
+            if day in days or day not in ('saturday', 'sunday')
+        ]
+        self.periods = sorted(periods)
+        self.period_names = periods
+        self.cells = cells
+
+    @property
+    def title(self):
+        return f'Class Timetable - {self.class_name} ({self.academic_year})'
+
+    def header(self):
+        return ['Time Slot'] + [DAY_LABELS[day] for day in self.days]
+
+    def period_label(self, period):
+        start, end = period
+        return f"{self.period_names[period]} ({start:%H:%M}-{end:%H:%M})"
+
+    def cell_text(self, period, day, separator='\n'):
+        cell = self.cells.get((period, day))
+        if not cell:
+            return ''
+        parts = [cell['subject'], cell['teacher']]
+        if cell['room']:
+            parts.append(f"Room {cell['room']}")
+        return separator.join(parts)
+
+    def rows(self, separator='\n'):
+        for period in self.periods:
+            yield [self.period_label(period)] + [
+                self.cell_text(period, day, separator) for day in self.days
+            ]
+
+
+def academic_year_param(value):
+    """
+    Resolve an ``academic_year`` query parameter: the current
+    ``AcademicYear`` when missing, None (every year) for 'all'
+    """
+    if value == 'all':
+        return None
+    return value or AcademicYear.objects.filter(is_current=True).values_list('name', flat=True).first()
+
+
+def _class_label(entry):
+    name = entry['class_assigned__name']
+    section = entry['class_assigned__section']
+    return f'{name} {section}' if section else name
+
+
+def _entries_queryset(academic_year=None):
+    qs = Timetable.objects.filter(is_active=True)
+    if academic_year:
+        qs = qs.filter(academic_year=academic_year)
+    return qs.values(*ENTRY_FIELDS).order_by(
+        'class_assigned_id', 'time_slot__start_time')
+
+
+def build_grid(class_obj, academic_year=None):
+    """Pivot one class's timetable into a grid with a single query"""
+    entries = list(_entries_queryset(academic_year).filter(class_assigned=class_obj))
+    class_name = f'{class_obj.name} {class_obj.section}' if class_obj.section else class_obj.name
+    return TimetableGrid(class_obj.id, class_name, academic_year or 'All', entries)
+
+
+def build_all_grids(academic_year=None):
+    """Yield a grid per class from one query over all timetable entries"""
+    current_id = None
+    bucket = []
+    label = None
+    for entry in _entries_queryset(academic_year).iterator(chunk_size=2000):
+        if entry['class_assigned_id'] != current_id:
+            if bucket:
+                yield TimetableGrid(current_id, label, academic_year or 'All', bucket)
+            current_id = entry['class_assigned_id']
+            label = _class_label(entry)
+            bucket = []
+        bucket.append(entry)
+    if bucket:
+        yield TimetableGrid(current_id, label, academic_year or 'All', bucket)
+
+
+# ==================== RENDERERS ====================
+
+def render_xlsx(grid):
+    from openpyxl.styles import Font, Alignment, PatternFill
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Timetable'
+
+    header = grid.header()
+    last_column = openpyxl.utils.get_column_letter(len(header))
+    ws.merge_cells(f'A1:{last_column}1')
+    title_cell = ws['A1']
+    title_cell.value = grid.title
+    title_cell.font = Font(bold=True, size=14)
+    title_cell.alignment = Alignment(horizontal='center')
+
+    header_fill = PatternFill(start_color='CCCCCC', end_color='CCCCCC', fill_type='solid')
+    for col_num, value in enumerate(header, 1):
+        cell = ws.cell(row=3, column=col_num, value=value)
+        cell.font = Font(bold=True)
+        cell.fill = header_fill
+        ws.column_dimensions[cell.column_letter].width = 24
+
+    wrap = Alignment(wrap_text=True, vertical='top')
+    for row_num, row in enumerate(grid.rows(), 4):
+        for col_num, value in enumerate(row, 1):
+            ws.cell(row=row_num, column=col_num, value=value).alignment = wrap
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def render_csv(grid):
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(grid.header())
+    writer.writerows(grid.rows(separator=' / '))
+    return output.getvalue().encode('utf-8')
+
+
+def render_pdf(grid):
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+    buffer = BytesIO()
+    pagesize = landscape(A4)
+    width, height = pagesize
+    p = canvas.Canvas(buffer, pagesize=pagesize)
+
+    margin = 0.5 * inch
+    header = grid.header()
+    col_width = (width - 2 * margin) / len(header)
+    line_height = 0.18 * inch
+
+    def draw_header(y):
+        p.setFont("Helvetica-Bold", 9)
+        for col, value in enumerate(header):
+            p.drawString(margin + col * col_width + 2, y, value)
+        p.line(margin, y - 4, width - margin, y - 4)
+        return y - line_height - 4
+
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(margin, height - margin, grid.title)
+    y = draw_header(height - margin - 0.4 * inch)
+
+    for row in grid.rows():
+        lines = [value.split('\n') for value in row]
+        row_height = max(len(cell) for cell in lines) * line_height + 4
+        if y - row_height < margin:
+            p.showPage()
+            y = draw_header(height - margin)
+
+        p.setFont("Helvetica", 8)
+        for col, cell_lines in enumerate(lines):
+            for offset, text in enumerate(cell_lines):
+                p.drawString(margin + col * col_width + 2, y - offset * line_height, text[:40])
+        y -= row_height
+        p.line(margin, y + line_height - 2, width - margin, y + line_height - 2)
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'xlsx': render_xlsx,
+    'csv': render_csv,
+    'pdf': render_pdf,
+}
+
+
+# ==================== CACHING ====================
+
+def get_version(class_id):
+    """Current version token for a class's timetable"""
+    key = VERSION_KEY.format(class_id=class_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def bump_version(class_id=SHARED):
+    """
+    Rotate the version token, orphaning every cached artefact of the class
+    (or of every class, for the shared token)
+    """
+    cache.set(VERSION_KEY.format(class_id=class_id), uuid.uuid4().hex, None)
+
+
+def _artefact_key(class_id, academic_year, file_format, shared_version=None):
+    return ARTEFACT_KEY.format(
+        class_id=class_id,
+        academic_year=academic_year or 'all',
+        version=f'{get_version(class_id)}.{shared_version or get_version(SHARED)}',
+        file_format=file_format,
+    )
+
+
+def render_class(class_obj, academic_year=None, file_format='xlsx'):
+    """Return the rendered timetable bytes for a class, served from cache when fresh"""
+    key = _artefact_key(class_obj.id, academic_year, file_format)
+    content = cache.get(key)
+    if content is None:
+        content = RENDERERS[file_format](build_grid(class_obj, academic_year))
+        cache.set(key, content, CACHE_TIMEOUT)
+    return content
+
+
+def filename_for(class_name, academic_year, file_format):
+    safe_name = ''.join(c if c.isalnum() else '_' for c in class_name)
+    suffix = f'_{academic_year}' if academic_year else ''
+    return f'timetable_{safe_name}{suffix}.{file_format}'
+
+
+# ==================== BULK ZIP ====================
+
+class _ZipStream:
+    """Unseekable sink for ZipFile; drained after every member is written"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_all_classes_zip(academic_year=None, file_format='xlsx'):
+    """
+    Generator yielding a zip archive of every class's timetable.
+
+    Archive members are emitted one class at a time so the full archive is
+    never held in memory. Cached artefacts are reused where available.
+    """
+    sink = _ZipStream()
+    shared_version = get_version(SHARED)
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for grid in build_all_grids(academic_year):
+            key = _artefact_key(grid.class_id, academic_year, file_format, shared_version)
+            content = cache.get(key)
+            if content is None:
+                content = RENDERERS[file_format](grid)
+                cache.set(key, content, CACHE_TIMEOUT)
+            archive.writestr(
+                f'{grid.class_id}_' + filename_for(grid.class_name, academic_year, file_format),
+                content,
+            )
+            yield sink.drain()
+    yield sink.drain()
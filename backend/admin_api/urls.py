@@ -1,16 +1,9 @@
-from .bulk_import_export import (
-    bulk_import_students, bulk_import_teachers,
-    export_students, export_teachers, download_import_template
-)
-from .payment_views import (
-    create_payment_intent, confirm_payment, stripe_webhook,
-    get_payment_history, create_refund
-)
 from .views.inventory import SupplierViewSet, ItemCategoryViewSet, ItemViewSet, ItemReceiveViewSet, ItemIssueViewSet
 from .views.accounts import ChartOfAccountViewSet, AccountTransactionViewSet
 from .views.wallet import WalletAccountViewSet, WalletTransactionViewSet, WalletDepositRequestViewSet, WalletRefundRequestViewSet
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .lazy_imports import lazy_view
 from .views import (
     DashboardStatsView, RecentActivitiesView, UpcomingEventsView,
     StudentListView, StudentDetailView, StudentStatsView, StudentCreateView,
@@ -54,6 +47,8 @@ from .views.attendance import (
 )
 from .views.room import RoomListView, RoomDetailView, RoomCreateView, RoomStatsView
 from .views.report_analytics import ReportAnalyticsView
+from .views.files import StoredFileViewSet, UploadSessionViewSet
+from .views.jobs import JobViewSet
 from student.notifications_view import NotificationsView
 from .views.communicate_admin import EmailTemplateViewSet, SmsTemplateViewSet, EmailSmsLogViewSet
 from .views.chat_admin import ChatInvitationViewSet, BlockedChatUserViewSet
@@ -473,6 +468,13 @@ router.register(r'announcement-enhanced', AnnouncementEnhancedViewSet, basename=
 # Notifications (Real-Time Push, Read/Unread Management)
 router.register(r'notification-enhanced', NotificationEnhancedViewSet, basename='notification-enhanced')
 
+# File Storage (Content-Addressed Blobs, Resumable Chunked Uploads, Range Downloads)
+router.register(r'files/uploads', UploadSessionViewSet, basename='file-upload')
+router.register(r'files', StoredFileViewSet, basename='stored-file')
+
+# Background Jobs (?async=1 on long-running endpoints, progress, cancel, file results)
+router.register(r'jobs', JobViewSet, basename='job')
+
 urlpatterns = [
     # Dashboard
     path(
@@ -573,53 +575,53 @@ urlpatterns = [
         name='admin-notifications'),
 ]
 
-# Payment endpoints (Stripe integration)
+# Payment endpoints (Stripe integration); the view modules load on first request
 
 urlpatterns += [
     path(
         'payments/create-intent/',
-        create_payment_intent,
+        lazy_view('admin_api.payment_views.create_payment_intent'),
         name='create-payment-intent'),
     path(
         'payments/confirm/',
-        confirm_payment,
+        lazy_view('admin_api.payment_views.confirm_payment'),
         name='confirm-payment'),
     path(
         'payments/webhook/',
-        stripe_webhook,
+        lazy_view('admin_api.payment_views.stripe_webhook'),
         name='stripe-webhook'),
     path(
         'payments/history/<int:student_id>/',
-        get_payment_history,
+        lazy_view('admin_api.payment_views.get_payment_history'),
         name='payment-history'),
     path(
         'payments/refund/',
-        create_refund,
+        lazy_view('admin_api.payment_views.create_refund'),
         name='create-refund'),
 ]
 
-# Bulk Import/Export endpoints
+# Bulk Import/Export endpoints; the view modules load on first request
 
 urlpatterns += [
     path(
         'bulk/import/students/',
-        bulk_import_students,
+        lazy_view('admin_api.bulk_import_export.bulk_import_students'),
         name='bulk-import-students'),
     path(
         'bulk/import/teachers/',
-        bulk_import_teachers,
+        lazy_view('admin_api.bulk_import_export.bulk_import_teachers'),
         name='bulk-import-teachers'),
     path(
         'bulk/export/students/',
-        export_students,
+        lazy_view('admin_api.bulk_import_export.export_students'),
         name='export-students'),
     path(
         'bulk/export/teachers/',
-        export_teachers,
+        lazy_view('admin_api.bulk_import_export.export_teachers'),
         name='export-teachers'),
     path(
         'bulk/template/<str:entity_type>/',
-        download_import_template,
+        lazy_view('admin_api.bulk_import_export.download_import_template'),
         name='download-template'),
 ]
 
@@ -10,7 +10,6 @@ from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Q, Count, Avg
 from datetime import datetime, timedelta
-import openpyxl
 from io import BytesIO
 from django.http import HttpResponse
 
@@ -23,6 +22,10 @@ from admin_api.models_academic import (
     Homework, ClassRoutine
 )
 from users.models import User
+from admin_api import grading_scale, jobs
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
 
 
 class ExamTypeViewSet(viewsets.ModelViewSet):
@@ -268,6 +271,7 @@ class ExamResultViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-exam__exam_date', 'rank')
     
     @action(detail=False, methods=['post'])
+    @jobs.allow_async
     def calculate_results(self, request):
         """
         Calculate and generate results for an exam
@@ -293,7 +297,7 @@ class ExamResultViewSet(viewsets.ModelViewSet):
         
         results_created = 0
         for mark in marks:
-            # Calculate grade based on GradeScale
+            # Calculate grade on the grading scale (loaded once, not per mark)
             percentage = mark.percentage
             grade = self._get_grade(percentage)
             
@@ -326,15 +330,7 @@ class ExamResultViewSet(viewsets.ModelViewSet):
     
     def _get_grade(self, percentage):
         """Helper method to get grade from percentage"""
-        try:
-            grade_scale = GradeScale.objects.filter(
-                min_percentage__lte=percentage,
-                max_percentage__gte=percentage,
-                is_active=True
-            ).first()
-            return grade_scale.grade if grade_scale else 'N/A'
-        except:
-            return 'N/A'
+        return grading_scale.letter(percentage)
 
 
 class GradeScaleViewSet(viewsets.ModelViewSet):
@@ -2,7 +2,7 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Avg, Count, Sum
+from django.db.models import Q, Avg, Count, Sum, Prefetch
 from django.utils import timezone
 from django.db import transaction
 from datetime import datetime, timedelta
@@ -12,6 +12,8 @@ from admin_api.models import (
     ExamSession, QuestionAnswer, ProgressCard, ProgressCardSubject,
     MeritList, MeritListEntry, Student, User, Exam, Question
 )
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
+from admin_api.exam_grading import grade_answers, load_answer_key
 from admin_api.serializers.academic import (
     AcademicYearSerializer, AdmissionApplicationSerializer,
     AdmissionApplicationListSerializer, StudentPromotionSerializer,
@@ -340,23 +342,18 @@ class ExamSessionViewSet(viewsets.ModelViewSet):
         session.is_submitted = True
         
         # Auto-grade MCQ questions
-        total_marks = 0
-        answers = session.answers.all()
-        
-        for answer in answers:
-            question = answer.question
-            if question.question_type == 'mcq' and question.correct_option:
-                if answer.selected_option == question.correct_option:
-                    answer.is_correct = True
-                    answer.marks_awarded = question.marks
-                else:
-                    answer.is_correct = False
-                    answer.marks_awarded = 0
-                answer.save()
-                total_marks += answer.marks_awarded
-        
-        session.auto_graded_marks = total_marks
-        session.save()
+        answer_key = load_answer_key(
+            Question.objects.filter(student_answers__session=session),
+            session.online_exam.negative_mark_ratio if session.online_exam else 0
+        )
+        
+        with transaction.atomic():
+            _, totals = grade_answers(session.answers.all(), answer_key)
+            session.auto_graded_marks = max(totals.get(session.id, 0), 0)
+            session.save()
+            # The exam's stored ranking no longer includes this student
+            if session.online_exam_id:
+                MeritList.objects.filter(online_exam_id=session.online_exam_id).delete()
         
         return Response({
             'message': 'Exam submitted successfully',
@@ -478,9 +475,10 @@ class ProgressCardViewSet(viewsets.ModelViewSet):
         })
 
 
-class MeritListViewSet(viewsets.ModelViewSet):
+class MeritListViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     """Merit list management"""
-    queryset = MeritList.objects.all()
+    queryset = MeritList.objects.select_related('academic_year', 'generated_by').prefetch_related(
+        Prefetch('entries', queryset=MeritListEntry.objects.select_related('student__user')))
     serializer_class = MeritListSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
@@ -14,15 +14,13 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q, Avg, Count, Sum, Max, Min, F
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.db.models import Q, Avg, Count, Max, Min, F
 from django.utils import timezone
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from datetime import datetime, timedelta
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 import csv
 
 from admin_api.models import (
@@ -30,12 +28,22 @@ from admin_api.models import (
     OnlineExam, Question, QuestionGroup, QuestionAnswer,
     Assignment, AssignmentSubmission, ClassTest,
     Lesson, Topic, LessonPlan, Timetable,
-    AcademicYear, AdmissionApplication, StudentPromotion
+    AcademicYear, AdmissionApplication, PromotionBatch, StudentPromotion
 )
+from admin_api import (
+    exam_tabulation, file_storage, jobs, promotion_engine, question_import, sequences
+)
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
+from admin_api.file_storage import UploadError
+from admin_api.promotion_engine import PromotionError
+from admin_api.exam_grading import grade_online_exam
 from admin_api.serializers.online_exam import OnlineExamSerializer
 from admin_api.serializers import AssignmentSerializer, AssignmentSubmissionSerializer
 from admin_api.serializers.class_test import ClassTestSerializer
 from admin_api.serializers.lesson_plan import LessonSerializer, TopicSerializer, LessonPlanSerializer
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
 
 
 # ==================== ADMISSION & PROMOTION ====================
@@ -57,6 +65,7 @@ class AdmissionEnhancedViewSet(viewsets.ModelViewSet):
         """
         Download CSV/Excel template for bulk admission import
         """
+        from openpyxl.styles import Font, Alignment, PatternFill
         file_format = request.query_params.get('format', 'excel')
         
         if file_format == 'csv':
@@ -124,10 +133,17 @@ class AdmissionEnhancedViewSet(viewsets.ModelViewSet):
             
             return response
     
+    IMPORT_CHUNK_SIZE = 500
+    PRIORITY_LEVELS = {'low': 0, 'medium': 1, 'high': 2, 'urgent': 3}
+    
     @action(detail=False, methods=['post'])
     def bulk_import(self, request):
         """
         Bulk import admission applications from CSV/Excel
+        
+        Rows are streamed and written with chunked bulk_create; application
+        numbers for each chunk are reserved from the admission sequence in
+        one round trip.
         """
         file = request.FILES.get('file')
         if not file:
@@ -137,48 +153,47 @@ class AdmissionEnhancedViewSet(viewsets.ModelViewSet):
             )
         
         file_ext = file.name.split('.')[-1].lower()
+        if file_ext not in ['csv', 'xlsx', 'xls']:
+            return Response(
+                {'error': 'Invalid file format. Please use CSV or Excel (.xlsx)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        current_year = AcademicYear.objects.filter(is_current=True).first()
+        if not current_year:
+            return Response(
+                {'error': 'No current academic year set'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         try:
-            imported = []
+            imported_count = 0
             errors = []
+            batch = []
             
-            if file_ext == 'csv':
-                # Process CSV
-                decoded_file = file.read().decode('utf-8').splitlines()
-                reader = csv.DictReader(decoded_file)
-                
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        self._create_application_from_row(row, imported)
-                    except Exception as e:
-                        errors.append(f'Row {row_num}: {str(e)}')
-            
-            elif file_ext in ['xlsx', 'xls']:
-                # Process Excel
-                wb = openpyxl.load_workbook(file)
-                ws = wb.active
-                
-                headers = [cell.value for cell in ws[1]]
-                
-                for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                    if not any(row):  # Skip empty rows
-                        continue
-                    
-                    try:
-                        row_dict = dict(zip(headers, row))
-                        self._create_application_from_row(row_dict, imported)
-                    except Exception as e:
-                        errors.append(f'Row {row_num}: {str(e)}')
+            def flush():
+                numbers = sequences.admission_application_numbers(len(batch))
+                for application, number in zip(batch, numbers):
+                    application.application_number = number
+                AdmissionApplication.objects.bulk_create(batch)
+                batch.clear()
             
-            else:
-                return Response(
-                    {'error': 'Invalid file format. Please use CSV or Excel (.xlsx)'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            for row_num, row in self._iter_import_rows(file, file_ext):
+                try:
+                    batch.append(self._application_from_row(row, current_year))
+                except Exception as e:
+                    errors.append(f'Row {row_num}: {str(e)}')
+                    continue
+                if len(batch) >= self.IMPORT_CHUNK_SIZE:
+                    imported_count += len(batch)
+                    flush()
+            if batch:
+                imported_count += len(batch)
+                flush()
             
             return Response({
-                'message': f'Successfully imported {len(imported)} applications',
-                'imported_count': len(imported),
+                'message': f'Successfully imported {imported_count} applications',
+                'imported_count': imported_count,
                 'error_count': len(errors),
                 'errors': errors[:10] if errors else None  # Return first 10 errors
             })
@@ -189,48 +204,68 @@ class AdmissionEnhancedViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _create_application_from_row(self, row, imported_list):
-        """Helper method to create application from row data"""
-        # Get academic year
-        current_year = AcademicYear.objects.filter(is_current=True).first()
-        if not current_year:
-            raise Exception('No current academic year set')
+    def _iter_import_rows(self, file, file_ext):
+        """Yield ``(row_number, row_dict)`` without loading the whole sheet"""
+        if file_ext == 'csv':
+            reader = csv.DictReader(TextIOWrapper(file, encoding='utf-8-sig'))
+            for row_num, row in enumerate(reader, start=2):
+                yield row_num, row
+            return
+        
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            headers = next(rows, None) or []
+            for row_num, row in enumerate(rows, start=2):
+                if not any(row):  # Skip empty rows
+                    continue
+                yield row_num, dict(zip(headers, row))
+        finally:
+            wb.close()
+    
+    def _application_from_row(self, row, current_year):
+        """Build an unsaved application from row data"""
+        def text(key, default=''):
+            value = row.get(key)
+            return str(value).strip() if value is not None else default
         
         # Parse date of birth
         dob_str = row.get('Date of Birth (YYYY-MM-DD)') or row.get('Date of Birth')
         if isinstance(dob_str, str):
-            dob = datetime.strptime(dob_str, '%Y-%m-%d').date()
+            dob = datetime.strptime(dob_str.strip(), '%Y-%m-%d').date()
+        elif isinstance(dob_str, datetime):
+            dob = dob_str.date()
         else:
             dob = dob_str
+        if not dob:
+            raise ValueError('Date of birth is required')
         
-        # Generate application number
-        app_number = f"ADM{timezone.now().year}{AdmissionApplication.objects.count() + 1:05d}"
+        priority = text('Priority (low/medium/high/urgent)', 'medium').lower() or 'medium'
+        if priority not in self.PRIORITY_LEVELS:
+            raise ValueError(f'Invalid priority "{priority}"')
         
-        # Create application
-        application = AdmissionApplication.objects.create(
-            application_number=app_number,
+        return AdmissionApplication(
             academic_year=current_year,
-            first_name=row.get('First Name', '').strip(),
-            last_name=row.get('Last Name', '').strip(),
+            first_name=text('First Name'),
+            last_name=text('Last Name'),
             date_of_birth=dob,
-            gender=row.get('Gender', 'Male'),
-            email=row.get('Email', '').strip(),
-            phone=row.get('Phone', '').strip(),
-            parent_phone=row.get('Parent Phone', '').strip(),
-            applying_for_class=row.get('Applying for Class', '').strip(),
-            previous_school=row.get('Previous School', '').strip(),
-            address=row.get('Address', '').strip(),
-            priority=row.get('Priority (low/medium/high/urgent)', 'medium').lower(),
+            gender=text('Gender', 'male').lower() or 'male',
+            email=text('Email'),
+            phone=text('Phone'),
+            parent_phone=text('Parent Phone'),
+            applying_for_class=text('Applying for Class'),
+            previous_school=text('Previous School'),
+            address=text('Address'),
+            priority=self.PRIORITY_LEVELS[priority],
             status='pending'
         )
-        
-        imported_list.append(application.id)
     
     @action(detail=False, methods=['get'])
     def bulk_export(self, request):
         """
         Export admission applications to Excel
         """
+        from openpyxl.styles import Font, Alignment, PatternFill
         # Get filters
         status_filter = request.query_params.get('status')
         academic_year_id = request.query_params.get('academic_year')
@@ -310,78 +345,91 @@ class StudentPromotionEnhancedViewSet(viewsets.ModelViewSet):
         return StudentPromotionSerializer
     
     @action(detail=False, methods=['post'])
+    def promotion_preview(self, request):
+        """
+        Count the students a promotion would move. Accepts the same
+        ``mapping`` (or ``from_class``/``to_class``) and ``student_ids`` as
+        ``bulk_promote``.
+        """
+        try:
+            preview = promotion_engine.preview(
+                self._promotion_mapping(request), request.data.get('student_ids') or None)
+        except PromotionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(preview)
+
+    @action(detail=False, methods=['post'])
+    @jobs.allow_async
     def bulk_promote(self, request):
         """
-        Bulk promote students to next grade/class
+        Promote students to their next class in one batch.
+
+        Send ``mapping`` (``{"Grade 1": "Grade 2", ...}``) to promote the
+        whole school, or ``from_class`` and ``to_class`` for a single class;
+        ``student_ids`` limits the run to those students. ``academic_year``
+        is the year being promoted into, ``from_academic_year`` defaults to
+        the current one. The returned ``batch_id`` can be passed to
+        ``reverse_promotion``.
         """
-        from_class = request.data.get('from_class')
-        to_class = request.data.get('to_class')
-        academic_year_id = request.data.get('academic_year')
-        student_ids = request.data.get('student_ids', [])
-        
-        if not all([from_class, to_class, academic_year_id]):
-            return Response(
-                {'error': 'from_class, to_class, and academic_year are required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
-            academic_year = AcademicYear.objects.get(id=academic_year_id)
-        except AcademicYear.DoesNotExist:
-            return Response(
-                {'error': 'Academic year not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
+            mapping = self._promotion_mapping(request)
+            if not request.data.get('academic_year'):
+                raise PromotionError('academic_year is required')
+            from_year, to_year = promotion_engine.academic_years(
+                request.data.get('academic_year'), request.data.get('from_academic_year'))
+            batch = promotion_engine.promote(
+                mapping, from_year, to_year, user=request.user,
+                student_ids=request.data.get('student_ids') or None,
+                remarks=request.data.get('remarks', ''))
+        except PromotionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': f'Successfully promoted {batch.promoted_count} students',
+            'promoted_count': batch.promoted_count,
+            'batch': promotion_engine.batch_summary(batch),
+        })
+
+    @action(detail=False, methods=['post'])
+    def reverse_promotion(self, request):
+        """Undo a whole promotion batch (``batch_id``)"""
+        batch = PromotionBatch.objects.filter(batch_id=request.data.get('batch_id') or None).first()
+        if batch is None:
+            return Response({'error': 'Promotion batch not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            with transaction.atomic():
-                # Get students to promote
-                if student_ids:
-                    students = Student.objects.filter(id__in=student_ids, class_name=from_class, is_active=True)
-                else:
-                    students = Student.objects.filter(class_name=from_class, is_active=True)
-                
-                promoted_count = 0
-                
-                for student in students:
-                    # Create promotion record
-                    StudentPromotion.objects.create(
-                        student=student,
-                        from_class=from_class,
-                        to_class=to_class,
-                        academic_year=academic_year,
-                        promoted_by=request.user,
-                        promotion_date=timezone.now().date(),
-                        status='promoted'
-                    )
-                    
-                    # Update student class
-                    student.class_name = to_class
-                    student.save()
-                    
-                    promoted_count += 1
-                
-                return Response({
-                    'message': f'Successfully promoted {promoted_count} students',
-                    'promoted_count': promoted_count,
-                    'from_class': from_class,
-                    'to_class': to_class
-                })
-        
-        except Exception as e:
-            return Response(
-                {'error': f'Promotion failed: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            restored, skipped = promotion_engine.reverse(batch)
+        except PromotionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': f'Reversed promotion of {restored} students',
+            'restored_count': restored,
+            'skipped_count': skipped,
+        })
+
+    @action(detail=False, methods=['get'])
+    def promotion_batches(self, request):
+        """Recent promotion batches"""
+        batches = PromotionBatch.objects.all()[:50]
+        return Response([promotion_engine.batch_summary(batch) for batch in batches])
+
+    def _promotion_mapping(self, request):
+        mapping = request.data.get('mapping')
+        if mapping is None:
+            from_class = request.data.get('from_class')
+            to_class = request.data.get('to_class')
+            if not (from_class and to_class):
+                raise PromotionError('mapping, or from_class and to_class, is required')
+            mapping = {from_class: to_class}
+        return mapping
 
 
 # ==================== HOMEWORK & ASSIGNMENT ====================
 
-class AssignmentEnhancedViewSet(viewsets.ModelViewSet):
+class AssignmentEnhancedViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     """
     Enhanced assignment management with file upload and evaluation
     """
-    queryset = Assignment.objects.all()
+    queryset = Assignment.objects.select_related('subject', 'class_assigned', 'teacher__user')
     serializer_class = AssignmentSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -393,43 +441,34 @@ class AssignmentEnhancedViewSet(viewsets.ModelViewSet):
         """Create assignment with file upload"""
         serializer.save(teacher=self.request.user.teacher)
     
-    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser, JSONParser])
     def upload_attachment(self, request, pk=None):
         """
         Upload attachment for assignment
+
+        Accepts a multipart ``file`` or the ``file_id`` of a completed
+        chunked upload (``/files/uploads/``).
         """
         assignment = self.get_object()
-        file = request.FILES.get('file')
-        
-        if not file:
+
+        try:
+            stored = file_storage.resolve_upload(request, max_size=10 * 1024 * 1024)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+
+        if stored is None:
             return Response(
                 {'error': 'No file provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Validate file size (10MB limit)
-        if file.size > 10 * 1024 * 1024:
-            return Response(
-                {'error': 'File size exceeds 10MB limit'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Validate file type
-        allowed_extensions = ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'txt', 'jpg', 'jpeg', 'png']
-        file_ext = file.name.split('.')[-1].lower()
-        
-        if file_ext not in allowed_extensions:
-            return Response(
-                {'error': f'File type not allowed. Allowed types: {", ".join(allowed_extensions)}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Save file (in production, use cloud storage)
-        assignment.attachment_url = f'/media/assignments/{assignment.id}_{file.name}'
-        assignment.save()
-        
+
+        assignment.attachment_file = stored
+        assignment.attachment_url = stored.shared_download_url
+        assignment.save(update_fields=['attachment_file', 'attachment_url', 'updated_at'])
+
         return Response({
             'message': 'File uploaded successfully',
+            'file_id': stored.id,
             'file_url': assignment.attachment_url
         })
     
@@ -480,6 +519,7 @@ class AssignmentEnhancedViewSet(viewsets.ModelViewSet):
         """
         Export all submissions for an assignment to Excel
         """
+        from openpyxl.styles import Font
         assignment = self.get_object()
         
         wb = openpyxl.Workbook()
@@ -537,14 +577,14 @@ class AssignmentSubmissionEnhancedViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
-    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser, JSONParser])
     def submit_with_file(self, request):
         """
-        Submit assignment with file attachment
+        Submit assignment with file attachment (multipart ``file`` or the
+        ``file_id`` of a completed chunked upload)
         """
         assignment_id = request.data.get('assignment_id')
         submission_text = request.data.get('submission_text', '')
-        file = request.FILES.get('file')
         
         if not assignment_id:
             return Response(
@@ -579,6 +619,11 @@ class AssignmentSubmissionEnhancedViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        try:
+            stored = file_storage.resolve_upload(request, max_size=10 * 1024 * 1024)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+
         # Determine status
         is_late = timezone.now().date() > assignment.due_date
         submission_status = 'late' if is_late else 'submitted'
@@ -589,7 +634,8 @@ class AssignmentSubmissionEnhancedViewSet(viewsets.ModelViewSet):
             student=request.user.student,
             defaults={
                 'submission_text': submission_text,
-                'attachment_url': f'/media/submissions/{assignment.id}_{request.user.student.id}_{file.name}' if file else '',
+                'attachment_file': stored,
+                'attachment_url': stored.shared_download_url if stored else '',
                 'status': submission_status,
                 'submission_date': timezone.now()
             }
@@ -929,14 +975,12 @@ class OnlineExamEnhancedViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        questions = Question.objects.filter(id__in=question_ids)
-        
-        # Assuming a many-to-many relationship exists
-        # exam.questions.add(*questions)
+        questions = list(Question.objects.filter(id__in=question_ids).values_list('id', flat=True))
+        exam.questions.add(*questions)
         
         return Response({
-            'message': f'Added {questions.count()} questions to exam',
-            'total_questions': questions.count()
+            'message': f'Added {len(questions)} questions to exam',
+            'total_questions': exam.questions.count()
         })
     
     @action(detail=True, methods=['post'])
@@ -952,199 +996,65 @@ class OnlineExamEnhancedViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get all student answers for this exam
-        answers = QuestionAnswer.objects.filter(
-            exam=exam
-        ).select_related('question', 'student')
-        
-        graded_count = 0
-        student_scores = {}
-        
-        with transaction.atomic():
-            for answer in answers:
-                if answer.question.question_type == 'mcq':
-                    # Compare answer with correct option
-                    correct_option = answer.question.options.get('correct')  # Adjust based on your JSON structure
-                    
-                    if answer.answer == correct_option:
-                        answer.marks_obtained = answer.question.marks
-                    else:
-                        answer.marks_obtained = 0
-                    
-                    answer.is_graded = True
-                    answer.graded_at = timezone.now()
-                    answer.save()
-                    
-                    # Track student scores
-                    student_id = answer.student.id
-                    if student_id not in student_scores:
-                        student_scores[student_id] = 0
-                    student_scores[student_id] += answer.marks_obtained
-                    
-                    graded_count += 1
+        summary = grade_online_exam(exam)
         
         return Response({
-            'message': f'Auto-graded {graded_count} MCQ answers',
-            'graded_count': graded_count,
-            'students_graded': len(student_scores)
+            'message': f"Auto-graded {summary['graded_count']} MCQ answers",
+            **summary
         })
     
     @action(detail=True, methods=['get'])
+    @jobs.allow_async
     def generate_merit_list(self, request, pk=None):
         """
         Generate merit list based on exam results
+
+        The ranking is stored as a snapshot and reused until the exam is
+        re-graded; pass ?refresh=1 to rebuild it.
         """
         exam = self.get_object()
-        
-        # Calculate total marks for each student
-        student_results = QuestionAnswer.objects.filter(
-            exam=exam,
-            is_graded=True
-        ).values('student').annotate(
-            total_marks=Sum('marks_obtained')
-        ).order_by('-total_marks')
-        
-        # Calculate total possible marks
-        total_possible = Question.objects.filter(
-            # Filter questions for this exam
-        ).aggregate(Sum('marks'))['marks__sum'] or 0
-        
-        merit_list = []
-        rank = 1
-        
-        for result in student_results:
-            student = Student.objects.get(id=result['student'])
-            percentage = (result['total_marks'] / total_possible * 100) if total_possible > 0 else 0
-            
-            merit_list.append({
-                'rank': rank,
-                'roll_no': student.roll_no,
-                'student_name': student.user.get_full_name(),
-                'total_marks': float(result['total_marks']),
-                'max_marks': total_possible,
-                'percentage': round(percentage, 2),
-                'grade': self._calculate_grade(percentage)
-            })
-            
-            rank += 1
+        refresh = request.query_params.get('refresh') in ('1', 'true')
+        merit_list = exam_tabulation.get_snapshot(exam, request.user, refresh=refresh)
+        max_marks = float(merit_list.max_marks or 0)
+        
+        merit_list_data = [
+            {
+                'rank': row['rank'],
+                'roll_no': row['roll_no'],
+                'student_name': row['student_name'],
+                'total_marks': float(row['total_marks']),
+                'max_marks': max_marks,
+                'percentage': float(row['percentage']),
+                'grade': row['grade']
+            }
+            for row in exam_tabulation.snapshot_rows(merit_list)
+        ]
         
         return Response({
             'exam': self.get_serializer(exam).data,
-            'merit_list': merit_list,
-            'total_students': len(merit_list)
+            'merit_list': merit_list_data,
+            'total_students': len(merit_list_data),
+            'generated_at': merit_list.generated_date
         })
     
     @action(detail=True, methods=['get'])
+    @jobs.allow_async
     def generate_tabulation_sheet(self, request, pk=None):
         """
         Generate comprehensive tabulation sheet with all results
         """
         exam = self.get_object()
+        refresh = request.query_params.get('refresh') in ('1', 'true')
+        merit_list = exam_tabulation.get_snapshot(exam, request.user, refresh=refresh)
         
-        # Create Excel workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Tabulation Sheet'
-        
-        # Title
-        ws.merge_cells('A1:H1')
-        title_cell = ws['A1']
-        title_cell.value = f'{exam.title} - Tabulation Sheet'
-        title_cell.font = Font(bold=True, size=14)
-        title_cell.alignment = Alignment(horizontal='center')
-        
-        # Headers
-        headers = ['Rank', 'Roll No', 'Student Name', 'Total Marks', 'Max Marks', 'Percentage', 'Grade', 'Status']
-        
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col_num, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='CCCCCC', end_color='CCCCCC', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Calculate results
-        student_results = QuestionAnswer.objects.filter(
-            exam=exam,
-            is_graded=True
-        ).values('student').annotate(
-            total_marks=Sum('marks_obtained')
-        ).order_by('-total_marks')
-        
-        total_possible = Question.objects.filter(
-            # Filter for this exam
-        ).aggregate(Sum('marks'))['marks__sum'] or exam.min_percent  # Fallback
-        
-        row_num = 4
-        rank = 1
-        
-        for result in student_results:
-            student = Student.objects.get(id=result['student'])
-            total_marks = result['total_marks']
-            percentage = (total_marks / total_possible * 100) if total_possible > 0 else 0
-            grade = self._calculate_grade(percentage)
-            status = 'Pass' if percentage >= exam.min_percent else 'Fail'
-            
-            ws.cell(row=row_num, column=1, value=rank)
-            ws.cell(row=row_num, column=2, value=student.roll_no)
-            ws.cell(row=row_num, column=3, value=student.user.get_full_name())
-            ws.cell(row=row_num, column=4, value=float(total_marks))
-            ws.cell(row=row_num, column=5, value=total_possible)
-            ws.cell(row=row_num, column=6, value=round(percentage, 2))
-            ws.cell(row=row_num, column=7, value=grade)
-            ws.cell(row=row_num, column=8, value=status)
-            
-            # Color code status
-            status_cell = ws.cell(row=row_num, column=8)
-            if status == 'Pass':
-                status_cell.fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
-            else:
-                status_cell.fill = PatternFill(start_color='FFB6C1', end_color='FFB6C1', fill_type='solid')
-            
-            row_num += 1
-            rank += 1
-        
-        # Auto-size columns
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        output = exam_tabulation.write_tabulation_sheet(exam, merit_list)
         
-        # Save to BytesIO
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'tabulation_sheet_{exam.title}_{timezone.now().strftime("%Y%m%d")}.xlsx',
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="tabulation_sheet_{exam.title}_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-        
-        return response
-    
-    def _calculate_grade(self, percentage):
-        """Helper method to calculate letter grade"""
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 80:
-            return 'A'
-        elif percentage >= 70:
-            return 'B+'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C+'
-        elif percentage >= 40:
-            return 'C'
-        else:
-            return 'F'
 
 
 class QuestionBankViewSet(viewsets.ModelViewSet):
@@ -1190,6 +1100,10 @@ class QuestionBankViewSet(viewsets.ModelViewSet):
     def bulk_import_questions(self, request):
         """
         Bulk import questions from Excel/CSV
+
+        Small files are imported inline. Files above
+        QUESTION_IMPORT_SYNC_MAX_BYTES (or any file with ?async=1) are queued
+        as a background job and answered with 202 and a job id to poll.
         """
         file = request.FILES.get('file')
         subject_id = request.data.get('subject_id')
@@ -1210,51 +1124,45 @@ class QuestionBankViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        try:
-            wb = openpyxl.load_workbook(file)
-            ws = wb.active
-            
-            created_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                try:
-                    question_text, q_type, options_str, marks = row[:4]
-                    
-                    # Parse options for MCQ
-                    options = {}
-                    if q_type == 'mcq' and options_str:
-                        # Expect format: "A:Option1|B:Option2|C:Option3|correct:A"
-                        for opt in options_str.split('|'):
-                            key, value = opt.split(':')
-                            options[key.strip()] = value.strip()
-                    
-                    Question.objects.create(
-                        question_text=question_text,
-                        question_type=q_type,
-                        options=options,
-                        marks=marks,
-                        subject=subject,
-                        class_assigned=class_obj,
-                        created_by=request.user
-                    )
-                    
-                    created_count += 1
-                
-                except Exception as e:
-                    errors.append(f'Row {row_num}: {str(e)}')
-            
-            return Response({
-                'message': f'Successfully imported {created_count} questions',
-                'created_count': created_count,
-                'errors': errors if errors else None
-            })
+        run_async = (
+            request.query_params.get('async') in ('1', 'true')
+            or file.size > question_import.SYNC_MAX_BYTES
+        )
         
+        if run_async:
+            job = question_import.start_import_job(file, subject, class_obj, request.user)
+            return jobs.accepted_response(job)
+        
+        try:
+            result = question_import.import_uploaded_file(file, subject, class_obj, request.user)
         except Exception as e:
             return Response(
                 {'error': f'Failed to process file: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        return Response({
+            'message': f"Successfully imported {result['created_count']} questions",
+            'created_count': result['created_count'],
+            'duplicate_count': result['duplicate_count'],
+            'errors': result['errors'] if result['errors'] else None
+        })
+    
+    @action(detail=False, methods=['get'], url_path=r'import_jobs/(?P<job_id>\d+)')
+    def import_job_status(self, request, job_id=None):
+        """
+        Poll the progress of a background question import
+        """
+        from admin_api.serializers.job import JobSerializer
+        
+        job = jobs.visible_to(request.user).filter(kind='questions.import', id=job_id).first()
+        if job is None:
+            return Response(
+                {'error': 'Import job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response(JobSerializer(job).data)
 
 
 # ==================== CLASS ROUTINE / TIMETABLE ====================
@@ -1425,9 +1333,16 @@ class TimetableEnhancedViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def export_timetable(self, request):
         """
-        Export timetable to Excel
+        Export a class timetable as a day x period grid (xlsx, csv or pdf)
+
+        Query params: class_id, academic_year (default the current year,
+        'all' for every year), file_format=xlsx|csv|pdf (default xlsx)
         """
+        from admin_api import timetable_export
+
         class_id = request.query_params.get('class_id')
+        academic_year = timetable_export.academic_year_param(request.query_params.get('academic_year'))
+        file_format = request.query_params.get('file_format', 'xlsx')
         
         if not class_id:
             return Response(
@@ -1435,6 +1350,12 @@ class TimetableEnhancedViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if file_format not in timetable_export.FORMATS:
+            return Response(
+                {'error': f'file_format must be one of: {", ".join(timetable_export.FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
             class_obj = Class.objects.get(id=class_id)
         except Class.DoesNotExist:
@@ -1443,46 +1364,38 @@ class TimetableEnhancedViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Timetable'
-        
-        # Title
-        ws.merge_cells('A1:F1')
-        title_cell = ws['A1']
-        title_cell.value = f'Class Timetable - {class_obj.name}'
-        title_cell.font = Font(bold=True, size=14)
-        title_cell.alignment = Alignment(horizontal='center')
-        
-        # Headers
-        headers = ['Time Slot', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col_num, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='CCCCCC', end_color='CCCCCC', fill_type='solid')
+        content = timetable_export.render_class(class_obj, academic_year, file_format)
         
-        # Get all timetable entries
-        timetable = Timetable.objects.filter(
-            class_assigned=class_obj
-        ).select_related('subject', 'teacher__user', 'time_slot')
+        response = HttpResponse(content, content_type=timetable_export.FORMATS[file_format])
+        filename = timetable_export.filename_for(class_obj.name, academic_year, file_format)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
-        # Organize by time slots (you'll need to adjust based on your TimeSlot model)
-        # This is a simplified version
-        row = 4
-        for entry in timetable:
-            ws.cell(row=row, column=1, value=str(entry.time_slot))
-            ws.cell(row=row, column=2, value=f"{entry.subject.title}\n{entry.teacher.user.get_full_name() if entry.teacher else 'TBA'}")
-            row += 1
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def export_all_classes(self, request):
+        """
+        Stream a zip archive with the timetable of every class
+
+        Query params: academic_year (default the current year, 'all' for
+        every year), file_format=xlsx|csv|pdf
+        """
+        from admin_api import timetable_export
+
+        academic_year = timetable_export.academic_year_param(request.query_params.get('academic_year'))
+        file_format = request.query_params.get('file_format', 'xlsx')
         
-        # Save to BytesIO
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
+        if file_format not in timetable_export.FORMATS:
+            return Response(
+                {'error': f'file_format must be one of: {", ".join(timetable_export.FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        response = StreamingHttpResponse(
+            timetable_export.stream_all_classes_zip(academic_year, file_format),
+            content_type='application/zip'
         )
-        response['Content-Disposition'] = f'attachment; filename="timetable_{class_obj.name}_{timezone.now().strftime("%Y%m%d")}.xlsx"'
+        suffix = f'_{academic_year}' if academic_year else ''
+        response['Content-Disposition'] = f'attachment; filename="timetables{suffix}_{timezone.now().strftime("%Y%m%d")}.zip"'
         
         return response
@@ -15,21 +15,19 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q, Avg, Count, Sum, Max, Min, F
+from django.db.models import Q, Avg, Count, Sum, Max, Min
 from django.utils import timezone
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from datetime import datetime, timedelta
 from decimal import Decimal
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from io import BytesIO
 import csv
 
 from admin_api.models import (
     Teacher, Employee, Designation, Department,
     StaffAttendance, PayrollRecord,
-    LeaveType, LeaveDefine, LeaveApplication,
+    LeaveApplication,
     ChartOfAccount, AccountTransaction, AccountGroup, JournalEntry, JournalEntryLine, BudgetAllocation,
     FeeStructure, FeePayment, Student,
     WalletAccount, WalletTransaction, WalletDepositRequest, WalletRefundRequest,
@@ -39,6 +37,10 @@ from admin_api.models import (
     DormRoomType, DormRoom, DormitoryAssignment,
     User
 )
+from admin_api import jobs, leave_ledger, staff_attendance_report
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
 
 
 # ==================== HR & PAYROLL ====================
@@ -55,16 +57,16 @@ class LeaveManagementEnhancedViewSet(viewsets.ModelViewSet):
         return LeaveApplicationSerializer
     
     def get_queryset(self):
-        queryset = LeaveApplication.objects.select_related('teacher__user', 'leave_type').all()
+        queryset = LeaveApplication.objects.select_related('applicant', 'leave_type').all()
         
         # Filter by status
         leave_status = self.request.query_params.get('status')
         if leave_status:
             queryset = queryset.filter(status=leave_status)
         
-        # Filter by teacher (for teachers viewing their own)
+        # Filter by applicant (for teachers viewing their own)
         if self.request.user.role == 'teacher':
-            queryset = queryset.filter(teacher=self.request.user.teacher)
+            queryset = queryset.filter(applicant__user=self.request.user)
         
         # Filter by leave type
         leave_type_id = self.request.query_params.get('leave_type')
@@ -75,113 +77,95 @@ class LeaveManagementEnhancedViewSet(viewsets.ModelViewSet):
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
         if start_date:
-            queryset = queryset.filter(start_date__gte=start_date)
+            queryset = queryset.filter(from_date__gte=start_date)
         if end_date:
-            queryset = queryset.filter(end_date__lte=end_date)
+            queryset = queryset.filter(to_date__lte=end_date)
         
-        return queryset.order_by('-applied_date')
+        return queryset.order_by('-applied_at')
     
-    @action(detail=True, methods=['post'])
-    def approve(self, request, pk=None):
-        """
-        Approve leave application
-        """
+    def _transition(self, request, action_name, message):
         leave_app = self.get_object()
-        
-        if leave_app.status != 'pending':
-            return Response(
-                {'error': 'Only pending applications can be approved'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        leave_app.status = 'approved'
-        leave_app.approved_by = request.user
-        leave_app.approved_date = timezone.now().date()
-        leave_app.save()
+        try:
+            leave_app = leave_ledger.transition_one(leave_app, action_name, request.user)
+        except leave_ledger.LeaveTransitionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
-            'message': 'Leave application approved successfully',
+            'message': message,
             'data': self.get_serializer(leave_app).data
         })
     
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        """
+        Approve a pending leave application and debit the leave balance
+        """
+        return self._transition(request, 'approve', 'Leave application approved successfully')
+    
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """
-        Reject leave application
+        Reject leave application (an approved one is credited back)
         """
-        leave_app = self.get_object()
-        rejection_reason = request.data.get('reason', '')
-        
-        if leave_app.status != 'pending':
+        return self._transition(request, 'reject', 'Leave application rejected')
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Cancel leave application (an approved one is credited back)
+        """
+        return self._transition(request, 'cancel', 'Leave application cancelled')
+    
+    @action(detail=False, methods=['get'])
+    def leave_balance(self, request):
+        """
+        Get leave balance for a staff member from the leave ledger
+        Query params: employee_id (defaults to the current user's record), year
+        """
+        try:
+            employee_id = int(request.query_params.get('employee_id') or 0)
+            year = int(request.query_params.get('year', timezone.now().year))
+        except (TypeError, ValueError):
             return Response(
-                {'error': 'Only pending applications can be rejected'},
+                {'error': 'employee_id and year must be integers'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        leave_app.status = 'rejected'
-        leave_app.approved_by = request.user
-        leave_app.approved_date = timezone.now().date()
-        leave_app.remarks = rejection_reason
-        leave_app.save()
+        if not employee_id:
+            employee_id = Employee.objects.filter(
+                user=request.user).values_list('id', flat=True).first()
+            if not employee_id:
+                return Response(
+                    {'error': 'employee_id is required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
         return Response({
-            'message': 'Leave application rejected',
-            'data': self.get_serializer(leave_app).data
+            'employee_id': employee_id,
+            'year': year,
+            'leave_balance': leave_ledger.employee_balances(employee_id, year)
         })
     
     @action(detail=False, methods=['get'])
-    def leave_balance(self, request):
+    def balance_report(self, request):
         """
-        Get leave balance for a teacher
+        Leave balances of all active staff for a year
+        Query params: year, department_id
         """
-        teacher_id = request.query_params.get('teacher_id')
-        
-        if not teacher_id:
-            if request.user.role == 'teacher':
-                teacher_id = request.user.teacher.id
-            else:
-                return Response(
-                    {'error': 'teacher_id is required'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Get all leave types
-        leave_types = LeaveType.objects.all()
-        
-        balance_data = []
-        for leave_type in leave_types:
-            # Get annual allocation
-            leave_define = LeaveDefine.objects.filter(
-                leave_type=leave_type
-            ).first()
-            
-            annual_allocation = leave_define.days if leave_define else 0
-            
-            # Calculate used leaves (approved only)
-            used_leaves = LeaveApplication.objects.filter(
-                teacher_id=teacher_id,
-                leave_type=leave_type,
-                status='approved',
-                start_date__year=timezone.now().year
-            ).aggregate(
-                total_days=Sum(F('end_date') - F('start_date'))
-            )['total_days'] or 0
-            
-            # Convert timedelta to days
-            if hasattr(used_leaves, 'days'):
-                used_leaves = used_leaves.days + 1  # Include end date
-            
-            balance_data.append({
-                'leave_type': leave_type.name,
-                'annual_allocation': annual_allocation,
-                'used': used_leaves,
-                'balance': annual_allocation - used_leaves
-            })
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+            department_id = int(request.query_params.get('department_id') or 0) or None
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'year and department_id must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        report = leave_ledger.organisation_report(year, department_id)
         
         return Response({
-            'teacher_id': teacher_id,
-            'year': timezone.now().year,
-            'leave_balance': balance_data
+            'year': year,
+            'staff_count': len(report),
+            'staff': report
         })
     
     @action(detail=False, methods=['get'])
@@ -191,7 +175,7 @@ class LeaveManagementEnhancedViewSet(viewsets.ModelViewSet):
         """
         pending = LeaveApplication.objects.filter(
             status='pending'
-        ).select_related('teacher__user', 'leave_type').order_by('applied_date')
+        ).select_related('applicant', 'leave_type').order_by('applied_at')
         
         serializer = self.get_serializer(pending, many=True)
         
@@ -205,6 +189,7 @@ class LeaveManagementEnhancedViewSet(viewsets.ModelViewSet):
         """
         Export leave report to Excel
         """
+        from openpyxl.styles import Font, PatternFill
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
@@ -286,6 +271,7 @@ class PayrollRunEnhancedViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-year', '-month', 'teacher__user__first_name')
     
     @action(detail=False, methods=['post'])
+    @jobs.allow_async
     def generate_payroll(self, request):
         """
         Generate payroll for a specific month
@@ -311,49 +297,55 @@ class PayrollRunEnhancedViewSet(viewsets.ModelViewSet):
             )
         
         # Get all active teachers
-        teachers = Teacher.objects.filter(is_active=True)
-        
-        created_count = 0
-        
+        teachers = list(Teacher.objects.filter(is_active=True))
+        
+        # Records are computed first and written together at the end, so
+        # progress is reported (and a cancel seen) outside any transaction
+        records = []
+        for index, teacher in enumerate(teachers):
+            # Run as a job (?async=1) this reports progress and can be cancelled
+            jobs.progress(index, len(teachers), f'Payroll {month}/{year}')
+            
+            # Calculate salary components
+            basic_salary = teacher.salary or Decimal('0.00')
+            allowances = Decimal('0.00')  # Add logic for allowances
+            deductions = Decimal('0.00')  # Add logic for deductions
+            
+            # Calculate attendance-based deductions
+            working_days = 30  # Adjust based on month
+            attendance_count = StaffAttendance.objects.filter(
+                teacher=teacher,
+                date__month=month,
+                date__year=year,
+                status='present'
+            ).count()
+            
+            # Absence deduction
+            absent_days = working_days - attendance_count
+            per_day_salary = basic_salary / Decimal(working_days)
+            absence_deduction = per_day_salary * Decimal(absent_days)
+            deductions += absence_deduction
+            
+            # Calculate net salary
+            gross_salary = basic_salary + allowances
+            net_salary = gross_salary - deductions
+            
+            records.append(PayrollRecord(
+                teacher=teacher,
+                month=month,
+                year=year,
+                basic_salary=basic_salary,
+                allowances=allowances,
+                deductions=deductions,
+                gross_salary=gross_salary,
+                net_salary=net_salary
+            ))
+        
+        jobs.progress(len(teachers), len(teachers), f'Saving payroll {month}/{year}')
         with transaction.atomic():
-            for teacher in teachers:
-                # Calculate salary components
-                basic_salary = teacher.salary or Decimal('0.00')
-                allowances = Decimal('0.00')  # Add logic for allowances
-                deductions = Decimal('0.00')  # Add logic for deductions
-                
-                # Calculate attendance-based deductions
-                working_days = 30  # Adjust based on month
-                attendance_count = StaffAttendance.objects.filter(
-                    teacher=teacher,
-                    date__month=month,
-                    date__year=year,
-                    status='present'
-                ).count()
-                
-                # Absence deduction
-                absent_days = working_days - attendance_count
-                per_day_salary = basic_salary / Decimal(working_days)
-                absence_deduction = per_day_salary * Decimal(absent_days)
-                deductions += absence_deduction
-                
-                # Calculate net salary
-                gross_salary = basic_salary + allowances
-                net_salary = gross_salary - deductions
-                
-                # Create payroll record
-                PayrollRecord.objects.create(
-                    teacher=teacher,
-                    month=month,
-                    year=year,
-                    basic_salary=basic_salary,
-                    allowances=allowances,
-                    deductions=deductions,
-                    gross_salary=gross_salary,
-                    net_salary=net_salary
-                )
-                
-                created_count += 1
+            for record in records:
+                record.save()
+        created_count = len(records)
         
         return Response({
             'message': f'Payroll generated successfully for {month}/{year}',
@@ -401,6 +393,7 @@ class PayrollRunEnhancedViewSet(viewsets.ModelViewSet):
         """
         Export payslips for all employees
         """
+        from openpyxl.styles import Font, PatternFill
         month = request.query_params.get('month')
         year = request.query_params.get('year')
         
@@ -566,52 +559,43 @@ class StaffAttendanceEnhancedViewSet(viewsets.ModelViewSet):
             'attendance_rate': round((present / total_staff * 100), 2) if total_staff > 0 else 0
         })
     
+    def _month_params(self, request):
+        today = timezone.now().date()
+        month = int(request.query_params.get('month', today.month))
+        year = int(request.query_params.get('year', today.year))
+        staff_attendance_report.month_bounds(year, month)
+        return year, month
+    
     @action(detail=False, methods=['get'])
     def monthly_summary(self, request):
         """
         Get monthly attendance summary for all staff
+        Query params: month, year, view (summary/matrix)
         """
-        month = request.query_params.get('month', timezone.now().month)
-        year = request.query_params.get('year', timezone.now().year)
-        
-        month = int(month)
-        year = int(year)
-        
-        # Get all active teachers
-        teachers = Teacher.objects.filter(is_active=True)
-        
-        summary_data = []
-        
-        for teacher in teachers:
-            attendance = StaffAttendance.objects.filter(
-                teacher=teacher,
-                date__month=month,
-                date__year=year
+        try:
+            year, month = self._month_params(request)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'month and year must be valid numbers'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            present = attendance.filter(status='present').count()
-            absent = attendance.filter(status='absent').count()
-            late = attendance.filter(status='late').count()
-            on_leave = attendance.filter(status='on_leave').count()
-            
-            total_marked = attendance.count()
-            
-            summary_data.append({
-                'teacher_id': teacher.id,
-                'employee_id': teacher.employee_id if hasattr(teacher, 'employee_id') else '',
-                'name': teacher.user.get_full_name(),
-                'present': present,
-                'absent': absent,
-                'late': late,
-                'on_leave': on_leave,
-                'total_marked': total_marked,
-                'attendance_percentage': round((present / total_marked * 100), 2) if total_marked > 0 else 0
+        
+        if request.query_params.get('view') == 'matrix':
+            days, rows = staff_attendance_report.attendance_matrix(year, month)
+            return Response({
+                'month': month,
+                'year': year,
+                'staff_count': len(rows),
+                'days': days,
+                'matrix': rows
             })
         
+        summary_data = staff_attendance_report.monthly_summary(year, month)
+        
         return Response({
             'month': month,
             'year': year,
-            'staff_count': teachers.count(),
+            'staff_count': len(summary_data),
             'summary': summary_data
         })
     
@@ -619,69 +603,31 @@ class StaffAttendanceEnhancedViewSet(viewsets.ModelViewSet):
     def export_monthly_report(self, request):
         """
         Export monthly attendance report to Excel
+        Query params: month, year, view (summary/matrix)
         """
-        month = request.query_params.get('month', timezone.now().month)
-        year = request.query_params.get('year', timezone.now().year)
-        
-        month = int(month)
-        year = int(year)
-        
-        teachers = Teacher.objects.filter(is_active=True)
-        
-        # Create workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = f'Attendance {month}-{year}'
-        
-        # Header
-        headers = [
-            'Employee ID', 'Name', 'Present', 'Absent', 'Late',
-            'On Leave', 'Total Marked', 'Attendance %'
-        ]
-        
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-            cell.font = Font(bold=True, color='FFFFFF')
-        
-        # Data rows
-        for row_num, teacher in enumerate(teachers, start=2):
-            attendance = StaffAttendance.objects.filter(
-                teacher=teacher,
-                date__month=month,
-                date__year=year
+        try:
+            year, month = self._month_params(request)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'month and year must be valid numbers'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            present = attendance.filter(status='present').count()
-            absent = attendance.filter(status='absent').count()
-            late = attendance.filter(status='late').count()
-            on_leave = attendance.filter(status='on_leave').count()
-            total_marked = attendance.count()
-            
-            attendance_pct = round((present / total_marked * 100), 2) if total_marked > 0 else 0
-            
-            ws.cell(row=row_num, column=1, value=teacher.employee_id if hasattr(teacher, 'employee_id') else '')
-            ws.cell(row=row_num, column=2, value=teacher.user.get_full_name())
-            ws.cell(row=row_num, column=3, value=present)
-            ws.cell(row=row_num, column=4, value=absent)
-            ws.cell(row=row_num, column=5, value=late)
-            ws.cell(row=row_num, column=6, value=on_leave)
-            ws.cell(row=row_num, column=7, value=total_marked)
-            ws.cell(row=row_num, column=8, value=attendance_pct)
         
-        # Save
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
+        if request.query_params.get('view') == 'matrix':
+            days, rows = staff_attendance_report.attendance_matrix(year, month)
+            output = staff_attendance_report.write_matrix_xlsx(days, rows, year, month)
+            filename = f'staff_attendance_matrix_{month}_{year}.xlsx'
+        else:
+            summary_data = staff_attendance_report.monthly_summary(year, month)
+            output = staff_attendance_report.write_summary_xlsx(summary_data, year, month)
+            filename = f'staff_attendance_{month}_{year}.xlsx'
+        
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="staff_attendance_{month}_{year}.xlsx"'
-        
-        return response
 
 
 # ==================== DOUBLE-ENTRY ACCOUNTING ====================
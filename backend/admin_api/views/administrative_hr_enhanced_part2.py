@@ -14,8 +14,6 @@ from django.db import transaction
 from django.http import HttpResponse
 from datetime import datetime, timedelta
 from decimal import Decimal
-import openpyxl
-from openpyxl.styles import Font, PatternFill
 from io import BytesIO
 
 from admin_api.models import (
@@ -27,6 +25,10 @@ from admin_api.models import (
     DormRoomType, DormRoom, DormitoryAssignment,
     User
 )
+from admin_api.pagination import CreatedAtKeysetPagination
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
 
 
 # ==================== FEE MANAGEMENT ====================
@@ -245,6 +247,7 @@ class FeeManagementEnhancedViewSet(viewsets.ModelViewSet):
         """
         Export fee collection report to Excel
         """
+        from openpyxl.styles import Font, PatternFill
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date', timezone.now().date())
         
@@ -255,7 +258,7 @@ class FeeManagementEnhancedViewSet(viewsets.ModelViewSet):
         if end_date:
             queryset = queryset.filter(payment_date__lte=end_date)
         
-        queryset = queryset.select_related('student__user', 'fee_structure')
+        queryset = queryset.select_related('student__user', 'student__school_class', 'fee_structure')
         
         # Create workbook
         wb = openpyxl.Workbook()
@@ -277,14 +280,14 @@ class FeeManagementEnhancedViewSet(viewsets.ModelViewSet):
         
         # Data rows
         for row_num, payment in enumerate(queryset, start=2):
-            ws.cell(row=row_num, column=1, value=payment.student.student_id if hasattr(payment.student, 'student_id') else '')
+            ws.cell(row=row_num, column=1, value=payment.student.roll_no)
             ws.cell(row=row_num, column=2, value=payment.student.user.get_full_name())
-            ws.cell(row=row_num, column=3, value=payment.student.current_class.name if payment.student.current_class else '')
+            ws.cell(row=row_num, column=3, value=payment.student.class_name)
             ws.cell(row=row_num, column=4, value=payment.fee_structure.name)
             ws.cell(row=row_num, column=5, value=float(payment.fee_structure.amount))
             ws.cell(row=row_num, column=6, value=float(payment.amount_paid))
             ws.cell(row=row_num, column=7, value=float(payment.amount_due))
-            ws.cell(row=row_num, column=8, value=float(payment.waiver_amount or 0))
+            ws.cell(row=row_num, column=8, value=float(payment.discount))
             ws.cell(row=row_num, column=9, value=payment.payment_date.strftime('%Y-%m-%d') if payment.payment_date else '')
             ws.cell(row=row_num, column=10, value=payment.status.title())
         
@@ -405,24 +408,29 @@ class WalletSystemEnhancedViewSet(viewsets.ModelViewSet):
         if end_date:
             transactions = transactions.filter(created_at__lte=end_date)
         
-        transactions = transactions.order_by('-created_at')
+        # One keyset page at a time (?cursor=, ?page_size=, ?count=estimate)
+        paginator = CreatedAtKeysetPagination()
+        page = paginator.paginate_queryset(transactions, request, self)
         
         data = []
-        for txn in transactions:
+        for txn in page:
             data.append({
                 'id': txn.id,
                 'date': txn.created_at,
                 'type': txn.transaction_type,
                 'amount': float(txn.amount),
-                'description': txn.description,
-                'balance_after': float(txn.balance_after)
+                'reference': txn.reference,
+                'status': txn.status,
+                'notes': txn.notes
             })
         
         return Response({
             'wallet_id': wallet.id,
             'current_balance': float(wallet.balance),
             'transaction_count': len(data),
-            'transactions': data
+            'transactions': data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
         })
     
     @action(detail=False, methods=['post'])
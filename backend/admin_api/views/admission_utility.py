@@ -8,19 +8,22 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Q, Count, Avg, Sum
-from django.db import transaction
 from datetime import datetime, timedelta, date
 from decimal import Decimal
-import openpyxl
 from io import BytesIO
 from django.http import HttpResponse
 import csv
 
 from admin_api.models import (
     AdmissionApplication, AdmissionQuery, StudentPromotion,
-    VisitorBook, Complaint, Student, ClassRoom, AcademicYear, User
+    VisitorBook, Complaint, Student, User
 )
+from admin_api import jobs, promotion_engine
+from admin_api.promotion_engine import PromotionError
 from rest_framework import serializers
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
 
 
 # ==================== Serializers ====================
@@ -71,7 +74,7 @@ class AdmissionQuerySerializer(serializers.ModelSerializer):
 class StudentPromotionSerializer(serializers.ModelSerializer):
     """Serializer for student promotions"""
     student_name = serializers.CharField(source='student.user.get_full_name', read_only=True)
-    student_roll = serializers.CharField(source='student.roll_number', read_only=True)
+    student_roll = serializers.CharField(source='student.roll_no', read_only=True)
     promoted_by_name = serializers.CharField(source='promoted_by.get_full_name', read_only=True)
     
     class Meta:
@@ -457,79 +460,71 @@ class StudentPromotionViewSet(viewsets.ModelViewSet):
     ViewSet for managing student promotions
     
     Custom Actions:
-    - bulk_promote: Promote multiple students
+    - bulk_promote: Promote multiple students (or the whole school) as one batch
+    - promotion_preview: Count the students a class mapping would promote
     - promotion_report: Get promotion statistics
-    - reverse_promotion: Reverse a promotion (demote)
+    - reverse_promotion: Reverse a promotion (demote), or its whole batch
     """
     queryset = StudentPromotion.objects.all()
     serializer_class = StudentPromotionSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['student', 'from_academic_year', 'to_academic_year']
-    search_fields = ['student__user__first_name', 'student__user__last_name', 'student__roll_number']
+    search_fields = ['student__user__first_name', 'student__user__last_name', 'student__roll_no']
     ordering_fields = ['promotion_date', 'created_at']
     ordering = ['-promotion_date']
 
     @action(detail=False, methods=['post'])
+    @jobs.allow_async
     def bulk_promote(self, request):
-        """Promote multiple students to next class"""
+        """
+        Promote students to the next class in one batch: either
+        ``student_ids`` + ``to_class``, or a whole-school ``mapping`` of
+        ``{from_class: to_class}`` (optionally limited by ``student_ids``)
+        """
         student_ids = request.data.get('student_ids', [])
         to_class = request.data.get('to_class')
+        mapping = request.data.get('mapping')
         to_academic_year_id = request.data.get('to_academic_year')
         remarks = request.data.get('remarks', '')
-        
-        if not all([student_ids, to_class, to_academic_year_id]):
+
+        if not to_academic_year_id or not (mapping or (student_ids and to_class)):
             return Response(
-                {'error': 'student_ids, to_class, and to_academic_year are required'},
+                {'error': 'to_academic_year and either mapping, or student_ids and to_class, are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
         try:
-            to_academic_year = AcademicYear.objects.get(id=to_academic_year_id)
-        except AcademicYear.DoesNotExist:
-            return Response(
-                {'error': 'Invalid academic year'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        promotions = []
-        with transaction.atomic():
-            for student_id in student_ids:
-                try:
-                    student = Student.objects.get(id=student_id)
-                    
-                    # Get current class and academic year
-                    from_class = student.class_room.name if student.class_room else 'Unknown'
-                    from_academic_year = student.academic_year if hasattr(student, 'academic_year') else to_academic_year
-                    
-                    # Create promotion record
-                    promotion = StudentPromotion.objects.create(
-                        student=student,
-                        from_class=from_class,
-                        to_class=to_class,
-                        from_academic_year=from_academic_year,
-                        to_academic_year=to_academic_year,
-                        promoted_by=request.user,
-                        remarks=remarks
-                    )
-                    promotions.append(promotion)
-                    
-                    # Update student's class (if ClassRoom exists with that name)
-                    try:
-                        new_class_room = ClassRoom.objects.get(name=to_class)
-                        student.class_room = new_class_room
-                        student.save()
-                    except ClassRoom.DoesNotExist:
-                        pass
-                    
-                except Student.DoesNotExist:
-                    continue
-        
+            from_academic_year, to_academic_year = promotion_engine.academic_years(
+                to_academic_year_id, request.data.get('from_academic_year'))
+            if mapping is None:
+                # Every class the selected students are in moves to to_class
+                classes = Student.objects.filter(id__in=student_ids).values_list(
+                    'class_name', flat=True).distinct().order_by()
+                mapping = {class_name: to_class for class_name in classes if class_name != to_class}
+                if not mapping:
+                    raise PromotionError('No students to promote')
+            batch = promotion_engine.promote(
+                mapping, from_academic_year, to_academic_year, user=request.user,
+                student_ids=student_ids or None, remarks=remarks)
+        except PromotionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         return Response({
-            'message': f'{len(promotions)} students promoted successfully',
-            'promoted_count': len(promotions),
-            'promotions': StudentPromotionSerializer(promotions, many=True).data
+            'message': f'{batch.promoted_count} students promoted successfully',
+            'promoted_count': batch.promoted_count,
+            'batch': promotion_engine.batch_summary(batch),
         })
 
+    @action(detail=False, methods=['post'])
+    def promotion_preview(self, request):
+        """Students per class that a ``mapping`` would promote"""
+        try:
+            preview = promotion_engine.preview(
+                request.data.get('mapping'), request.data.get('student_ids') or None)
+        except PromotionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(preview)
+
     @action(detail=False, methods=['get'])
     def promotion_report(self, request):
         """Get promotion statistics"""
@@ -557,22 +552,39 @@ class StudentPromotionViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def reverse_promotion(self, request, pk=None):
-        """Reverse a promotion (demote student)"""
+        """
+        Reverse a promotion (demote student). With ``scope=batch`` the whole
+        batch the promotion belongs to is reversed in bulk.
+        """
         promotion = self.get_object()
+
+        if request.data.get('scope') == 'batch':
+            if promotion.batch is None:
+                return Response(
+                    {'error': 'Promotion is not part of a batch'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                restored, skipped = promotion_engine.reverse(promotion.batch)
+            except PromotionError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                'message': f'Reversed promotion of {restored} students',
+                'batch_id': str(promotion.batch.batch_id),
+                'restored_count': restored,
+                'skipped_count': skipped,
+            })
+
         student = promotion.student
-        
+
         # Restore to previous class
-        try:
-            old_class_room = ClassRoom.objects.get(name=promotion.from_class)
-            student.class_room = old_class_room
-            student.save()
-        except ClassRoom.DoesNotExist:
-            pass
-        
+        student.class_name = promotion.from_class
+        student.save(update_fields=['class_name'])
+
         # Mark promotion record
         promotion.remarks = (promotion.remarks or '') + f"\n[REVERSED on {timezone.now().date()}]"
         promotion.save()
-        
+
         return Response({
             'message': 'Promotion reversed successfully',
             'student_id': student.id,
@@ -18,6 +18,7 @@ from admin_api.models import (
     Assignment, AssignmentSubmission, LeaveApplication,
     Employee, StaffAttendance, Payslip
 )
+from admin_api import fee_rollup
 
 from users.models import User
 
@@ -525,37 +526,33 @@ class AdvancedReportsViewSet(viewsets.ViewSet):
         )
         
         if class_id:
-            payments = payments.filter(student__enrollment__classroom_id=class_id)
+            payments = payments.filter(fee_structure__class_assigned_id=class_id)
         
-        # Calculate totals
-        total_collected = payments.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
-        total_transactions = payments.count()
+        # One grouped aggregate per day; totals and the monthly view are
+        # derived from it instead of issuing per-day queries
+        days = fee_rollup.collection_buckets(payments, 'day')
+        total_collected = sum((amount for _, amount in days.values()), Decimal('0'))
+        total_transactions = sum(count for count, _ in days.values())
         
         # Payment method breakdown
         payment_methods = payments.values('payment_method').annotate(
             count=Count('id'),
             amount=Sum('amount_paid')
-        )
+        ).order_by()
         
-        # Daily breakdown for the period
-        daily_collection = []
-        current_date = start_date
-        while current_date <= end_date:
-            day_payments = payments.filter(payment_date=current_date)
-            day_total = day_payments.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
-            
-            daily_collection.append({
-                'date': current_date,
-                'transactions': day_payments.count(),
-                'amount': float(day_total)
-            })
-            current_date += timedelta(days=1)
+        daily_collection = fee_rollup.densify(days, start_date, end_date, 'day')
+        months = {}
+        for day, (count, amount) in days.items():
+            month = day.replace(day=1)
+            month_count, month_amount = months.get(month, (0, Decimal('0')))
+            months[month] = (month_count + count, month_amount + amount)
+        monthly_collection = fee_rollup.densify(months, start_date, end_date, 'month')
         
         # Get pending fees
         all_fee_structures = FeeStructure.objects.all()
         if class_id:
             all_fee_structures = all_fee_structures.filter(
-                class_room_id=class_id
+                class_assigned_id=class_id
             )
         
         total_expected = all_fee_structures.aggregate(
@@ -585,7 +582,64 @@ class AdvancedReportsViewSet(viewsets.ViewSet):
                 }
                 for pm in payment_methods
             ],
-            'daily_collection': daily_collection
+            'daily_collection': daily_collection,
+            'monthly_collection': monthly_collection
+        })
+    
+    @action(detail=False, methods=['get'])
+    def fee_collection_trend(self, request):
+        """
+        Fee collection trend from the precomputed daily rollup
+        Query params: start_date, end_date, granularity (day/month), class_ids (comma separated)
+        """
+        granularity = request.query_params.get('granularity', 'month')
+        if granularity not in fee_rollup.TRUNCATORS:
+            return Response(
+                {'error': 'granularity must be day or month'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        today = timezone.now().date()
+        try:
+            start_date = datetime.strptime(request.query_params['start_date'], '%Y-%m-%d').date() \
+                if request.query_params.get('start_date') else today.replace(month=1, day=1)
+            end_date = datetime.strptime(request.query_params['end_date'], '%Y-%m-%d').date() \
+                if request.query_params.get('end_date') else today
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            class_ids = [int(c) for c in request.query_params.get('class_ids', '').split(',') if c.strip()]
+        except ValueError:
+            return Response(
+                {'error': 'class_ids must be comma separated integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        series = fee_rollup.rollup_buckets(start_date, end_date, granularity, class_ids or None)
+        
+        totals = {}
+        for buckets in series.values():
+            for bucket, (count, amount) in buckets.items():
+                bucket_count, bucket_amount = totals.get(bucket, (0, Decimal('0')))
+                totals[bucket] = (bucket_count + count, bucket_amount + amount)
+        
+        return Response({
+            'period': {
+                'start_date': start_date,
+                'end_date': end_date,
+                'granularity': granularity
+            },
+            'total': fee_rollup.densify(totals, start_date, end_date, granularity),
+            'classes': [
+                {
+                    'class_id': class_key,
+                    'collection': fee_rollup.densify(buckets, start_date, end_date, granularity)
+                }
+                for class_key, buckets in sorted(series.items(), key=lambda item: item[0] or 0)
+            ]
         })
     
     @action(detail=False, methods=['get'])
@@ -621,20 +675,17 @@ class AdvancedReportsViewSet(viewsets.ViewSet):
             teacher=teacher
         ).count()
         
-        # Get assignment completion rate
-        assignments = Assignment.objects.filter(teacher=teacher)
-        total_expected_submissions = 0
-        actual_submissions = 0
-        
-        for assignment in assignments:
-            class_students = Enrollment.objects.filter(
-                classroom=assignment.classroom,
-                is_active=True
-            ).count()
-            total_expected_submissions += class_students
-            actual_submissions += AssignmentSubmission.objects.filter(
-                assignment=assignment
-            ).count()
+        # Get assignment completion rate: every active student of the
+        # assignment's class is expected to submit
+        assignments = Assignment.objects.filter(teacher=teacher).annotate(
+            class_students=Count(
+                'class_assigned__enrolled_students',
+                filter=Q(class_assigned__enrolled_students__is_active=True),
+                distinct=True),
+            submissions_count=Count('submissions', distinct=True),
+        ).values('class_students', 'submissions_count')
+        total_expected_submissions = sum(row['class_students'] for row in assignments)
+        actual_submissions = sum(row['submissions_count'] for row in assignments)
         
         completion_rate = (actual_submissions / total_expected_submissions * 100) if total_expected_submissions > 0 else 0
         
@@ -2,12 +2,13 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
 from admin_api.models import Assignment, AssignmentSubmission
 from admin_api.serializers import AssignmentSerializer, AssignmentSubmissionSerializer
 
 
-class AssignmentViewSet(viewsets.ModelViewSet):
-    queryset = Assignment.objects.all()
+class AssignmentViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Assignment.objects.select_related('subject', 'class_assigned', 'teacher__user')
     serializer_class = AssignmentSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'subject__title', 'class_assigned__name']
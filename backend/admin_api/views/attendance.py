@@ -2,6 +2,7 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from admin_api.models import Attendance, Class, Student
+from admin_api.pagination import DateKeysetPagination
 from admin_api.serializers import AttendanceSerializer, AttendanceCreateSerializer
 from datetime import datetime
 
@@ -9,6 +10,7 @@ from datetime import datetime
 class AttendanceListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = AttendanceSerializer
+    pagination_class = DateKeysetPagination
 
     def get_queryset(self):
         queryset = Attendance.objects.all()
@@ -119,7 +121,7 @@ class ClassStudentsView(generics.ListAPIView):
         if date:
             # Get existing attendance records for the date
             attendance_records = Attendance.objects.filter(
-                class_section=class_obj,
+                student_id__in=[student['id'] for student in students],
                 date=date
             ).values('student_id', 'status')
 
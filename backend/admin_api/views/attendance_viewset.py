@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 
 from ..models import Attendance, Enrollment, ClassRoom
+from ..pagination import DateKeysetPagination
 from ..serializers import AttendanceSerializer, AttendanceCreateSerializer
 
 
@@ -10,6 +11,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     queryset = Attendance.objects.all().select_related(
         'student__user', 'class_section', 'recorded_by__user')
     permission_classes = [IsAuthenticated]
+    pagination_class = DateKeysetPagination
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -5,13 +5,14 @@ from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.db.models import Count, Avg
 
+from ..annotated_fields import AnnotatedQuerysetMixin
 from ..models import ClassRoom, Teacher
 from ..serializers import (
     ClassRoomSerializer, ClassRoomListSerializer, ClassRoomCreateSerializer
 )
 
 
-class ClassRoomViewSet(viewsets.ModelViewSet):
+class ClassRoomViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing classrooms
     """
@@ -1,5 +1,6 @@
 from rest_framework import viewsets
 from admin_api.models import EmailTemplate, SmsTemplate, EmailSmsLog
+from admin_api.pagination import CreatedAtKeysetPagination
 from admin_api.serializers.communicate import (
     EmailTemplateSerializer, SmsTemplateSerializer, EmailSmsLogSerializer
 )
@@ -18,3 +19,4 @@ class SmsTemplateViewSet(viewsets.ModelViewSet):
 class EmailSmsLogViewSet(viewsets.ModelViewSet):
     queryset = EmailSmsLog.objects.all().order_by('-created_at')
     serializer_class = EmailSmsLogSerializer
+    pagination_class = CreatedAtKeysetPagination
@@ -2,7 +2,9 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
 from admin_api.models import Announcement, Message, Notification
+from admin_api.pagination import CreatedAtKeysetPagination
 from admin_api.serializers import AnnouncementSerializer, MessageSerializer, NotificationSerializer
 
 
@@ -45,16 +47,16 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class MessageViewSet(viewsets.ModelViewSet):
-    queryset = Message.objects.all()
+class MessageViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Message.objects.select_related('sender', 'receiver')
     serializer_class = MessageSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CreatedAtKeysetPagination
+    filter_backends = [filters.SearchFilter]
     search_fields = [
         'subject',
         'body',
         'sender__username',
         'receiver__username']
-    ordering_fields = ['created_at']
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -121,9 +123,9 @@ class MessageViewSet(viewsets.ModelViewSet):
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CreatedAtKeysetPagination
+    filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'message']
-    ordering_fields = ['created_at', 'priority']
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -21,8 +21,6 @@ from django.conf import settings
 from django.http import HttpResponse
 from datetime import datetime, timedelta
 from decimal import Decimal
-import openpyxl
-from openpyxl.styles import Font, PatternFill
 from io import BytesIO
 import json
 import re
@@ -34,6 +32,8 @@ from admin_api.models import (
     User, Student, Teacher,
     Assignment, Grade, ClassRoom, Subject
 )
+from admin_api import jobs
+from admin_api.pagination import CreatedAtKeysetPagination
 
 
 # ==================== EMAIL & SMS TEMPLATES ====================
@@ -94,6 +94,7 @@ class EmailTemplateEnhancedViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=True, methods=['post'])
+    @jobs.allow_async
     def send_email(self, request, pk=None):
         """
         Send email using template with variable substitution
@@ -116,7 +117,8 @@ class EmailTemplateEnhancedViewSet(viewsets.ModelViewSet):
         # Resolve recipients to email addresses
         email_list = self._resolve_recipients(recipients)
         
-        for email_data in email_list:
+        for index, email_data in enumerate(email_list):
+            jobs.progress(index, len(email_list), f'Sending {template.title}')
             email = email_data['email']
             custom_vars = {**variables, **email_data.get('custom_vars', {})}
             
@@ -449,6 +451,7 @@ class CommunicationLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = EmailSmsLog.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtKeysetPagination
     
     def get_serializer_class(self):
         from admin_api.serializers.communicate import EmailSmsLogSerializer
@@ -1055,9 +1058,10 @@ class NotificationEnhancedViewSet(viewsets.ModelViewSet):
     """
     queryset = Notification.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtKeysetPagination
     
     def get_serializer_class(self):
-        from admin_api.serializers.notification import NotificationSerializer
+        from admin_api.serializers.communication import NotificationSerializer
         return NotificationSerializer
     
     def get_queryset(self):
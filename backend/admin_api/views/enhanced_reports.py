@@ -6,6 +6,7 @@ from django.db.models import Avg, Count
 from django.utils import timezone
 
 from ..models import Report, Student, ClassRoom, Subject, Grade, Attendance, Teacher
+from .. import grading_scale
 from ..serializers import (
     ReportSerializer, StudentReportSerializer
 )
@@ -264,28 +265,8 @@ class ReportsView(generics.RetrieveAPIView):
             total_attendance_records *
             100) if total_attendance_records > 0 else 0
 
-        # Grade distribution
-        grade_distribution = []
-        for letter in ['A+', 'A', 'B+', 'B', 'C+', 'C', 'D', 'F']:
-            if letter == 'A+':
-                count = all_grades.filter(score__gte=90).count()
-            elif letter == 'A':
-                count = all_grades.filter(score__gte=85, score__lt=90).count()
-            elif letter == 'B+':
-                count = all_grades.filter(score__gte=80, score__lt=85).count()
-            elif letter == 'B':
-                count = all_grades.filter(score__gte=75, score__lt=80).count()
-            elif letter == 'C+':
-                count = all_grades.filter(score__gte=70, score__lt=75).count()
-            elif letter == 'C':
-                count = all_grades.filter(score__gte=65, score__lt=70).count()
-            elif letter == 'D':
-                count = all_grades.filter(score__gte=60, score__lt=65).count()
-            else:  # F
-                count = all_grades.filter(score__lt=60).count()
-
-            grade_distribution.append({'grade': letter, 'count': count, 'percentage': round(
-                (count / total_grades * 100), 2) if total_grades > 0 else 0})
+        # Grade distribution, bucketed on the grading scale in one GROUP BY
+        grade_distribution = grading_scale.distribution(all_grades)
 
         return Response({
             'type': 'overview',
@@ -2,12 +2,13 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Avg
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
 from admin_api.models import Exam, ExamSchedule, ExamResult, Student
 from admin_api.serializers import ExamSerializer, ExamScheduleSerializer, ExamResultSerializer, ExamResultCreateSerializer
 
 
-class ExamViewSet(viewsets.ModelViewSet):
-    queryset = Exam.objects.all()
+class ExamViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Exam.objects.select_related('class_assigned', 'created_by')
     serializer_class = ExamSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'exam_type', 'academic_year']
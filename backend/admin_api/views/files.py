@@ -0,0 +1,137 @@
+"""
+File storage endpoints
+
+Resumable chunked uploads (start, PUT chunks with Content-Range, query
+status to resume, complete) and downloads of stored files with Range
+support. See ``admin_api.file_storage``.
+"""
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+
+from admin_api import file_storage
+from admin_api.file_storage import UploadError
+from admin_api.models import StoredFile, UploadSession
+from admin_api.serializers.files import StoredFileSerializer, UploadSessionSerializer
+
+
+def _error_response(error):
+    return Response({'error': str(error), **error.extra}, status=error.status)
+
+
+class StoredFileViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Stored files: list your uploads, upload a small file in one request, or
+    download a file with Range support. Only the uploader (or staff) can see
+    a file; others need its ``shared_download_url``.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = StoredFileSerializer
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    def get_queryset(self):
+        queryset = StoredFile.objects.select_related('blob')
+        if self.request.user.is_staff or self._shared_link():
+            return queryset
+        return queryset.filter(uploaded_by=self.request.user)
+
+    def _shared_link(self):
+        """Downloading through a valid ``?share=`` link of this very file"""
+        token = self.request.query_params.get('share')
+        if self.action != 'download' or not token:
+            return False
+        return str(file_storage.shared_file_id(token)) == str(self.kwargs.get('pk'))
+
+    def create(self, request):
+        if 'file' not in request.FILES:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            stored = file_storage.resolve_upload(
+                request, max_size=file_storage.CHUNKED_UPLOAD_MAX_SIZE)
+        except UploadError as e:
+            return _error_response(e)
+        return Response(self.get_serializer(stored).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Download the file. Honours ``Range: bytes=start-end`` (206) and
+        ``If-None-Match``; ``?inline=1`` serves it for in-browser viewing.
+        """
+        stored = self.get_object()
+        return file_storage.download_response(
+            request, stored, as_attachment=request.query_params.get('inline') != '1')
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads.
+
+    1. ``POST /files/uploads/`` with ``filename`` and ``total_size``
+    2. ``PUT /files/uploads/{upload_id}/chunk/`` with the raw bytes and
+       ``Content-Range: bytes start-end/total``, in order
+    3. ``GET /files/uploads/{upload_id}/`` after an interruption and resume
+       from ``received_bytes``
+    4. ``POST /files/uploads/{upload_id}/complete/`` returns the stored file,
+       whose ``id`` can be passed as ``file_id`` to attachment endpoints
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+    lookup_field = 'upload_id'
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            created_by=self.request.user).select_related('stored_file__blob')
+
+    def create(self, request):
+        filename = request.data.get('filename')
+        try:
+            total_size = int(request.data.get('total_size') or 0)
+        except (TypeError, ValueError):
+            return Response({'error': 'total_size must be an integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not filename:
+            return Response({'error': 'filename is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = file_storage.start_upload(
+                request.user, filename, total_size, request.data.get('content_type', ''))
+        except UploadError as e:
+            return _error_response(e)
+        return Response(self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, upload_id=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def destroy(self, request, upload_id=None):
+        file_storage.abort_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, upload_id=None):
+        """Append one chunk; the body is read straight from the request stream"""
+        upload = self.get_object()
+        try:
+            offset, length = file_storage.parse_content_range(
+                request.headers.get('Content-Range'), upload.total_size)
+            if int(request.headers.get('Content-Length') or 0) != length:
+                raise UploadError('Content-Length does not match Content-Range')
+            upload = file_storage.append_chunk(upload, request.stream, offset, length)
+        except UploadError as e:
+            return _error_response(e)
+        return Response({
+            'upload_id': str(upload.upload_id),
+            'received_bytes': upload.received_bytes,
+            'total_size': upload.total_size,
+        })
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, upload_id=None):
+        upload = self.get_object()
+        try:
+            stored = file_storage.complete_upload(upload)
+        except UploadError as e:
+            return _error_response(e)
+        return Response(StoredFileSerializer(stored).data, status=status.HTTP_201_CREATED)
@@ -1,6 +1,7 @@
 from rest_framework import generics
 from rest_framework.response import Response
-from django.db.models import Avg
+from django.db.models import Avg, Count
+from admin_api import grading_scale
 from admin_api.models import Grade
 from admin_api.serializers.grade import GradeSerializer
 
@@ -17,20 +18,19 @@ class GradeDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class GradeStatsView(generics.RetrieveAPIView):
     def get(self, request, *args, **kwargs):
-        # Calculate grade distribution by computing letter grades from
-        # percentages
-        grades = Grade.objects.all()
-        grade_counts = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
-
-        for grade in grades:
-            letter = grade.letter_grade
-            # Map A+, A to A, B+, B to B, etc.
-            base_letter = letter[0] if letter else 'F'
-            if base_letter in grade_counts:
-                grade_counts[base_letter] += 1
+        # Letter grades are bucketed in SQL: one GROUP BY, however many grades
+        bands = grading_scale.distribution(Grade.objects.all())
+        totals = Grade.objects.aggregate(total=Count('id'), average=Avg('score'))
+
+        # Map A+, A to A, B+, B to B, etc.
+        grade_counts = {}
+        for band in bands:
+            base_letter = band['grade'][0]
+            grade_counts[base_letter] = grade_counts.get(base_letter, 0) + band['count']
 
         return Response({
-            "total_grades": Grade.objects.count(),
-            "average_score": float(Grade.objects.aggregate(Avg('score'))['score__avg'] or 0),
-            "distribution": grade_counts
+            "total_grades": totals['total'],
+            "average_score": float(totals['average'] or 0),
+            "distribution": grade_counts,
+            "grade_distribution": bands,
         })
@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 
 from ..models import Grade, Enrollment, ClassRoom
+from ..pagination import CreatedAtKeysetPagination
 from ..serializers import GradeSerializer
 
 
@@ -11,6 +12,7 @@ class GradeViewSet(viewsets.ModelViewSet):
         'student__user', 'subject', 'recorded_by__user')
     serializer_class = GradeSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
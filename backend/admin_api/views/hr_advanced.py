@@ -7,21 +7,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Q, Sum, Count, Avg
+from django.db.models import Q, Count, Avg
 from datetime import datetime, timedelta
 from decimal import Decimal
-import openpyxl
 from io import BytesIO
 from django.http import HttpResponse
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
 
-from admin_api.models import Teacher, Designation, LeaveApplication, Payslip
+from admin_api.models import Teacher, Designation, Employee, LeaveApplication, Payslip
+from admin_api import jobs, leave_ledger
 from admin_api.models_hr import (
     EmployeeDetails, PayrollComponent, PayrollRun, PayslipComponent, Holiday
 )
 from users.models import User
+from admin_api.lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
 
 
 class DesignationViewSet(viewsets.ModelViewSet):
@@ -198,6 +198,7 @@ class PayrollRunViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-year', '-month')
     
     @action(detail=False, methods=['post'])
+    @jobs.allow_async
     def process_payroll(self, request):
         """
         Process payroll for a specific month
@@ -412,6 +413,9 @@ class PayslipViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def download_pdf(self, request, pk=None):
         """Generate and download payslip as PDF"""
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
         payslip = self.get_object()
         
         # Create PDF
@@ -560,20 +564,16 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = LeaveApplication.objects.select_related(
-            'employee__teacher__user', 'leave_type', 'approved_by'
+            'applicant', 'leave_type', 'approved_by'
         ).all()
         
         # Filter by employee
         employee_id = self.request.query_params.get('employee')
         if employee_id:
-            queryset = queryset.filter(employee_id=employee_id)
+            queryset = queryset.filter(applicant_id=employee_id)
         elif self.request.user.role == 'teacher':
             # Teachers see only their own leaves
-            try:
-                employee = EmployeeDetails.objects.get(teacher=self.request.user.teacher)
-                queryset = queryset.filter(employee=employee)
-            except EmployeeDetails.DoesNotExist:
-                queryset = queryset.none()
+            queryset = queryset.filter(applicant__user=self.request.user)
         
         # Filter by status
         leave_status = self.request.query_params.get('status')
@@ -589,11 +589,11 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
         if start_date:
-            queryset = queryset.filter(start_date__gte=start_date)
+            queryset = queryset.filter(from_date__gte=start_date)
         if end_date:
-            queryset = queryset.filter(end_date__lte=end_date)
+            queryset = queryset.filter(to_date__lte=end_date)
         
-        return queryset.order_by('-applied_date')
+        return queryset.order_by('-applied_at')
     
     def perform_create(self, serializer):
         # Calculate total days
@@ -603,58 +603,34 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
         
         serializer.save(total_days=total_days)
     
-    @action(detail=True, methods=['post'])
-    def approve(self, request, pk=None):
-        """Approve leave application"""
-        leave = self.get_object()
-        
-        if leave.status != 'pending':
-            return Response(
-                {'error': 'Only pending leaves can be approved'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    def _transition(self, request, action_name):
+        from admin_api.serializers.leave import LeaveApplicationSerializer
         
-        leave.status = 'approved'
-        leave.approved_by = request.user
-        leave.approved_date = timezone.now().date()
-        leave.admin_remarks = request.data.get('admin_remarks', '')
-        leave.save()
+        leave = self.get_object()
+        try:
+            leave = leave_ledger.transition_one(leave, action_name, request.user)
+        except leave_ledger.LeaveTransitionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # TODO: Send notification to employee
         
-        from admin_api.serializers.leave import LeaveApplicationSerializer
         serializer = LeaveApplicationSerializer(leave)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        """Approve leave application and debit the leave balance"""
+        return self._transition(request, 'approve')
+    
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
-        """Reject leave application"""
-        leave = self.get_object()
-        
-        if leave.status != 'pending':
-            return Response(
-                {'error': 'Only pending leaves can be rejected'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        admin_remarks = request.data.get('admin_remarks')
-        if not admin_remarks:
-            return Response(
-                {'error': 'admin_remarks is required for rejection'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        leave.status = 'rejected'
-        leave.approved_by = request.user
-        leave.approved_date = timezone.now().date()
-        leave.admin_remarks = admin_remarks
-        leave.save()
-        
-        # TODO: Send notification to employee
-        
-        from admin_api.serializers.leave import LeaveApplicationSerializer
-        serializer = LeaveApplicationSerializer(leave)
-        return Response(serializer.data)
+        """Reject leave application (an approved one is credited back)"""
+        return self._transition(request, 'reject')
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel leave application (an approved one is credited back)"""
+        return self._transition(request, 'cancel')
     
     @action(detail=False, methods=['post'])
     def bulk_approve(self, request):
@@ -667,20 +643,11 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        leaves = LeaveApplication.objects.filter(
-            id__in=leave_ids,
-            status='pending'
-        )
-        
-        approved_count = leaves.update(
-            status='approved',
-            approved_by=request.user,
-            approved_date=timezone.now().date()
-        )
+        approved = leave_ledger.approve(leave_ids, request.user)
         
         return Response({
-            'message': f'Approved {approved_count} leave applications',
-            'approved_count': approved_count
+            'message': f'Approved {len(approved)} leave applications',
+            'approved_count': len(approved)
         })
     
     @action(detail=False, methods=['get'])
@@ -690,52 +657,46 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
         
         leaves = LeaveApplication.objects.filter(
             status='pending'
-        ).select_related('employee__teacher__user', 'leave_type').order_by('applied_date')
+        ).select_related('applicant', 'leave_type').order_by('applied_at')
         
         serializer = LeaveApplicationSerializer(leaves, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def leave_balance(self, request):
-        """Get leave balance for employee"""
-        employee_id = request.query_params.get('employee_id')
-        year = request.query_params.get('year', timezone.now().year)
+        """Get leave balance for employee from the leave ledger"""
+        try:
+            employee_id = int(request.query_params.get('employee_id') or 0)
+            year = int(request.query_params.get('year', timezone.now().year))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'employee_id and year must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         if not employee_id:
-            if request.user.role == 'teacher':
-                try:
-                    employee = EmployeeDetails.objects.get(teacher=request.user.teacher)
-                    employee_id = employee.id
-                except EmployeeDetails.DoesNotExist:
+            employee_id = Employee.objects.filter(
+                user=request.user).values_list('id', flat=True).first()
+            if not employee_id:
+                if request.user.role == 'teacher':
                     return Response(
                         {'error': 'Employee details not found'},
                         status=status.HTTP_404_NOT_FOUND
                     )
-            else:
                 return Response(
                     {'error': 'employee_id is required'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        # Get approved leaves for the year
-        from admin_api.models import LeaveType
-        leave_types = LeaveType.objects.filter(is_active=True)
-        
-        balance = []
-        for leave_type in leave_types:
-            used = LeaveApplication.objects.filter(
-                employee_id=employee_id,
-                leave_type=leave_type,
-                status='approved',
-                start_date__year=year
-            ).aggregate(total=Sum('total_days'))['total'] or 0
-            
-            balance.append({
-                'leave_type': leave_type.name,
-                'total_days': leave_type.days_per_year,
-                'used_days': used,
-                'remaining_days': leave_type.days_per_year - used
-            })
+        balance = [
+            {
+                'leave_type': row['leave_type'],
+                'total_days': row['annual_allocation'] + row['carried_forward'],
+                'used_days': row['used'],
+                'remaining_days': row['balance']
+            }
+            for row in leave_ledger.employee_balances(employee_id, year)
+        ]
         
         return Response({
             'year': year,
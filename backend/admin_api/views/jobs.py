@@ -0,0 +1,59 @@
+"""
+Background job endpoints
+
+Poll the jobs started with ``?async=1`` (see ``admin_api.jobs``), cancel
+them, and download the file a finished export produced. Progress is also
+pushed over the notifications WebSocket as ``job_progress`` messages.
+"""
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from admin_api import file_storage, jobs
+from admin_api.models import Job
+from admin_api.serializers.job import JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Your background jobs, newest first (admins see everyone's).
+    Filter with ?status=pending|running|completed|failed|cancelled.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = jobs.visible_to(self.request.user)
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Cancel a job: pending jobs stop at once, running ones at their next
+        progress report
+        """
+        job = self.get_object()
+        if job.is_finished:
+            return Response(
+                {'error': f'Job already {job.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        Job.objects.filter(pk=job.pk).update(cancel_requested=True)
+        Job.objects.filter(pk=job.pk, status='pending').update(status='cancelled', error='Cancelled')
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The file produced by a finished export job"""
+        job = self.get_object()
+        if job.result_file_id is None:
+            return Response(
+                {'error': 'This job has no file to download'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return file_storage.download_response(request, job.result_file)
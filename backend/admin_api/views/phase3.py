@@ -6,11 +6,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q, F
+from django.db.models import Sum, Count, Q, F, Prefetch
 from django.utils import timezone
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 
+from admin_api.annotated_fields import AnnotatedQuerysetMixin, annotation_name
 from admin_api.models import (
     # Payroll
     SalaryGrade, AllowanceType, DeductionType, EmployeeSalaryStructure,
@@ -86,10 +87,10 @@ class DeductionTypeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class EmployeeSalaryStructureViewSet(viewsets.ModelViewSet):
+class EmployeeSalaryStructureViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = EmployeeSalaryStructure.objects.select_related(
-        'employee', 'salary_grade'
-    ).prefetch_related('allowances', 'deductions')
+        'employee__designation', 'employee__department', 'salary_grade'
+    ).prefetch_related('allowances__allowance_type', 'deductions__deduction_type')
     serializer_class = EmployeeSalaryStructureSerializer
     permission_classes = [IsAuthenticated]
     
@@ -129,14 +130,17 @@ class EmployeeSalaryStructureViewSet(viewsets.ModelViewSet):
     def statistics(self, request):
         """Get salary statistics"""
         structures = self.queryset.filter(is_active=True)
+        allowances = annotation_name('total_allowances')
+        payroll = EmployeeSalaryStructureSerializer.annotate_queryset(
+            EmployeeSalaryStructure.objects.filter(is_active=True)
+        ).values_list('basic_salary', allowances)
         
         stats = {
             'total_employees': structures.count(),
             'average_salary': structures.aggregate(avg=Sum('basic_salary'))['avg'] or 0,
             'total_payroll': sum(
-                float(s.basic_salary) + 
-                sum(float(a.amount) for a in s.allowances.filter(is_active=True))
-                for s in structures
+                float(basic_salary) + float(total_allowances or 0)
+                for basic_salary, total_allowances in payroll
             )
         }
         return Response(stats)
@@ -318,8 +322,9 @@ class PayslipViewSet(viewsets.ModelViewSet):
 
 # ==================== LEAVE MANAGEMENT VIEWSETS ====================
 
-class LeavePolicyViewSet(viewsets.ModelViewSet):
-    queryset = LeavePolicy.objects.prefetch_related('rules')
+class LeavePolicyViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = LeavePolicy.objects.select_related('designation', 'department').prefetch_related(
+        Prefetch('rules', queryset=LeavePolicyRule.objects.select_related('leave_type')))
     serializer_class = LeavePolicySerializer
     permission_classes = [IsAuthenticated]
     
@@ -630,7 +635,7 @@ class ExpenseClaimViewSet(viewsets.ModelViewSet):
 
 # ==================== ASSET MANAGEMENT VIEWSETS ====================
 
-class AssetCategoryViewSet(viewsets.ModelViewSet):
+class AssetCategoryViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = AssetCategory.objects.all()
     serializer_class = AssetCategorySerializer
     permission_classes = [IsAuthenticated]
@@ -643,7 +648,7 @@ class AssetCategoryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Asset.objects.select_related('category')
     serializer_class = AssetSerializer
     permission_classes = [IsAuthenticated]
@@ -835,8 +840,8 @@ class AssetMaintenanceViewSet(viewsets.ModelViewSet):
 
 # ==================== ACCOUNTING VIEWSETS ====================
 
-class AccountGroupViewSet(viewsets.ModelViewSet):
-    queryset = AccountGroup.objects.all()
+class AccountGroupViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = AccountGroup.objects.select_related('parent')
     serializer_class = AccountGroupSerializer
     permission_classes = [IsAuthenticated]
 
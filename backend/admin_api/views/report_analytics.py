@@ -1,57 +1,70 @@
+from bisect import bisect_right
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Avg
+from django.db.models import Avg, Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from admin_api import grade_cube, grading_scale
 from admin_api.models import Student, Grade, Class, Subject, Attendance
-from decimal import Decimal
 
 
 class ReportAnalyticsView(APIView):
     """
     Get comprehensive report analytics data
+
+    Averages, the grade distribution, class comparison and the monthly trend
+    are read from the grade analytics cube (``admin_api.grade_cube``); the
+    per-student figures come from a handful of grouped queries, so every
+    student is reported whatever the school's size.
+    Filters: ?class=, ?subject=, ?term=, ?grade_type= (each accepts 'all').
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
             # Get filter parameters
-            class_filter = request.query_params.get('class', None)
-            subject_filter = request.query_params.get('subject', None)
-            period = request.query_params.get(
-                'period', 'current')  # current, previous, all
+            class_filter = self._filter_value(request, 'class')
+            subject_filter = self._filter_value(request, 'subject')
+            term_filter = self._filter_value(request, 'term')
+            grade_type_filter = self._filter_value(request, 'grade_type')
 
             # Base querysets
             students_query = Student.objects.filter(is_active=True)
-            if class_filter and class_filter != 'all':
+            if class_filter:
                 students_query = students_query.filter(class_name=class_filter)
 
             grades_query = Grade.objects.all()
-            if subject_filter and subject_filter != 'all':
-                grades_query = grades_query.filter(
-                    subject__title=subject_filter)
-
-            # Calculate analytics
-            analytics = self._calculate_analytics(students_query, grades_query)
-
-            # Get student reports
-            student_reports = self._get_student_reports(
-                students_query, grades_query)
-
-            # Get class analytics
-            class_analytics_data = self._get_class_analytics(grades_query)
-
-            # Get grade distribution
-            grade_distribution = self._get_grade_distribution(grades_query)
-
-            # Get progress tracking
-            progress_tracking = self._get_progress_tracking(students_query)
+            if subject_filter:
+                grades_query = grades_query.filter(subject__title=subject_filter)
+            if term_filter:
+                grades_query = grades_query.filter(term=term_filter)
+            if grade_type_filter:
+                grades_query = grades_query.filter(grade_type=grade_type_filter)
+
+            # Cube slices: every class for the comparison, the chosen one otherwise
+            all_classes = grade_cube.cells(
+                subject_titles=[subject_filter] if subject_filter else None,
+                terms=[term_filter] if term_filter else None,
+                grade_types=[grade_type_filter] if grade_type_filter else None,
+            )
+            cube = all_classes.filter(class_assigned__name=class_filter) if class_filter else all_classes
+
+            student_stats = self._get_student_stats(students_query, grades_query)
+            windows = self._grade_windows(grades_query.filter(student__in=students_query))
+            if subject_filter or term_filter or grade_type_filter:
+                # Progress follows every grade, not only the filtered ones
+                progress_windows = self._grade_windows(Grade.objects.filter(student__in=students_query))
+            else:
+                progress_windows = windows
 
             return Response({
-                'analytics': analytics,
-                'student_reports': student_reports,
-                'class_analytics': class_analytics_data,
-                'grade_distribution': grade_distribution,
-                'progress_tracking': progress_tracking,
+                'analytics': self._calculate_analytics(cube, student_stats, windows),
+                'student_reports': self._get_student_reports(students_query, student_stats),
+                'class_analytics': self._get_class_analytics(all_classes, grades_query),
+                'grade_distribution': grade_cube.distribution(cube),
+                'progress_tracking': self._get_progress_tracking(students_query, progress_windows),
+                'monthly_trend': self._get_monthly_trend(cube),
                 'filters': {
                     'classes': list(Class.objects.values_list('name', flat=True)),
                     'subjects': list(Subject.objects.values_list('title', flat=True)),
@@ -64,119 +77,132 @@ class ReportAnalyticsView(APIView):
                 'student_reports': [],
                 'class_analytics': [],
                 'grade_distribution': [],
-                'progress_tracking': []
+                'progress_tracking': [],
+                'monthly_trend': []
             }, status=500)
 
-    def _calculate_analytics(self, students_query, grades_query):
-        """Calculate overall analytics"""
-        # Class average
-        avg_score = grades_query.aggregate(Avg('score'))['score__avg']
-        if avg_score is None:
-            avg_score = Decimal('0')
-
-        # Get unique students with grades
-        students_with_grades = students_query.filter(
-            id__in=grades_query.values_list('student_id', flat=True)
+    def _filter_value(self, request, name):
+        value = request.query_params.get(name)
+        return None if value in (None, '', 'all') else value
+
+    def _get_student_stats(self, students_query, grades_query):
+        """``{student_id: row}`` of averages, grade and subject counts in one grouped query"""
+        rows = (
+            grades_query.filter(student__in=students_query)
+            .values('student_id')
+            .annotate(
+                average=Avg('score'),
+                average_percentage=Avg(grading_scale.percentage_expression()),
+                grade_count=Count('id'),
+                subjects_count=Count('subject', distinct=True))
+            .order_by()
+        )
+        return {row['student_id']: row for row in rows}
+
+    def _grade_windows(self, grades):
+        """
+        Per student, the scores of their first three grades and of their
+        latest six (newest first), from one windowed query
+        """
+        student = [F('student_id')]
+        ranked = (
+            grades.order_by()
+            .annotate(
+                first_rank=Window(RowNumber(), partition_by=student,
+                                  order_by=[F('created_at').asc(), F('id').asc()]),
+                last_rank=Window(RowNumber(), partition_by=student,
+                                 order_by=[F('created_at').desc(), F('id').desc()]),
+            )
+            .filter(Q(first_rank__lte=3) | Q(last_rank__lte=6))
+            .values_list('student_id', 'score', 'first_rank', 'last_rank')
         )
+        windows = {}
+        for student_id, score, first_rank, last_rank in ranked:
+            window = windows.setdefault(student_id, {'first': {}, 'latest': {}, 'count': 0})
+            window['count'] = max(window['count'], first_rank)
+            if first_rank <= 3:
+                window['first'][first_rank] = score
+            if last_rank <= 6:
+                window['latest'][last_rank] = score
+        for window in windows.values():
+            window['first'] = [window['first'][rank] for rank in sorted(window['first'])]
+            window['latest'] = [window['latest'][rank] for rank in sorted(window['latest'])]
+        return windows
+
+    def _average(self, scores):
+        return float(sum(scores)) / len(scores) if scores else 0.0
+
+    def _calculate_analytics(self, cube, student_stats, windows):
+        """Calculate overall analytics"""
+        totals = grade_cube.totals(cube)
+        avg_score = totals['average']
+
+        top_performers = sum(1 for row in student_stats.values() if row['average'] >= 90)
+        at_risk = sum(1 for row in student_stats.values() if row['average'] < 60)
 
-        # Top performers (90% and above average)
-        top_performers = 0
-        at_risk = 0
+        # Improvement: latest three grades against the three before them
         improving = 0
+        for window in windows.values():
+            recent, older = window['latest'][:3], window['latest'][3:6]
+            if recent and older and self._average(recent) > self._average(older):
+                improving += 1
 
-        for student in students_with_grades:
-            student_avg = grades_query.filter(
-                student=student).aggregate(
-                Avg('score'))['score__avg']
-            if student_avg is None:
-                student_avg = Decimal('0')
-
-            if student_avg >= 90:
-                top_performers += 1
-            elif student_avg < 60:
-                at_risk += 1
-
-            # Check improvement (compare recent vs older grades)
-            recent_grades = grades_query.filter(
-                student=student).order_by('-created_at')[:3]
-            older_grades = grades_query.filter(
-                student=student).order_by('-created_at')[3:6]
-
-            if recent_grades.exists() and older_grades.exists():
-                recent_avg = recent_grades.aggregate(
-                    Avg('score'))['score__avg'] or Decimal('0')
-                older_avg = older_grades.aggregate(
-                    Avg('score'))['score__avg'] or Decimal('0')
-                if recent_avg > older_avg:
-                    improving += 1
-
-        total_students = students_with_grades.count()
+        total_students = len(student_stats)
         improvement_rate = (
             improving /
             total_students *
             100) if total_students > 0 else 0
 
-        # Convert Decimal to float for JSON serialization
-        avg_score_float = float(avg_score)
-        trend_value = (avg_score_float - 75) * 0.1
+        trend_value = (avg_score - 75) * 0.1
 
         return {
-            'class_average': round(avg_score_float, 1),
+            'class_average': round(avg_score, 1),
             'top_performers': top_performers,
             'at_risk': at_risk,
             'improvement_rate': round(improvement_rate, 1),
             'trend': round(trend_value, 1),
             'total_students': total_students,
-            'total_grades': grades_query.count()
+            'total_grades': totals['grade_count']
         }
 
-    def _get_student_reports(self, students_query, grades_query):
+    def _get_student_reports(self, students_query, student_stats):
         """Get individual student reports"""
-        reports = []
-
-        for student in students_query[:50]:  # Limit to 50 for performance
-            student_grades = grades_query.filter(student=student)
+        students = students_query.values(
+            'id', 'roll_no', 'class_name', 'user__first_name', 'user__last_name', 'user__email')
+        attendance = {
+            row['student_id']: row
+            for row in Attendance.objects.filter(student__in=students_query)
+            .values('student_id')
+            .annotate(total=Count('id'), present=Count('id', filter=Q(status='present')))
+            .order_by()
+        }
+        # Rank: one plus the number of students with a strictly higher average
+        averages = sorted(float(row['average']) for row in student_stats.values())
 
-            if not student_grades.exists():
+        reports = []
+        for student in students:
+            stats = student_stats.get(student['id'])
+            if stats is None:
                 continue
-
-            # Calculate averages
-            overall_avg = student_grades.aggregate(Avg('score'))['score__avg']
-            if overall_avg is None:
-                overall_avg = Decimal('0')
-
-            # Get attendance
-            attendance_records = Attendance.objects.filter(student=student)
-            total_attendance = attendance_records.count()
-            present_count = attendance_records.filter(status='present').count()
+            overall_avg = float(stats['average'])
+            record = attendance.get(student['id'], {'total': 0, 'present': 0})
             attendance_rate = (
-                present_count /
-                total_attendance *
-                100) if total_attendance > 0 else 0
-
-            # Determine grade letter
-            grade_letter = self._get_letter_grade(float(overall_avg))
-
-            # Calculate rank (simple version)
-            rank = students_query.filter(
-                id__in=grades_query.values('student').annotate(
-                    avg_score=Avg('score')).filter(
-                    avg_score__gt=overall_avg).values_list(
-                    'student_id',
-                    flat=True)).count() + 1
+                record['present'] /
+                record['total'] *
+                100) if record['total'] > 0 else 0
 
             reports.append({
-                'id': student.id,
-                'student': student.get_full_name(),
-                'roll_no': student.roll_no,
-                'class': student.class_name,
-                'email': student.user.email if hasattr(student.user, 'email') else '',
-                'overall_average': round(float(overall_avg), 1),
-                'grade': grade_letter,
-                'rank': rank,
+                'id': student['id'],
+                'student': f"{student['user__first_name']} {student['user__last_name']}".strip(),
+                'roll_no': student['roll_no'],
+                'class': student['class_name'],
+                'email': student['user__email'] or '',
+                'overall_average': round(overall_avg, 1),
+                'grade': self._get_letter_grade(stats['average_percentage']),
+                'rank': len(averages) - bisect_right(averages, overall_avg) + 1,
                 'attendance': round(attendance_rate, 1),
-                'total_grades': student_grades.count(),
-                'subjects_count': student_grades.values('subject').distinct().count()
+                'total_grades': stats['grade_count'],
+                'subjects_count': stats['subjects_count']
             })
 
         # Sort by average descending
@@ -184,105 +210,72 @@ class ReportAnalyticsView(APIView):
 
         return reports
 
-    def _get_class_analytics(self, grades_query):
+    def _get_class_analytics(self, cube, grades_query):
         """Get class-wise analytics"""
-        analytics = []
-
-        for class_obj in Class.objects.all():
-            class_students = Student.objects.filter(
-                class_name=class_obj.name, is_active=True)
-            class_grades = grades_query.filter(student__in=class_students)
-
-            if not class_grades.exists():
-                continue
-
-            avg_score = class_grades.aggregate(Avg('score'))['score__avg']
-            if avg_score is None:
-                avg_score = Decimal('0')
-
-            total_students = class_students.count()
-            students_with_grades = class_students.filter(
-                id__in=class_grades.values_list('student_id', flat=True)
-            ).count()
+        students = {
+            row['school_class_id']: row
+            for row in Student.objects.filter(is_active=True, school_class__isnull=False)
+            .values('school_class_id')
+            .annotate(
+                total=Count('id'),
+                graded=Count('id', filter=Q(id__in=grades_query.values('student_id'))))
+            .order_by()
+        }
 
+        analytics = []
+        for row in grade_cube.summarize(
+                cube.filter(class_assigned__isnull=False), 'class_assigned_id', 'class_assigned__name'):
+            counts = students.get(row['class_assigned_id'], {'total': 0, 'graded': 0})
             analytics.append({
-                'class_name': class_obj.name,
-                'average': round(float(avg_score), 1),
-                'total_students': total_students,
-                'active_students': students_with_grades,
-                'total_grades': class_grades.count()
+                'class_name': row['class_assigned__name'],
+                'average': round(row['average'], 1),
+                'total_students': counts['total'],
+                'active_students': counts['graded'],
+                'total_grades': row['grade_count']
             })
 
         return analytics
 
-    def _get_grade_distribution(self, grades_query):
-        """Get grade distribution data"""
-        distribution = {
-            'A (90-100)': 0,
-            'B (80-89)': 0,
-            'C (70-79)': 0,
-            'D (60-69)': 0,
-            'F (<60)': 0
+    def _get_progress_tracking(self, students_query, windows):
+        """Get student progress over time"""
+        names = {
+            student['id']: student
+            for student in students_query.values(
+                'id', 'class_name', 'user__first_name', 'user__last_name')
         }
 
-        for grade in grades_query:
-            score = grade.score
-            if score >= 90:
-                distribution['A (90-100)'] += 1
-            elif score >= 80:
-                distribution['B (80-89)'] += 1
-            elif score >= 70:
-                distribution['C (70-79)'] += 1
-            elif score >= 60:
-                distribution['D (60-69)'] += 1
-            else:
-                distribution['F (<60)'] += 1
-
-        return [{'grade': k, 'count': v} for k, v in distribution.items()]
-
-    def _get_progress_tracking(self, students_query):
-        """Get student progress over time"""
         progress = []
-
-        for student in students_query[:20]:  # Limit to 20 for performance
-            student_grades = Grade.objects.filter(
-                student=student).order_by('created_at')
-
-            if student_grades.count() < 2:
+        for student_id, window in windows.items():
+            if window['count'] < 2:
                 continue
 
-            first_avg = student_grades[:3].aggregate(Avg('score'))[
-                'score__avg']
-            latest_avg = student_grades.reverse()[:3].aggregate(Avg('score'))[
-                'score__avg']
-
-            if first_avg is None:
-                first_avg = Decimal('0')
-            if latest_avg is None:
-                latest_avg = Decimal('0')
-
-            change = float(latest_avg) - float(first_avg)
+            first_avg = self._average(window['first'])
+            latest_avg = self._average(window['latest'][:3])
+            change = latest_avg - first_avg
+            student = names[student_id]
 
             progress.append({
-                'student': student.get_full_name(),
-                'class': student.class_name,
-                'initial_average': round(float(first_avg), 1),
-                'current_average': round(float(latest_avg), 1),
+                'student': f"{student['user__first_name']} {student['user__last_name']}".strip(),
+                'class': student['class_name'],
+                'initial_average': round(first_avg, 1),
+                'current_average': round(latest_avg, 1),
                 'change': round(change, 1),
                 'trend': 'improving' if change > 0 else 'declining' if change < 0 else 'stable'
             })
 
         return progress
 
-    def _get_letter_grade(self, score):
-        """Convert numeric score to letter grade"""
-        if score >= 90:
-            return 'A'
-        elif score >= 80:
-            return 'B'
-        elif score >= 70:
-            return 'C'
-        elif score >= 60:
-            return 'D'
-        else:
-            return 'F'
+    def _get_monthly_trend(self, cube):
+        """Average score and grade count per month"""
+        return [
+            {
+                'month': row['month'].strftime('%Y-%m'),
+                'average': round(row['average'], 1),
+                'total_grades': row['grade_count'],
+            }
+            for row in grade_cube.summarize(cube, 'month')
+        ]
+
+    def _get_letter_grade(self, percentage):
+        """Convert a percentage to its letter on the grading scale"""
+        return grading_scale.letter(percentage)
@@ -6,6 +6,7 @@ from django.db.models import Avg, Count
 from django.utils import timezone
 
 from ..models import Report, Student, Teacher, ClassRoom, Subject, Grade, Attendance
+from .. import grading_scale
 from ..serializers import (
     ReportSerializer, StudentReportSerializer
 )
@@ -240,28 +241,8 @@ class ReportsView(generics.RetrieveAPIView):
             total_attendance_records *
             100) if total_attendance_records > 0 else 0
 
-        # Grade distribution
-        grade_distribution = []
-        for letter in ['A+', 'A', 'B+', 'B', 'C+', 'C', 'D', 'F']:
-            if letter == 'A+':
-                count = all_grades.filter(score__gte=90).count()
-            elif letter == 'A':
-                count = all_grades.filter(score__gte=85, score__lt=90).count()
-            elif letter == 'B+':
-                count = all_grades.filter(score__gte=80, score__lt=85).count()
-            elif letter == 'B':
-                count = all_grades.filter(score__gte=75, score__lt=80).count()
-            elif letter == 'C+':
-                count = all_grades.filter(score__gte=70, score__lt=75).count()
-            elif letter == 'C':
-                count = all_grades.filter(score__gte=65, score__lt=70).count()
-            elif letter == 'D':
-                count = all_grades.filter(score__gte=60, score__lt=65).count()
-            else:  # F
-                count = all_grades.filter(score__lt=60).count()
-
-            grade_distribution.append({'grade': letter, 'count': count, 'percentage': round(
-                (count / total_grades * 100), 2) if total_grades > 0 else 0})
+        # Grade distribution, bucketed on the grading scale in one GROUP BY
+        grade_distribution = grading_scale.distribution(all_grades)
 
         return Response({
             'type': 'overview',
@@ -331,18 +312,12 @@ class StudentProgressView(generics.RetrieveAPIView):
 
 class GradeDistributionView(generics.RetrieveAPIView):
     def get(self, request, *args, **kwargs):
-        # Calculate grade distribution by computing letter grades from
-        # percentages
-        grades = Grade.objects.all()
-        grade_counts = {}
-
-        for grade in grades:
-            letter = grade.letter_grade
-            grade_counts[letter] = grade_counts.get(letter, 0) + 1
-
-        # Convert to list format expected by frontend
-        distribution = [{'letter_grade': k, 'count': v}
-                        for k, v in grade_counts.items()]
+        # Letter grades are bucketed in SQL rather than per row
+        distribution = [
+            {'letter_grade': band['grade'], 'count': band['count']}
+            for band in grading_scale.distribution(Grade.objects.all())
+            if band['count']
+        ]
 
         return Response({
             "distribution": distribution,
@@ -2,23 +2,26 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
 from admin_api.models import Student
 from admin_api.serializers.student import StudentSerializer, StudentCreateSerializer
+from admin_api.lazy_imports import lazy_module
 from users.models import User
-import pandas as pd
 import random
 import string
 from django.db import transaction
 from django.http import HttpResponse
 import csv
 
+pd = lazy_module('pandas')
 
-class StudentListView(generics.ListAPIView):
-    queryset = Student.objects.all().select_related('user')
+
+class StudentListView(AnnotatedQuerysetMixin, generics.ListAPIView):
+    queryset = Student.objects.all().select_related('user').order_by('id')
     serializer_class = StudentSerializer
 
 
-class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class StudentDetailView(AnnotatedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Student.objects.all().select_related('user')
     serializer_class = StudentSerializer
 
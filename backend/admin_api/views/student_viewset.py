@@ -2,11 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from ..annotated_fields import AnnotatedQuerysetMixin
 from ..models import Student, Enrollment, ClassRoom
 from ..serializers import StudentSerializer, StudentCreateSerializer
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all().select_related('user')
     permission_classes = [IsAuthenticated]
 
@@ -1,14 +1,15 @@
 from rest_framework import generics
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
 from admin_api.models import Subject
 from admin_api.serializers.subject import SubjectSerializer
 
 
-class SubjectListView(generics.ListAPIView):
+class SubjectListView(AnnotatedQuerysetMixin, generics.ListAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
 
 
-class SubjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class SubjectDetailView(AnnotatedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
 
@@ -1,11 +1,12 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 
+from ..annotated_fields import AnnotatedQuerysetMixin
 from ..models import Subject
 from ..serializers import SubjectSerializer, SubjectListSerializer, SubjectCreateSerializer
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Subject.objects.all()
     permission_classes = [IsAuthenticated]
 
@@ -1,15 +1,16 @@
 from rest_framework import generics
 from rest_framework.response import Response
+from admin_api.annotated_fields import AnnotatedQuerysetMixin
 from admin_api.models import Teacher
 from admin_api.serializers.teacher import TeacherSerializer, TeacherCreateSerializer
 
 
-class TeacherListView(generics.ListAPIView):
+class TeacherListView(AnnotatedQuerysetMixin, generics.ListAPIView):
     queryset = Teacher.objects.all().select_related('user')
     serializer_class = TeacherSerializer
 
 
-class TeacherDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TeacherDetailView(AnnotatedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Teacher.objects.all().select_related('user')
     serializer_class = TeacherSerializer
 
@@ -2,11 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from ..annotated_fields import AnnotatedQuerysetMixin
 from ..models import Teacher
 from ..serializers import TeacherSerializer, TeacherCreateSerializer
 
 
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Teacher.objects.all().select_related('user')
     permission_classes = [IsAuthenticated]
 
@@ -1,5 +1,6 @@
 from rest_framework import viewsets
 from admin_api.models import WalletAccount, WalletTransaction, WalletDepositRequest, WalletRefundRequest
+from admin_api.pagination import CreatedAtKeysetPagination
 from admin_api.serializers.wallet import (
     WalletAccountSerializer, WalletTransactionSerializer,
     WalletDepositRequestSerializer, WalletRefundRequestSerializer
@@ -14,6 +15,7 @@ class WalletAccountViewSet(viewsets.ModelViewSet):
 class WalletTransactionViewSet(viewsets.ModelViewSet):
     queryset = WalletTransaction.objects.all().order_by('-created_at')
     serializer_class = WalletTransactionSerializer
+    pagination_class = CreatedAtKeysetPagination
 
 
 class WalletDepositRequestViewSet(viewsets.ModelViewSet):
@@ -4,10 +4,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from datetime import timedelta
+from .annotated_fields import AnnotatedQuerysetMixin
 from .models_library import Book, BookCategory, BookIssue
 from .serializers_library import BookSerializer, BookCategorySerializer, BookIssueSerializer
 
-class BookCategoryViewSet(viewsets.ModelViewSet):
+class BookCategoryViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = BookCategory.objects.all()
     serializer_class = BookCategorySerializer
     permission_classes = [IsAuthenticated]
@@ -20,7 +21,7 @@ class BookCategoryViewSet(viewsets.ModelViewSet):
         serializer = BookSerializer(books, many=True)
         return Response(serializer.data)
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(AnnotatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Book.objects.select_related('category').all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
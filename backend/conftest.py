@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(scope='session')
+def query_budget_data(django_db_setup, django_db_blocker):
+    """The ``check_query_budgets`` dataset, created once in the test database"""
+    from admin_api.query_budgets import build_fixture
+
+    with django_db_blocker.unblock():
+        return build_fixture()
@@ -37,10 +37,16 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # SQL query count / DB time per API request (Server-Timing in DEBUG)
+    'admin_api.middleware.QueryMetricsMiddleware',
     # Convert unhandled exceptions to JSON for API consumers
     'admin_api.middleware.ExceptionToJSONMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Audit trail of API writes, written in batches off the request thread
+    'admin_api.middleware.AuditLogMiddleware',
+    # Report/export reads on the read replica, if one is configured
+    'admin_api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,13 +73,28 @@ WSGI_APPLICATION = 'edu_backend.wsgi.application'
 
 USE_SQLITE = os.getenv('USE_SQLITE', '1') == '1'
 
+# Seconds a database connection is kept open between requests; reused
+# connections are checked first (CONN_HEALTH_CHECKS) so a server restart or
+# failover costs one reconnect instead of a failed request
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 0 if DEBUG else 600))
+
 if USE_SQLITE:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    # A second SQLite file standing in for a read replica in development;
+    # refresh it from the primary with `manage.py sync_sqlite_replica`
+    if os.getenv('SQLITE_REPLICA_PATH'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.getenv('SQLITE_REPLICA_PATH'),
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     DATABASES = {
         'default': {
@@ -83,8 +104,51 @@ else:
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'edu_pass'),
             'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
             'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 10,
+            },
         }
     }
+    if os.getenv('POSTGRES_POOL_MAX_SIZE'):
+        # Connection pool shared by a worker's threads (needs psycopg 3 and
+        # Django 5.1+); replaces persistent connections
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE')),
+            'timeout': int(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+        }
+    if os.getenv('POSTGRES_PGBOUNCER') == '1':
+        # PgBouncer in transaction mode can't keep the server-side cursors
+        # behind QuerySet.iterator() open across statements
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    if os.getenv('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.getenv('POSTGRES_REPLICA_HOST'),
+            'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Report, analytics and export reads go to the 'replica' alias when there is
+# one (admin_api.db_routing): GET/HEAD requests served by a view in one of
+# these modules or whose path contains one of these parts
+DATABASE_ROUTERS = ['admin_api.db_routing.ReplicaRouter']
+DATABASE_REPLICA_VIEW_MODULES = [
+    'admin_api.views.advanced_reports',
+    'admin_api.views.report_analytics',
+    'admin_api.views.enhanced_reports',
+]
+DATABASE_REPLICA_PATH_PARTS = ['export']
+# After a write the client reads from the primary for this long
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 5))
+# The replica is skipped while unreachable or lagging more than this;
+# re-checked at most every DATABASE_REPLICA_HEALTH_SECONDS per process
+DATABASE_REPLICA_MAX_LAG_SECONDS = int(os.getenv('DATABASE_REPLICA_MAX_LAG_SECONDS', 30))
+DATABASE_REPLICA_HEALTH_SECONDS = int(os.getenv('DATABASE_REPLICA_HEALTH_SECONDS', 10))
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -125,11 +189,39 @@ ALLOWED_FILE_TYPES = os.getenv(
     'ALLOWED_FILE_TYPES',
     'pdf,doc,docx,xls,xlsx,jpg,jpeg,png').split(',')
 DATA_UPLOAD_MAX_MEMORY_SIZE = MAX_UPLOAD_SIZE
+# Uploads above this size are spooled to a temporary file instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', 2621440))  # 2.5MB
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR') or None
+
+# Content-addressed file storage (assignment attachments and submissions).
+# Blobs live outside MEDIA_ROOT and are only served through the API.
+PRIVATE_STORAGE_ROOT = Path(os.getenv('PRIVATE_STORAGE_ROOT', BASE_DIR / 'private'))
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'blobs': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': PRIVATE_STORAGE_ROOT / 'blobs'},
+    },
+}
+CHUNKED_UPLOAD_DIR = PRIVATE_STORAGE_ROOT / 'partial'
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 524288000))  # 500MB
+# 'X-Sendfile' (Apache/lighttpd) or 'X-Accel-Redirect' (nginx) to hand
+# downloads to the web server; empty streams them from Django.
+FILE_SENDFILE_HEADER = os.getenv('FILE_SENDFILE_HEADER', '')
+FILE_SENDFILE_PREFIX = os.getenv('FILE_SENDFILE_PREFIX', '/protected/blobs/')
 
 # Payment Gateway (Stripe)
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
 STRIPE_PUBLIC_KEY = os.getenv('STRIPE_PUBLIC_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+# Webhook events are stored on receipt and applied by a background job
+# (admin_api.stripe_inbox) this many at a time
+STRIPE_WEBHOOK_BATCH_SIZE = int(os.getenv('STRIPE_WEBHOOK_BATCH_SIZE', 200))
 
 # Redis (for caching and background tasks)
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -187,12 +279,6 @@ if not DEBUG:
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
 
-    # Database connection pooling for production
-    DATABASES['default']['CONN_MAX_AGE'] = 600
-    DATABASES['default']['OPTIONS'] = {
-        'connect_timeout': 10,
-    }
-
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -219,19 +305,87 @@ LOGGING = {
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': False,
         },
+        'admin_api.query_metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('QUERY_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
 
+# Per-request SQL instrumentation (admin_api.middleware.QueryMetricsMiddleware)
+QUERY_METRICS_ENABLED = os.getenv('QUERY_METRICS_ENABLED', '1') == '1'
+QUERY_METRICS_LOG_MIN_QUERIES = int(os.getenv('QUERY_METRICS_LOG_MIN_QUERIES', '0'))
+
+# Audit log (admin_api.middleware.AuditLogMiddleware, admin_api.audit_log).
+# Entries are buffered per process and bulk-inserted every
+# AUDIT_LOG_BATCH_SIZE entries or AUDIT_LOG_FLUSH_SECONDS; with the 'redis'
+# backend batches go to a Redis list drained by `manage.py flush_audit_log`.
+AUDIT_LOG_ENABLED = os.getenv('AUDIT_LOG_ENABLED', '1') == '1'
+AUDIT_LOG_ASYNC = os.getenv('AUDIT_LOG_ASYNC', '1') == '1'
+AUDIT_LOG_BACKEND = os.getenv('AUDIT_LOG_BACKEND', 'memory')
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', 200))
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv('AUDIT_LOG_FLUSH_SECONDS', 2))
+AUDIT_LOG_MAX_BUFFER = int(os.getenv('AUDIT_LOG_MAX_BUFFER', 10000))
+AUDIT_LOG_REDIS_KEY = 'audit_log:queue'
+# Fraction of successful GETs logged; GETs whose path contains one of
+# AUDIT_LOG_GET_ALWAYS are always logged (as 'export')
+AUDIT_LOG_GET_SAMPLE_RATE = float(os.getenv('AUDIT_LOG_GET_SAMPLE_RATE', 0))
+AUDIT_LOG_GET_ALWAYS = ['/export']
+AUDIT_LOG_SKIP_PATHS = ['/api/auth/token/', '/api/health/', '/api/admin/notifications/']
+# Rows older than this are moved to monthly gzipped JSONL files by
+# `manage.py archive_audit_logs`
+AUDIT_LOG_RETENTION_DAYS = int(os.getenv('AUDIT_LOG_RETENTION_DAYS', 180))
+AUDIT_LOG_ARCHIVE_DIR = Path(os.getenv('AUDIT_LOG_ARCHIVE_DIR', PRIVATE_STORAGE_ROOT / 'audit_archive'))
+
+# Background jobs (admin_api.jobs). Endpoints marked allow_async answer
+# ?async=1 with 202 and a job id. JOBS_RUNNER 'thread' runs jobs on a thread
+# of the web process; 'workers' leaves them to `manage.py run_workers`, woken
+# through a Redis list with JOBS_QUEUE_BACKEND 'redis' instead of polling.
+JOBS_RUNNER = os.getenv('JOBS_RUNNER', 'thread')
+JOBS_QUEUE_BACKEND = os.getenv('JOBS_QUEUE_BACKEND', 'db')
+JOBS_REDIS_KEY = 'jobs:queue'
+JOBS_WORKER_PROCESSES = int(os.getenv('JOBS_WORKER_PROCESSES', 2))
+JOBS_POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', 2))
+JOBS_PROGRESS_SECONDS = 1
+# A running job not heard from for this long is requeued (up to
+# JOBS_MAX_ATTEMPTS runs in total) or failed
+JOBS_STALE_SECONDS = int(os.getenv('JOBS_STALE_SECONDS', 300))
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 1))
+JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', 30))
+# Uploads of queued requests wait here until the job has run
+JOBS_SPOOL_DIR = PRIVATE_STORAGE_ROOT / 'jobs'
+
+# Startup budget enforced by `manage.py check_import_time` (run in CI):
+# milliseconds a fresh interpreter may spend importing the URL conf after
+# django.setup(). pandas, openpyxl, reportlab and stripe are loaded on first
+# use (admin_api.lazy_imports) and fail the check if the URL conf imports them.
+IMPORT_TIME_BUDGET_MS = int(os.getenv('IMPORT_TIME_BUDGET_MS', 800))
+
+# Letter grades (admin_api.grading_scale) come from the active GradeScale
+# rows named GRADING_SCALE_NAME (empty: the first scale configured), or from
+# GRADING_SCALE ((grade, min_percentage, grade_point) tuples) when none are
+# active. Each process rechecks for an edited scale at most this often.
+GRADING_SCALE_NAME = os.getenv('GRADING_SCALE_NAME', '')
+GRADING_SCALE_CHECK_SECONDS = int(os.getenv('GRADING_SCALE_CHECK_SECONDS', 5))
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication with the user resolved from a short-lived cache
+        'users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Bounded page sizes (?page_size= up to 100); the append-heavy tables
+    # use keyset pagination, see admin_api.pagination
+    'DEFAULT_PAGINATION_CLASS': 'admin_api.pagination.BoundedPageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# Seconds an authenticated user's id, role and flags are served from the
+# cache; the entry is dropped whenever the user row changes
+AUTH_USER_CACHE_SECONDS = int(os.getenv('AUTH_USER_CACHE_SECONDS', 60))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(
         minutes=int(
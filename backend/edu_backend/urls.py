@@ -5,6 +5,7 @@ from django.http import JsonResponse
 from django.db import connection
 from rest_framework_simplejwt.views import TokenRefreshView
 from users.views import RegisterView, EmailTokenObtainPairView
+from admin_api import db_routing
 import sys
 
 
@@ -20,11 +21,20 @@ def health_check(request):
         with connection.cursor() as cursor:
             cursor.execute("SELECT 1")
 
-        return JsonResponse({
+        data = {
             'status': 'healthy',
             'database': 'connected',
             'python_version': sys.version.split()[0],
-        })
+        }
+        if db_routing.replica_configured():
+            # Reads fall back to the primary, so a bad replica only degrades
+            replica = db_routing.check_database(db_routing.REPLICA_ALIAS)
+            data['replica'] = 'connected' if replica['ok'] else 'unavailable'
+            data['replica_lag_seconds'] = replica['lag_seconds']
+            if not replica['ok']:
+                data['status'] = 'degraded'
+                data['replica_error'] = replica['error']
+        return JsonResponse(data)
     except Exception as e:
         return JsonResponse({
             'status': 'unhealthy',
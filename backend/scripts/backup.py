@@ -2,12 +2,37 @@
 """
 Database backup script for EduManage
 Supports both SQLite and PostgreSQL databases
+
+Usage:
+    python scripts/backup.py                      # database, per-model data, media
+    python scripts/backup.py --jobs 8 --compression zstd
+    python scripts/backup.py --verify             # check the latest backup
+    python scripts/backup.py --verify backups/backup_20250101_020000
+
+Each run writes ``backups/backup_<timestamp>/`` (layout in backup_format.py):
+
+- a consistent copy of the database: the SQLite online backup API, or a
+  ``pg_dump -F d -j N`` directory on PostgreSQL
+- every model's rows as compressed JSONL chunks, dumped in parallel by a
+  process pool from that same point in time (the SQLite copy, or an
+  exported PostgreSQL snapshot)
+- media files in a content-addressed store shared by all backups, so only
+  new or changed files are written
+- ``manifest.json`` with the row count and SHA-256 of every file, which
+  ``--verify`` and restore.py check
 """
+import argparse
+import base64
+import json
 import os
-import sys
-import subprocess
 import shutil
-from datetime import datetime
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, time as dt_time
+from multiprocessing import get_context
 from pathlib import Path
 
 # Add parent directory to path
@@ -18,137 +43,361 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edu_backend.settings')
 import django
 django.setup()
 
+from django.apps import apps
 from django.conf import settings
-from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.db.models import Max, Min
+from django.db.migrations.recorder import MigrationRecorder
+
+from backup_format import (
+    EXTENSIONS, FORMAT_VERSION, MEDIA_STORE, blob_path, dumped_models, list_backups,
+    open_compressed, read_manifest, sha256_file, use_database, verify_backup, write_manifest,
+)
+
+
+BACKUP_ROOT = Path(__file__).parent.parent / 'backups'
+SNAPSHOT_ALIAS = 'backup_snapshot'
+# Sessions are disposable and recreated on login
+EXCLUDED_MODELS = ('sessions',)
+CHUNK_ROWS = 100000
+
+
+class BackupEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime, dt_time)):
+            # DjangoJSONEncoder rounds these to milliseconds
+            return o.isoformat()
+        if isinstance(o, (bytes, memoryview)):
+            # BinaryField.to_python decodes base64 strings on restore
+            return base64.b64encode(bytes(o)).decode()
+        return super().default(o)
 
 
 def create_backup_directory():
     """Create backup directory if it doesn't exist"""
-    backup_dir = Path(__file__).parent.parent / 'backups'
-    backup_dir.mkdir(exist_ok=True)
-    return backup_dir
+    BACKUP_ROOT.mkdir(exist_ok=True)
+    return BACKUP_ROOT
+
+
+def use_snapshot_database(config):
+    """Point the ``backup_snapshot`` alias at ``config``"""
+    use_database(SNAPSHOT_ALIAS, config)
 
 
-def backup_sqlite():
-    """Backup SQLite database"""
+# ==================== DATABASE ====================
+
+def backup_sqlite(backup_dir):
+    """Consistent copy of the SQLite database through the online backup API"""
     print("Starting SQLite backup...")
-    
+
     db_path = settings.DATABASES['default']['NAME']
     if not os.path.exists(db_path):
-        print(f"Error: Database file not found: {db_path}")
-        return False
-    
-    backup_dir = create_backup_directory()
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_file = backup_dir / f'db_backup_{timestamp}.sqlite3'
-    
+        raise RuntimeError(f"Database file not found: {db_path}")
+
+    target = backup_dir / 'db.sqlite3'
+    started = time.monotonic()
+    source = sqlite3.connect(str(db_path))
+    destination = sqlite3.connect(str(target))
     try:
-        shutil.copy2(db_path, backup_file)
-        print(f"✓ SQLite backup created: {backup_file}")
-        
-        # Create a JSON dump as well
-        json_file = backup_dir / f'data_backup_{timestamp}.json'
-        with open(json_file, 'w') as f:
-            call_command('dumpdata', '--natural-foreign', '--natural-primary', 
-                        '--indent', '2', stdout=f, exclude=['contenttypes', 'auth.permission'])
-        print(f"✓ JSON data dump created: {json_file}")
-        
-        return True
-    except Exception as e:
-        print(f"✗ Backup failed: {e}")
-        return False
+        # One step: the copy is a single point in time even while the
+        # server keeps writing (writers wait, or carry on under WAL)
+        source.backup(destination)
+    finally:
+        destination.close()
+        source.close()
+    print(f"✓ SQLite backup created: {target} ({time.monotonic() - started:.1f}s)")
+    return {'vendor': 'sqlite', 'files': {'db.sqlite3': sha256_file(target)}}
 
 
-def backup_postgresql():
-    """Backup PostgreSQL database"""
+def backup_postgresql(backup_dir, jobs, snapshot):
+    """``pg_dump`` directory-format dump with ``jobs`` parallel workers"""
     print("Starting PostgreSQL backup...")
-    
+
     db_config = settings.DATABASES['default']
-    backup_dir = create_backup_directory()
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_file = backup_dir / f'db_backup_{timestamp}.sql'
-    
+    target = backup_dir / 'db.pgdump'
+
     # Set environment variables for pg_dump
     env = os.environ.copy()
     env['PGPASSWORD'] = db_config['PASSWORD']
-    
+
     cmd = [
         'pg_dump',
         '-h', db_config['HOST'],
         '-p', str(db_config['PORT']),
         '-U', db_config['USER'],
         '-d', db_config['NAME'],
-        '-F', 'c',  # Custom format (compressed)
-        '-f', str(backup_file)
+        '-F', 'd',  # Directory format, required for parallel dumps
+        '-j', str(jobs),
+        '-Z', '6',
+        # Same point in time as the JSONL dumps
+        '--snapshot', snapshot,
+        '-f', str(target),
     ]
-    
     try:
         subprocess.run(cmd, check=True, env=env, capture_output=True)
-        print(f"✓ PostgreSQL backup created: {backup_file}")
-        
-        # Create a JSON dump as well
-        json_file = backup_dir / f'data_backup_{timestamp}.json'
-        with open(json_file, 'w') as f:
-            call_command('dumpdata', '--natural-foreign', '--natural-primary', 
-                        '--indent', '2', stdout=f, exclude=['contenttypes', 'auth.permission'])
-        print(f"✓ JSON data dump created: {json_file}")
-        
-        return True
     except subprocess.CalledProcessError as e:
-        print(f"✗ Backup failed: {e}")
-        print(f"Error output: {e.stderr.decode() if e.stderr else 'No error output'}")
-        return False
+        raise RuntimeError(f"pg_dump failed: {e.stderr.decode() if e.stderr else e}")
     except FileNotFoundError:
-        print("✗ pg_dump not found. Please install PostgreSQL client tools.")
-        return False
+        raise RuntimeError("pg_dump not found. Please install PostgreSQL client tools.")
+    print(f"✓ PostgreSQL backup created: {target}")
+    return {
+        'vendor': 'postgresql',
+        'files': {
+            str(path.relative_to(backup_dir)): sha256_file(path)
+            for path in sorted(target.iterdir())
+        },
+    }
+
+
+# ==================== DATA ====================
+
+_snapshot_id = None
+
+
+def init_worker(config, snapshot_id):
+    global _snapshot_id
+    use_snapshot_database(config)
+    _snapshot_id = snapshot_id
+
+
+def dump_chunk(task):
+    """Write one pk range of a model to a compressed JSONL file"""
+    label, fields, low, high, path, compression = task
+    model = apps.get_model(label)
+    queryset = model._base_manager.using(SNAPSHOT_ALIAS).order_by('pk').values_list(*fields)
+    if low is not None:
+        queryset = queryset.filter(pk__gte=low, pk__lte=high)
+
+    rows = 0
+    with transaction.atomic(using=SNAPSHOT_ALIAS):
+        if _snapshot_id:
+            with connections[SNAPSHOT_ALIAS].cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [_snapshot_id])
+        with open_compressed(path, 'w', compression) as handle:
+            for row in queryset.iterator(chunk_size=2000):
+                handle.write(json.dumps(row, cls=BackupEncoder, separators=(',', ':')))
+                handle.write('\n')
+                rows += 1
+    return {'rows': rows, 'sha256': sha256_file(path), 'bytes': os.path.getsize(path)}
+
+
+def plan_chunks(model, chunk_rows):
+    """Primary key ranges of about ``chunk_rows`` keys; one open range for non-integer keys"""
+    if model._meta.pk.get_internal_type() not in ('AutoField', 'BigAutoField', 'SmallAutoField',
+                                                 'IntegerField', 'BigIntegerField'):
+        return [(None, None)]
+    bounds = model._base_manager.using(SNAPSHOT_ALIAS).aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    return [
+        (start, min(start + chunk_rows - 1, bounds['high']))
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_rows)
+    ]
+
+
+def backup_data(backup_dir, config, snapshot_id, jobs, compression, chunk_rows):
+    """Dump every model in parallel; returns the manifest's ``models`` list"""
+    print("Dumping model data...")
+    started = time.monotonic()
+    data_dir = backup_dir / 'data'
+    entries = []
+    tasks = []
+    chunks = []
+    tables = set(connections[SNAPSHOT_ALIAS].introspection.table_names())
+    for model in dumped_models(exclude=EXCLUDED_MODELS):
+        if model._meta.db_table not in tables:
+            # Declared but not migrated yet
+            continue
+        label = model._meta.label_lower
+        fields = [field.attname for field in model._meta.concrete_fields]
+        entry = {
+            'label': label,
+            'table': model._meta.db_table,
+            'fields': fields,
+            'rows': 0,
+            'chunks': [],
+        }
+        entries.append(entry)
+        (data_dir / label).mkdir(parents=True, exist_ok=True)
+        for number, (low, high) in enumerate(plan_chunks(model, chunk_rows)):
+            relative = f'data/{label}/{number:05d}{EXTENSIONS[compression]}'
+            chunk = {'file': relative}
+            entry['chunks'].append(chunk)
+            chunks.append((entry, chunk))
+            tasks.append((label, fields, low, high, str(backup_dir / relative), compression))
+
+    # spawn, not fork: the children must not share this process's
+    # connection, which holds the exported snapshot open
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn'),
+                             initializer=init_worker, initargs=(config, snapshot_id)) as pool:
+        for (entry, chunk), result in zip(chunks, pool.map(dump_chunk, tasks)):
+            chunk.update(result)
+            entry['rows'] += result['rows']
 
+    total = sum(entry['rows'] for entry in entries)
+    print(f"✓ {total:,} rows of {len(entries)} models in {len(tasks)} chunks "
+          f"({time.monotonic() - started:.1f}s)")
+    return entries
 
-def backup_media_files():
-    """Backup media files (uploads)"""
+
+# ==================== MEDIA ====================
+
+def media_roots():
+    roots = {}
+    if getattr(settings, 'MEDIA_ROOT', None):
+        roots['media'] = Path(settings.MEDIA_ROOT)
+    if getattr(settings, 'PRIVATE_STORAGE_ROOT', None):
+        roots['private'] = Path(settings.PRIVATE_STORAGE_ROOT) / 'blobs'
+    return {name: path for name, path in roots.items() if path.exists()}
+
+
+def store_blob(source, store):
+    """Hash ``source`` and copy it into the store unless that content is there already"""
+    import gzip
+
+    sha256 = sha256_file(source)
+    target = blob_path(store, sha256)
+    if target.exists():
+        return sha256, False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_suffix(f'.{os.getpid()}.tmp')
+    with open(source, 'rb') as reader, gzip.open(temporary, 'wb', compresslevel=6) as writer:
+        shutil.copyfileobj(reader, writer, 1024 * 1024)
+    temporary.replace(target)
+    return sha256, True
+
+
+def backup_media_files(previous, jobs):
+    """Incremental media backup; returns the manifest's ``media`` entry"""
     print("Backing up media files...")
-    
-    media_root = settings.MEDIA_ROOT if hasattr(settings, 'MEDIA_ROOT') else None
-    if not media_root or not os.path.exists(media_root):
+
+    roots = media_roots()
+    if not roots:
         print("No media directory found, skipping...")
-        return True
-    
-    backup_dir = create_backup_directory()
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    media_backup = backup_dir / f'media_backup_{timestamp}'
-    
-    try:
-        shutil.copytree(media_root, media_backup)
-        
-        # Create tar.gz archive
-        shutil.make_archive(str(media_backup), 'gztar', media_root)
-        shutil.rmtree(media_backup)  # Remove uncompressed copy
-        
-        print(f"✓ Media files backup created: {media_backup}.tar.gz")
-        return True
-    except Exception as e:
-        print(f"✗ Media backup failed: {e}")
-        return False
+        return None
+
+    store = BACKUP_ROOT / MEDIA_STORE
+    known = {}
+    if previous and previous.get('media'):
+        known = {(entry['root'], entry['path']): entry for entry in previous['media']['files']}
+
+    files = []
+    pending = []
+    for name, root in roots.items():
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(directory) / filename
+                stat = path.stat()
+                entry = {
+                    'root': name,
+                    'path': path.relative_to(root).as_posix(),
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                }
+                before = known.get((name, entry['path']))
+                if (before and before['size'] == entry['size']
+                        and before['mtime_ns'] == entry['mtime_ns']
+                        and blob_path(store, before['sha256']).exists()):
+                    # Unchanged since the previous backup: no need to read it
+                    entry['sha256'] = before['sha256']
+                else:
+                    pending.append((entry, path))
+                files.append(entry)
+
+    written = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(lambda item: store_blob(item[1], store), pending)
+        for (entry, _), (sha256, new) in zip(pending, results):
+            entry['sha256'] = sha256
+            written += new
 
+    print(f"✓ {len(files)} media files, {len(pending)} changed, {written} new blobs stored")
+    return {
+        'roots': {name: str(path) for name, path in roots.items()},
+        'files': files,
+        'new_blobs': written,
+    }
+
+
+# ==================== CLEANUP ====================
 
 def cleanup_old_backups(keep_days=30):
-    """Remove backups older than specified days"""
+    """Remove backups older than specified days and media blobs no backup uses"""
     print(f"\nCleaning up backups older than {keep_days} days...")
-    
+
     backup_dir = create_backup_directory()
     cutoff_time = datetime.now().timestamp() - (keep_days * 24 * 60 * 60)
-    
+
     removed_count = 0
-    for file in backup_dir.iterdir():
-        if file.is_file() and file.stat().st_mtime < cutoff_time:
-            file.unlink()
-            removed_count += 1
-            print(f"  Removed: {file.name}")
-    
+    # Always keep the newest complete backup
+    keep = set(list_backups(backup_dir)[:1])
+    for path in backup_dir.iterdir():
+        if path.name == MEDIA_STORE or path in keep or path.stat().st_mtime >= cutoff_time:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        removed_count += 1
+        print(f"  Removed: {path.name}")
+
+    store = backup_dir / MEDIA_STORE
+    if store.exists():
+        used = set()
+        for backup in list_backups(backup_dir):
+            media = read_manifest(backup).get('media') or {}
+            used.update(entry['sha256'] for entry in media.get('files', []))
+        orphans = [blob for blob in store.glob('*/*.gz') if blob.name[:-3] not in used]
+        for blob in orphans:
+            blob.unlink()
+            if not any(blob.parent.iterdir()):
+                blob.parent.rmdir()
+        if orphans:
+            print(f"  Removed {len(orphans)} unreferenced media blob(s)")
+
     print(f"✓ Cleaned up {removed_count} old backup(s)")
 
 
-def main():
+# ==================== VERIFY ====================
+
+def verify(target):
+    if target == 'latest':
+        backups = list_backups(BACKUP_ROOT)
+        if not backups:
+            print("✗ No backups found.")
+            return 1
+        target = backups[0]
+    target = Path(target)
+    print(f"Verifying {target}...")
+    problems = verify_backup(target, store=BACKUP_ROOT / MEDIA_STORE)
+    for problem in problems:
+        print(f"  ✗ {problem}")
+    if problems:
+        print(f"✗ {len(problems)} problem(s) found")
+        return 1
+    print("✓ Every file matches the manifest")
+    return 0
+
+
+def main(argv=None):
     """Main backup function"""
+    parser = argparse.ArgumentParser(description='Back up the EduManage database and media')
+    parser.add_argument('--jobs', type=int, default=min(os.cpu_count() or 2, 8),
+                        help='Parallel dump workers')
+    parser.add_argument('--compression', choices=sorted(EXTENSIONS), default='gzip')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help='Primary keys per data chunk')
+    parser.add_argument('--skip-media', action='store_true')
+    parser.add_argument('--keep-days', type=int, default=30)
+    parser.add_argument('--verify', nargs='?', const='latest', metavar='BACKUP',
+                        help='Check a backup (default: the latest) against its manifest')
+    options = parser.parse_args(argv)
+
+    if options.verify:
+        return verify(options.verify)
+
     print("=" * 60)
     print("EduManage Database Backup Utility")
     print("=" * 60)
@@ -156,27 +405,65 @@ def main():
     print(f"Database Engine: {settings.DATABASES['default']['ENGINE']}")
     print("=" * 60)
     print()
-    
+
+    create_backup_directory()
+    previous = list_backups(BACKUP_ROOT)
+    previous = read_manifest(previous[0]) if previous else None
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_dir = BACKUP_ROOT / f'backup_{timestamp}'
+    backup_dir.mkdir()
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'compression': options.compression,
+        'migrations': [list(key) for key in sorted(MigrationRecorder(connection).applied_migrations())],
+    }
+
     # Determine database type
     engine = settings.DATABASES['default']['ENGINE']
-    
-    if 'sqlite' in engine:
-        success = backup_sqlite()
-    elif 'postgresql' in engine:
-        success = backup_postgresql()
-    else:
-        print(f"✗ Unsupported database engine: {engine}")
-        return 1
-    
-    if not success:
+    try:
+        if 'sqlite' in engine:
+            manifest['database'] = backup_sqlite(backup_dir)
+            config = dict(connections['default'].settings_dict, NAME=str(backup_dir / 'db.sqlite3'))
+            use_snapshot_database(config)
+            manifest['models'] = backup_data(
+                backup_dir, config, None, options.jobs, options.compression, options.chunk_rows)
+        elif 'postgresql' in engine:
+            config = dict(connections['default'].settings_dict)
+            use_snapshot_database(config)
+            with transaction.atomic(using=SNAPSHOT_ALIAS):
+                with connections[SNAPSHOT_ALIAS].cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                    cursor.execute('SELECT pg_export_snapshot()')
+                    snapshot = cursor.fetchone()[0]
+                # The snapshot stays valid while this transaction is open
+                manifest['database'] = backup_postgresql(backup_dir, options.jobs, snapshot)
+                manifest['models'] = backup_data(
+                    backup_dir, config, snapshot, options.jobs, options.compression,
+                    options.chunk_rows)
+        else:
+            print(f"✗ Unsupported database engine: {engine}")
+            shutil.rmtree(backup_dir)
+            return 1
+    except Exception as e:
+        print(f"✗ Backup failed: {e}")
+        shutil.rmtree(backup_dir, ignore_errors=True)
         return 1
-    
+
     # Backup media files
-    backup_media_files()
-    
+    if not options.skip_media:
+        try:
+            manifest['media'] = backup_media_files(previous, options.jobs)
+        except Exception as e:
+            print(f"✗ Media backup failed: {e}")
+
+    write_manifest(backup_dir, manifest)
+    print(f"✓ Manifest written: {backup_dir / 'manifest.json'}")
+
     # Cleanup old backups
-    cleanup_old_backups()
-    
+    cleanup_old_backups(options.keep_days)
+
     print("\n" + "=" * 60)
     print("✓ Backup completed successfully!")
     print("=" * 60)
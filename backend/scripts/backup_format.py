@@ -0,0 +1,179 @@
+"""
+On-disk format shared by backup.py and restore.py
+
+A backup is a directory ``backups/backup_<timestamp>/`` holding:
+
+    manifest.json            what is in the backup and the checksum of every file
+    db.sqlite3               SQLite: consistent copy made with the online backup API
+    db.pgdump/               PostgreSQL: ``pg_dump -F d -j N`` directory
+    data/<app.model>/<n>.jsonl.gz
+                             rows of one model, one JSON array per line in the
+                             order of the manifest's ``fields``; ``.jsonl.zst``
+                             with --compression zstd
+
+Media files are stored once per content in ``backups/media_store/<aa>/<sha256>.gz``
+and listed by every backup's manifest, so a backup only writes the files
+that changed since the previous one.
+"""
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+
+FORMAT_VERSION = 2
+MANIFEST = 'manifest.json'
+MEDIA_STORE = 'media_store'
+HASH_BLOCK = 1024 * 1024
+EXTENSIONS = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+
+
+# ==================== FILES ====================
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def open_compressed(path, mode, compression=None):
+    """Text-mode stream over a gzip or zstd file; ``compression`` defaults to the suffix"""
+    path = Path(path)
+    compression = compression or ('zstd' if path.suffix == '.zst' else 'gzip')
+    if compression == 'gzip':
+        # Level 6 is ~3x faster than 9 for a few percent of size
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError('zstd compression needs the zstandard package')
+        return zstandard.open(path, mode + 't', encoding='utf-8')
+    raise ValueError(f'Unknown compression: {compression}')
+
+
+def blob_path(store, sha256):
+    return Path(store) / sha256[:2] / f'{sha256}.gz'
+
+
+def read_manifest(backup_dir):
+    with open(Path(backup_dir) / MANIFEST) as handle:
+        return json.load(handle)
+
+
+def write_manifest(backup_dir, manifest):
+    # Written last and renamed into place: a backup without a manifest is
+    # an incomplete one
+    path = Path(backup_dir) / MANIFEST
+    temporary = path.with_suffix('.tmp')
+    with open(temporary, 'w') as handle:
+        json.dump(manifest, handle, indent=1)
+    temporary.replace(path)
+
+
+def list_backups(root):
+    """Complete backup directories under ``root``, newest first"""
+    root = Path(root)
+    if not root.exists():
+        return []
+    backups = [path for path in root.glob('backup_*') if (path / MANIFEST).exists()]
+    return sorted(backups, key=lambda path: path.name, reverse=True)
+
+
+# ==================== MODELS ====================
+
+def use_database(alias, config):
+    """Register (or repoint) the connection alias ``alias`` at runtime"""
+    from django.db import connections
+
+    connections.settings[alias] = config
+    if hasattr(connections._connections, alias):
+        delattr(connections._connections, alias)
+
+
+def dumped_models(exclude=()):
+    """Concrete models with a table of their own, each after the models it references"""
+    from django.apps import apps
+
+    models = [
+        model for model in apps.get_models(include_auto_created=True)
+        if not model._meta.proxy and model._meta.managed
+        and model._meta.label_lower not in exclude
+        and model._meta.app_label not in exclude
+    ]
+    by_label = {model._meta.label_lower: model for model in models}
+    depends = {}
+    for model in models:
+        depends[model._meta.label_lower] = {
+            field.related_model._meta.concrete_model._meta.label_lower
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not None
+        } & set(by_label) - {model._meta.label_lower}
+
+    ordered = []
+    done = set()
+    remaining = sorted(by_label)
+    while remaining:
+        ready = [label for label in remaining if depends[label] <= done]
+        if not ready:
+            # A reference cycle: take the model with the fewest unmet
+            # references; restore loads it with constraints deferred
+            ready = [min(remaining, key=lambda label: len(depends[label] - done))]
+        for label in ready:
+            ordered.append(by_label[label])
+            done.add(label)
+        remaining = [label for label in remaining if label not in done]
+    return ordered
+
+
+# ==================== VERIFICATION ====================
+
+def count_lines(path):
+    with open_compressed(path, 'r') as handle:
+        return sum(1 for _ in handle)
+
+
+def verify_backup(backup_dir, store=None, check_rows=True):
+    """Problems found checking ``backup_dir`` against its manifest; empty when intact"""
+    backup_dir = Path(backup_dir)
+    manifest = read_manifest(backup_dir)
+    problems = []
+
+    def check(relative, expected):
+        path = backup_dir / relative
+        if not path.exists():
+            problems.append(f'missing {relative}')
+        elif sha256_file(path) != expected:
+            problems.append(f'checksum mismatch {relative}')
+        else:
+            return True
+        return False
+
+    database = manifest.get('database', {})
+    for relative, expected in database.get('files', {}).items():
+        check(relative, expected)
+
+    for model in manifest.get('models', []):
+        for chunk in model['chunks']:
+            if check(chunk['file'], chunk['sha256']) and check_rows:
+                rows = count_lines(backup_dir / chunk['file'])
+                if rows != chunk['rows']:
+                    problems.append(f"{chunk['file']}: {rows} rows, manifest says {chunk['rows']}")
+
+    media = manifest.get('media')
+    if media:
+        store = Path(store) if store else backup_dir.parent / MEDIA_STORE
+        for sha256 in {entry['sha256'] for entry in media['files']}:
+            path = blob_path(store, sha256)
+            if not path.exists():
+                problems.append(f'missing media blob {sha256}')
+                continue
+            digest = hashlib.sha256()
+            with gzip.open(path, 'rb') as handle:
+                for block in iter(lambda: handle.read(HASH_BLOCK), b''):
+                    digest.update(block)
+            if digest.hexdigest() != sha256:
+                problems.append(f'checksum mismatch media blob {sha256}')
+    return problems
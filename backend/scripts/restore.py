@@ -2,12 +2,47 @@
 """
 Database restore script for EduManage
 Supports both SQLite and PostgreSQL databases
+
+Usage:
+    python scripts/restore.py                              # pick a backup interactively
+    python scripts/restore.py --latest --yes               # the newest backup, unattended
+    python scripts/restore.py backups/backup_20250101_020000 --jobs 8 --yes
+    python scripts/restore.py backups/backup_20250101_020000 --dry-run
+    python scripts/restore.py backups/backup_20250101_020000 --method database
+
+Backups written by backup.py (see backup_format.py) are restored by:
+
+1. checking every file against the manifest's checksums
+2. emptying the target tables and dropping their secondary indexes and
+   foreign keys (SQLite: index DDL plus ``PRAGMA foreign_keys = OFF``;
+   PostgreSQL: index and constraint DDL)
+3. loading the per-model JSONL chunks in dependency order through a
+   process pool, each chunk streamed and inserted in batches
+4. recreating the indexes and constraints (which checks every foreign key
+   once) and resetting sequences
+5. comparing every table's row count with the manifest
+6. streaming media files out of the content-addressed store
+
+``--dry-run`` does all of this into a scratch database instead, then
+reports, table by table, the rows that the restore would add, remove or
+change in the live database. ``--method database`` restores the database
+copy instead (SQLite online backup API, ``pg_restore -j``).
+
+Backups in the old single-file format are still restored as before.
 """
+import argparse
+import gzip
+import hashlib
+import json
 import os
-import sys
-import subprocess
 import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+from multiprocessing import get_context
 from pathlib import Path
 
 # Add parent directory to path
@@ -18,37 +53,493 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edu_backend.settings')
 import django
 django.setup()
 
+from django.apps import apps
 from django.conf import settings
 from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from backup_format import (
+    MEDIA_STORE, blob_path, list_backups, open_compressed, read_manifest, sha256_file,
+    use_database, verify_backup,
+)
+
+
+BACKUP_ROOT = Path(__file__).parent.parent / 'backups'
+TARGET_ALIAS = 'restore_target'
+SCRATCH_SUFFIX = '_restore_scratch'
+INSERT_BATCH = 2000
 
 
 def list_available_backups():
     """List all available backup files"""
-    backup_dir = Path(__file__).parent.parent / 'backups'
-    
+    backup_dir = BACKUP_ROOT
+
     if not backup_dir.exists():
         print("No backup directory found.")
         return []
-    
+
     backups = list(backup_dir.glob('db_backup_*.sqlite3')) + \
               list(backup_dir.glob('db_backup_*.sql')) + \
-              list(backup_dir.glob('data_backup_*.json'))
-    
+              list(backup_dir.glob('data_backup_*.json')) + \
+              list_backups(backup_dir)
+
     return sorted(backups, key=lambda x: x.stat().st_mtime, reverse=True)
 
 
+# ==================== TARGET DATABASE ====================
+
+def target_config(scratch=None):
+    """Connection settings for the restore: the live database or a scratch copy"""
+    config = dict(connections['default'].settings_dict)
+    config['OPTIONS'] = dict(config.get('OPTIONS') or {})
+    if config['ENGINE'].endswith('sqlite3'):
+        # Loader processes take turns writing; let them wait for the lock
+        config['OPTIONS']['timeout'] = 600
+    if scratch:
+        config['NAME'] = str(scratch)
+    return config
+
+
+def create_scratch_database(scratch):
+    """Empty, migrated database called ``scratch`` (a file path on SQLite)"""
+    engine = settings.DATABASES['default']['ENGINE']
+    if 'sqlite' in engine:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+    else:
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{scratch}"')
+            cursor.execute(f'CREATE DATABASE "{scratch}"')
+    use_database(TARGET_ALIAS, target_config(scratch))
+    print(f"Migrating scratch database {scratch}...")
+    call_command('migrate', database=TARGET_ALIAS, verbosity=0, interactive=False)
+
+
+def drop_scratch_database(scratch):
+    connections[TARGET_ALIAS].close()
+    if 'sqlite' in settings.DATABASES['default']['ENGINE']:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+    else:
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{scratch}"')
+
+
+def check_migrations(manifest, alias):
+    applied = {tuple(key) for key in MigrationRecorder(connections[alias]).applied_migrations()}
+    recorded = {tuple(key) for key in manifest.get('migrations', [])}
+    if applied != recorded:
+        print(f"⚠ The backup was taken at a different migration state "
+              f"({len(recorded - applied)} migration(s) only in the backup, "
+              f"{len(applied - recorded)} only in the target); "
+              f"columns missing on either side are skipped")
+
+
+# ==================== DEFERRED INDEXES ====================
+
+def defer_indexes(alias, tables):
+    """
+    Drop the secondary indexes and foreign keys of ``tables``; returns the
+    DDL that recreates them
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})", tables)
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX "{name}"')
+            return {'indexes': [sql for _, sql in indexes], 'constraints': []}
+
+        if connection.vendor == 'postgresql':
+            cursor.execute("""
+                SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid)
+                FROM pg_constraint c
+                WHERE c.contype = 'f' AND c.conrelid::regclass::text = ANY(%s)
+            """, [tables])
+            constraints = cursor.fetchall()
+            for table, name, _ in constraints:
+                cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+            # Indexes backing primary keys and unique constraints stay
+            cursor.execute("""
+                SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+                FROM pg_index i JOIN pg_class t ON t.oid = i.indrelid
+                WHERE t.relname = ANY(%s) AND NOT i.indisprimary
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+            """, [tables])
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {name}')
+            return {
+                'indexes': [sql for _, sql in indexes],
+                'constraints': [
+                    f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'
+                    for table, name, definition in constraints
+                ],
+            }
+    return None
+
+
+def run_ddl(statement):
+    """One CREATE INDEX / ADD CONSTRAINT statement, in a worker or here"""
+    with connections[TARGET_ALIAS].cursor() as cursor:
+        cursor.execute(statement)
+    return statement
+
+
+# ==================== DATA ====================
+
+def init_worker(config):
+    use_database(TARGET_ALIAS, config)
+    connection = connections[TARGET_ALIAS]
+    if connection.vendor == 'sqlite':
+        connection.disable_constraint_checking()
+        with connection.cursor() as cursor:
+            # A failed restore is redone from the backup, not recovered
+            cursor.execute('PRAGMA synchronous = OFF')
+
+
+def load_chunk(task):
+    """Worker: stream one JSONL chunk into its table; returns the row count"""
+    label, fields, path = task
+    model = apps.get_model(label)
+    connection = connections[TARGET_ALIAS]
+    quote = connection.ops.quote_name
+    local = {field.attname: field for field in model._meta.local_concrete_fields}
+    columns = [(index, local[name]) for index, name in enumerate(fields) if name in local]
+    # One prepared INSERT run with executemany: the ORM's bulk insert
+    # compiles SQL per batch of a few hundred rows, which costs more than
+    # the insert itself. Values go through the same to_python and
+    # get_db_prep_save as a raw save, so auto_now fields keep their
+    # backed-up values.
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for _, field in columns),
+        ', '.join(['%s'] * len(columns)))
+
+    rows = 0
+    batch = []
+    with transaction.atomic(using=TARGET_ALIAS), open_compressed(path, 'r') as handle:
+        with connection.cursor() as cursor:
+            for line in handle:
+                values = json.loads(line)
+                batch.append([
+                    field.get_db_prep_save(field.to_python(values[index]), connection)
+                    for index, field in columns
+                ])
+                if len(batch) >= INSERT_BATCH:
+                    cursor.executemany(sql, batch)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                rows += len(batch)
+    return rows
+
+
+def dependency_levels(manifest):
+    """Model labels grouped so each group only references earlier groups"""
+    level = {}
+    for entry in manifest['models']:
+        model = apps.get_model(entry['label'])
+        references = [
+            field.related_model._meta.label_lower for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not None
+        ]
+        level[entry['label']] = 1 + max(
+            (level[label] for label in references if label in level), default=-1)
+    groups = {}
+    for entry in manifest['models']:
+        groups.setdefault(level[entry['label']], []).append(entry)
+    return [groups[key] for key in sorted(groups)]
+
+
+def restore_data(backup_dir, manifest, config, jobs):
+    """Load every model of the backup into the ``restore_target`` database"""
+    connection = connections[TARGET_ALIAS]
+    entries = [entry for entry in manifest['models'] if entry_model(entry) is not None]
+    tables = [entry['table'] for entry in entries]
+    missing = [entry['label'] for entry in manifest['models'] if entry_model(entry) is None]
+    if missing:
+        print(f"⚠ Skipping {len(missing)} model(s) this code base no longer has: {', '.join(missing)}")
+
+    print("Emptying target tables...")
+    constraints_were_on = connection.disable_constraint_checking()
+    try:
+        with transaction.atomic(using=TARGET_ALIAS):
+            for statement in connection.ops.sql_flush(
+                    no_style(), tables, reset_sequences=True, allow_cascade=False):
+                with connection.cursor() as cursor:
+                    cursor.execute(statement)
+            deferred = defer_indexes(TARGET_ALIAS, tables)
+    finally:
+        if constraints_were_on:
+            connection.enable_constraint_checking()
+    connection.close()
+    if deferred:
+        # Kept next to the backup so a failed restore can still recreate them
+        with open(backup_dir / f'deferred_ddl_{os.getpid()}.json', 'w') as handle:
+            json.dump(deferred, handle, indent=1)
+        print(f"✓ Deferred {len(deferred['indexes'])} index(es) and "
+              f"{len(deferred['constraints'])} foreign key(s)")
+
+    print("Loading data...")
+    started = time.monotonic()
+    loaded = {}
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn'),
+                             initializer=init_worker, initargs=(config,)) as pool:
+        # Without deferred constraints a level waits for the ones it references
+        levels = dependency_levels({'models': entries}) if not deferred else [entries]
+        for group in levels:
+            futures = {}
+            for entry in group:
+                for chunk in entry['chunks']:
+                    task = (entry['label'], entry['fields'], str(backup_dir / chunk['file']))
+                    futures[pool.submit(load_chunk, task)] = entry['label']
+            wait(futures)
+            for future, label in futures.items():
+                loaded[label] = loaded.get(label, 0) + future.result()
+        total = sum(loaded.values())
+        print(f"✓ Loaded {total:,} rows ({time.monotonic() - started:.1f}s)")
+
+        if deferred:
+            started = time.monotonic()
+            list(pool.map(run_ddl, deferred['indexes']))
+            # Foreign keys last: adding one checks it against the loaded rows
+            for statement in deferred['constraints']:
+                run_ddl(statement)
+            print(f"✓ Recreated indexes and constraints ({time.monotonic() - started:.1f}s)")
+
+    if connection.vendor == 'sqlite':
+        # Foreign keys were not checked while loading
+        connection.check_constraints(table_names=tables)
+    with connection.cursor() as cursor:
+        for statement in connection.ops.sequence_reset_sql(no_style(), [entry_model(e) for e in entries]):
+            cursor.execute(statement)
+    if deferred:
+        for path in backup_dir.glob(f'deferred_ddl_{os.getpid()}.json'):
+            path.unlink()
+    return loaded
+
+
+def entry_model(entry):
+    try:
+        return apps.get_model(entry['label'])
+    except LookupError:
+        return None
+
+
+def verify_counts(manifest, alias):
+    """Tables whose row count differs from the manifest's"""
+    problems = []
+    for entry in manifest['models']:
+        model = entry_model(entry)
+        if model is None:
+            continue
+        count = model._base_manager.using(alias).count()
+        if count != entry['rows']:
+            problems.append(f"{entry['label']}: {count} rows, manifest says {entry['rows']}")
+    return problems
+
+
+# ==================== MEDIA ====================
+
+def media_roots():
+    roots = {}
+    if getattr(settings, 'MEDIA_ROOT', None):
+        roots['media'] = Path(settings.MEDIA_ROOT)
+    if getattr(settings, 'PRIVATE_STORAGE_ROOT', None):
+        roots['private'] = Path(settings.PRIVATE_STORAGE_ROOT) / 'blobs'
+    return roots
+
+
+def restore_blob(entry, target, store):
+    """Stream-decompress one media file into place unless it is already there"""
+    if target.exists() and target.stat().st_size == entry['size'] and sha256_file(target) == entry['sha256']:
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f'.{target.name}.restoring')
+    with gzip.open(blob_path(store, entry['sha256']), 'rb') as reader, open(temporary, 'wb') as writer:
+        shutil.copyfileobj(reader, writer, 1024 * 1024)
+    temporary.replace(target)
+    # Matching mtimes let the next incremental backup skip re-hashing it
+    os.utime(target, ns=(entry['mtime_ns'], entry['mtime_ns']))
+    return True
+
+
+def restore_media_store(manifest, jobs):
+    media = manifest.get('media')
+    if not media:
+        print("No media in this backup, skipping...")
+        return True
+    roots = media_roots()
+    store = BACKUP_ROOT / MEDIA_STORE
+    entries = [entry for entry in media['files'] if entry['root'] in roots]
+    print(f"Restoring {len(entries)} media files...")
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        written = sum(pool.map(
+            lambda entry: restore_blob(entry, roots[entry['root']] / entry['path'], store), entries))
+    print(f"✓ Media restored: {written} written, {len(entries) - written} already up to date")
+    return True
+
+
+# ==================== DIFF ====================
+
+def row_digests(model, fields, alias):
+    """``(pk, digest)`` for every row of ``model`` in ``alias``, ordered by pk"""
+    queryset = model._base_manager.using(alias).order_by('pk').values_list('pk', *fields)
+    for row in queryset.iterator(chunk_size=5000):
+        yield row[0], hashlib.md5(repr(row[1:]).encode()).digest()
+
+
+def diff_model(model, fields, backup_alias, live_alias):
+    """``(added, removed, changed)`` row counts going from live to backup"""
+    added = removed = changed = 0
+    backup_rows = row_digests(model, fields, backup_alias)
+    live_rows = row_digests(model, fields, live_alias)
+    backup_row = next(backup_rows, None)
+    live_row = next(live_rows, None)
+    while backup_row is not None or live_row is not None:
+        if live_row is None or (backup_row is not None and backup_row[0] < live_row[0]):
+            added += 1
+            backup_row = next(backup_rows, None)
+        elif backup_row is None or live_row[0] < backup_row[0]:
+            removed += 1
+            live_row = next(live_rows, None)
+        else:
+            changed += backup_row[1] != live_row[1]
+            backup_row = next(backup_rows, None)
+            live_row = next(live_rows, None)
+    return added, removed, changed
+
+
+def diff_against_live(manifest):
+    print("\nDifferences the restore would make to the live database:")
+    print(f"  {'model':<45} {'backup':>9} {'live':>9} {'added':>8} {'removed':>8} {'changed':>8}")
+    differences = 0
+    for entry in manifest['models']:
+        model = entry_model(entry)
+        if model is None:
+            continue
+        fields = [field.attname for field in model._meta.local_concrete_fields
+                  if field.attname in entry['fields'] and not field.primary_key]
+        added, removed, changed = diff_model(model, fields, TARGET_ALIAS, 'default')
+        if added or removed or changed:
+            differences += 1
+            live = model._base_manager.using('default').count()
+            print(f"  {entry['label']:<45} {entry['rows']:>9} {live:>9} {added:>8} {removed:>8} {changed:>8}")
+    if not differences:
+        print("  (none)")
+
+    media = manifest.get('media')
+    if media:
+        roots = media_roots()
+        missing = changed = 0
+        for entry in media['files']:
+            if entry['root'] not in roots:
+                continue
+            path = roots[entry['root']] / entry['path']
+            if not path.exists():
+                missing += 1
+            elif path.stat().st_size != entry['size'] or sha256_file(path) != entry['sha256']:
+                changed += 1
+        print(f"  media: {missing} file(s) would be restored, {changed} overwritten")
+
+
+# ==================== RESTORE ====================
+
+def restore_backup(backup_dir, options):
+    """Restore (or with ``dry_run``, rehearse) a backup directory"""
+    manifest = read_manifest(backup_dir)
+    print(f"Backup taken at {manifest['created_at']} "
+          f"({sum(entry['rows'] for entry in manifest['models']):,} rows)")
+
+    if not options.no_verify:
+        print("Verifying checksums...")
+        problems = verify_backup(backup_dir, store=BACKUP_ROOT / MEDIA_STORE,
+                                 check_rows=False)
+        if problems:
+            for problem in problems:
+                print(f"  ✗ {problem}")
+            print("✗ The backup does not match its manifest; not restoring")
+            return False
+        print("✓ Checksums match")
+
+    if options.method == 'database':
+        return restore_database_copy(backup_dir, manifest, options)
+
+    scratch = None
+    if options.dry_run:
+        default = settings.DATABASES['default']
+        if 'sqlite' in default['ENGINE']:
+            scratch = options.scratch or str(BACKUP_ROOT / f'{backup_dir.name}{SCRATCH_SUFFIX}.sqlite3')
+        else:
+            scratch = options.scratch or f"{default['NAME']}{SCRATCH_SUFFIX}"
+        create_scratch_database(scratch)
+    config = target_config(scratch)
+    use_database(TARGET_ALIAS, config)
+    check_migrations(manifest, TARGET_ALIAS)
+
+    try:
+        restore_data(backup_dir, manifest, config, options.jobs)
+        problems = verify_counts(manifest, TARGET_ALIAS)
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        if problems:
+            print("✗ Row counts do not match the manifest")
+            return False
+        print("✓ Row counts match the manifest")
+
+        if options.dry_run:
+            diff_against_live(manifest)
+        elif not options.skip_media:
+            restore_media_store(manifest, options.jobs)
+    finally:
+        if scratch and not options.keep_scratch:
+            drop_scratch_database(scratch)
+        elif scratch:
+            print(f"Scratch database kept: {scratch}")
+    return True
+
+
+def restore_database_copy(backup_dir, manifest, options):
+    """Restore the database copy rather than the per-model data"""
+    vendor = manifest['database']['vendor']
+    if vendor == 'sqlite':
+        db_path = settings.DATABASES['default']['NAME']
+        connections['default'].close()
+        source = sqlite3.connect(str(backup_dir / 'db.sqlite3'))
+        destination = sqlite3.connect(str(db_path), timeout=600)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+        print("✓ Database restored from the SQLite copy")
+        ok = True
+    else:
+        ok = restore_postgresql(backup_dir / 'db.pgdump', jobs=options.jobs)
+    if ok and not options.skip_media:
+        restore_media_store(manifest, options.jobs)
+    return ok
+
+
 def restore_sqlite(backup_file):
     """Restore SQLite database"""
     print(f"Restoring SQLite from: {backup_file}")
-    
+
     db_path = settings.DATABASES['default']['NAME']
-    
+
     # Create backup of current database
     if os.path.exists(db_path):
         current_backup = Path(db_path).parent / f'{Path(db_path).stem}_before_restore.sqlite3'
         shutil.copy2(db_path, current_backup)
         print(f"✓ Current database backed up to: {current_backup}")
-    
+
     try:
         if backup_file.suffix == '.sqlite3':
             # Direct SQLite file restore
@@ -65,26 +556,26 @@ def restore_sqlite(backup_file):
         else:
             print(f"✗ Unsupported backup file format: {backup_file.suffix}")
             return False
-        
+
         return True
     except Exception as e:
         print(f"✗ Restore failed: {e}")
         return False
 
 
-def restore_postgresql(backup_file):
+def restore_postgresql(backup_file, jobs=1):
     """Restore PostgreSQL database"""
     print(f"Restoring PostgreSQL from: {backup_file}")
-    
+
     db_config = settings.DATABASES['default']
-    
+
     # Set environment variables for pg_restore
     env = os.environ.copy()
     env['PGPASSWORD'] = db_config['PASSWORD']
-    
+
     try:
-        if backup_file.suffix == '.sql':
-            # PostgreSQL custom format restore
+        if backup_file.suffix in ('.sql', '.pgdump'):
+            # PostgreSQL custom (.sql) or directory (.pgdump) format restore
             print("Dropping existing database objects...")
             cmd_drop = [
                 'psql',
@@ -95,7 +586,7 @@ def restore_postgresql(backup_file):
                 '-c', 'DROP SCHEMA public CASCADE; CREATE SCHEMA public;'
             ]
             subprocess.run(cmd_drop, check=True, env=env, capture_output=True)
-            
+
             print("Restoring database...")
             cmd_restore = [
                 'pg_restore',
@@ -103,12 +594,14 @@ def restore_postgresql(backup_file):
                 '-p', str(db_config['PORT']),
                 '-U', db_config['USER'],
                 '-d', db_config['NAME'],
-                '-F', 'c',  # Custom format
+                '-F', 'd' if backup_file.suffix == '.pgdump' else 'c',
+                # Parallel restore; indexes and constraints are built after the data
+                '-j', str(jobs),
                 str(backup_file)
             ]
             subprocess.run(cmd_restore, check=True, env=env, capture_output=True)
             print(f"✓ Database restored from PostgreSQL backup")
-            
+
         elif backup_file.suffix == '.json':
             # JSON data restore
             print("Flushing current database...")
@@ -120,7 +613,7 @@ def restore_postgresql(backup_file):
         else:
             print(f"✗ Unsupported backup file format: {backup_file.suffix}")
             return False
-        
+
         return True
     except subprocess.CalledProcessError as e:
         print(f"✗ Restore failed: {e}")
@@ -134,19 +627,19 @@ def restore_postgresql(backup_file):
 def restore_media_files(backup_file):
     """Restore media files from tar.gz archive"""
     print(f"Restoring media files from: {backup_file}")
-    
+
     media_root = settings.MEDIA_ROOT if hasattr(settings, 'MEDIA_ROOT') else None
     if not media_root:
         print("No media directory configured, skipping...")
         return True
-    
+
     try:
         # Create backup of current media
         if os.path.exists(media_root):
             current_backup = f"{media_root}_before_restore"
             shutil.copytree(media_root, current_backup)
             print(f"✓ Current media backed up to: {current_backup}")
-        
+
         # Extract archive
         shutil.unpack_archive(backup_file, media_root)
         print(f"✓ Media files restored")
@@ -156,63 +649,121 @@ def restore_media_files(backup_file):
         return False
 
 
-def main():
-    """Main restore function"""
-    print("=" * 60)
-    print("EduManage Database Restore Utility")
-    print("=" * 60)
-    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Database Engine: {settings.DATABASES['default']['ENGINE']}")
-    print("=" * 60)
-    print()
-    
-    # List available backups
+def select_backup():
+    """Interactive choice among the available backups; ``None`` to cancel"""
     backups = list_available_backups()
-    
+
     if not backups:
         print("✗ No backup files found.")
-        return 1
-    
+        return None
+
     print("Available backups:")
     for i, backup in enumerate(backups, 1):
         mod_time = datetime.fromtimestamp(backup.stat().st_mtime)
-        size = backup.stat().st_size / (1024 * 1024)  # MB
+        if backup.is_dir():
+            size = sum(path.stat().st_size for path in backup.rglob('*') if path.is_file())
+        else:
+            size = backup.stat().st_size
         print(f"  {i}. {backup.name}")
         print(f"     Date: {mod_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"     Size: {size:.2f} MB")
+        print(f"     Size: {size / (1024 * 1024):.2f} MB")
         print()
-    
+
     # Get user selection
     try:
         selection = input("Enter backup number to restore (or 'q' to quit): ")
         if selection.lower() == 'q':
             print("Restore cancelled.")
-            return 0
-        
+            return None
+
         backup_index = int(selection) - 1
         if backup_index < 0 or backup_index >= len(backups):
             print("✗ Invalid selection.")
-            return 1
-        
-        selected_backup = backups[backup_index]
-    except (ValueError, KeyboardInterrupt):
+            return None
+
+        return backups[backup_index]
+    except (ValueError, KeyboardInterrupt, EOFError):
         print("\n✗ Restore cancelled.")
+        return None
+
+
+def main(argv=None):
+    """Main restore function"""
+    parser = argparse.ArgumentParser(description='Restore the EduManage database and media')
+    parser.add_argument('backup', nargs='?', help='Backup directory or legacy backup file')
+    parser.add_argument('--jobs', type=int, default=min(os.cpu_count() or 2, 8))
+    parser.add_argument('--method', choices=('data', 'database'), default='data',
+                        help="'data': per-model chunks (default); 'database': the database copy")
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Restore into a scratch database and report the differences')
+    parser.add_argument('--scratch', help='Scratch database name (SQLite: file path)')
+    parser.add_argument('--keep-scratch', action='store_true')
+    parser.add_argument('--skip-media', action='store_true')
+    parser.add_argument('--no-verify', action='store_true',
+                        help='Skip the checksum check before loading')
+    parser.add_argument('--latest', action='store_true',
+                        help='Restore the newest backup instead of asking which one')
+    parser.add_argument('--yes', action='store_true', help="Don't ask for confirmation")
+    options = parser.parse_args(argv)
+    if options.backup and options.latest:
+        parser.error('give a backup path or --latest, not both')
+    # Nothing may prompt under --yes, and picking a backup is a prompt
+    if options.yes and not options.backup and not options.latest:
+        parser.error('--yes needs a backup path or --latest')
+
+    print("=" * 60)
+    print("EduManage Database Restore Utility")
+    print("=" * 60)
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Database Engine: {settings.DATABASES['default']['ENGINE']}")
+    print("=" * 60)
+    print()
+
+    if options.backup:
+        selected_backup = Path(options.backup)
+    elif options.latest:
+        backups = list_available_backups()
+        selected_backup = backups[0] if backups else None
+        if selected_backup is None:
+            print("✗ No backup files found.")
+        else:
+            print(f"Newest backup: {selected_backup.name}")
+    else:
+        selected_backup = select_backup()
+    if selected_backup is None:
         return 1
-    
+    if not selected_backup.exists():
+        print(f"✗ Backup not found: {selected_backup}")
+        return 1
+
     # Confirm restoration
-    confirm = input(f"\n⚠ This will REPLACE your current database with: {selected_backup.name}\n"
-                   f"   Are you sure? Type 'yes' to continue: ")
-    
-    if confirm.lower() != 'yes':
-        print("Restore cancelled.")
-        return 0
-    
+    if not options.dry_run and not options.yes:
+        confirm = input(f"\n⚠ This will REPLACE your current database with: {selected_backup.name}\n"
+                       f"   Are you sure? Type 'yes' to continue: ")
+
+        if confirm.lower() != 'yes':
+            print("Restore cancelled.")
+            return 0
+
     print("\nStarting restoration...")
     print("=" * 60)
-    
+
+    if selected_backup.is_dir():
+        try:
+            success = restore_backup(selected_backup, options)
+        except Exception as e:
+            print(f"✗ Restore failed: {e}")
+            success = False
+        if not success:
+            return 1
+        print("\n" + "=" * 60)
+        print("✓ Dry run completed" if options.dry_run else "✓ Restore completed successfully!")
+        print("=" * 60)
+        return 0
+
     # Determine database type
     engine = settings.DATABASES['default']['ENGINE']
-    
+
     if 'sqlite' in engine:
         success = restore_sqlite(selected_backup)
     elif 'postgresql' in engine:
@@ -220,15 +771,15 @@ def main():
     else:
         print(f"✗ Unsupported database engine: {engine}")
         return 1
-    
+
     if not success:
         return 1
-    
+
     # Look for corresponding media backup
     media_backup = selected_backup.parent / f"media_backup_{selected_backup.stem.split('_')[-1]}.tar.gz"
     if media_backup.exists():
         restore_media_files(media_backup)
-    
+
     print("\n" + "=" * 60)
     print("✓ Restore completed successfully!")
     print("=" * 60)
@@ -108,16 +108,15 @@ class NotificationsView(APIView):
         time_of_day = 'morning' if hour < 12 else 'afternoon' if hour < 17 else 'evening'
 
         # Get student's class and course count
-        student_class = Class.objects.filter(name=student.class_name).first()
         course_count = 0
-        if student_class:
+        if student.school_class_id:
             course_count = ClassSubject.objects.filter(
-                class_assigned=student_class, is_active=True).count()
+                class_assigned_id=student.school_class_id, is_active=True).count()
 
         # Count pending assignments from HomeworkSubmission model
         from admin_api.models import Assignment
         pending_assignments = Assignment.objects.filter(
-            class_assigned=student_class,
+            class_assigned_id=student.school_class_id,
             due_date__gte=timezone.now(),
             is_active=True
         ).exclude(
@@ -1,7 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from admin_api.models import Student, Class, Grade, Attendance
+from admin_api.models import Student, Grade, Attendance
 
 
 class DashboardView(APIView):
@@ -17,13 +17,11 @@ class DashboardView(APIView):
                 request.user.first_name} {
                 request.user.last_name}"
 
-            # Find student's class and count enrolled courses
-            student_class = Class.objects.filter(
-                name=student.class_name).first()
+            # Count enrolled courses through the student's class link
             enrolled_courses = 0
-            if student_class:
+            if student.school_class_id:
                 enrolled_courses = ClassSubject.objects.filter(
-                    class_assigned=student_class,
+                    class_assigned_id=student.school_class_id,
                     is_active=True
                 ).count()
 
@@ -113,11 +111,11 @@ class CoursesView(APIView):
         try:
             from admin_api.models import ClassSubject, TeacherAssignment
 
-            student = Student.objects.get(user=request.user)
+            student = Student.objects.select_related(
+                'school_class').get(user=request.user)
 
             # Find the student's class
-            student_class = Class.objects.filter(
-                name=student.class_name).first()
+            student_class = student.school_class
 
             if not student_class:
                 return Response([])
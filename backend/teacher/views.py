@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from admin_api.models import Teacher, Student, Subject, Grade, Attendance, TeacherAssignment
+from admin_api.student_classes import grade_counts, student_counts
 from datetime import datetime, date
 
 
@@ -19,12 +20,11 @@ class DashboardView(APIView):
                 teacher=teacher, is_active=True).select_related('class_assigned')
             teacher_classes = [
                 assignment.class_assigned for assignment in teacher_assignments]
-            total_students = Student.objects.filter(
-                class_name__in=[cls.name for cls in teacher_classes]).count()
-            all_students = Student.objects.filter(
-                class_name__in=[cls.name for cls in teacher_classes])
-            pending_grades = Grade.objects.filter(
-                student__in=all_students).count()
+            class_names = {cls.name for cls in teacher_classes}
+            students_by_class = student_counts(class_names)
+            grades_by_class = grade_counts(class_names)
+            total_students = sum(students_by_class.values())
+            pending_grades = sum(grades_by_class.values())
 
             # Return structured teacher dashboard data
             data = {
@@ -49,16 +49,14 @@ class DashboardView(APIView):
                         'class': cls.name,
                         'time': f"{cls.schedule}" if cls.schedule else "TBD",
                         'room': cls.room,
-                        'students': Student.objects.filter(class_name=cls.name).count()
+                        'students': students_by_class.get(cls.name, 0)
                     } for cls in teacher_classes[:3]
                 ],
                 'pending_tasks': [
                     {
                         'task': 'Grade Assignments',
                         'class': cls.name,
-                        'count': f"{
-                            Grade.objects.filter(
-                                student__class_name=cls.name).count()} assignments",
+                        'count': f"{grades_by_class.get(cls.name, 0)} assignments",
                         'priority': 'high'}
                     for cls in teacher_classes[:3]
                 ],
@@ -85,11 +83,13 @@ class ClassesView(APIView):
                 is_active=True
             ).select_related('class_assigned', 'subject')
 
+            assignments = list(assignments)
+            students_by_class = student_counts(
+                {assignment.class_assigned.name for assignment in assignments})
             classes_data = []
             for assignment in assignments:
                 cls = assignment.class_assigned
-                student_count = Student.objects.filter(
-                    class_name=cls.name).count()
+                student_count = students_by_class.get(cls.name, 0)
                 classes_data.append({
                     'id': cls.id,
                     'subject': assignment.subject.title,  # Subject from assignment
@@ -543,10 +543,11 @@ class AttendanceView(APIView):
                     teacher=teacher, is_active=True).select_related('class_assigned')
                 teacher_classes = [
                     assignment.class_assigned for assignment in teacher_assignments]
+                students_by_class = student_counts({cls.name for cls in teacher_classes})
                 return Response([{
                     'id': cls.id,
                     'name': cls.name,
-                    'student_count': Student.objects.filter(class_name=cls.name).count()
+                    'student_count': students_by_class.get(cls.name, 0)
                 } for cls in teacher_classes])
 
         except Teacher.DoesNotExist:
@@ -0,0 +1,157 @@
+"""
+JWT authentication without a user SELECT on every request
+
+``CachedJWTAuthentication`` validates the access token exactly like
+simplejwt's ``JWTAuthentication`` (same token classes, so blacklisted or
+expired tokens are refused the same way) but resolves the user from a
+short-lived cache entry holding the fields permission checks read: id,
+names, e-mail, role and the active/staff/superuser flags. ``request.user``
+is a ``CachedUser`` that answers those from the entry and loads the real
+row only when something else is asked of it (a related profile, a save,
+use as a foreign key value).
+
+Signed role claims in the token were considered instead, but a token
+stays valid for its whole lifetime, so a deactivated or demoted user would
+keep access until it expired. The cache entry is dropped whenever the
+``User`` row is saved or deleted (which covers deactivation, role changes,
+password changes and lockouts) and otherwise lives
+``AUTH_USER_CACHE_SECONDS``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+CACHE_KEY = 'auth_user:{}'
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'role',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+def cache_seconds():
+    return getattr(settings, 'AUTH_USER_CACHE_SECONDS', 60)
+
+
+def snapshot(user):
+    """The cached part of ``user``"""
+    data = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+    data['pk'] = user.pk
+    data['password_hash'] = get_md5_hash_password(user.password)
+    return data
+
+
+def invalidate_user(user_id):
+    """
+    Drop the cached entry of ``user_id`` now and again once the current
+    transaction commits, so a concurrent request cannot re-cache the row
+    as it was before the change
+    """
+    key = CACHE_KEY.format(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedUser(SimpleLazyObject):
+    """
+    ``request.user`` backed by a cache snapshot; reading any attribute not
+    in the snapshot loads the ``User`` row once
+    """
+
+    def __init__(self, model, data, loader):
+        self.__dict__['_model'] = model
+        self.__dict__['_snapshot'] = data
+        super().__init__(loader)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            if name in self._snapshot:
+                return self._snapshot[name]
+            if name == '_meta':
+                return self._model._meta
+            if not name.startswith('_') and not hasattr(self._model, name):
+                # Duck-typing probes such as hasattr(user, 'resolve_expression')
+                raise AttributeError(name)
+        return super().__getattr__(name)
+
+    # Passing isinstance(user, User) without a load lets querysets filter
+    # on request.user (they only read its _meta and pk)
+    @property
+    def __class__(self):
+        if self._wrapped is empty:
+            return self._model
+        return self._wrapped.__class__
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def _is_pk_set(self):
+        # Checked by Django before using a model instance as a lookup value
+        return True
+
+    def get_full_name(self):
+        if self._wrapped is not empty:
+            return self._wrapped.get_full_name()
+        return f"{self._snapshot['first_name']} {self._snapshot['last_name']}".strip()
+
+    def get_username(self):
+        return self._snapshot['email'] if self._wrapped is empty else self._wrapped.get_username()
+
+    def __bool__(self):
+        return True
+
+    def __hash__(self):
+        return hash(self._snapshot['pk'])
+
+    def __repr__(self):
+        if self._wrapped is empty:
+            return f"<CachedUser: {self._snapshot['email']} ({self._snapshot['role']})>"
+        return super().__repr__()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` resolving the user through ``CachedUser``"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        key = CACHE_KEY.format(user_id)
+        data = cache.get(key)
+        user = None
+        if data is None:
+            user = self.load_user(user_id)
+            data = snapshot(user)
+            cache.set(key, data, cache_seconds())
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not data['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != data['password_hash']:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed')
+
+        if user is not None:
+            # Just read from the database; no point deferring it
+            return user
+        return CachedUser(self.user_model, data, lambda: self.load_user(user_id))
+
+    def load_user(self, user_id):
+        try:
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+
@@ -0,0 +1,15 @@
+"""
+Signal handlers for the users app
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import invalidate_user
+from users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    """Saves cover deactivation, role and password changes and lockouts"""
+    invalidate_user(instance.pk)